@@ -12,9 +12,13 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from pathlib import Path
+from services.service_registry import service_registry
+from services.session_catalog import session_catalog
 
 logger = logging.getLogger(__name__)
 
+CATALOG_KIND = 'analyses'
+
 class LocalDatabaseManager:
     """Manager de banco de dados local usando apenas arquivos JSON"""
     
@@ -61,6 +65,7 @@ class LocalDatabaseManager:
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
             
+            session_catalog.upsert(CATALOG_KIND, analysis_id, *self._catalog_entry(analysis_id, data, file_path))
             logger.info(f"✅ Análise salva: {analysis_id}")
             return True
             
@@ -114,21 +119,71 @@ class LocalDatabaseManager:
             logger.error(f"Erro ao carregar progresso {session_id}: {e}")
             return None
     
-    def list_analyses(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """Lista análises"""
+    @staticmethod
+    def _catalog_entry(analysis_id: str, data: Dict[str, Any], file_path: Path) -> tuple:
+        """(resumo, tamanho, colunas indexadas) de uma análise para o catálogo"""
+        metadata = data.get('metadata', {})
+        summary = {
+            'id': analysis_id,
+            'metadata': metadata,
+            'summary': data.get('summary', 'Sem resumo')
+        }
+        fields = {
+            'name': data.get('produto') or data.get('nicho'),
+            'segmento': data.get('segmento'),
+            'created_at': metadata.get('created_at'),
+            'updated_at': metadata.get('updated_at')
+        }
+        return summary, file_path.stat().st_size, fields
+
+    def rebuild_catalog(self) -> int:
+        """Reconstrói o catálogo de análises a partir dos arquivos em disco"""
+        analyses_dir = self.base_path / 'analyses'
+        entries = []
+        for file_path in analyses_dir.glob('*.json'):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                entries.append((file_path.stem, *self._catalog_entry(file_path.stem, data, file_path)))
+            except Exception as e:
+                logger.warning(f"Erro ao ler {file_path}: {e}")
+        return session_catalog.rebuild(CATALOG_KIND, str(analyses_dir), entries)
+
+    def list_analyses(self, limit: int = 50, offset: int = 0, segmento: str = None,
+                      search: str = None) -> List[Dict[str, Any]]:
+        """Lista análises (mais recentes primeiro) pelo catálogo indexado"""
+        if session_catalog.enabled:
+            try:
+                if not session_catalog.is_current(CATALOG_KIND, str(self.base_path / 'analyses')):
+                    self.rebuild_catalog()
+                analyses, _ = session_catalog.query(
+                    CATALOG_KIND, segmento=segmento, search=search,
+                    limit=limit, offset=offset, order_by='created_at'
+                )
+                return analyses
+            except Exception as e:
+                logger.warning(f"Catálogo indisponível, varrendo análises: {e}")
+
+        return self._scan_analyses(limit, offset, segmento, search)
+
+    def _scan_analyses(self, limit: int = 50, offset: int = 0, segmento: str = None,
+                       search: str = None) -> List[Dict[str, Any]]:
+        """Listagem lendo cada arquivo (catálogo desativado ou indisponível)"""
         try:
             analyses_dir = self.base_path / 'analyses'
             analyses = []
+            needle = (search or '').lower()
             
             for file_path in analyses_dir.glob('*.json'):
                 try:
                     with open(file_path, 'r', encoding='utf-8') as f:
                         data = json.load(f)
-                        analyses.append({
-                            'id': file_path.stem,
-                            'metadata': data.get('metadata', {}),
-                            'summary': data.get('summary', 'Sem resumo')
-                        })
+                    summary, _, fields = self._catalog_entry(file_path.stem, data, file_path)
+                    if segmento and fields['segmento'] != segmento:
+                        continue
+                    if needle and needle not in f"{fields['name'] or ''} {fields['segmento'] or ''}".lower():
+                        continue
+                    analyses.append(summary)
                 except Exception as e:
                     logger.warning(f"Erro ao ler {file_path}: {e}")
                     continue
@@ -139,7 +194,7 @@ class LocalDatabaseManager:
                 reverse=True
             )
             
-            return analyses[:limit]
+            return analyses[offset:offset + limit]
             
         except Exception as e:
             logger.error(f"Erro ao listar análises: {e}")
@@ -152,6 +207,7 @@ class LocalDatabaseManager:
             
             if file_path.exists():
                 file_path.unlink()
+                session_catalog.remove(CATALOG_KIND, analysis_id)
                 logger.info(f"✅ Análise deletada: {analysis_id}")
                 return True
             
@@ -162,4 +218,4 @@ class LocalDatabaseManager:
             return False
 
 # Instância global
-db_manager = LocalDatabaseManager()
+db_manager = service_registry.register('db_manager', LocalDatabaseManager)
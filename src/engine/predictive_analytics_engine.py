@@ -76,7 +76,8 @@ try:
     HAS_NETWORKX = True
 except ImportError:
     HAS_NETWORKX = False
-from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.auto_save_manager import auto_save_manager, salvar_etapa, salvar_erro
+from services.service_registry import service_registry
 logger = logging.getLogger(__name__)
 
 class PredictiveAnalyticsEngine:
@@ -428,6 +429,39 @@ class PredictiveAnalyticsEngine:
         logger.info(f"✅ Queries refinadas: {refined_queries}")
         return refined_queries
 
+    def _load_massive_data(self, session_dir: Path) -> Optional[Dict[str, Any]]:
+        """
+        Carrega os dados massivos da sessão.
+
+        Usa massive_data_collected.json quando existe; senão lê os trechos da
+        pesquisa web direto do log consolidado (sempre atualizado, ao contrário
+        do snapshot consolidado.json gerado só na compactação).
+        """
+        massive_data_file = session_dir / "massive_data_collected.json"
+        if massive_data_file.exists():
+            with open(massive_data_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        extracted_content = [
+            {
+                **trecho,
+                "url": trecho.get("url"),
+                "title": trecho.get("titulo", ""),
+                "content": trecho.get("conteudo", ""),
+                "timestamp": trecho.get("timestamp_extracao"),
+                "source": trecho.get("plataforma", "unknown")
+            }
+            for trecho in auto_save_manager.iterar_consolidado(session_dir.name)
+        ]
+        if not extracted_content:
+            return None
+
+        return {
+            "session_id": session_dir.name,
+            "extracted_content": extracted_content,
+            "statistics": {"total_sources": len(extracted_content)}
+        }
+
     async def _perform_ultra_textual_analysis(self, session_dir: Path) -> Dict[str, Any]:
         """Realiza análise textual ultra-profunda em todo o conteúdo coletado."""
         logger.info("📝 Realizando análise textual ultra-profunda...")
@@ -442,26 +476,11 @@ class PredictiveAnalyticsEngine:
             "content_summaries": {}
         }
 
-        # Verifica múltiplos locais para dados massivos
-        possible_files = [
-            session_dir / "massive_data_collected.json",
-            session_dir / "consolidado.json",
-            Path(f"analyses_data/pesquisa_web/{session_dir.name}/consolidado.json")
-        ]
-
-        massive_data_file = None
-        for file_path in possible_files:
-            if file_path.exists():
-                massive_data_file = file_path
-                break
-
-        if not massive_data_file:
+        massive_data = self._load_massive_data(session_dir)
+        if massive_data is None:
             logger.warning(f"⚠️ Nenhum arquivo de dados encontrado para {session_dir}")
             return textual_insights
 
-        with open(massive_data_file, "r", encoding="utf-8") as f:
-            massive_data = json.load(f)
-
         all_text_content = []
         for item in massive_data.get("extracted_content", []):
             text = str(item.get("content", "")) + str(item.get("snippet", "")) + str(item.get("title", ""))
@@ -550,26 +569,11 @@ class PredictiveAnalyticsEngine:
             "future_projections": {}
         }
 
-        # Verifica múltiplos locais para dados massivos
-        possible_files = [
-            session_dir / "massive_data_collected.json",
-            session_dir / "consolidado.json",
-            Path(f"analyses_data/pesquisa_web/{session_dir.name}/consolidado.json")
-        ]
-
-        massive_data_file = None
-        for file_path in possible_files:
-            if file_path.exists():
-                massive_data_file = file_path
-                break
-
-        if not massive_data_file:
+        massive_data = self._load_massive_data(session_dir)
+        if massive_data is None:
             logger.warning(f"⚠️ Nenhum arquivo de dados encontrado para {session_dir}")
             return temporal_trends
 
-        with open(massive_data_file, "r", encoding="utf-8") as f:
-            massive_data = json.load(f)
-
         # Coleta dados com timestamp
         dated_content = []
         for item in massive_data.get("extracted_content", []):
@@ -719,26 +723,11 @@ class PredictiveAnalyticsEngine:
             "influencer_detection": []
         }
 
-        # Verifica múltiplos locais para dados massivos
-        possible_files = [
-            session_dir / "massive_data_collected.json",
-            session_dir / "consolidado.json",
-            Path(f"analyses_data/pesquisa_web/{session_dir.name}/consolidado.json")
-        ]
-
-        massive_data_file = None
-        for file_path in possible_files:
-            if file_path.exists():
-                massive_data_file = file_path
-                break
-
-        if not massive_data_file:
+        massive_data = self._load_massive_data(session_dir)
+        if massive_data is None:
             logger.warning(f"⚠️ Nenhum arquivo de dados encontrado para {session_dir}")
             return network_analysis
 
-        with open(massive_data_file, "r", encoding="utf-8") as f:
-            massive_data = json.load(f)
-
         if not HAS_NETWORKX:
             logger.warning("⚠️ NetworkX não disponível para análise de rede.")
             return network_analysis
@@ -798,26 +787,11 @@ class PredictiveAnalyticsEngine:
             "sentiment_shifts": []
         }
 
-        # Verifica múltiplos locais para dados massivos
-        possible_files = [
-            session_dir / "massive_data_collected.json",
-            session_dir / "consolidado.json",
-            Path(f"analyses_data/pesquisa_web/{session_dir.name}/consolidado.json")
-        ]
-
-        massive_data_file = None
-        for file_path in possible_files:
-            if file_path.exists():
-                massive_data_file = file_path
-                break
-
-        if not massive_data_file:
+        massive_data = self._load_massive_data(session_dir)
+        if massive_data is None:
             logger.warning(f"⚠️ Nenhum arquivo de dados encontrado para {session_dir}")
             return sentiment_dynamics
 
-        with open(massive_data_file, "r", encoding="utf-8") as f:
-            massive_data = json.load(f)
-
         if not HAS_VADER or not self.sentiment_analyzer:
             logger.warning("⚠️ VADER Sentiment Analyzer não disponível.")
             return sentiment_dynamics
@@ -909,26 +883,11 @@ class PredictiveAnalyticsEngine:
             "declining_topics": []
         }
 
-        # Verifica múltiplos locais para dados massivos
-        possible_files = [
-            session_dir / "massive_data_collected.json",
-            session_dir / "consolidado.json",
-            Path(f"analyses_data/pesquisa_web/{session_dir.name}/consolidado.json")
-        ]
-
-        massive_data_file = None
-        for file_path in possible_files:
-            if file_path.exists():
-                massive_data_file = file_path
-                break
-
-        if not massive_data_file:
+        massive_data = self._load_massive_data(session_dir)
+        if massive_data is None:
             logger.warning(f"⚠️ Nenhum arquivo de dados encontrado para {session_dir}")
             return topic_evolution
 
-        with open(massive_data_file, "r", encoding="utf-8") as f:
-            massive_data = json.load(f)
-
         all_text_content = []
         dated_content = []
         for item in massive_data.get("extracted_content", []):
@@ -1027,26 +986,11 @@ class PredictiveAnalyticsEngine:
             "engagement_prediction": {}
         }
 
-        # Verifica múltiplos locais para dados massivos
-        possible_files = [
-            session_dir / "massive_data_collected.json",
-            session_dir / "consolidado.json",
-            Path(f"analyses_data/pesquisa_web/{session_dir.name}/consolidado.json")
-        ]
-
-        massive_data_file = None
-        for file_path in possible_files:
-            if file_path.exists():
-                massive_data_file = file_path
-                break
-
-        if not massive_data_file:
+        massive_data = self._load_massive_data(session_dir)
+        if massive_data is None:
             logger.warning(f"⚠️ Nenhum arquivo de dados encontrado para {session_dir}")
             return engagement_patterns
 
-        with open(massive_data_file, "r", encoding="utf-8") as f:
-            massive_data = json.load(f)
-
         social_data = massive_data.get("social_media_data", {}).get("all_platforms_data", {}).get("platforms", {})
         all_engagements = []
         for platform_name, platform_info in social_data.items():
@@ -1343,26 +1287,11 @@ class PredictiveAnalyticsEngine:
         """Avalia a qualidade dos dados brutos coletados (chamada interna)."""
         logger.info("🔍 Avaliando qualidade dos dados brutos...")
         
-        # Verifica múltiplos locais para dados massivos
-        possible_files = [
-            session_dir / "massive_data_collected.json",
-            session_dir / "consolidado.json",
-            Path(f"analyses_data/pesquisa_web/{session_dir.name}/consolidado.json")
-        ]
-
-        massive_data_file = None
-        for file_path in possible_files:
-            if file_path.exists():
-                massive_data_file = file_path
-                break
-        
-        if not massive_data_file:
+        massive_data = self._load_massive_data(session_dir)
+        if massive_data is None:
             logger.warning(f"⚠️ massive_data_collected.json não encontrado em {session_dir}")
             return {"success": False, "error": "Dados brutos não encontrados"}
 
-        with open(massive_data_file, "r", encoding="utf-8") as f:
-            massive_data = json.load(f)
-
         return await self.analyze_data_quality(massive_data) # Reutiliza o método existente
 
     async def _generate_strategic_recommendations(self, insights: Dict[str, Any]) -> Dict[str, Any]:
@@ -1435,4 +1364,4 @@ class PredictiveAnalyticsEngine:
         return action_priorities
 
 # Instância global
-predictive_analytics_engine = PredictiveAnalyticsEngine()
\ No newline at end of file
+predictive_analytics_engine = service_registry.register('predictive_analytics_engine', PredictiveAnalyticsEngine)
\ No newline at end of file
@@ -11,6 +11,7 @@ import uuid
 import random
 from datetime import datetime
 from flask import Blueprint, request, jsonify
+from services.http_client_registry import http_client_registry
 
 logger = logging.getLogger(__name__)
 
@@ -156,9 +157,9 @@ def execute_complete_analysis():
 
                     # ETAPA 3: Análise Preditiva Ultra-Avançada
                     progress_callback(3, "🔮 Executando análise preditiva ultra-avançada...")
-                    predictive_engine = PredictiveAnalyticsEngine()
+                    from services.predictive_analytics_service import predictive_analytics_service
                     predictive_insights = loop.run_until_complete(
-                        predictive_engine.analyze_session_data(session_id)
+                        predictive_analytics_service.analyze_session(session_id)
                     )
 
                     # ETAPA 4: Geração de módulos
@@ -169,7 +170,7 @@ def execute_complete_analysis():
                     )
 
                 finally:
-                    loop.close()
+                    http_client_registry.close_event_loop(loop)
 
                 return {
                     "success": True,
@@ -367,7 +368,7 @@ def start_collection():
                 )
             )
         finally:
-            loop.close()
+            http_client_registry.close_event_loop(loop)
 
         return jsonify({
             "success": True,
@@ -411,7 +412,7 @@ def start_analysis():
                 enhanced_synthesis_engine.analyze_and_synthesize(session_id)
             )
         finally:
-            loop.close()
+            http_client_registry.close_event_loop(loop)
 
         return jsonify({
             "success": True,
@@ -452,7 +453,7 @@ def start_generation():
                 enhanced_module_processor.generate_all_modules(session_id)
             )
         finally:
-            loop.close()
+            http_client_registry.close_event_loop(loop)
 
         # Compila relatório final
         final_report = comprehensive_report_generator_v3.compile_final_markdown_report(session_id)
@@ -528,7 +529,7 @@ def analyze_data_endpoint():
                 enhanced_synthesis_engine.analyze_and_synthesize(session_id)
             )
         finally:
-            loop.close()
+            http_client_registry.close_event_loop(loop)
 
         return jsonify({
             "success": True,
@@ -659,7 +660,7 @@ def generate_report_endpoint():
                 enhanced_module_processor.generate_all_modules(session_id)
             )
         finally:
-            loop.close()
+            http_client_registry.close_event_loop(loop)
 
         # Compila relatório final
         final_report = comprehensive_report_generator_v3.compile_final_markdown_report(session_id)
@@ -839,4 +840,3 @@ def check_analysis_status(session_id):
             'message': str(e),
             'can_continue': False
         }), 500
-from engine.predictive_analytics_engine import PredictiveAnalyticsEngine
\ No newline at end of file
@@ -8,9 +8,10 @@ Sistema de chat integrado com agente UBIE
 import logging
 import json
 import time
+from contextlib import closing
 from datetime import datetime
-from flask import Blueprint, request, jsonify, session
-from typing import Dict, Any, List, Optional
+from flask import Blueprint, request, jsonify, session, Response, stream_with_context
+from typing import Dict, Any, List, Optional, Iterator
 
 # Importações locais
 try:
@@ -71,19 +72,7 @@ class ChatAgent:
         try:
             self.last_activity = datetime.now()
             
-            # Adiciona mensagem do usuário ao histórico
-            user_message = {
-                'role': 'user',
-                'content': message,
-                'timestamp': datetime.now().isoformat(),
-                'context': context or {}
-            }
-            self.conversation_history.append(user_message)
-            
-            # Salva na memória de conversação se disponível
-            if self.conversation_memory:
-                # ConversationMemory usa save_conversation, não add_message
-                pass
+            self._append_user_message(message, context)
             
             # Processa comandos de ferramentas se detectados
             tool_result = self._process_tool_commands(message)
@@ -91,23 +80,7 @@ class ChatAgent:
             # Gera resposta usando IA (incluindo resultado das ferramentas se houver)
             response = self._generate_response(message, context, tool_result)
             
-            # Adiciona resposta do agente ao histórico
-            agent_message = {
-                'role': 'assistant',
-                'content': response['content'],
-                'timestamp': datetime.now().isoformat(),
-                'metadata': response.get('metadata', {})
-            }
-            self.conversation_history.append(agent_message)
-            
-            # Salva resposta na memória
-            if self.conversation_memory:
-                self.conversation_memory.save_conversation(
-                    self.session_id,
-                    message,
-                    response['content'],
-                    response.get('metadata', {})
-                )
+            agent_message = self._append_agent_message(message, response['content'], response.get('metadata', {}))
             
             return {
                 'success': True,
@@ -126,6 +99,98 @@ class ChatAgent:
                 'session_id': self.session_id
             }
     
+    def stream_message(self, message: str, context: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Versão em streaming de process_message.
+
+        Produz eventos {'event': 'token', 'content': ...} conforme o modelo gera
+        e um evento final 'done' (ou 'error') com o mesmo formato da resposta
+        de process_message.
+        """
+        self.last_activity = datetime.now()
+        self._append_user_message(message, context)
+        
+        tool_result = self._process_tool_commands(message)
+        if tool_result:
+            yield {'event': 'tool', 'result': tool_result}
+        
+        chunks = []
+        metadata = {'source': 'enhanced_ai_manager', 'streaming': True}
+        try:
+            if not enhanced_ai_manager:
+                raise RuntimeError("enhanced_ai_manager não disponível")
+            
+            metadata['model'] = enhanced_ai_manager.default_response_model
+            # Mesmo modelo de /chat/send; closing cancela o stream se o cliente desconectar
+            with closing(enhanced_ai_manager.iter_text_sync(
+                prompt=self._build_prompt(message, context, tool_result),
+                max_tokens=2000,
+                temperature=0.8,
+                model_override=enhanced_ai_manager.default_response_model
+            )) as stream:
+                for delta in stream:
+                    chunks.append(delta)
+                    yield {'event': 'token', 'content': delta}
+            content = "".join(chunks)
+            
+        except Exception as e:
+            logger.error(f"❌ Erro no streaming da resposta: {e}")
+            if chunks:
+                # Resposta parcial já entregue: encerra com erro, preservando o que foi gerado
+                content = "".join(chunks)
+                metadata['partial'] = True
+            else:
+                fallback = self._generate_fallback_response(message, context)
+                content = fallback['content']
+                metadata = fallback.get('metadata', {})
+                yield {'event': 'token', 'content': content}
+        
+        agent_message = self._append_agent_message(message, content, metadata)
+        yield {
+            'event': 'done',
+            'success': True,
+            'response': content,
+            'metadata': metadata,
+            'session_id': self.session_id,
+            'timestamp': agent_message['timestamp']
+        }
+    
+    def _append_user_message(self, message: str, context: Dict[str, Any] = None):
+        """Adiciona mensagem do usuário ao histórico"""
+        user_message = {
+            'role': 'user',
+            'content': message,
+            'timestamp': datetime.now().isoformat(),
+            'context': context or {}
+        }
+        self.conversation_history.append(user_message)
+        
+        # Salva na memória de conversação se disponível
+        if self.conversation_memory:
+            # ConversationMemory usa save_conversation, não add_message
+            pass
+    
+    def _append_agent_message(self, message: str, content: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Adiciona resposta do agente ao histórico e à memória"""
+        agent_message = {
+            'role': 'assistant',
+            'content': content,
+            'timestamp': datetime.now().isoformat(),
+            'metadata': metadata
+        }
+        self.conversation_history.append(agent_message)
+        
+        # Salva resposta na memória
+        if self.conversation_memory:
+            self.conversation_memory.save_conversation(
+                self.session_id,
+                message,
+                content,
+                metadata
+            )
+        
+        return agent_message
+    
     def _process_tool_commands(self, message: str) -> Dict[str, Any]:
         """Processa comandos de ferramentas na mensagem do usuário"""
         tool_result = None
@@ -193,12 +258,51 @@ class ChatAgent:
     def _generate_response(self, message: str, context: Dict[str, Any] = None, tool_result: Dict[str, Any] = None) -> Dict[str, Any]:
         """Gera resposta usando IA integrada com cliente Gemini direto"""
         try:
-            # Contexto da conversa
-            conversation_context = self._build_conversation_context()
+            prompt = self._build_prompt(message, context, tool_result)
+            
+            # Usa enhanced_ai_manager diretamente
+            if enhanced_ai_manager:
+                logger.info("🚀 Usando enhanced_ai_manager com API DIRETA do Gemini")
+                try:
+                    response = enhanced_ai_manager.generate_response(
+                        prompt=prompt,
+                        max_tokens=2000,
+                        temperature=0.8
+                    )
+                    
+                    if response and response.get('success'):
+                        logger.info("✅ Resposta gerada com sucesso pelo enhanced_ai_manager")
+                        return {
+                            'content': response['content'],
+                            'metadata': {
+                                'model': response.get('model', 'gemini-direct'),
+                                'tokens_used': response.get('tokens_used', 0),
+                                'api_key_used': response.get('api_key_used', 'gemini_1'),
+                                'source': 'enhanced_ai_manager'
+                            }
+                        }
+                    else:
+                        logger.warning(f"⚠️ enhanced_ai_manager falhou: {response}")
+                except Exception as e:
+                    logger.error(f"❌ Erro no enhanced_ai_manager: {e}")
+            else:
+                logger.warning("⚠️ enhanced_ai_manager não disponível")
             
-            # Prompt para o agente
-            system_prompt = """Você é UBIE, um assistente especializado em análise de mercado e marketing digital com CONTROLE TOTAL sobre o fluxo da aplicação.
+            # Fallback para resposta padrão
+            return self._generate_fallback_response(message, context)
             
+        except Exception as e:
+            logger.error(f"❌ Erro ao gerar resposta: {e}")
+            return self._generate_fallback_response(message, context)
+    
+    def _build_prompt(self, message: str, context: Dict[str, Any] = None, tool_result: Dict[str, Any] = None) -> str:
+        """Monta o prompt do agente com histórico, contexto e resultado de ferramentas"""
+        # Contexto da conversa
+        conversation_context = self._build_conversation_context()
+        
+        # Prompt para o agente
+        system_prompt = """Você é UBIE, um assistente especializado em análise de mercado e marketing digital com CONTROLE TOTAL sobre o fluxo da aplicação.
+        
 Suas especialidades:
 - Análise de mercado e concorrência
 - Estratégias de marketing digital  
@@ -241,52 +345,19 @@ Contexto adicional: {context}
 
 Mensagem do usuário: {message}"""
 
-            # Adiciona resultado das ferramentas se houver
-            tool_result_text = ""
-            if tool_result:
-                tool_result_text = f"RESULTADO DA FERRAMENTA EXECUTADA:\n{json.dumps(tool_result, ensure_ascii=False, indent=2)}\n"
+        # Adiciona resultado das ferramentas se houver
+        tool_result_text = ""
+        if tool_result:
+            tool_result_text = f"RESULTADO DA FERRAMENTA EXECUTADA:\n{json.dumps(tool_result, ensure_ascii=False, indent=2)}\n"
 
-            prompt = system_prompt.format(
-                conversation_context=conversation_context,
-                context=json.dumps(context or {}, ensure_ascii=False, indent=2),
-                tool_result_text=tool_result_text,
-                message=message
-            )
-            
-            # Usa enhanced_ai_manager diretamente
-            if enhanced_ai_manager:
-                logger.info("🚀 Usando enhanced_ai_manager com API DIRETA do Gemini")
-                try:
-                    response = enhanced_ai_manager.generate_response(
-                        prompt=prompt,
-                        max_tokens=2000,
-                        temperature=0.8
-                    )
-                    
-                    if response and response.get('success'):
-                        logger.info("✅ Resposta gerada com sucesso pelo enhanced_ai_manager")
-                        return {
-                            'content': response['content'],
-                            'metadata': {
-                                'model': response.get('model', 'gemini-direct'),
-                                'tokens_used': response.get('tokens_used', 0),
-                                'api_key_used': response.get('api_key_used', 'gemini_1'),
-                                'source': 'enhanced_ai_manager'
-                            }
-                        }
-                    else:
-                        logger.warning(f"⚠️ enhanced_ai_manager falhou: {response}")
-                except Exception as e:
-                    logger.error(f"❌ Erro no enhanced_ai_manager: {e}")
-            else:
-                logger.warning("⚠️ enhanced_ai_manager não disponível")
-            
-            # Fallback para resposta padrão
-            return self._generate_fallback_response(message, context)
-            
-        except Exception as e:
-            logger.error(f"❌ Erro ao gerar resposta: {e}")
-            return self._generate_fallback_response(message, context)
+        prompt = system_prompt.format(
+            conversation_context=conversation_context,
+            context=json.dumps(context or {}, ensure_ascii=False, indent=2),
+            tool_result_text=tool_result_text,
+            message=message
+        )
+        
+        return prompt
     
     def _build_conversation_context(self) -> str:
         """Constrói contexto da conversa para a IA"""
@@ -421,6 +492,43 @@ def send_message():
             'message': str(e)
         }), 500
 
+@chat_bp.route('/chat/stream', methods=['POST'])
+def stream_message():
+    """Envia mensagem e recebe a resposta em tempo real via Server-Sent Events"""
+    data = request.get_json()
+    if not data or not data.get('message', '').strip():
+        return jsonify({
+            'success': False,
+            'error': 'Mensagem obrigatória'
+        }), 400
+    
+    message = data['message'].strip()
+    session_id = data.get('session_id') or f"chat_{int(time.time())}_{hash(message) % 10000}"
+    context = data.get('context', {})
+    
+    if session_id not in chat_sessions:
+        chat_sessions[session_id] = ChatAgent(session_id)
+    agent = chat_sessions[session_id]
+    
+    def generate():
+        try:
+            for event in agent.stream_message(message, context):
+                name = event.pop('event')
+                yield f"event: {name}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+            logger.info(f"💬 Mensagem transmitida para sessão {session_id}")
+        except Exception as e:
+            logger.error(f"❌ Erro no streaming do chat: {e}")
+            yield f"event: error\ndata: {json.dumps({'success': False, 'error': str(e)}, ensure_ascii=False)}\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @chat_bp.route('/chat/history/<session_id>', methods=['GET'])
 def get_chat_history(session_id: str):
     """Obtém histórico de chat de uma sessão"""
@@ -14,7 +14,6 @@ import json
 from datetime import datetime
 from typing import Dict, Any, List
 from flask import Blueprint, request, jsonify, send_file
-import threading
 # Import dos serviços necessários
 # services.auto_save_manager será importado diretamente para evitar circular imports
 def get_services():
@@ -47,9 +46,55 @@ enhanced_workflow_bp = Blueprint('enhanced_workflow', __name__)
 
 # Instância global do AutoSaveManager para evitar circular imports e garantir consistência
 from services.auto_save_manager import AutoSaveManager
+from services.workflow_scheduler import workflow_scheduler, WorkflowQueueFullError, DEFAULT_PRIORITY
 auto_save_manager_instance = AutoSaveManager()
 salvar_etapa = auto_save_manager_instance.salvar_etapa
 
+# Header com a identidade do usuário injetado por um proxy autenticado na
+# frente da aplicação (ex.: X-Authenticated-User). Só é lido se configurado;
+# sem ele o tenant é o IP de origem da conexão.
+WORKFLOW_TENANT_HEADER = os.getenv('WORKFLOW_TENANT_HEADER', '')
+
+# Prioridade por tipo de job (menor = despachado antes): verificações curtas
+# passam à frente, o workflow completo (mais longo) vai por último
+JOB_PRIORITIES = {
+    'ai_verification': 3,
+    'full_workflow': 7
+}
+
+def _job_options(kind: str) -> Dict[str, Any]:
+    """Tenant e prioridade do job, definidos pelo servidor (nunca pelo cliente)"""
+    tenant = request.headers.get(WORKFLOW_TENANT_HEADER) if WORKFLOW_TENANT_HEADER else None
+    tenant = tenant or request.remote_addr or 'default'
+    return {'tenant': str(tenant), 'priority': JOB_PRIORITIES.get(kind, DEFAULT_PRIORITY)}
+
+def _submit_job(session_id: str, kind: str, coro_factory, error_etapa: str):
+    """Enfileira o job no scheduler; devolve (job, resposta de erro ou None)"""
+    def on_cancel():
+        salvar_etapa(f"{error_etapa}_cancelado", {
+            "session_id": session_id,
+            "timestamp": datetime.now().isoformat()
+        }, categoria="workflow", session_id=session_id)
+    try:
+        job = workflow_scheduler.submit(
+            session_id, kind, coro_factory, on_cancel=on_cancel, **_job_options(kind)
+        )
+        return job, None
+    except WorkflowQueueFullError as e:
+        logger.warning(f"⚠️ {kind} recusado - Sessão: {session_id}: {e}")
+        return None, (jsonify({
+            "success": False,
+            "error": str(e),
+            "message": "Servidor ocupado, tente novamente em alguns minutos"
+        }), 429)
+
+def _queue_info(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": job["job_id"],
+        "job_state": job["state"],
+        "queue_position": job["queue_position"]
+    }
+
 @enhanced_workflow_bp.route('/workflow/step1/start', methods=['POST'])
 def start_step1_collection():
     """ETAPA 1: Coleta Massiva de Dados com Screenshots"""
@@ -89,19 +134,13 @@ def start_step1_collection():
             "timestamp": datetime.now().isoformat()
         }, categoria="workflow", session_id=session_id)
         # Executa coleta massiva em thread separada
-        def execute_collection_thread():
-            logger.info(f"🚀 INICIANDO THREAD DE COLETA - Sessão: {session_id}")
+        async def execute_collection_job():
+            logger.info(f"🚀 INICIANDO JOB DE COLETA - Sessão: {session_id}")
             try:
                 # Carrega serviços de forma lazy
                 services = get_services()
                 if not services:
-                    logger.error("❌ Falha ao carregar serviços necessários")
-                    salvar_etapa("etapa1_erro", {
-                        "session_id": session_id,
-                        "error": "Falha ao carregar serviços",
-                        "timestamp": datetime.now().isoformat()
-                    }, categoria="workflow", session_id=session_id)
-                    return
+                    raise RuntimeError("Falha ao carregar serviços necessários")
                 async def async_collection_tasks():
                     search_results = {'web_results': [], 'social_results': [], 'youtube_results': []}
                     massive_results = {}
@@ -172,6 +211,8 @@ def start_step1_collection():
                         logger.warning("⚠️ Falha ao gerar relatório viral automático")
                     # GERA CONSOLIDAÇÃO FINAL COMPLETA
                     logger.info("🔗 CONSOLIDANDO TODOS OS DADOS DA ETAPA 1...")
+                    # A consolidação lê do disco as etapas enfileiradas
+                    await asyncio.to_thread(auto_save_manager_instance.garantir_gravacao, session_id)
                     consolidacao_final = _gerar_consolidacao_final_etapa1(
                         session_id, search_results, viral_analysis, massive_results, viral_results
                     )
@@ -194,7 +235,9 @@ def start_step1_collection():
                     }, categoria="workflow", session_id=session_id)
                     logger.info(f"✅ ETAPA 1 CONCLUÍDA - Sessão: {session_id}")
                     logger.info(f"📊 CONSOLIDAÇÃO: {consolidacao_final.get('estatisticas', {}).get('total_dados_coletados', 0)} dados únicos")
-                asyncio.run(async_collection_tasks())
+                await async_collection_tasks()
+                # Garante que as etapas enfileiradas estejam no disco antes da próxima fase
+                await asyncio.to_thread(auto_save_manager_instance.garantir_gravacao, session_id)
             except Exception as e:
                 logger.error(f"❌ Erro na execução da Etapa 1: {e}")
                 salvar_etapa("etapa1_erro", {
@@ -202,12 +245,16 @@ def start_step1_collection():
                     "error": str(e),
                     "timestamp": datetime.now().isoformat()
                 }, categoria="workflow", session_id=session_id)
-        # Inicia a thread para a coleta
-        thread = threading.Thread(target=execute_collection_thread)
-        thread.start()
+                # Propaga para o scheduler registrar o job como failed
+                raise
+        # Enfileira a coleta no scheduler de workflows
+        job, error_response = _submit_job(session_id, "step1", execute_collection_job, "etapa1")
+        if error_response:
+            return error_response
         return jsonify({
             "success": True,
             "session_id": session_id,
+            **_queue_info(job),
             "message": "Etapa 1 iniciada: Coleta massiva de dados em segundo plano",
             "query": query,
             "estimated_duration": "3-5 minutos",
@@ -237,18 +284,12 @@ def start_step2_synthesis():
             "timestamp": datetime.now().isoformat()
         }, categoria="workflow", session_id=session_id)
         # Executa síntese em thread separada
-        def execute_synthesis_thread():
+        async def execute_synthesis_job():
             try:
                 # Carrega serviços de forma lazy
                 services = get_services()
                 if not services:
-                    logger.error("❌ Falha ao carregar serviços necessários")
-                    salvar_etapa("etapa2_erro", {
-                        "session_id": session_id,
-                        "error": "Falha ao carregar serviços",
-                        "timestamp": datetime.now().isoformat()
-                    }, categoria="workflow", session_id=session_id)
-                    return
+                    raise RuntimeError("Falha ao carregar serviços necessários")
                 async def async_synthesis_tasks():
                     synthesis_result = {}
                     behavioral_result = {}
@@ -274,7 +315,9 @@ def start_step2_synthesis():
                         "timestamp": datetime.now().isoformat()
                     }, categoria="workflow", session_id=session_id)
                     logger.info(f"✅ ETAPA 2 CONCLUÍDA - Sessão: {session_id}")
-                asyncio.run(async_synthesis_tasks())
+                await async_synthesis_tasks()
+                # Garante que as etapas enfileiradas estejam no disco antes da próxima fase
+                await asyncio.to_thread(auto_save_manager_instance.garantir_gravacao, session_id)
             except Exception as e:
                 logger.error(f"❌ Erro na execução da Etapa 2: {e}")
                 salvar_etapa("etapa2_erro", {
@@ -282,12 +325,16 @@ def start_step2_synthesis():
                     "error": str(e),
                     "timestamp": datetime.now().isoformat()
                 }, categoria="workflow", session_id=session_id)
-        # Inicia a thread para a síntese
-        thread = threading.Thread(target=execute_synthesis_thread)
-        thread.start()
+                # Propaga para o scheduler registrar o job como failed
+                raise
+        # Enfileira a síntese no scheduler de workflows
+        job, error_response = _submit_job(session_id, "step2", execute_synthesis_job, "etapa2")
+        if error_response:
+            return error_response
         return jsonify({
             "success": True,
             "session_id": session_id,
+            **_queue_info(job),
             "message": "Etapa 2 iniciada: Síntese com IA e busca ativa em segundo plano",
             "estimated_duration": "2-4 minutos",
             "next_step": "/api/workflow/step3/start",
@@ -313,9 +360,8 @@ def run_external_ai_verification():
         logger.info(f"🤖 VERIFICAÇÃO AI INICIADA - Sessão: {session_id}")
 
         # Executa verificação em thread separada
-        def execute_verification_thread():
+        async def execute_verification_job():
             try:
-                import asyncio
                 from services.external_ai_integration import external_ai_integration
 
                 async def async_verification():
@@ -330,7 +376,9 @@ def run_external_ai_verification():
 
                     logger.info(f"✅ VERIFICAÇÃO AI CONCLUÍDA - Sessão: {session_id}")
 
-                asyncio.run(async_verification())
+                await async_verification()
+                # Garante que as etapas enfileiradas estejam no disco antes da próxima fase
+                await asyncio.to_thread(auto_save_manager_instance.garantir_gravacao, session_id)
 
             except Exception as e:
                 logger.error(f"❌ Erro na verificação AI: {e}")
@@ -339,14 +387,18 @@ def run_external_ai_verification():
                     "error": str(e),
                     "timestamp": datetime.now().isoformat()
                 }, categoria="workflow", session_id=session_id)
+                # Propaga para o scheduler registrar o job como failed
+                raise
 
-        # Inicia a thread para verificação
-        thread = threading.Thread(target=execute_verification_thread)
-        thread.start()
+        # Enfileira a verificação no scheduler de workflows
+        job, error_response = _submit_job(session_id, "ai_verification", execute_verification_job, "verificacao_ai")
+        if error_response:
+            return error_response
 
         return jsonify({
             "success": True,
             "session_id": session_id,
+            **_queue_info(job),
             "message": "Verificação AI iniciada em segundo plano",
             "estimated_duration": "1-2 minutos",
             "status_endpoint": f"/api/workflow/status/{session_id}"
@@ -377,18 +429,12 @@ def start_step3_generation():
             "timestamp": datetime.now().isoformat()
         }, categoria="workflow", session_id=session_id)
         # Executa geração em thread separada
-        def execute_generation_thread():
+        async def execute_generation_job():
             try:
                 # Carrega serviços de forma lazy
                 services = get_services()
                 if not services:
-                    logger.error("❌ Falha ao carregar serviços necessários")
-                    salvar_etapa("etapa3_erro", {
-                        "session_id": session_id,
-                        "error": "Falha ao carregar serviços",
-                        "timestamp": datetime.now().isoformat()
-                    }, categoria="workflow", session_id=session_id)
-                    return
+                    raise RuntimeError("Falha ao carregar serviços necessários")
                 async def async_generation_tasks():
                     modules_result = {}
                     final_report = ""
@@ -408,7 +454,9 @@ def start_step3_generation():
                     }, categoria="workflow", session_id=session_id)
                     logger.info(f"✅ ETAPA 3 CONCLUÍDA - Sessão: {session_id}")
                     logger.info(f"📊 {modules_result.get('successful_modules', 0)}/16 módulos gerados")
-                asyncio.run(async_generation_tasks())
+                await async_generation_tasks()
+                # Garante que as etapas enfileiradas estejam no disco antes da próxima fase
+                await asyncio.to_thread(auto_save_manager_instance.garantir_gravacao, session_id)
             except Exception as e:
                 logger.error(f"❌ Erro na execução da Etapa 3: {e}")
                 salvar_etapa("etapa3_erro", {
@@ -416,12 +464,16 @@ def start_step3_generation():
                     "error": str(e),
                     "timestamp": datetime.now().isoformat()
                 }, categoria="workflow", session_id=session_id)
-        # Inicia a thread para a geração
-        thread = threading.Thread(target=execute_generation_thread)
-        thread.start()
+                # Propaga para o scheduler registrar o job como failed
+                raise
+        # Enfileira a geração no scheduler de workflows
+        job, error_response = _submit_job(session_id, "step3", execute_generation_job, "etapa3")
+        if error_response:
+            return error_response
         return jsonify({
             "success": True,
             "session_id": session_id,
+            **_queue_info(job),
             "message": "Etapa 3 iniciada: Geração dos 16 módulos e relatório final em segundo plano",
             "estimated_duration": "4-6 minutos",
             "next_step": "/api/workflow/results", # Ou um endpoint para o relatório final
@@ -472,17 +524,11 @@ def start_full_workflow():
             "context": context,
             "timestamp": datetime.now().isoformat()
         }, categoria="workflow", session_id=session_id)
-        def execute_full_workflow_thread():
+        async def execute_full_workflow_job():
             try:
                 services = get_services()
                 if not services:
-                    logger.error("❌ Falha ao carregar serviços necessários para workflow completo")
-                    salvar_etapa("workflow_erro", {
-                        "session_id": session_id,
-                        "error": "Falha ao carregar serviços para workflow completo",
-                        "timestamp": datetime.now().isoformat()
-                    }, categoria="workflow", session_id=session_id)
-                    return
+                    raise RuntimeError("Falha ao carregar serviços necessários para workflow completo")
                 async def async_full_workflow_tasks():
                     search_results = {'web_results': [], 'social_results': [], 'youtube_results': []}
                     massive_results = {}
@@ -518,6 +564,8 @@ def start_full_workflow():
                         viral_report_generator = services['ViralReportGenerator']()
                         viral_report_generator.generate_viral_report(session_id)
                         # GERA CONSOLIDAÇÃO FINAL COMPLETA
+                        # A consolidação lê do disco as etapas enfileiradas
+                        await asyncio.to_thread(auto_save_manager_instance.garantir_gravacao, session_id)
                         consolidacao_final = _gerar_consolidacao_final_etapa1(
                             session_id, search_results, viral_analysis, massive_results
                         )
@@ -544,8 +592,9 @@ def start_full_workflow():
                             "error": str(e),
                             "timestamp": datetime.now().isoformat()
                         }, categoria="workflow", session_id=session_id)
-                        return # Aborta o workflow se a primeira etapa falhar
+                        raise # Aborta o workflow se a primeira etapa falhar
                     # ETAPA 2: Síntese com IA e Busca Ativa
+                    await asyncio.to_thread(auto_save_manager_instance.garantir_gravacao, session_id)
                     logger.info(f"🧠 INICIANDO ETAPA 2 (Workflow Completo) - Sessão: {session_id}")
                     try:
                         synthesis_result = await services['enhanced_synthesis_engine'].execute_enhanced_synthesis(
@@ -569,8 +618,9 @@ def start_full_workflow():
                             "error": str(e),
                             "timestamp": datetime.now().isoformat()
                         }, categoria="workflow", session_id=session_id)
-                        return # Aborta o workflow se a segunda etapa falhar
+                        raise # Aborta o workflow se a segunda etapa falhar
                     # ETAPA 3: Geração dos 16 Módulos e Relatório Final
+                    await asyncio.to_thread(auto_save_manager_instance.garantir_gravacao, session_id)
                     logger.info(f"📝 INICIANDO ETAPA 3 (Workflow Completo) - Sessão: {session_id}")
                     try:
                         modules_result = await services['enhanced_module_processor'].generate_all_modules(session_id)
@@ -589,7 +639,7 @@ def start_full_workflow():
                             "error": str(e),
                             "timestamp": datetime.now().isoformat()
                         }, categoria="workflow", session_id=session_id)
-                        return # Aborta o workflow se a terceira etapa falhar
+                        raise # Aborta o workflow se a terceira etapa falhar
                     # Salva resultado final do workflow completo
                     salvar_etapa("workflow_completo_concluido", {
                         "session_id": session_id,
@@ -601,7 +651,9 @@ def start_full_workflow():
                         "timestamp": datetime.now().isoformat()
                     }, categoria="workflow", session_id=session_id)
                     logger.info(f"✅ WORKFLOW COMPLETO CONCLUÍDO - Sessão: {session_id}")
-                asyncio.run(async_full_workflow_tasks())
+                await async_full_workflow_tasks()
+                # Garante que as etapas enfileiradas estejam no disco antes da próxima fase
+                await asyncio.to_thread(auto_save_manager_instance.garantir_gravacao, session_id)
             except Exception as e:
                 logger.error(f"❌ Erro no workflow completo: {e}")
                 salvar_etapa("workflow_erro", {
@@ -609,12 +661,16 @@ def start_full_workflow():
                     "error": str(e),
                     "timestamp": datetime.now().isoformat()
                 }, categoria="workflow", session_id=session_id)
-        # Inicia a thread para o workflow completo
-        thread = threading.Thread(target=execute_full_workflow_thread)
-        thread.start()
+                # Propaga para o scheduler registrar o job como failed
+                raise
+        # Enfileira o workflow completo no scheduler de workflows
+        job, error_response = _submit_job(session_id, "full_workflow", execute_full_workflow_job, "workflow")
+        if error_response:
+            return error_response
         return jsonify({
             "success": True,
             "session_id": session_id,
+            **_queue_info(job),
             "message": "Workflow completo iniciado em segundo plano",
             "estimated_total_duration": "8-15 minutos",
             "steps": [
@@ -690,6 +746,15 @@ def get_workflow_status(session_id):
                 status["step_status"]["step2"] = "failed" if "etapa2_erro" in pattern else status["step_status"]["step2"]
                 status["step_status"]["step3"] = "failed" if "etapa3_erro" in pattern else status["step_status"]["step3"]
                 break
+        # Estado do job no scheduler (fila, execução, cancelamento)
+        job = workflow_scheduler.get_job_status(session_id)
+        if job:
+            status["job"] = job
+            status["queue_position"] = job["queue_position"]
+            if job["state"] == "queued":
+                status["estimated_remaining"] = f"Aguardando na fila (posição {job['queue_position']})"
+            elif job["state"] == "cancelled":
+                status["cancelled"] = True
         return jsonify(status), 200
     except Exception as e:
         logger.error(f"❌ Erro ao obter status: {e}")
@@ -699,6 +764,27 @@ def get_workflow_status(session_id):
             "status": "error"
         }), 500
 
+@enhanced_workflow_bp.route('/workflow/cancel/<session_id>', methods=['POST'])
+def cancel_workflow(session_id):
+    """Cancela o job da sessão (remove da fila ou interrompe a execução)"""
+    job = workflow_scheduler.cancel(session_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": "Nenhum job encontrado para a sessão",
+            "session_id": session_id
+        }), 404
+    return jsonify({
+        "success": True,
+        "session_id": session_id,
+        "job": job
+    }), 200
+
+@enhanced_workflow_bp.route('/workflow/scheduler', methods=['GET'])
+def get_scheduler_status():
+    """Ocupação do pool de workers e fila de jobs"""
+    return jsonify(workflow_scheduler.get_status()), 200
+
 @enhanced_workflow_bp.route('/workflow/results/<session_id>', methods=['GET'])
 def get_workflow_results(session_id):
     """Obtém resultados do workflow"""
@@ -999,6 +1085,8 @@ def _gerar_consolidacao_final_etapa1(session_id, search_results, viral_analysis,
         import os
         import glob
         import json
+        # Compacta o log de trechos e gera o snapshot consolidado.json
+        auto_save_manager_instance.compactar_consolidado(session_id)
         # Diretório da sessão
         session_dir = f"analyses_data/{session_id}"
         workflow_dir = f"relatorios_intermediarios/workflow/{session_id}"
@@ -1272,19 +1360,15 @@ def _load_all_saved_excerpts(session_id: str) -> List[Dict[str, Any]]:
     excerpts = []
     urls_processadas = set()
     try:
-        # 1. Carrega arquivo consolidado primeiro (prioridade)
-        consolidado_path = os.path.join("analyses_data", "pesquisa_web", session_id, "consolidado.json")
-        if os.path.exists(consolidado_path):
-            try:
-                with open(consolidado_path, 'r', encoding='utf-8') as f:
-                    consolidado = json.load(f)
-                    for trecho in consolidado.get('trechos', []):
-                        if trecho.get('url') not in urls_processadas:
-                            excerpts.append(trecho)
-                            urls_processadas.add(trecho.get('url'))
-                logger.info(f"✅ {len(excerpts)} trechos carregados do arquivo consolidado")
-            except Exception as e:
-                logger.error(f"❌ Erro ao carregar arquivo consolidado: {e}")
+        # 1. Carrega log consolidado primeiro (prioridade) - leitura em streaming
+        try:
+            for trecho in auto_save_manager_instance.iterar_consolidado(session_id):
+                if trecho.get('url') not in urls_processadas:
+                    excerpts.append(trecho)
+                    urls_processadas.add(trecho.get('url'))
+            logger.info(f"✅ {len(excerpts)} trechos carregados do arquivo consolidado")
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar arquivo consolidado: {e}")
         # 2. Diretório de trechos da sessão
         excerpts_dir = os.path.join("analyses_data", "pesquisa_web", session_id)
         if os.path.exists(excerpts_dir):
@@ -22,7 +22,12 @@ def list_local_analyses():
     """Lista análises salvas localmente"""
     
     try:
-        analyses = local_file_manager.list_local_analyses()
+        analyses = local_file_manager.list_local_analyses(
+            limit=request.args.get('limit', type=int),
+            offset=max(0, request.args.get('offset', 0, type=int)),
+            segmento=request.args.get('segmento'),
+            search=request.args.get('q')
+        )
         
         return jsonify({
             'success': True,
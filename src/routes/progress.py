@@ -10,10 +10,10 @@ import logging
 import time
 import json
 from datetime import datetime
-from flask import Blueprint, request, jsonify, session
+from collections import deque
+from flask import Blueprint, request, jsonify, session, Response, stream_with_context
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import threading
-from queue import Queue
 import uuid
 
 # Importar auto_save_manager aqui
@@ -31,10 +31,130 @@ logger = logging.getLogger(__name__)
 # Cria blueprint
 progress_bp = Blueprint('progress', __name__)
 
+# Eventos guardados por sessão para retomada via Last-Event-ID
+PROGRESS_BUFFER_SIZE = int(os.getenv('PROGRESS_BUFFER_SIZE', '200'))
+# Intervalo entre heartbeats do stream SSE (segundos)
+PROGRESS_SSE_HEARTBEAT = float(os.getenv('PROGRESS_SSE_HEARTBEAT', '15'))
+# Intervalo de reconexão sugerido ao EventSource (ms)
+PROGRESS_SSE_RETRY_MS = int(os.getenv('PROGRESS_SSE_RETRY_MS', '3000'))
+# Sessões concluídas ficam disponíveis por este tempo (segundos)
+PROGRESS_RETENTION_SECONDS = int(os.getenv('PROGRESS_RETENTION_SECONDS', '600'))
+# Sessões sem atualização há mais que isso são descartadas (segundos)
+PROGRESS_IDLE_SECONDS = int(os.getenv('PROGRESS_IDLE_SECONDS', str(6 * 3600)))
+PROGRESS_REAPER_INTERVAL = int(os.getenv('PROGRESS_REAPER_INTERVAL', '60'))
+
 # Sistema de progresso global CORRIGIDO
 progress_sessions = {}
-progress_queues = {}
-progress_lock = threading.Lock()
+progress_channels = {}
+progress_lock = threading.RLock()
+_reaper_thread = None
+
+
+class ProgressChannel:
+    """
+    Fan-out dos eventos de progresso de uma sessão.
+
+    Cada evento recebe um id sequencial e fica num buffer circular de
+    PROGRESS_BUFFER_SIZE itens. Cada assinante guarda o próprio cursor (o
+    último id recebido) e dorme na Condition até haver evento novo, então
+    clientes ociosos não consomem CPU e um cliente lento não afeta os outros.
+    """
+
+    def __init__(self, session_id: str, buffer_size: int = PROGRESS_BUFFER_SIZE):
+        self.session_id = session_id
+        self.events = deque(maxlen=buffer_size)
+        self.last_id = 0
+        self.finished = False
+        self.closed = False
+        self.poll_cursor = 0
+        self._condition = threading.Condition()
+
+    def publish(self, data: dict, event: str = 'progress') -> int:
+        """Acrescenta evento ao buffer e acorda os assinantes"""
+        with self._condition:
+            if self.closed:
+                return self.last_id
+            self.last_id += 1
+            self.events.append((self.last_id, event, data))
+            if event == 'complete':
+                self.finished = True
+            self._condition.notify_all()
+            return self.last_id
+
+    def close(self):
+        """Encerra o canal (sessão removida) e libera os assinantes"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def _events_after(self, cursor: int):
+        pending = [entry for entry in self.events if entry[0] > cursor]
+        # Houve perda se o evento seguinte ao cursor já saiu do buffer
+        gap = bool(self.events) and cursor < self.events[0][0] - 1
+        return pending, gap
+
+    def events_after(self, cursor: int):
+        """(eventos com id > cursor, True se parte deles já saiu do buffer)"""
+        with self._condition:
+            return self._events_after(cursor)
+
+    def wait(self, cursor: int, timeout: float):
+        """Como events_after, mas bloqueia até timeout se não houver evento novo"""
+        with self._condition:
+            if self.last_id <= cursor and not (self.finished or self.closed):
+                self._condition.wait(timeout)
+            return self._events_after(cursor)
+
+    def is_drained(self, cursor: int) -> bool:
+        """True se o canal terminou e o cursor já recebeu tudo"""
+        with self._condition:
+            return (self.finished or self.closed) and cursor >= self.last_id
+
+
+def _remove_session_locked(session_id: str):
+    """Remove tracker e canal da sessão (chamar com progress_lock)"""
+    tracker = progress_sessions.pop(session_id, None)
+    if tracker:
+        tracker.is_active = False
+    channel = progress_channels.pop(session_id, None)
+    if channel:
+        channel.close()
+
+
+def _reap_expired_sessions(now: float = None) -> int:
+    """Remove sessões concluídas há mais de PROGRESS_RETENTION_SECONDS ou ociosas"""
+    now = now or time.time()
+    with progress_lock:
+        expired = [
+            session_id for session_id, tracker in progress_sessions.items()
+            if (tracker.completed_at and now - tracker.completed_at > PROGRESS_RETENTION_SECONDS)
+            or now - tracker.last_update > PROGRESS_IDLE_SECONDS
+        ]
+        for session_id in expired:
+            _remove_session_locked(session_id)
+
+    if expired:
+        logger.info(f"🧹 Limpeza automática: {len(expired)} sessões de progresso removidas")
+    return len(expired)
+
+
+def _reaper_loop():
+    while True:
+        time.sleep(PROGRESS_REAPER_INTERVAL)
+        try:
+            _reap_expired_sessions()
+        except Exception as e:
+            logger.error(f"Erro na limpeza automática: {e}")
+
+
+def _ensure_reaper():
+    """Inicia (uma vez por processo) a thread única de limpeza das sessões"""
+    global _reaper_thread
+    with progress_lock:
+        if _reaper_thread is None or not _reaper_thread.is_alive():
+            _reaper_thread = threading.Thread(target=_reaper_loop, name='progress-reaper', daemon=True)
+            _reaper_thread.start()
+
 
 class ProgressTracker:
     """Rastreador de progresso em tempo real COMPLETAMENTE FUNCIONAL"""
@@ -47,7 +167,7 @@ class ProgressTracker:
         self.last_update = time.time()
         self.is_active = True
         self.is_complete = False
-
+        self.completed_at = None
 
         self.steps = [
             "🔍 Validando dados de entrada e preparando análise",
@@ -72,7 +192,8 @@ class ProgressTracker:
         # Registra sessão global COM LOCK
         with progress_lock:
             progress_sessions[session_id] = self
-            progress_queues[session_id] = Queue()
+            self.channel = progress_channels[session_id] = ProgressChannel(session_id)
+        _ensure_reaper()
 
         logger.info(f"✅ ProgressTracker criado para sessão: {session_id}")
 
@@ -127,23 +248,8 @@ class ProgressTracker:
                 if len(self.detailed_logs) > 50:
                     self.detailed_logs = self.detailed_logs[-50:]
 
-                # Adiciona à queue para polling
-                if self.session_id in progress_queues:
-                    try:
-                        # Limpa queue antiga se muito cheia
-                        queue = progress_queues[self.session_id]
-                        if queue.qsize() > 100:
-                            while not queue.empty():
-                                try:
-                                    queue.get_nowait()
-                                except:
-                                    break
-
-                        queue.put(progress_data)
-                    except (OSError, RuntimeError) as e:
-                        logger.error(f"Erro de sistema ao adicionar à queue: {e}")
-                    except Exception as e:
-                        logger.error(f"Erro inesperado ao adicionar à queue: {e}")
+                # Publica para os assinantes (stream SSE e polling)
+                self.channel.publish(progress_data)
 
                 logger.info(f"📊 Progress {self.session_id}: Step {self.current_step}/{self.total_steps} - {message}")
 
@@ -167,22 +273,12 @@ class ProgressTracker:
                 self.current_step = self.total_steps
                 self.update_progress(self.total_steps, "🎉 Análise concluída! Preparando resultados...")
 
-                logger.info(f"✅ Análise {self.session_id} marcada como completa")
-
-                # Remove da sessão após 10 minutos
-                def cleanup():
-                    time.sleep(600)  # 10 minutos
-                    try:
-                        with progress_lock:
-                            if self.session_id in progress_sessions:
-                                del progress_sessions[self.session_id]
-                            if self.session_id in progress_queues:
-                                del progress_queues[self.session_id]
-                        logger.info(f"🧹 Limpeza automática: sessão {self.session_id} removida")
-                    except Exception as e:
-                        logger.error(f"Erro na limpeza automática: {e}")
+                # Evento final encerra os streams; o reaper remove a sessão
+                # após PROGRESS_RETENTION_SECONDS
+                self.completed_at = time.time()
+                self.channel.publish(self.get_current_status(), event='complete')
 
-                threading.Thread(target=cleanup, daemon=True).start()
+                logger.info(f"✅ Análise {self.session_id} marcada como completa")
 
         except Exception as e:
             logger.error(f"Erro ao completar análise: {e}")
@@ -232,12 +328,7 @@ def start_tracking():
 
         # Remove tracker existente se houver
         with progress_lock:
-            if session_id in progress_sessions:
-                old_tracker = progress_sessions[session_id]
-                old_tracker.is_active = False
-                del progress_sessions[session_id]
-            if session_id in progress_queues:
-                del progress_queues[session_id]
+            _remove_session_locked(session_id)
 
         # Cria novo tracker
         tracker = ProgressTracker(session_id)
@@ -252,6 +343,7 @@ def start_tracking():
             'status': tracker.get_current_status(),
             'endpoints': {
                 'progress': f'/api/progress/{session_id}',
+                'stream': f'/api/progress/stream/{session_id}',
                 'polling': f'/api/progress/poll/{session_id}',
                 'logs': f'/api/progress/logs/{session_id}'
             }
@@ -349,34 +441,106 @@ def get_progress_alt(session_id):
 
 
 
+def _format_sse(event_id, event: str, data: dict) -> str:
+    """Formata um evento no protocolo text/event-stream"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {payload}\n\n"
+
+@progress_bp.route('/progress/stream/<session_id>', methods=['GET'])
+def stream_progress(session_id):
+    """
+    Stream de progresso via Server-Sent Events
+
+    Cada evento traz um id sequencial; ao reconectar, o EventSource envia
+    Last-Event-ID (ou ?last_event_id=) e recebe só o que perdeu. Se os
+    eventos perdidos já saíram do buffer, um evento "snapshot" com o estado
+    atual é enviado antes. O stream termina após o evento "complete".
+    """
+    with progress_lock:
+        channel = progress_channels.get(session_id)
+        tracker = progress_sessions.get(session_id)
+
+    if channel is None:
+        return jsonify({
+            'success': False,
+            'error': 'Sessão não encontrada',
+            'session_id': session_id
+        }), 404
+
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0
+    try:
+        cursor = max(0, int(cursor))
+    except (TypeError, ValueError):
+        cursor = 0
+
+    # 204 faz o EventSource parar de reconectar após o fim da análise
+    if channel.is_drained(cursor):
+        return Response(status=204)
+
+    def generate():
+        position = cursor
+        yield f"retry: {PROGRESS_SSE_RETRY_MS}\n\n"
+        while True:
+            events, gap = channel.wait(position, PROGRESS_SSE_HEARTBEAT)
+            if gap and tracker:
+                yield _format_sse(None, 'snapshot', tracker.get_current_status())
+            if not events:
+                if channel.is_drained(position):
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            for event_id, event, data in events:
+                yield _format_sse(event_id, event, data)
+                position = event_id
+            if channel.is_drained(position):
+                break
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @progress_bp.route('/poll/<session_id>', methods=['GET'])
 def poll_updates(session_id):
-    """Polling para atualizações de progresso"""
+    """
+    Polling para atualizações de progresso
+
+    Com ?since=<id> devolve os eventos posteriores a esse id sem afetar
+    outros clientes; sem ele, usa o cursor compartilhado da sessão
+    (comportamento antigo de consumir a fila).
+    """
     try:
-        if session_id not in progress_queues:
+        channel = progress_channels.get(session_id)
+        if channel is None:
             return jsonify({
                 'success': False,
                 'error': 'Sessão não encontrada para polling',
                 'session_id': session_id
             }), 404
 
-        queue = progress_queues[session_id]
-        updates = []
         max_updates = 50  # Limite de updates por poll
+        since = request.args.get('since', type=int)
+        cursor = since if since is not None else channel.poll_cursor
 
-        # Coleta atualizações disponíveis
-        while not queue.empty() and len(updates) < max_updates:
-            try:
-                update = queue.get_nowait()
-                updates.append(update)
-            except:
-                break
+        events, gap = channel.events_after(cursor)
+        events = events[:max_updates]
+        if events and since is None:
+            channel.poll_cursor = max(channel.poll_cursor, events[-1][0])
+
+        updates = [data for _, event, data in events if event == 'progress']
 
         return jsonify({
             'success': True,
             'updates': updates,
             'has_updates': len(updates) > 0,
             'update_count': len(updates),
+            'last_event_id': events[-1][0] if events else cursor,
+            'missed_updates': gap,
             'session_id': session_id
         })
 
@@ -553,10 +717,7 @@ def cleanup_sessions():
 
             for session_id in sessions_to_remove:
                 try:
-                    if session_id in progress_sessions:
-                        del progress_sessions[session_id]
-                    if session_id in progress_queues:
-                        del progress_queues[session_id]
+                    _remove_session_locked(session_id)
                     cleaned += 1
                 except Exception as e:
                     logger.error(f"Erro ao remover sessão {session_id}: {e}")
@@ -726,8 +887,8 @@ def clear_sessions():
         # Limpa sessões da memória
         with progress_lock:
             cleared_memory = len(progress_sessions)
-            progress_sessions.clear()
-            progress_queues.clear()
+            for session_id in list(progress_sessions):
+                _remove_session_locked(session_id)
 
         # Limpa arquivos de sessões antigas
         dirs_to_clear = [
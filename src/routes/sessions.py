@@ -18,43 +18,36 @@ sessions_bp = Blueprint('sessions', __name__)
 
 @sessions_bp.route('/sessions', methods=['GET'])
 def list_sessions():
-    """Lista todas as sessões salvas localmente"""
-    print("🔍 PRINT DEBUG: Entrando na função list_sessions")
-    logger.info("🔍 LOG DEBUG: Entrando na função list_sessions")
-    
-    # Teste direto do session_persistence
-    from services.session_persistence import SessionPersistenceManager
-    test_manager = SessionPersistenceManager()
-    test_sessions = test_manager.get_sessions()
-    print(f"🔍 PRINT DEBUG: test_manager sessions: {len(test_sessions)}")
-    
+    """
+    Lista sessões salvas localmente (mais recentes primeiro)
+
+    Query params opcionais: status, segmento, q (busca em nome/segmento),
+    limit e offset para paginação.
+    """
     try:
-        status_filter = request.args.get('status')
-        
-        # Debug: verificar se session_persistence está funcionando
-        print(f"🔍 PRINT DEBUG: session_persistence type: {type(session_persistence)}")
-        print(f"🔍 PRINT DEBUG: sessions_dir: {session_persistence.sessions_dir}")
-        logger.info(f"🔍 DEBUG: session_persistence type: {type(session_persistence)}")
-        logger.info(f"🔍 DEBUG: sessions_dir: {session_persistence.sessions_dir}")
-        
-        sessions = session_persistence.get_sessions(status=status_filter)
+        limit = request.args.get('limit', type=int)
+        offset = max(0, request.args.get('offset', 0, type=int))
+        
+        result = session_persistence.query_sessions(
+            status=request.args.get('status'),
+            segmento=request.args.get('segmento'),
+            search=request.args.get('q'),
+            limit=limit,
+            offset=offset
+        )
         
-        print(f"🔍 PRINT DEBUG: sessions returned: {len(sessions)}")
-        logger.info(f"📋 Listando {len(sessions)} sessões para o frontend")
-        logger.info(f"🔍 DEBUG: sessions data: {sessions}")
+        logger.info(f"📋 Listando {len(result['sessions'])} de {result['total']} sessões para o frontend")
         
         return jsonify({
             'success': True,
-            'sessions': sessions,
-            'total': len(sessions)
+            'sessions': result['sessions'],
+            'total': result['total'],
+            'limit': limit,
+            'offset': offset
         })
         
     except Exception as e:
-        print(f"❌ PRINT ERROR: {e}")
         logger.error(f"❌ Erro ao listar sessões: {e}")
-        import traceback
-        print(f"❌ PRINT TRACEBACK: {traceback.format_exc()}")
-        logger.error(f"❌ Traceback: {traceback.format_exc()}")
         return jsonify({
             'success': False,
             'error': str(e),
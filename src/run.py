@@ -8,6 +8,7 @@ Servidor Flask para análise de mercado ultra-detalhada
 import os
 import sys
 import time
+import atexit
 import logging
 from typing import Dict, List, Any, Optional
 from flask import Flask, render_template, jsonify, request
@@ -19,6 +20,10 @@ from logging.handlers import RotatingFileHandler
 if 'src' not in sys.path:
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Perfil de importação (IMPORT_PROFILE=true) e registro de serviços sob demanda
+from services.service_registry import service_registry, import_profiler
+import_profiler.start()
+
 # Importar logger em tempo real ANTES de outros imports
 from services.realtime_logger import realtime_logger, log_info, log_success, log_error, log_separator
 
@@ -80,22 +85,27 @@ def create_app():
     logger.info("🔍 Importando blueprints...")
 
     logger.info("📊 Importando analysis...")
-    from routes.analysis import analysis_bp
+    with import_profiler.section('routes.analysis'):
+        from routes.analysis import analysis_bp
 
     logger.info("📊 Importando enhanced_analysis...")
-    from routes.enhanced_analysis import enhanced_analysis_bp
+    with import_profiler.section('routes.enhanced_analysis'):
+        from routes.enhanced_analysis import enhanced_analysis_bp
 
     logger.info("🔍 Importando forensic_analysis...")
     # from routes.forensic_analysis import forensic_bp  # COMENTADO - módulo não existe
 
     logger.info("📁 Importando files...")
-    from routes.files import files_bp
+    with import_profiler.section('routes.files'):
+        from routes.files import files_bp
 
     logger.info("📈 Importando progress...")
-    from routes.progress import progress_bp
+    with import_profiler.section('routes.progress'):
+        from routes.progress import progress_bp
 
     logger.info("👤 Importando user...")
-    from routes.user import user_bp
+    with import_profiler.section('routes.user'):
+        from routes.user import user_bp
 
     logger.info("🖥️ Importando monitoring...")
     # from routes.monitoring import monitoring_bp  # COMENTADO - módulo não existe
@@ -107,13 +117,16 @@ def create_app():
     # from routes.mcp import mcp_bp  # COMENTADO - módulo não existe
 
     logger.info("⚡ Importando enhanced_workflow...")
-    from routes.enhanced_workflow import enhanced_workflow_bp
+    with import_profiler.section('routes.enhanced_workflow'):
+        from routes.enhanced_workflow import enhanced_workflow_bp
     
     logger.info("💾 Importando sessions...")
-    from routes.sessions import sessions_bp
+    with import_profiler.section('routes.sessions'):
+        from routes.sessions import sessions_bp
     
     logger.info("💬 Importando chat...")
-    from routes.chat import chat_bp
+    with import_profiler.section('routes.chat'):
+        from routes.chat import chat_bp
 
     logger.info("🔍 Inicializando External AI Verifier...")
     try:
@@ -140,6 +153,16 @@ def create_app():
         app.external_ai_verifier = None
 
     logger.info("✅ Todos os blueprints e serviços importados com sucesso!")
+    import_profiler.stop()
+    import_profiler.log_report()
+
+    # Encerramento limpo dos pools HTTP e de navegadores compartilhados (workers do scheduler primeiro)
+    from services.http_client_registry import http_client_registry
+    from services.workflow_scheduler import workflow_scheduler
+    from services.browser_pool import browser_pool
+    atexit.register(http_client_registry.shutdown)
+    atexit.register(browser_pool.shutdown)
+    atexit.register(workflow_scheduler.shutdown)
 
     app.register_blueprint(analysis_bp, url_prefix='/api')
     app.register_blueprint(enhanced_analysis_bp, url_prefix='/enhanced')
@@ -228,6 +251,35 @@ def create_app():
             }), 500
 
 
+    @app.route('/api/system/services')
+    def system_services():
+        """Singletons registrados e quais já foram construídos"""
+        return jsonify(service_registry.get_status())
+
+    @app.route('/api/system/warmup', methods=['POST'])
+    def system_warmup():
+        """
+        Constrói antecipadamente os serviços pedidos.
+
+        Body opcional: {"services": ["enhanced_ai_manager", ...]}; sem lista,
+        constrói todos. Útil logo após o boot de cada worker para tirar a
+        construção do caminho da primeira requisição.
+        """
+        data = request.get_json(silent=True) or {}
+        started = time.perf_counter()
+        report = service_registry.warm_up(data.get('services'))
+        return jsonify({
+            'services': report,
+            'total_ms': round((time.perf_counter() - started) * 1000, 1),
+            'status': service_registry.get_status()
+        })
+
+    @app.route('/api/system/import_profile')
+    def system_import_profile():
+        """Custo de importação por blueprint e, com IMPORT_PROFILE=true, por módulo"""
+        top = request.args.get('top', 30, type=int)
+        return jsonify(import_profiler.report(top))
+
     @app.errorhandler(404)
     def not_found(error):
         return jsonify({'error': 'Endpoint não encontrado'}), 404
@@ -13,6 +13,7 @@ import json
 from typing import Dict, List, Optional, Any, Union
 import requests
 from datetime import datetime, timedelta
+from services.service_registry import service_registry
 
 # Imports condicionais para os clientes de IA
 try:
@@ -495,4 +496,4 @@ class AIManager:
         return status
 
 # Instância global
-ai_manager = AIManager()
+ai_manager = service_registry.register('ai_manager', AIManager)
@@ -16,6 +16,7 @@ from datetime import datetime
 from pathlib import Path
 from .enhanced_ai_manager import enhanced_ai_manager
 from .auto_save_manager import salvar_etapa, salvar_erro
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -556,4 +557,4 @@ IMPORTANTE: Use as ferramentas sempre que precisar de informações mais especí
             return {'status': 'error', 'error': str(e)}
 
 # Instância global
-ai_synthesis_engine = AISynthesisEngine()
\ No newline at end of file
+ai_synthesis_engine = service_registry.register('ai_synthesis_engine', AISynthesisEngine)
\ No newline at end of file
@@ -24,6 +24,9 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
+from services.service_registry import service_registry
+from services.browser_pool import browser_pool
+from services.http_client_registry import http_client_registry
 
 try:
     from .auto_save_manager import AutoSaveManager
@@ -2760,57 +2763,50 @@ class ViralImageFinder:
         timestamp = int(time.time())
         screenshot_filename = f"screenshot_{safe_title}_{hash_suffix}_{timestamp}.png"
         screenshot_path = os.path.join(self.config['screenshots_dir'], screenshot_filename)
-        try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(
-                    headless=self.config['headless'],
-                    args=['--no-sandbox', '--disable-setuid-sandbox']
-                )
-                context = await browser.new_context(
-                    viewport={'width': 1920, 'height': 1080},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                )
-                page = await context.new_page()
-                # Configurar timeouts mais robustos
-                page.set_default_timeout(self.config['playwright_timeout'])
-                page.set_default_navigation_timeout(30000)  # 30 segundos para navegação
-                # Navegar com múltiplas estratégias
+        async def _capture(page):
+            # Configurar timeouts mais robustos
+            page.set_default_timeout(self.config['playwright_timeout'])
+            page.set_default_navigation_timeout(30000)  # 30 segundos para navegação
+            # Navegar com múltiplas estratégias
+            try:
+                await page.goto(post_url, wait_until='domcontentloaded', timeout=self.config["fast_timeout"]*1000)
+            except Exception as e:
+                logger.warning(f"Primeira tentativa de navegação falhou: {e}")
+                # Fallback: tentar com networkidle
                 try:
-                    await page.goto(post_url, wait_until='domcontentloaded', timeout=self.config["fast_timeout"]*1000)
-                except Exception as e:
-                    logger.warning(f"Primeira tentativa de navegação falhou: {e}")
-                    # Fallback: tentar com networkidle
-                    try:
-                        await page.goto(post_url, wait_until='networkidle', timeout=self.config["fast_timeout"]*1000)
-                    except Exception as e2:
-                        logger.warning(f"Segunda tentativa falhou: {e2}")
-                        # Último fallback: load básico
-                        await page.goto(post_url, wait_until='load', timeout=self.config["fast_timeout"]*1000)
-                await asyncio.sleep(3)
-                # Fechar popups
-                await self._close_common_popups(page, platform)
-                await asyncio.sleep(1)
-                # Tirar screenshot da área principal
-                if platform == 'instagram':
-                    # Focar no post principal
-                    try:
-                        main_element = await page.query_selector('article, main')
-                        if main_element:
-                            await main_element.screenshot(path=screenshot_path)
-                        else:
-                            await page.screenshot(path=screenshot_path, full_page=False)
-                    except:
+                    await page.goto(post_url, wait_until='networkidle', timeout=self.config["fast_timeout"]*1000)
+                except Exception as e2:
+                    logger.warning(f"Segunda tentativa falhou: {e2}")
+                    # Último fallback: load básico
+                    await page.goto(post_url, wait_until='load', timeout=self.config["fast_timeout"]*1000)
+            await asyncio.sleep(3)
+            # Fechar popups
+            await self._close_common_popups(page, platform)
+            await asyncio.sleep(1)
+            # Tirar screenshot da área principal
+            if platform == 'instagram':
+                # Focar no post principal
+                try:
+                    main_element = await page.query_selector('article, main')
+                    if main_element:
+                        await main_element.screenshot(path=screenshot_path)
+                    else:
                         await page.screenshot(path=screenshot_path, full_page=False)
-                else:
+                except:
                     await page.screenshot(path=screenshot_path, full_page=False)
-                await browser.close()
-                # Verificar se screenshot foi criada
-                if os.path.exists(screenshot_path) and os.path.getsize(screenshot_path) > 5000:
-                    logger.info(f"✅ Screenshot salva: {screenshot_path}")
-                    return screenshot_path
-                else:
-                    logger.error(f"❌ Screenshot inválida: {screenshot_path}")
-                    return None
+            else:
+                await page.screenshot(path=screenshot_path, full_page=False)
+
+        try:
+            # Contexto aquecido do pool compartilhado, em vez de um navegador por captura
+            await browser_pool.run(post_url, _capture)
+            # Verificar se screenshot foi criada
+            if os.path.exists(screenshot_path) and os.path.getsize(screenshot_path) > 5000:
+                logger.info(f"✅ Screenshot salva: {screenshot_path}")
+                return screenshot_path
+            else:
+                logger.error(f"❌ Screenshot inválida: {screenshot_path}")
+                return None
         except Exception as e:
             logger.error(f"❌ Erro ao capturar screenshot: {e}")
             return None
@@ -2835,14 +2831,14 @@ class ViralImageFinder:
                             self.search_images(query)
                         )
                     finally:
-                        new_loop.close()
+                        http_client_registry.close_event_loop(new_loop)
 
                 with concurrent.futures.ThreadPoolExecutor() as executor:
                     future = executor.submit(run_async_in_thread)
                     return future.result()
             except RuntimeError:
                 # Se não há loop ativo, executa diretamente com asyncio.run
-                return asyncio.run(self.search_images(query))
+                return http_client_registry.run(self.search_images(query))
 
 
     def _find_viral_images_sync(self, query: str) -> List[Dict[str, Any]]:
@@ -2853,7 +2849,7 @@ class ViralImageFinder:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             result = loop.run_until_complete(self.search_images(query))
-            loop.close()
+            http_client_registry.close_event_loop(loop)
             return result
         except Exception as e:
             logger.error(f"❌ Erro na busca viral síncrona: {e}")
@@ -4432,6 +4428,34 @@ class PerformanceTracker:
         return final_score
 
 
+DIRECT_EXTRACTION_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+
+def _extract_text_from_html(raw: bytes) -> Optional[Tuple[str, str]]:
+    """Cadeia local de extração: trafilatura e, se insuficiente, BeautifulSoup (CPU-bound)"""
+    try:
+        import trafilatura
+        content = trafilatura.extract(raw)
+        if content and len(content) > 300:
+            return content, "trafilatura"
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.warning(f"⚠️ Trafilatura falhou: {str(e)}")
+
+    if HAS_BS4:
+        soup = BeautifulSoup(raw, 'html.parser')
+        # Remove scripts e styles
+        for script in soup(["script", "style"]):
+            script.decompose()
+        content = ' '.join(soup.get_text().split())  # Limpa espaços
+        if len(content) > 300:
+            return content, "beautifulsoup"
+    return None
+
+
 class AlibabaWebSailorAgent:
     """Agente principal do Alibaba WebSailor V2 - Unifica todas as funcionalidades com navegação super-humana"""
 
@@ -4446,7 +4470,13 @@ class AlibabaWebSailorAgent:
             'medium_timeout': 45,
             'slow_timeout': 90,
             'retry_attempts': 3,
-            'retry_delay': 2.0
+            'retry_delay': 2.0,
+            # Extração concorrente de páginas na navegação profunda
+            'page_timeout': float(os.getenv('WEBSAILOR_PAGE_TIMEOUT', '20')),
+            'extract_concurrency': int(os.getenv('WEBSAILOR_EXTRACT_CONCURRENCY', '30')),
+            'domain_concurrency': int(os.getenv('WEBSAILOR_DOMAIN_CONCURRENCY', '2')),
+            'jina_timeout': 8,
+            'direct_timeout': 6
         }
         
         # ===== WEBSAILOR V2 INTEGRATION =====
@@ -4551,8 +4581,30 @@ class AlibabaWebSailorAgent:
             'fallback_reason': reason
         }
     
+    def _build_extraction_result(self, url: str, title: str, description: str,
+                                 content: Optional[str], extraction_method: str) -> Dict[str, Any]:
+        """Resultado final da extração (ou fallback se não houver conteúdo válido)"""
+        if not content or len(content) < 100:
+            logger.warning(f"❌ Nenhum conteúdo válido extraído de {url}")
+            self._mark_url_failed(url)
+            return self._generate_fallback_content(url, title, description, "no_content_extracted")
+
+        # Limpa e processa o conteúdo
+        content_cleaned = content[:8000] if len(content) > 8000 else content
+
+        return {
+            'success': True,
+            'url': url,
+            'title': title,
+            'content': content_cleaned,
+            'extraction_method': extraction_method,
+            'content_length': len(content_cleaned),
+            'word_count': len(content_cleaned.split()),
+            'extracted_at': datetime.now().isoformat()
+        }
+
     def _extract_intelligent_content(self, url: str, title: str, description: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        """MÉTODO CRÍTICO: Extrai conteúdo real inteligente das páginas"""
+        """MÉTODO CRÍTICO: Extrai conteúdo real inteligente das páginas (versão síncrona)"""
         
         try:
             # SKIP AUTOMÁTICO para URLs problemáticas
@@ -4563,107 +4615,109 @@ class AlibabaWebSailorAgent:
             
             logger.info(f"🔍 Extraindo conteúdo inteligente de: {url}")
             
-            # TIMEOUT GLOBAL para toda a extração
-            import time
-            extraction_start_time = time.time()
-            max_extraction_time = 20  # 20 segundos máximo para extração completa
-            
-            # Tenta múltiplos métodos de extração
-            content = None
-            extraction_method = "none"
-            
             # 1. JINA Reader (mais eficaz) - COM TIMEOUT AGRESSIVO
-            if time.time() - extraction_start_time < max_extraction_time:
-                try:
-                    jina_url = f"https://r.jina.ai/{url}"
-                    response = requests.get(jina_url, timeout=8)  # Timeout agressivo de 8s
-                    if response.status_code == 200 and len(response.text) > 500:
-                        content = response.text[:10000]  # Limita para otimização
-                        extraction_method = "jina"
-                        logger.info(f"✅ JINA extraiu {len(content)} caracteres de {url}")
-                except requests.exceptions.Timeout:
-                    logger.warning(f"⏰ Timeout JINA para {url} - pulando para próximo método")
-                except Exception as e:
-                    logger.warning(f"⚠️ JINA falhou para {url}: {str(e)}")
-            else:
-                logger.warning(f"⏰ Timeout global atingido - pulando JINA para {url}")
-            
-            # 2. Trafilatura (fallback) - COM TIMEOUT AGRESSIVO
-            if not content and time.time() - extraction_start_time < max_extraction_time:
-                try:
-                    import trafilatura
-                    import signal
-                    
-                    def timeout_handler(signum, frame):
-                        raise TimeoutError("Trafilatura timeout")
-                    
-                    # Configurar timeout de 6s
-                    signal.signal(signal.SIGALRM, timeout_handler)
-                    signal.alarm(6)
-                    
-                    try:
-                        downloaded = trafilatura.fetch_url(url)
-                        if downloaded:
-                            content = trafilatura.extract(downloaded)
-                            if content and len(content) > 300:
-                                extraction_method = "trafilatura"
-                                logger.info(f"✅ Trafilatura extraiu {len(content)} caracteres de {url}")
-                    finally:
-                        signal.alarm(0)  # Cancelar timeout
-                        
-                except (TimeoutError, Exception) as e:
-                    logger.warning(f"⚠️ Trafilatura falhou para {url}: {str(e)}")
-            elif not content:
-                logger.warning(f"⏰ Timeout global atingido - pulando Trafilatura para {url}")
+            extracted = None
+            try:
+                response = requests.get(f"https://r.jina.ai/{url}", timeout=self.config['jina_timeout'])
+                if response.status_code == 200 and len(response.text) > 500:
+                    extracted = (response.text[:10000], "jina")  # Limita para otimização
+            except requests.exceptions.Timeout:
+                logger.warning(f"⏰ Timeout JINA para {url} - pulando para próximo método")
+            except Exception as e:
+                logger.warning(f"⚠️ JINA falhou para {url}: {str(e)}")
             
-            # 3. BeautifulSoup (último recurso) - COM TIMEOUT AGRESSIVO
-            if not content and time.time() - extraction_start_time < max_extraction_time:
+            # 2. Trafilatura / BeautifulSoup sobre o HTML baixado direto
+            if not extracted:
                 try:
-                    response = requests.get(url, timeout=5, headers={  # 5s timeout
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    })
+                    response = requests.get(url, timeout=self.config['direct_timeout'], headers=DIRECT_EXTRACTION_HEADERS)
                     if response.status_code == 200:
-                        from bs4 import BeautifulSoup
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        
-                        # Remove scripts e styles
-                        for script in soup(["script", "style"]):
-                            script.decompose()
-                        
-                        content = soup.get_text()
-                        content = ' '.join(content.split())  # Limpa espaços
-                        
-                        if len(content) > 300:
-                            extraction_method = "beautifulsoup"
-                            logger.info(f"✅ BeautifulSoup extraiu {len(content)} caracteres de {url}")
+                        extracted = _extract_text_from_html(response.content)
                 except Exception as e:
-                    logger.warning(f"⚠️ BeautifulSoup falhou para {url}: {str(e)}")
+                    logger.warning(f"⚠️ Extração direta falhou para {url}: {str(e)}")
             
-            # Verificar se timeout global foi atingido
-            if time.time() - extraction_start_time >= max_extraction_time:
-                logger.warning(f"⏰ Timeout global de extração atingido para {url} - gerando fallback")
-                self._mark_url_failed(url)
-                return self._generate_fallback_content(url, title, description, "extraction_timeout")
+            content, extraction_method = extracted or (None, "none")
+            if extracted:
+                logger.info(f"✅ {extraction_method} extraiu {len(content)} caracteres de {url}")
+            return self._build_extraction_result(url, title, description, content, extraction_method)
             
-            if not content or len(content) < 100:
-                logger.warning(f"❌ Nenhum conteúdo válido extraído de {url}")
+        except Exception as e:
+            logger.error(f"❌ Erro crítico na extração de {url}: {str(e)}")
+            return None
+
+    async def _fetch_jina_content(self, url: str) -> Optional[Tuple[str, str]]:
+        """Estratégia remota: Jina Reader"""
+        timeout = aiohttp.ClientTimeout(total=self.config['jina_timeout'])
+        async with http_client_registry.session('jina', timeout=timeout) as session:
+            async with session.get(f"https://r.jina.ai/{url}") as response:
+                if response.status != 200:
+                    return None
+                text = await response.text()
+        return (text[:10000], "jina") if len(text) > 500 else None
+
+    async def _fetch_direct_content(self, url: str) -> Optional[Tuple[str, str]]:
+        """Estratégia local: baixa o HTML e extrai com trafilatura/BeautifulSoup fora do event loop"""
+        timeout = aiohttp.ClientTimeout(total=self.config['direct_timeout'])
+        async with http_client_registry.session('web', timeout=timeout, headers=DIRECT_EXTRACTION_HEADERS) as session:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    return None
+                raw = await response.read()
+        return await asyncio.to_thread(_extract_text_from_html, raw)
+
+    async def _extract_intelligent_content_async(self, url: str, title: str, description: str,
+                                                 context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Versão assíncrona de _extract_intelligent_content.
+
+        Jina e a extração local (trafilatura → BeautifulSoup) começam juntas
+        e vale o primeiro resultado bom; a outra é cancelada. Toda a página
+        tem um prazo único de page_timeout segundos.
+        """
+        if not AIOHTTP_AVAILABLE:
+            return await asyncio.to_thread(self._extract_intelligent_content, url, title, description, context)
+
+        try:
+            if self._should_skip_url(url):
+                logger.warning(f"⏭️ Pulando extração de URL problemática: {url}")
                 self._mark_url_failed(url)
-                return self._generate_fallback_content(url, title, description, "no_content_extracted")
-            
-            # Limpa e processa o conteúdo
-            content_cleaned = content[:8000] if len(content) > 8000 else content
-            
-            return {
-                'success': True,
-                'url': url,
-                'title': title,
-                'content': content_cleaned,
-                'extraction_method': extraction_method,
-                'content_length': len(content_cleaned),
-                'word_count': len(content_cleaned.split()),
-                'extracted_at': datetime.now().isoformat()
+                return self._generate_fallback_content(url, title, description, "url_skipped")
+
+            logger.info(f"🔍 Extraindo conteúdo inteligente de: {url}")
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.config['page_timeout']
+            strategies = {
+                asyncio.create_task(self._fetch_jina_content(url)): "jina",
+                asyncio.create_task(self._fetch_direct_content(url)): "direta"
             }
-            
+            extracted = None
+            pending = set(strategies)
+            try:
+                while pending and not extracted:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                    # Empate: mantém a preferência pelo Jina
+                    for task in sorted(done, key=lambda task: strategies[task] != "jina"):
+                        if task.exception() is not None:
+                            logger.warning(f"⚠️ Estratégia {strategies[task]} falhou para {url}: {task.exception()}")
+                        elif task.result() and not extracted:
+                            extracted = task.result()
+            finally:
+                for task in pending:
+                    task.cancel()
+
+            if not extracted and pending:
+                logger.warning(f"⏰ Timeout global de extração atingido para {url} - gerando fallback")
+                self._mark_url_failed(url)
+                return self._generate_fallback_content(url, title, description, "extraction_timeout")
+
+            content, extraction_method = extracted or (None, "none")
+            if extracted:
+                logger.info(f"✅ {extraction_method} extraiu {len(content)} caracteres de {url}")
+            return self._build_extraction_result(url, title, description, content, extraction_method)
+
         except Exception as e:
             logger.error(f"❌ Erro crítico na extração de {url}: {str(e)}")
             return None
@@ -4897,21 +4951,36 @@ class AlibabaWebSailorAgent:
             insights_reais = []
             tendencias_reais = []
             oportunidades_reais = []
-            
-            # Processa cada resultado para extrair CONTEÚDO REAL
-            for i, result in enumerate(search_results[:max_pages]):
+
+            candidatos = [
+                result for result in search_results[:max_pages]
+                if result.get('page_url', '').startswith('http')
+            ]
+
+            # Extração concorrente: limite global e por domínio
+            limite_global = asyncio.Semaphore(self.config['extract_concurrency'])
+            limites_dominio: Dict[str, asyncio.Semaphore] = {}
+
+            async def _extrair(result: Dict[str, Any]):
+                url = result.get('page_url', '')
+                dominio = urlparse(url).netloc.lower()
+                limite_dominio = limites_dominio.setdefault(dominio, asyncio.Semaphore(self.config['domain_concurrency']))
+                async with limite_global, limite_dominio:
+                    logger.info(f"📄 Extraindo conteúdo real de: {result.get('title', '')[:50]}...")
+                    return await self._extract_intelligent_content_async(
+                        url, result.get('title', ''), result.get('description', ''), context
+                    )
+
+            extracoes = await asyncio.gather(*(_extrair(result) for result in candidatos), return_exceptions=True)
+
+            # Processa cada resultado para extrair CONTEÚDO REAL (na ordem da busca)
+            for result, conteudo_extraido in zip(candidatos, extracoes):
                 url = result.get('page_url', '')
                 title = result.get('title', '')
-                
-                if not url or not url.startswith('http'):
-                    continue
-                    
-                logger.info(f"📄 Extraindo conteúdo real de: {title[:50]}...")
-                
-                # EXTRAI CONTEÚDO REAL DA PÁGINA
-                conteudo_extraido = self._extract_intelligent_content(
-                    url, title, result.get('description', ''), context
-                )
+
+                if isinstance(conteudo_extraido, Exception):
+                    logger.error(f"❌ Erro crítico na extração de {url}: {conteudo_extraido}")
+                    conteudo_extraido = None
                 
                 if conteudo_extraido and conteudo_extraido.get('content'):
                     # Adiciona fonte com CONTEÚDO REAL
@@ -5019,7 +5088,7 @@ class AlibabaWebSailorAgent:
             }
 
 # Instância global
-alibaba_websailor = AlibabaWebSailorAgent()
+alibaba_websailor = service_registry.register('alibaba_websailor', AlibabaWebSailorAgent)
 
 # Funções wrapper para compatibilidade
 async def find_viral_images(query: str) -> Tuple[List[ViralImage], str]:
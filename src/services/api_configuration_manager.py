@@ -11,6 +11,7 @@ import logging
 from typing import Dict, List, Any, Optional
 import requests
 import time
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -292,7 +293,7 @@ class APIConfigurationManager:
         }
 
 # Instância global
-api_config_manager = APIConfigurationManager()
+api_config_manager = service_registry.register('api_config_manager', APIConfigurationManager)
 
 # Função para teste rápido
 def test_apis_now():
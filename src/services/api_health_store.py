@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - API Health Store
+Estado de saúde das chaves/modelos/provedores (SQLite WAL) compartilhado entre workers
+"""
+
+import os
+import time
+import atexit
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Callable
+from services.service_registry import service_registry
+from services.sqlite_connections import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+# Escopos usados pelos gerenciadores
+SCOPE_API_KEY = 'api_key'              # chaves de API (identificadas pelo hash da chave)
+SCOPE_OPENROUTER_MODEL = 'openrouter_model'
+SCOPE_SEARCH_PROVIDER = 'search_provider'
+
+
+def api_key_id(api_key: str) -> str:
+    """Identificador estável da chave (hash), igual em todos os workers e gerenciadores"""
+    return hashlib.sha256((api_key or '').strip().encode('utf-8')).hexdigest()[:16]
+
+
+class APIHealthStore:
+    """
+    Saúde de APIs compartilhada por todos os processos (workers do Gunicorn).
+
+    Cada entrada (escopo, nome) guarda cooldown, esgotamento de créditos,
+    taxa de erro em janela deslizante (API_HEALTH_WINDOW segundos, aproximada
+    pela janela atual + anterior) e cota por período. Escritas de
+    leitura-modificação usam BEGIN IMMEDIATE e são atômicas entre processos.
+    A lista de bloqueados de cada escopo é relida no máximo a cada
+    API_HEALTH_READ_TTL segundos por processo.
+
+    record_result, set_cooldown e mark_credits_exhausted não tocam o disco
+    no chamador: contadores são somados em memória e, junto com os
+    bloqueios, gravados por uma thread em uma única transação a cada
+    API_HEALTH_FLUSH_INTERVAL segundos (bloqueios acordam a thread na
+    hora). Até a gravação, os bloqueios do próprio processo já valem em
+    blocked(). consume_quota e set_quota continuam síncronos.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = Path(db_path or os.getenv('API_HEALTH_DB_PATH', 'analyses_data/cache/api_health.db'))
+        self.enabled = os.getenv('API_HEALTH_ENABLED', 'true').lower() == 'true'
+        self.window = float(os.getenv('API_HEALTH_WINDOW', '300'))
+        self.read_ttl = float(os.getenv('API_HEALTH_READ_TTL', '1.0'))
+        self.credits_ttl = int(os.getenv('API_HEALTH_CREDITS_TTL', str(24 * 3600)))
+        self.flush_interval = float(os.getenv('API_HEALTH_FLUSH_INTERVAL', '2.0'))
+
+        self._lock = threading.Lock()
+        self._blocked_cache: Dict[str, Any] = {}
+
+        # Escritas adiadas: contadores somados, bloqueios na ordem de chegada
+        self._pending_lock = threading.Lock()
+        self._pending_counts: Dict[Tuple[str, str], List[Any]] = {}
+        self._pending_ops: List[Tuple[str, str, Optional[str], Callable]] = []
+        self._pending_blocks: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_pid: Optional[int] = None
+
+        self.stats = {
+            'reads': 0,
+            'cached_reads': 0,
+            'writes': 0,
+            'flushes': 0,
+            'blocked_skips': 0
+        }
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = SQLiteConnections(self.db_path, isolation_level=None)
+        self._init_database()
+        atexit.register(self.flush)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexão da thread atual (aberta e configurada uma única vez)"""
+        return self._db.connection()
+
+    def _init_database(self):
+        """Inicializa banco de dados SQLite"""
+        try:
+            self._connect().execute("""
+                CREATE TABLE IF NOT EXISTS api_health (
+                    scope TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    label TEXT,
+                    cooldown_until REAL NOT NULL DEFAULT 0,
+                    cooldown_reason TEXT,
+                    credits_exhausted_until REAL NOT NULL DEFAULT 0,
+                    window_start REAL NOT NULL DEFAULT 0,
+                    window_requests INTEGER NOT NULL DEFAULT 0,
+                    window_errors INTEGER NOT NULL DEFAULT 0,
+                    prev_requests INTEGER NOT NULL DEFAULT 0,
+                    prev_errors INTEGER NOT NULL DEFAULT 0,
+                    quota_limit INTEGER NOT NULL DEFAULT 0,
+                    quota_period REAL NOT NULL DEFAULT 0,
+                    quota_used INTEGER NOT NULL DEFAULT 0,
+                    quota_reset_at REAL NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (scope, name)
+                )
+            """)
+        except Exception as e:
+            logger.error(f"❌ Erro ao inicializar store de saúde de APIs: {e}")
+            self.enabled = False
+
+    def _apply(self, conn: sqlite3.Connection, scope: str, name: str, label: Optional[str], mutate, now: float):
+        """Lê, aplica `mutate(row, now)` e grava a linha (dentro de uma transação aberta)"""
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        current = cursor.execute(
+            "SELECT * FROM api_health WHERE scope = ? AND name = ?", (scope, name)
+        ).fetchone()
+        row = dict(current) if current else {
+            'scope': scope, 'name': name, 'label': label,
+            'cooldown_until': 0.0, 'cooldown_reason': None, 'credits_exhausted_until': 0.0,
+            'window_start': now, 'window_requests': 0, 'window_errors': 0,
+            'prev_requests': 0, 'prev_errors': 0,
+            'quota_limit': 0, 'quota_period': 0.0, 'quota_used': 0, 'quota_reset_at': 0.0,
+            'updated_at': now
+        }
+        row['label'] = label or row['label']
+        result = mutate(row, now)
+        row['updated_at'] = now
+        columns = list(row)
+        conn.execute(
+            f"INSERT OR REPLACE INTO api_health ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})",
+            [row[column] for column in columns]
+        )
+        return result if result is not None else row
+
+    def _update(self, scope: str, name: str, label: Optional[str], mutate) -> Optional[Dict[str, Any]]:
+        """Lê, aplica `mutate(row)` e grava a linha numa transação exclusiva"""
+        if not self.enabled:
+            return None
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    result = self._apply(conn, scope, name, label, mutate, time.time())
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                self._blocked_cache.pop(scope, None)
+            self.stats['writes'] += 1
+            return result
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao atualizar saúde de {scope}/{name}: {e}")
+            return None
+
+    # Escritas adiadas
+
+    def _ensure_flusher(self):
+        """Thread de gravação do processo atual (recriada após fork)"""
+        if self._flusher_pid == os.getpid() and self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._pending_lock:
+            if self._flusher_pid == os.getpid() and self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher_pid = os.getpid()
+            self._flusher = threading.Thread(target=self._flush_loop, name='api-health-flush', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _defer(self, scope: str, name: str, label: Optional[str], mutate, block: Dict[str, Any] = None):
+        """Enfileira uma escrita; `block` entra já na visão local de bloqueados"""
+        if not self.enabled:
+            return
+        with self._pending_lock:
+            self._pending_ops.append((scope, name, label, mutate))
+            if block:
+                self._pending_blocks.setdefault(scope, {})[name] = block
+        self._ensure_flusher()
+        self._wakeup.set()
+
+    def flush(self):
+        """Grava contadores e bloqueios pendentes numa única transação"""
+        with self._pending_lock:
+            counts, self._pending_counts = self._pending_counts, {}
+            ops, self._pending_ops = self._pending_ops, []
+            blocks = {scope: dict(names) for scope, names in self._pending_blocks.items()}
+        if not (counts or ops) or not self.enabled:
+            return
+
+        def count(requests, errors):
+            def mutate(row, now):
+                self._roll_window(row, now)
+                row['window_requests'] += requests
+                row['window_errors'] += errors
+                return None
+            return mutate
+
+        updates = [(scope, name, label, count(requests, errors))
+                   for (scope, name), (requests, errors, label) in counts.items()] + ops
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    now = time.time()
+                    for scope, name, label, mutate in updates:
+                        self._apply(conn, scope, name, label, mutate, now)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                for scope in {update[0] for update in updates}:
+                    self._blocked_cache.pop(scope, None)
+            self.stats['writes'] += len(updates)
+            self.stats['flushes'] += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao gravar saúde de APIs ({len(updates)} atualizações descartadas): {e}")
+        finally:
+            # Bloqueios gravados (ou descartados) saem da visão local, salvo se renovados nesse meio-tempo
+            with self._pending_lock:
+                for scope, names in blocks.items():
+                    pending = self._pending_blocks.get(scope, {})
+                    for name, block in names.items():
+                        if pending.get(name) is block:
+                            del pending[name]
+                    if not pending:
+                        self._pending_blocks.pop(scope, None)
+
+    def _roll_window(self, row: Dict[str, Any], now: float):
+        elapsed = now - row['window_start']
+        if elapsed >= 2 * self.window:
+            row['prev_requests'] = row['prev_errors'] = 0
+        elif elapsed >= self.window:
+            row['prev_requests'], row['prev_errors'] = row['window_requests'], row['window_errors']
+        else:
+            return
+        row['window_requests'] = row['window_errors'] = 0
+        row['window_start'] = now - (elapsed % self.window)
+
+    def _error_rate(self, row: Dict[str, Any], now: float) -> float:
+        """Taxa de erro da janela deslizante (janela anterior ponderada pelo tempo restante)"""
+        weight = max(0.0, 1.0 - (now - row['window_start']) / self.window)
+        requests = row['window_requests'] + row['prev_requests'] * weight
+        errors = row['window_errors'] + row['prev_errors'] * weight
+        return errors / requests if requests else 0.0
+
+    def record_result(self, scope: str, name: str, success: bool, label: str = None):
+        """Conta uma requisição (e erro) na janela deslizante; gravado no próximo flush"""
+        if not self.enabled:
+            return
+        with self._pending_lock:
+            entry = self._pending_counts.setdefault((scope, name), [0, 0, label])
+            entry[0] += 1
+            if not success:
+                entry[1] += 1
+            entry[2] = label or entry[2]
+        self._ensure_flusher()
+
+    def set_cooldown(self, scope: str, name: str, seconds: float, reason: str = None, label: str = None):
+        """Indisponível por `seconds` (mantém o maior prazo se já houver cooldown)"""
+        until = time.time() + seconds
+        reason = (reason or '')[:300]
+
+        def mutate(row, now):
+            if until > row['cooldown_until']:
+                row['cooldown_until'] = until
+                row['cooldown_reason'] = reason
+            return None
+        self._defer(scope, name, label, mutate, {'until': until, 'reason': reason, 'credits_exhausted': False})
+
+    def mark_credits_exhausted(self, scope: str, name: str, seconds: float = None,
+                               reason: str = None, label: str = None):
+        """Sem créditos: indisponível para todos os workers por `seconds` (padrão API_HEALTH_CREDITS_TTL)"""
+        until = time.time() + (seconds if seconds is not None else self.credits_ttl)
+        reason = (reason or 'sem créditos')[:300]
+
+        def mutate(row, now):
+            row['credits_exhausted_until'] = until
+            row['cooldown_reason'] = reason
+            return None
+        self._defer(scope, name, label, mutate, {'until': until, 'reason': reason, 'credits_exhausted': True})
+
+    def clear(self, scope: str, name: str = None):
+        """Remove cooldown e esgotamento (de um nome ou do escopo inteiro)"""
+        if not self.enabled:
+            return
+        query = "UPDATE api_health SET cooldown_until = 0, credits_exhausted_until = 0, cooldown_reason = NULL WHERE scope = ?"
+        params = [scope]
+        if name is not None:
+            query += " AND name = ?"
+            params.append(name)
+        # Bloqueios ainda pendentes seriam regravados depois da limpeza
+        self.flush()
+        try:
+            with self._lock:
+                self._connect().execute(query, params)
+                self._blocked_cache.pop(scope, None)
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao limpar saúde de {scope}: {e}")
+
+    def set_quota(self, scope: str, name: str, limit: int, period_seconds: float, label: str = None):
+        """Define cota de `limit` requisições por `period_seconds` (0 desativa)"""
+        def mutate(row, now):
+            if row['quota_limit'] != limit or row['quota_period'] != period_seconds:
+                row['quota_limit'] = limit
+                row['quota_period'] = period_seconds
+                row['quota_reset_at'] = max(row['quota_reset_at'], now + period_seconds) if limit else 0.0
+            return None
+        self._update(scope, name, label, mutate)
+
+    def consume_quota(self, scope: str, name: str, amount: int = 1) -> bool:
+        """Debita a cota atomicamente; False se esgotada no período atual"""
+        def mutate(row, now):
+            if not row['quota_limit']:
+                return True
+            if now >= row['quota_reset_at']:
+                row['quota_used'] = 0
+                row['quota_reset_at'] = now + row['quota_period']
+            if row['quota_used'] + amount > row['quota_limit']:
+                return False
+            row['quota_used'] += amount
+            return True
+        result = self._update(scope, name, None, mutate)
+        return result is not False
+
+    def blocked(self, scope: str) -> Dict[str, Dict[str, Any]]:
+        """Nomes indisponíveis no escopo → {until, reason, credits_exhausted}"""
+        if not self.enabled:
+            return {}
+
+        now = time.time()
+        cached = self._blocked_cache.get(scope)
+        if cached and now - cached[0] < self.read_ttl:
+            self.stats['cached_reads'] += 1
+            return self._with_pending_blocks(scope, cached[1], now)
+
+        try:
+            rows = self._connect().execute(
+                """SELECT name, cooldown_until, credits_exhausted_until, cooldown_reason,
+                          quota_limit, quota_used, quota_reset_at
+                   FROM api_health
+                   WHERE scope = ? AND (cooldown_until > ? OR credits_exhausted_until > ?
+                                        OR (quota_limit > 0 AND quota_used >= quota_limit AND quota_reset_at > ?))""",
+                (scope, now, now, now)
+            ).fetchall()
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao ler saúde de {scope}: {e}")
+            return self._with_pending_blocks(scope, {}, now)
+
+        result = {}
+        for name, cooldown_until, credits_until, reason, quota_limit, quota_used, quota_reset_at in rows:
+            quota_until = quota_reset_at if quota_limit and quota_used >= quota_limit else 0.0
+            result[name] = {
+                'until': max(cooldown_until, credits_until, quota_until),
+                'reason': reason if max(cooldown_until, credits_until) > now else 'cota esgotada',
+                'credits_exhausted': credits_until > now
+            }
+        self._blocked_cache[scope] = (now, result)
+        self.stats['reads'] += 1
+        return self._with_pending_blocks(scope, result, now)
+
+    def _with_pending_blocks(self, scope: str, blocked: Dict[str, Dict[str, Any]], now: float) -> Dict[str, Dict[str, Any]]:
+        """Acrescenta os bloqueios deste processo que ainda aguardam o flush"""
+        with self._pending_lock:
+            pending = {
+                name: block for name, block in self._pending_blocks.get(scope, {}).items()
+                if block['until'] > now and (name not in blocked or blocked[name]['until'] < block['until'])
+            }
+        return {**blocked, **pending} if pending else blocked
+
+    def is_blocked(self, scope: str, name: str) -> bool:
+        """True se em cooldown, sem créditos ou com cota esgotada (visão de todos os workers)"""
+        if name in self.blocked(scope):
+            self.stats['blocked_skips'] += 1
+            return True
+        return False
+
+    def get(self, scope: str, name: str) -> Optional[Dict[str, Any]]:
+        """Estado completo de uma entrada, com error_rate calculado (contadores até o último flush)"""
+        if not self.enabled:
+            return None
+        try:
+            cursor = self._connect().cursor()
+            cursor.row_factory = sqlite3.Row
+            row = cursor.execute(
+                "SELECT * FROM api_health WHERE scope = ? AND name = ?", (scope, name)
+            ).fetchone()
+        except Exception:
+            return None
+        if row is None:
+            return None
+        now = time.time()
+        entry = dict(row)
+        self._roll_window(entry, now)
+        entry['error_rate'] = round(self._error_rate(entry, now), 4)
+        entry['available'] = not (entry['cooldown_until'] > now or entry['credits_exhausted_until'] > now or
+                                  (entry['quota_limit'] and entry['quota_used'] >= entry['quota_limit']
+                                   and entry['quota_reset_at'] > now))
+        return entry
+
+    def error_rate(self, scope: str, name: str) -> float:
+        entry = self.get(scope, name)
+        return entry['error_rate'] if entry else 0.0
+
+    def reset(self, scope: str = None):
+        """Apaga o estado (de um escopo ou tudo)"""
+        if not self.enabled:
+            return
+        self.flush()
+        with self._lock:
+            conn = self._connect()
+            if scope:
+                conn.execute("DELETE FROM api_health WHERE scope = ?", (scope,))
+            else:
+                conn.execute("DELETE FROM api_health")
+            self._blocked_cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Entradas por escopo, bloqueios ativos e contadores"""
+        scopes: Dict[str, Dict[str, int]] = {}
+        try:
+            now = time.time()
+            for scope, total, blocked in self._connect().execute(
+                """SELECT scope, COUNT(*),
+                          SUM(CASE WHEN cooldown_until > ? OR credits_exhausted_until > ? THEN 1 ELSE 0 END)
+                   FROM api_health GROUP BY scope""",
+                (now, now)
+            ):
+                scopes[scope] = {'entries': total, 'blocked': blocked or 0}
+        except Exception:
+            pass
+        with self._pending_lock:
+            pending = sum(requests for requests, _, _ in self._pending_counts.values()) + len(self._pending_ops)
+        return {
+            'enabled': self.enabled,
+            'db_path': str(self.db_path),
+            'window_seconds': self.window,
+            'flush_interval': self.flush_interval,
+            'pending_writes': pending,
+            'scopes': scopes,
+            **self.stats
+        }
+
+
+# Instância global
+api_health_store = service_registry.register('api_health_store', APIHealthStore)
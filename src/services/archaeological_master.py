@@ -12,6 +12,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from services.ai_manager import ai_manager
 from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -777,4 +778,4 @@ CRÍTICO: Use APENAS dados REAIS da pesquisa. Seja cirúrgico, obsessivo e impla
         }
 
 # Instância global
-archaeological_master = ArchaeologicalMaster()
\ No newline at end of file
+archaeological_master = service_registry.register('archaeological_master', ArchaeologicalMaster)
\ No newline at end of file
@@ -9,12 +9,27 @@ import os
 import json
 import logging
 import asyncio
+import atexit
+import shutil
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable
 from pathlib import Path
 import re
-from collections import Counter
+import struct
+from contextlib import contextmanager
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 import hashlib # Importado para hashing de URL
+from services.service_registry import service_registry
+from services.http_client_registry import http_client_registry
+from utils.json_serializer import dump_to_file, to_serializable, is_json_native, MAX_DEPTH
+
+try:
+    import fcntl  # Lock entre processos (indisponível no Windows)
+except ImportError:
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +67,141 @@ def serializar_dados_seguros(dados: Any) -> Dict[str, Any]:
     serializable_data["timestamp"] = datetime.now().isoformat()
     return serializable_data
 
+class EscritorDiferido:
+    """
+    Fila de escrita em segundo plano (write-behind) para o AutoSaveManager.
+
+    As etapas são enfileiradas e gravadas em lotes por uma thread dedicada,
+    na ordem de chegada. Cada snapshot tem seu próprio arquivo, então nada é
+    coalescido: todo caminho devolvido por salvar_etapa chega ao disco.
+    """
+
+    def __init__(self, max_pendentes: int = 500, tamanho_lote: int = 32):
+        self.max_pendentes = max_pendentes
+        self.tamanho_lote = tamanho_lote
+
+        self._cond = threading.Condition()
+        self._pendentes: "deque[Dict[str, Any]]" = deque()
+        self._em_escrita: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+
+        self._metricas = {
+            'enfileiradas': 0,
+            'gravadas': 0,
+            'sincronas_por_fila_cheia': 0,
+            'erros': 0,
+            'latencia_total_ms': 0.0,
+            'latencia_max_ms': 0.0
+        }
+
+    def enfileirar(self, session_id: Optional[str], tarefa: Callable[[], Any]) -> bool:
+        """
+        Enfileira uma tarefa de escrita.
+
+        Returns:
+            False se a fila estiver cheia (o chamador deve gravar de forma síncrona)
+        """
+        with self._cond:
+            if len(self._pendentes) >= self.max_pendentes:
+                self._metricas['sincronas_por_fila_cheia'] += 1
+                return False
+
+            self._pendentes.append({
+                'session_id': session_id,
+                'tarefa': tarefa,
+                'enfileirado_em': time.monotonic()
+            })
+            self._metricas['enfileiradas'] += 1
+            self._garantir_thread()
+            self._cond.notify_all()
+            return True
+
+    def flush(self, session_id: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Aguarda a gravação das escritas pendentes (de uma sessão ou de todas).
+
+        Returns:
+            True se tudo foi gravado dentro do timeout
+        """
+        def _concluido():
+            if session_id is None:
+                return not self._pendentes and not self._em_escrita
+            return (
+                self._em_escrita[session_id] == 0 and
+                not any(item['session_id'] == session_id for item in self._pendentes)
+            )
+
+        with self._cond:
+            return self._cond.wait_for(_concluido, timeout=timeout)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Retorna profundidade da fila e latências de escrita"""
+        with self._cond:
+            metricas = dict(self._metricas)
+            gravadas = metricas['gravadas']
+            metricas['profundidade_fila'] = len(self._pendentes)
+            metricas['em_escrita'] = sum(self._em_escrita.values())
+            metricas['latencia_media_ms'] = round(metricas['latencia_total_ms'] / gravadas, 2) if gravadas else 0.0
+            metricas['pendentes_por_sessao'] = dict(Counter(
+                item['session_id'] for item in self._pendentes if item['session_id']
+            ))
+            return metricas
+
+    def _garantir_thread(self):
+        """Inicia a thread escritora sob demanda (chamado com o lock adquirido)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="auto-save-writer", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        """Loop da thread escritora: drena a fila em lotes"""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: bool(self._pendentes))
+                lote = []
+                while self._pendentes and len(lote) < self.tamanho_lote:
+                    item = self._pendentes.popleft()
+                    self._em_escrita[item['session_id']] += 1
+                    lote.append(item)
+
+            for item in lote:
+                erro = False
+                try:
+                    item['tarefa']()
+                except Exception as e:
+                    erro = True
+                    logger.error(f"❌ Erro na escrita diferida: {e}")
+
+                latencia_ms = (time.monotonic() - item['enfileirado_em']) * 1000
+                with self._cond:
+                    self._em_escrita[item['session_id']] -= 1
+                    if self._em_escrita[item['session_id']] <= 0:
+                        del self._em_escrita[item['session_id']]
+                    self._metricas['erros' if erro else 'gravadas'] += 1
+                    if not erro:
+                        self._metricas['latencia_total_ms'] += latencia_ms
+                        self._metricas['latencia_max_ms'] = max(self._metricas['latencia_max_ms'], latencia_ms)
+                    self._cond.notify_all()
+
+# Espera máxima (s) por flush das escritas pendentes
+AUTO_SAVE_FLUSH_TIMEOUT = float(os.getenv('AUTO_SAVE_FLUSH_TIMEOUT', '30'))
+
+# Escritor compartilhado por todas as instâncias do AutoSaveManager
+escritor_diferido = EscritorDiferido(
+    max_pendentes=int(os.getenv('AUTO_SAVE_MAX_PENDING', '500'))
+)
+atexit.register(escritor_diferido.flush, None, AUTO_SAVE_FLUSH_TIMEOUT)
+
+# Análises preditivas (LLM/NLP) acionadas após salvar: rodam fora da thread
+# escritora para não bloquear as gravações enfileiradas atrás delas
+executor_preditivo = ThreadPoolExecutor(
+    max_workers=int(os.getenv('AUTO_SAVE_PREDICTIVE_WORKERS', '2')),
+    thread_name_prefix='auto-save-predictive'
+)
+
+class EscritasPendentesError(RuntimeError):
+    """Escritas da sessão não chegaram ao disco dentro do timeout do flush"""
+
 class AutoSaveManager:
     """Gerenciador automático de salvamento de dados - CENTRALIZADO"""
 
@@ -61,6 +211,18 @@ class AutoSaveManager:
         self.base_dir = "analyses_data"
         self.relatorios_dir = "relatorios_intermediarios"
 
+        # Modo write-behind: salvar_etapa apenas enfileira e retorna o caminho
+        self.write_behind = os.getenv('AUTO_SAVE_WRITE_BEHIND', 'true').lower() == 'true'
+        self.escritor = escritor_diferido
+
+        # Desempate de nomes gerados no mesmo milissegundo
+        self._lock_nomes = threading.Lock()
+        self._ultimo_timestamp = None
+        self._repeticoes_timestamp = 0
+
+        # Arquivos lidos por máquina (etapas, dados massivos) são gravados sem indentação
+        self.pretty_json = os.getenv('AUTO_SAVE_PRETTY_JSON', 'false').lower() == 'true'
+
         # Cria diretórios necessários
         os.makedirs(self.base_dir, exist_ok=True)
         os.makedirs(self.relatorios_dir, exist_ok=True)
@@ -216,8 +378,7 @@ class AutoSaveManager:
             }
 
             # Salva arquivo final
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(massive_data_final, f, ensure_ascii=False, indent=2)
+            self._gravar_json(filepath, massive_data_final)
 
             file_size = os.path.getsize(filepath) / 1024  # KB
             logger.info(f"✅ Resultado massivo salvo: {filename} ({file_size:.1f}KB)")
@@ -274,25 +435,11 @@ class AutoSaveManager:
             return None
 
     def _save_to_consolidated(self, content_data: Dict[str, Any], session_id: str, category: str) -> Optional[str]:
-        """Adiciona conteúdo ao arquivo consolidado da sessão"""
+        """Adiciona conteúdo ao log consolidado da sessão"""
         try:
-            # Caminho do arquivo consolidado
+            # Diretório do log consolidado
             dir_path = os.path.join(self.base_dir, category, session_id)
-            os.makedirs(dir_path, exist_ok=True)
-            filepath = os.path.join(dir_path, "consolidado.json")
-
-            # Carrega arquivo existente ou cria novo
-            if os.path.exists(filepath):
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    consolidated_data = json.load(f)
-            else:
-                consolidated_data = {
-                    'session_id': session_id,
-                    'created_at': datetime.now().isoformat(),
-                    'trechos': []
-                }
 
-            # Adiciona novo trecho
             new_entry = {
                 'url': content_data['url'],
                 'titulo': content_data.get('titulo', ''),
@@ -302,15 +449,7 @@ class AutoSaveManager:
                 'timestamp_adicao': datetime.now().isoformat()
             }
 
-            consolidated_data['trechos'].append(new_entry)
-            consolidated_data['updated_at'] = datetime.now().isoformat()
-            consolidated_data['total_trechos'] = len(consolidated_data['trechos'])
-
-            # Salva arquivo consolidado
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(consolidated_data, f, ensure_ascii=False, indent=2)
-
-            return filepath
+            return self._anexar_ao_log_consolidado(dir_path, new_entry)
 
         except Exception as e:
             logger.error(f"❌ Erro ao salvar no consolidado: {e}")
@@ -448,10 +587,17 @@ class AutoSaveManager:
 
 
     def salvar_etapa(self, nome_etapa: str, dados: Any, categoria: str = "analise_completa", session_id: str = None) -> str:
-        """Salva uma etapa do processo com timestamp"""
+        """
+        Salva uma etapa do processo com timestamp
+
+        No modo write-behind os dados são copiados no momento da chamada, a
+        gravação é feita pela thread escritora e o caminho do arquivo JSON é
+        retornado imediatamente. Use flush(session_id) antes de ler os
+        arquivos da sessão do disco.
+        """
         try:
-            # Gera timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+            # Gera timestamp (único por chamada, mesmo dentro do mesmo milissegundo)
+            timestamp = self._gerar_timestamp_unico()
 
             # Define diretório base
             if session_id:
@@ -459,10 +605,51 @@ class AutoSaveManager:
             else:
                 diretorio = f"{self.relatorios_dir}/{categoria}"
 
-            os.makedirs(diretorio, exist_ok=True)
-
             # Nome do arquivo
             nome_arquivo = f"{nome_etapa}_{timestamp}"
+            arquivo_json = f"{diretorio}/{nome_arquivo}.json"
+
+            if self.write_behind:
+                instantaneo = self._copiar_para_escrita(dados)
+                if instantaneo is not None:
+                    tarefa = lambda: self._persistir_etapa(nome_etapa, instantaneo, categoria, session_id, diretorio, nome_arquivo, timestamp)
+                    if self.escritor.enfileirar(session_id, tarefa):
+                        return arquivo_json
+
+            return self._persistir_etapa(nome_etapa, dados, categoria, session_id, diretorio, nome_arquivo, timestamp)
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao salvar etapa {nome_etapa}: {e}")
+            return ""
+
+    def _gerar_timestamp_unico(self) -> str:
+        """Timestamp em ms; chamadas no mesmo milissegundo recebem sufixo sequencial"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        with self._lock_nomes:
+            if timestamp == self._ultimo_timestamp:
+                self._repeticoes_timestamp += 1
+                return f"{timestamp}_{self._repeticoes_timestamp}"
+            self._ultimo_timestamp = timestamp
+            self._repeticoes_timestamp = 0
+        return timestamp
+
+    def _copiar_para_escrita(self, dados: Any) -> Any:
+        """
+        Snapshot independente dos dados do chamador (apenas tipos JSON, sem
+        limites), para que alterações posteriores não vazem para o arquivo.
+        Retorna None se a cópia falhar; o chamador grava de forma síncrona.
+        """
+        try:
+            return to_serializable(dados, max_depth=None, max_items=None, max_set_items=None)
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível copiar dados para escrita diferida: {e}")
+            return None
+
+    def _persistir_etapa(self, nome_etapa: str, dados: Any, categoria: str, session_id: Optional[str],
+                         diretorio: str, nome_arquivo: str, timestamp: str) -> str:
+        """Grava uma etapa no disco (síncrono ou pela thread escritora)"""
+        try:
+            os.makedirs(diretorio, exist_ok=True)
 
             # Salva como JSON se possível
             try:
@@ -481,13 +668,15 @@ class AutoSaveManager:
                         "original_data": dados_serializaveis
                     }
 
-                with open(arquivo_json, 'w', encoding='utf-8') as f:
-                    json.dump(dados_serializaveis, f, ensure_ascii=False, indent=2)
+                self._gravar_json(arquivo_json, dados_serializaveis)
 
                 logger.info(f"💾 Etapa '{nome_etapa}' salva: {arquivo_json}")
 
-                # INTEGRAÇÃO COM ANÁLISE PREDITIVA
-                self._trigger_predictive_analysis(nome_etapa, dados_serializaveis, categoria, session_id)
+                # INTEGRAÇÃO COM ANÁLISE PREDITIVA (executor próprio, fora da escrita)
+                if session_id:
+                    executor_preditivo.submit(
+                        self._trigger_predictive_analysis, nome_etapa, dados_serializaveis, categoria, session_id
+                    )
 
                 # TAMBÉM salva na pasta analyses_data se for um módulo
                 # Lista de categorias que devem ser salvas em analyses_data
@@ -510,8 +699,8 @@ class AutoSaveManager:
                         analyses_arquivo_nome = f"{nome_modulo_base}_{timestamp}.json" if session_id is None else f"{nome_modulo_base}_{session_id}_{timestamp}.json"
                         analyses_arquivo = os.path.join(analyses_dir, analyses_arquivo_nome)
 
-                        with open(analyses_arquivo, 'w', encoding='utf-8') as f:
-                            json.dump(dados_serializaveis, f, ensure_ascii=False, indent=2)
+                        # O conteúdo é idêntico: cria hard link em vez de serializar de novo
+                        self._vincular_copia(arquivo_json, analyses_arquivo)
 
                         logger.info(f"💾 Módulo também salvo em analyses_data: {analyses_arquivo}")
 
@@ -537,6 +726,44 @@ class AutoSaveManager:
             logger.error(f"❌ Erro ao salvar etapa {nome_etapa}: {e}")
             return ""
 
+    def _vincular_copia(self, origem: str, destino: str):
+        """Cria hard link de origem em destino; copia o arquivo se o FS não suportar links"""
+        try:
+            if os.path.exists(destino):
+                os.remove(destino)
+            os.link(origem, destino)
+        except OSError:
+            shutil.copyfile(origem, destino)
+
+    def flush(self, session_id: str = None, timeout: float = AUTO_SAVE_FLUSH_TIMEOUT) -> bool:
+        """
+        Aguarda a gravação das etapas pendentes da sessão (ou de todas).
+        Bloqueante: em código assíncrono use asyncio.to_thread.
+        """
+        concluido = self.escritor.flush(session_id, timeout)
+        if not concluido:
+            logger.warning(f"⚠️ Escritas pendentes não concluídas em {timeout}s (sessão: {session_id or 'todas'})")
+        return concluido
+
+    def garantir_gravacao(self, session_id: str = None, tentativas: int = 2,
+                          timeout: float = None):
+        """
+        Flush obrigatório antes de ler a sessão do disco: repete o flush e
+        levanta EscritasPendentesError se ainda restarem escritas pendentes.
+        """
+        if timeout is None:
+            timeout = AUTO_SAVE_FLUSH_TIMEOUT
+        for _ in range(max(1, tentativas)):
+            if self.flush(session_id, timeout):
+                return
+        raise EscritasPendentesError(
+            f"Escritas pendentes da sessão {session_id or 'todas'} não gravadas após {tentativas} flush(es)"
+        )
+
+    def get_write_behind_metrics(self) -> Dict[str, Any]:
+        """Métricas da fila de escrita diferida (profundidade e latência)"""
+        return {'enabled': self.write_behind, **self.escritor.get_metrics()}
+
     # === NOVA FUNÇÃO: salvar_trecho_pesquisa_web ===
     def salvar_trecho_pesquisa_web(self, url: str, titulo: str, conteudo: str, metodo_extracao: str, qualidade: float, session_id: str = None) -> str:
         """
@@ -710,35 +937,287 @@ class AutoSaveManager:
             return 0.0
 
     def _adicionar_ao_arquivo_consolidado(self, session_id: str, trecho_data: Dict[str, Any]):
-        """Adiciona trecho ao arquivo consolidado da sessão"""
+        """Adiciona trecho ao log consolidado da sessão"""
         try:
-            consolidado_path = os.path.join(self.base_dir, 'pesquisa_web', session_id, 'consolidado.json') # Use analyses_path consistently
+            session_dir = os.path.join(self.base_dir, 'pesquisa_web', session_id)
+            consolidado_path = self._anexar_ao_log_consolidado(session_dir, trecho_data)
 
-            # Carrega arquivo existente ou cria novo
-            if os.path.exists(consolidado_path):
-                with open(consolidado_path, 'r', encoding='utf-8') as f:
-                    consolidado = json.load(f)
-            else:
-                consolidado = {
+            logger.info(f"✅ Trecho adicionado ao arquivo consolidado: {consolidado_path}")
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao adicionar ao arquivo consolidado: {e}")
+
+    # === LOG CONSOLIDADO APPEND-ONLY (JSONL) ===
+    #
+    # consolidado.jsonl     -> um trecho por linha, apenas anexado
+    # consolidado.jsonl.idx -> registros fixos (offset, tamanho) de cada linha
+    # consolidado.json      -> snapshot legado gerado na compactação
+    #
+    # O índice é derivado do log: se o último registro não terminar exatamente
+    # no fim do log (queda entre as escritas ou entre os os.replace da
+    # compactação), ele é reconstruído a partir do log antes do uso.
+
+    CONSOLIDADO_LOG = "consolidado.jsonl"
+    CONSOLIDADO_INDICE = "consolidado.jsonl.idx"
+    CONSOLIDADO_SNAPSHOT = "consolidado.json"
+    _REGISTRO_INDICE = struct.Struct("<QI")
+
+    _locks_consolidado: Dict[str, threading.Lock] = {}
+    _locks_consolidado_guard = threading.Lock()
+
+    @contextmanager
+    def _lock_consolidado(self, dir_path: str):
+        """Lock exclusivo do log da sessão (entre threads e, se possível, entre processos)"""
+        chave = os.path.abspath(dir_path)
+        with AutoSaveManager._locks_consolidado_guard:
+            lock = AutoSaveManager._locks_consolidado.get(chave)
+            if lock is None:
+                lock = AutoSaveManager._locks_consolidado[chave] = threading.Lock()
+
+        with lock:
+            # Arquivo de lock separado: o log é substituído na compactação
+            with open(os.path.join(dir_path, self.CONSOLIDADO_LOG + '.lock'), 'a') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _anexar_ao_log_consolidado(self, dir_path: str, entrada: Dict[str, Any]) -> str:
+        """Anexa uma entrada ao log JSONL em tempo constante e registra seu offset no índice"""
+        os.makedirs(dir_path, exist_ok=True)
+        log_path = os.path.join(dir_path, self.CONSOLIDADO_LOG)
+        indice_path = os.path.join(dir_path, self.CONSOLIDADO_INDICE)
+
+        linha = (json.dumps(entrada, ensure_ascii=False, default=str) + "\n").encode('utf-8')
+
+        with self._lock_consolidado(dir_path):
+            if not os.path.exists(log_path):
+                self._migrar_snapshot_legado(dir_path)
+            elif not self._indice_consistente(log_path, indice_path):
+                self._reconstruir_indice(dir_path)
+
+            with open(log_path, 'ab') as log_file, open(indice_path, 'ab') as indice_file:
+                log_file.seek(0, os.SEEK_END)
+                offset = log_file.tell()
+                log_file.write(linha)
+                log_file.flush()
+                indice_file.write(self._REGISTRO_INDICE.pack(offset, len(linha)))
+
+        return log_path
+
+    def _indice_consistente(self, log_path: str, indice_path: str) -> bool:
+        """True se o último registro do índice termina exatamente no fim do log"""
+        tamanho_log = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+        tamanho_indice = os.path.getsize(indice_path) if os.path.exists(indice_path) else 0
+
+        if tamanho_indice % self._REGISTRO_INDICE.size:
+            return False
+        if tamanho_indice == 0:
+            return tamanho_log == 0
+
+        with open(indice_path, 'rb') as indice_file:
+            indice_file.seek(-self._REGISTRO_INDICE.size, os.SEEK_END)
+            offset, tamanho = self._REGISTRO_INDICE.unpack(indice_file.read(self._REGISTRO_INDICE.size))
+        return offset + tamanho == tamanho_log
+
+    def _reconstruir_indice(self, dir_path: str):
+        """Regenera o índice a partir do log (chamado com o lock adquirido)"""
+        log_path = os.path.join(dir_path, self.CONSOLIDADO_LOG)
+        indice_path = os.path.join(dir_path, self.CONSOLIDADO_INDICE)
+
+        offset = 0
+        total = 0
+        with open(log_path, 'rb') as log_file, open(indice_path + '.tmp', 'wb') as indice_tmp:
+            for linha in log_file:
+                if not linha.endswith(b"\n"):
+                    break
+                indice_tmp.write(self._REGISTRO_INDICE.pack(offset, len(linha)))
+                offset += len(linha)
+                total += 1
+
+        # Linha final incompleta (escrita interrompida) é descartada
+        if offset < os.path.getsize(log_path):
+            with open(log_path, 'r+b') as log_file:
+                log_file.truncate(offset)
+            logger.warning(f"⚠️ Linha incompleta descartada no fim de {log_path}")
+
+        os.replace(indice_path + '.tmp', indice_path)
+        logger.warning(f"🔧 Índice do consolidado reconstruído a partir do log: {total} trechos ({dir_path})")
+
+    def _garantir_indice(self, dir_path: str):
+        """Reconstrói o índice da sessão se ele não corresponder ao log"""
+        log_path = os.path.join(dir_path, self.CONSOLIDADO_LOG)
+        indice_path = os.path.join(dir_path, self.CONSOLIDADO_INDICE)
+        if not os.path.exists(log_path) or self._indice_consistente(log_path, indice_path):
+            return
+
+        with self._lock_consolidado(dir_path):
+            if not self._indice_consistente(log_path, indice_path):
+                self._reconstruir_indice(dir_path)
+
+    def _migrar_snapshot_legado(self, dir_path: str):
+        """Converte um consolidado.json antigo em log JSONL (chamado com o lock adquirido)"""
+        snapshot_path = os.path.join(dir_path, self.CONSOLIDADO_SNAPSHOT)
+        if not os.path.exists(snapshot_path):
+            return
+
+        try:
+            with open(snapshot_path, 'r', encoding='utf-8') as f:
+                trechos = json.load(f).get('trechos', [])
+        except Exception as e:
+            logger.warning(f"⚠️ Snapshot consolidado legado ilegível, ignorado: {e}")
+            return
+
+        offset = 0
+        log_path = os.path.join(dir_path, self.CONSOLIDADO_LOG)
+        indice_path = os.path.join(dir_path, self.CONSOLIDADO_INDICE)
+        with open(log_path, 'wb') as log_file, open(indice_path, 'wb') as indice_file:
+            for trecho in trechos:
+                linha = (json.dumps(trecho, ensure_ascii=False, default=str) + "\n").encode('utf-8')
+                log_file.write(linha)
+                indice_file.write(self._REGISTRO_INDICE.pack(offset, len(linha)))
+                offset += len(linha)
+
+        logger.info(f"🔄 {len(trechos)} trechos migrados do consolidado.json para o log JSONL")
+
+    def iterar_consolidado(self, session_id: str, category: str = 'pesquisa_web'):
+        """
+        Lê os trechos consolidados da sessão em streaming.
+
+        Sessões antigas sem log JSONL são lidas do consolidado.json legado.
+        Linhas truncadas (escrita interrompida) são ignoradas.
+        """
+        dir_path = os.path.join(self.base_dir, category, session_id)
+        log_path = os.path.join(dir_path, self.CONSOLIDADO_LOG)
+
+        if not os.path.exists(log_path):
+            snapshot_path = os.path.join(dir_path, self.CONSOLIDADO_SNAPSHOT)
+            if os.path.exists(snapshot_path):
+                with open(snapshot_path, 'r', encoding='utf-8') as f:
+                    yield from json.load(f).get('trechos', [])
+            return
+
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for linha in f:
+                linha = linha.strip()
+                if not linha:
+                    continue
+                try:
+                    yield json.loads(linha)
+                except json.JSONDecodeError:
+                    logger.warning(f"⚠️ Linha inválida ignorada em {log_path}")
+
+    def contar_trechos_consolidados(self, session_id: str, category: str = 'pesquisa_web') -> int:
+        """Número de trechos no log (pelo tamanho do índice, sem ler o log)"""
+        dir_path = os.path.join(self.base_dir, category, session_id)
+        indice_path = os.path.join(dir_path, self.CONSOLIDADO_INDICE)
+        self._garantir_indice(dir_path)
+        if not os.path.exists(indice_path):
+            return 0
+        return os.path.getsize(indice_path) // self._REGISTRO_INDICE.size
+
+    def ler_trecho_consolidado(self, session_id: str, posicao: int, category: str = 'pesquisa_web') -> Optional[Dict[str, Any]]:
+        """Lê um único trecho do log via índice de offsets"""
+        dir_path = os.path.join(self.base_dir, category, session_id)
+        indice_path = os.path.join(dir_path, self.CONSOLIDADO_INDICE)
+        log_path = os.path.join(dir_path, self.CONSOLIDADO_LOG)
+
+        try:
+            self._garantir_indice(dir_path)
+            with open(indice_path, 'rb') as indice_file:
+                indice_file.seek(posicao * self._REGISTRO_INDICE.size)
+                registro = indice_file.read(self._REGISTRO_INDICE.size)
+            if len(registro) < self._REGISTRO_INDICE.size:
+                return None
+
+            offset, tamanho = self._REGISTRO_INDICE.unpack(registro)
+            with open(log_path, 'rb') as log_file:
+                log_file.seek(offset)
+                return json.loads(log_file.read(tamanho).decode('utf-8'))
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao ler trecho {posicao} do consolidado: {e}")
+            return None
+
+    def compactar_consolidado(self, session_id: str, category: str = 'pesquisa_web') -> Dict[str, Any]:
+        """
+        Compacta o log consolidado da sessão.
+
+        Remove trechos com URL repetida (mantém o primeiro, e registra os
+        descartados), reescreve log e índice via arquivos temporários e gera
+        o snapshot consolidado.json legado. Log e índice são trocados por dois
+        os.replace: uma queda entre eles é detectada e o índice é reconstruído
+        do log no próximo acesso (_garantir_indice).
+        """
+        dir_path = os.path.join(self.base_dir, category, session_id)
+        log_path = os.path.join(dir_path, self.CONSOLIDADO_LOG)
+        indice_path = os.path.join(dir_path, self.CONSOLIDADO_INDICE)
+        snapshot_path = os.path.join(dir_path, self.CONSOLIDADO_SNAPSHOT)
+
+        if not os.path.exists(log_path):
+            return {'success': False, 'error': 'Log consolidado inexistente'}
+
+        try:
+            with self._lock_consolidado(dir_path):
+                trechos = []
+                urls_vistas = set()
+                urls_duplicadas = Counter()
+                total_original = 0
+
+                for trecho in self.iterar_consolidado(session_id, category):
+                    total_original += 1
+                    url = trecho.get('url')
+                    if url and url in urls_vistas:
+                        urls_duplicadas[url] += 1
+                        logger.debug(f"🗑️ Trecho duplicado descartado na compactação: {url}")
+                        continue
+                    urls_vistas.add(url)
+                    trechos.append(trecho)
+
+                # Reescreve log e índice em arquivos temporários + rename atômico
+                offset = 0
+                with open(log_path + '.tmp', 'wb') as log_tmp, open(indice_path + '.tmp', 'wb') as indice_tmp:
+                    for trecho in trechos:
+                        linha = (json.dumps(trecho, ensure_ascii=False, default=str) + "\n").encode('utf-8')
+                        log_tmp.write(linha)
+                        indice_tmp.write(self._REGISTRO_INDICE.pack(offset, len(linha)))
+                        offset += len(linha)
+
+                # Log primeiro: o índice antigo passa a não bater com o log
+                # novo até o segundo replace (ou até a reconstrução)
+                os.replace(log_path + '.tmp', log_path)
+                os.replace(indice_path + '.tmp', indice_path)
+
+                snapshot = {
                     'session_id': session_id,
-                    'trechos': [],
-                    'created_at': datetime.now().isoformat(),
+                    'trechos': trechos,
+                    'total_trechos': len(trechos),
+                    'duplicados_removidos': dict(urls_duplicadas),
                     'last_updated': datetime.now().isoformat()
                 }
+                with open(snapshot_path + '.tmp', 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, ensure_ascii=False)
+                os.replace(snapshot_path + '.tmp', snapshot_path)
 
-            # Adiciona novo trecho
-            consolidado['trechos'].append(trecho_data)
-            consolidado['last_updated'] = datetime.now().isoformat()
-            consolidado['total_trechos'] = len(consolidado['trechos'])
+            removidos = total_original - len(trechos)
+            logger.info(f"🗜️ Consolidado compactado: {len(trechos)} trechos ({removidos} duplicados removidos)")
+            if urls_duplicadas:
+                logger.info(f"🗑️ URLs com trechos descartados: {len(urls_duplicadas)} (mais repetidas: {urls_duplicadas.most_common(5)})")
 
-            # Salva arquivo consolidado
-            with open(consolidado_path, 'w', encoding='utf-8') as f:
-                json.dump(consolidado, f, ensure_ascii=False, indent=2)
-
-            logger.info(f"✅ Trecho adicionado ao arquivo consolidado: {consolidado_path}")
+            return {
+                'success': True,
+                'total_trechos': len(trechos),
+                'duplicados_removidos': removidos,
+                'urls_duplicadas': dict(urls_duplicadas),
+                'snapshot': snapshot_path
+            }
 
         except Exception as e:
-            logger.error(f"❌ Erro ao adicionar ao arquivo consolidado: {e}")
+            logger.error(f"❌ Erro ao compactar consolidado: {e}")
+            return {'success': False, 'error': str(e)}
 
     def salvar_erro(self, nome_erro: str, erro: Exception, contexto: Dict[str, Any] = None, session_id: str = None) -> str:
         """Salva um erro com contexto"""
@@ -829,16 +1308,10 @@ class AutoSaveManager:
             # Garante que o diretório existe
             os.makedirs(os.path.dirname(filepath), exist_ok=True)
 
-            # Salva JSON com formatação
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(dados, f, ensure_ascii=False, indent=2)
-
-            # Calcula estatísticas
-            file_size = os.path.getsize(filepath)
-            content_length = len(json.dumps(dados, ensure_ascii=False))
+            file_size = self._gravar_json(filepath, dados)
 
             logger.info(f"💾 JSON gigante salvo: {filepath}")
-            logger.info(f"📊 Tamanho: {file_size:,} bytes ({content_length:,} caracteres)")
+            logger.info(f"📊 Tamanho: {file_size:,} bytes")
 
             return filepath
 
@@ -875,9 +1348,15 @@ class AutoSaveManager:
             return {"status": "erro", "erro": str(e), "dados": {}}
 
     def listar_etapas_salvas(self, session_id: str = None) -> Dict[str, str]:
-        """Lista todas as etapas salvas"""
+        """
+        Lista todas as etapas salvas
+
+        Levanta EscritasPendentesError se a fila não puder ser drenada, em vez
+        de listar um diretório incompleto.
+        """
         etapas = {}
 
+        self.garantir_gravacao(session_id)
         try:
             if session_id:
                 base_dir = f"{self.relatorios_dir}"
@@ -929,8 +1408,7 @@ class AutoSaveManager:
 
             arquivo = f"{diretorio}/dados_massivos_{session_id}_{timestamp}.json"
 
-            with open(arquivo, 'w', encoding='utf-8') as f:
-                json.dump(dados_massivos, f, ensure_ascii=False, indent=2)
+            self._gravar_json(arquivo, dados_massivos)
 
             logger.info(f"🗂️ JSON gigante salvo: {arquivo}")
             return arquivo
@@ -966,115 +1444,22 @@ class AutoSaveManager:
 
     def _clean_for_serialization(self, obj, seen=None, depth=0):
         """Limpa objeto para serialização JSON removendo referências circulares e tipos não serializáveis"""
-        if seen is None:
-            seen = set()
-
-        # Limite de profundidade para evitar recursão infinita
-        if depth > 15:
-            return {"__max_depth__": f"Depth limit reached at {depth}"}
-
-        # Verifica referência circular
-        obj_id = id(obj)
-        if obj_id in seen:
-            return {"__circular_ref__": f"{type(obj).__name__}_{obj_id}"}
-
-        seen.add(obj_id)
-
-        try:
-            # Tipos primitivos - retorna direto
-            if obj is None or isinstance(obj, (bool, int, float, str)):
-                return obj
-
-            # Dicionários - TRATAMENTO ESPECIAL PARA EVITAR unhashable type
-            elif isinstance(obj, dict):
-                result = {}
-                for key, value in obj.items():
-                    # Converte chaves para string segura
-                    try:
-                        if isinstance(key, (dict, list, set)):
-                            # Se a chave é um tipo não hashable, converte para string
-                            safe_key = f"key_{hash(str(key))}"
-                        else:
-                            safe_key = str(key)[:100]  # Limita tamanho da chave
-                    except Exception:
-                        safe_key = f"key_{obj_id}_{len(result)}"
-
-                    try:
-                        result[safe_key] = self._clean_for_serialization(value, seen.copy(), depth + 1)
-                    except Exception as e:
-                        result[safe_key] = f"<Error serializing: {str(e)[:50]}>"
-                return result
-
-            # Listas e tuplas
-            elif isinstance(obj, (list, tuple)):
-                result = []
-                for i, item in enumerate(obj[:100]):  # Limita a 100 itens para evitar listas enormes
-                    try:
-                        result.append(self._clean_for_serialization(item, seen.copy(), depth + 1))
-                    except Exception as e:
-                        result.append(f"<Error at index {i}: {str(e)[:50]}>")
-                return result
-
-            # Sets - converte para lista
-            elif isinstance(obj, set):
-                try:
-                    return [self._clean_for_serialization(item, seen.copy(), depth + 1) for item in list(obj)[:50]]
-                except Exception:
-                    return [f"<Set item {i}>" for i in range(min(len(obj), 50))]
-
-            # Objetos com __dict__
-            elif hasattr(obj, '__dict__'):
-                try:
-                    return self._clean_for_serialization(obj.__dict__, seen.copy(), depth + 1)
-                except Exception:
-                    return {"__object__": f"{type(obj).__name__}"}
-
-            # Funções e métodos
-            elif callable(obj):
-                return f"<function {getattr(obj, '__name__', 'unknown')}>"
-
-            # Tipos especiais (datetime, etc)
-            elif hasattr(obj, 'isoformat'):  # datetime objects
-                try:
-                    return obj.isoformat()
-                except Exception:
-                    return str(obj)
-
-            # Outros tipos - converte para string segura
-            else:
-                try:
-                    # Tenta serializar diretamente primeiro
-                    import json
-                    json.dumps(obj)
-                    return obj
-                except (TypeError, ValueError):
-                    # Se não conseguir, converte para string
-                    try:
-                        str_repr = str(obj)[:500]  # Limita tamanho
-                        return {"__string_repr__": str_repr, "__type__": type(obj).__name__}
-                    except Exception:
-                        return {"__unserializable__": type(obj).__name__}
-
-        except Exception as e:
-            logger.warning(f"Erro crítico ao limpar objeto: {e}")
-            return {"__serialization_error__": str(e)[:100]}
-        finally:
-            seen.discard(obj_id)
+        return to_serializable(obj, max_depth=MAX_DEPTH - depth)
 
     def make_serializable(self, data):
         """
         Converte objetos não serializáveis para formatos JSON-compatíveis
-        Versão otimizada para resolver problemas específicos de 'unhashable type: dict'
+
+        Verifica os tipos sem gerar o JSON; dados já nativos são devolvidos
+        sem cópia.
         """
-        try:
-            # Testa se já é serializável
-            import json
-            json.dumps(data)
+        if is_json_native(data):
             return data
-        except (TypeError, ValueError) as e:
-            if "unhashable type" in str(e):
-                logger.warning(f"⚠️ Detectado problema 'unhashable type', aplicando correção...")
-            return self._clean_for_serialization(data)
+        return self._clean_for_serialization(data)
+
+    def _gravar_json(self, caminho: str, dados: Any) -> int:
+        """Grava JSON lido por máquina (compacto, salvo AUTO_SAVE_PRETTY_JSON=true)"""
+        return dump_to_file(dados, caminho, indent=2 if self.pretty_json else None)
 
     def _trigger_predictive_analysis(self, nome_etapa: str, dados: Dict[str, Any], categoria: str, session_id: str):
         """
@@ -1155,7 +1540,7 @@ class AutoSaveManager:
                             logger.info(f"🔮 Insights parciais gerados para {nome_etapa}")
 
                         finally:
-                            loop.close()
+                            http_client_registry.close_event_loop(loop)
 
                 except Exception as e:
                     logger.warning(f"⚠️ Erro ao gerar insights parciais para {nome_etapa}: {e}")
@@ -1164,7 +1549,7 @@ class AutoSaveManager:
             logger.warning(f"⚠️ Erro na integração preditiva para {nome_etapa}: {e}")
 
 # Instância global
-auto_save_manager = AutoSaveManager()
+auto_save_manager = service_registry.register('auto_save_manager', AutoSaveManager)
 
 # Funções de conveniência para importação direta
 def salvar_etapa(nome_etapa: str, dados: Any, categoria: str = "analise_completa", session_id: str = None) -> str:
@@ -7,10 +7,14 @@ Gera perfis completos com nomes reais e análises personalizadas
 import os
 import json
 import random
-from typing import Dict, List, Any, Optional
+import asyncio
+import inspect
+import weakref
+from typing import Dict, List, Any, Optional, Callable, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime, date
 import logging
+from services.service_registry import service_registry
 
 # Initialize logger first, before any imports that might fail
 logger = logging.getLogger(__name__)
@@ -25,6 +29,11 @@ except ImportError:
     def get_api_manager():
         return None
 
+# Chamadas LLM simultâneas por event loop (todos os avatares/seções somados)
+AVATAR_LLM_CONCURRENCY = int(os.getenv('AVATAR_LLM_CONCURRENCY', '4'))
+# Perfil psicológico, dores e história numa única chamada JSON por avatar
+AVATAR_SECOES_EM_LOTE = os.getenv('AVATAR_SECOES_EM_LOTE', 'false').lower() == 'true'
+
 @dataclass
 class DadosDemograficos:
     nome_completo: str
@@ -105,6 +114,16 @@ class AvatarGenerationSystem:
         self.dados_coletados = {}
         self.dados_pesquisa = {}
         self.dados_publico_alvo = {}
+        self.secoes_em_lote = AVATAR_SECOES_EM_LOTE
+        self._semaforos_llm: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def _limite_llm(self) -> asyncio.Semaphore:
+        """Semáforo de chamadas LLM do event loop atual"""
+        loop = asyncio.get_running_loop()
+        semaforo = self._semaforos_llm.get(loop)
+        if semaforo is None:
+            semaforo = self._semaforos_llm[loop] = asyncio.Semaphore(AVATAR_LLM_CONCURRENCY)
+        return semaforo
 
     def _extrair_dados_demograficos_reais(self, dados_etapa1: Dict[str, Any], dados_etapa2: Dict[str, Any]) -> Dict[str, Any]:
         """Extrai dados demográficos reais das análises das etapas 1 e 2"""
@@ -335,16 +354,12 @@ class AvatarGenerationSystem:
         if not arquetipos_reais:
             raise ValueError("❌ DADOS INSUFICIENTES - Não foi possível extrair arquétipos válidos das etapas 1 e 2. Complete as etapas anteriores primeiro.")
         
-        avatares = []
-        for i, arquetipo in enumerate(arquetipos_reais[:4]):  # Máximo 4 avatares
-            logger.info(f"🎯 Gerando avatar {i+1} baseado em dados REAIS: {arquetipo.get('tipo', 'Avatar Real')}")
-            avatar = await self._gerar_avatar_individual(
-                f"avatar_real_{i+1}",
-                arquetipo,
-                contexto_nicho,
-                dados_reais
-            )
-            avatares.append(avatar)
+        arquetipos = arquetipos_reais[:4]  # Máximo 4 avatares
+        # Os avatares são independentes: gerados em paralelo
+        avatares = list(await asyncio.gather(*(
+            self._gerar_avatar_individual(f"avatar_real_{i+1}", arquetipo, contexto_nicho, dados_reais)
+            for i, arquetipo in enumerate(arquetipos)
+        )))
         
         logger.info(f"✅ {len(avatares)} avatares gerados com dados REAIS das etapas 1 e 2")
         
@@ -360,61 +375,132 @@ class AvatarGenerationSystem:
     async def _gerar_avatar_individual(self, avatar_id: str, arquetipo: Dict[str, Any],
                                      contexto_nicho: str, dados_pesquisa: Dict[str, Any]) -> AvatarCompleto:
         """
-        Gera um avatar individual completo
+        Gera um avatar individual completo.
+
+        As seções formam um grafo de dependências: cada uma começa assim que
+        as seções de que depende terminam (contexto digital e dia na vida
+        correm em paralelo ao perfil psicológico, comportamento em paralelo
+        às dores). Com AVATAR_SECOES_EM_LOTE=true, perfil psicológico, dores e
+        história vêm de uma única chamada JSON; seções ausentes na resposta
+        são geradas individualmente.
         """
         # Gerar dados demográficos
         demograficos = self._gerar_dados_demograficos(arquetipo)
-        
-        # Gerar perfil psicológico usando IA
-        psicologico = await self._gerar_perfil_psicologico(demograficos, arquetipo, contexto_nicho)
-        
-        # Gerar contexto digital
-        digital = self._gerar_contexto_digital(demograficos, psicologico)
-        
-        # Gerar dores e objetivos
-        dores_objetivos = await self._gerar_dores_objetivos(demograficos, psicologico, contexto_nicho)
-        
-        # Gerar comportamento de consumo
-        comportamento = await self._gerar_comportamento_consumo(demograficos, psicologico, contexto_nicho)
-        
-        # Gerar história pessoal
-        historia = await self._gerar_historia_pessoal(demograficos, psicologico, dores_objetivos)
-        
-        # Gerar dia na vida
-        dia_vida = await self._gerar_dia_na_vida(demograficos, psicologico, digital)
-        
-        # Gerar jornada do cliente
-        jornada = await self._gerar_jornada_cliente(demograficos, comportamento, contexto_nicho)
-        
-        # Identificar drivers mentais efetivos
-        drivers_efetivos = self._identificar_drivers_efetivos(psicologico, dores_objetivos)
-        
-        # Gerar estratégia de abordagem
-        estrategia = await self._gerar_estrategia_abordagem(demograficos, psicologico, drivers_efetivos)
-        
-        # Gerar scripts personalizados
-        scripts = await self._gerar_scripts_personalizados(demograficos, psicologico, estrategia)
-        
-        # Calcular métricas de conversão esperadas
-        metricas = self._calcular_metricas_conversao(psicologico, comportamento)
+
+        def lote(r):
+            return r['lote'] or {}
+
+        # seção: ([dependências], função(resultados) -> valor ou corrotina)
+        grafo = {
+            'lote': ([], lambda r: self._gerar_secoes_em_lote(demograficos, arquetipo, contexto_nicho) if self.secoes_em_lote else None),
+            'psicologico': (['lote'], lambda r: lote(r).get('psicologico') or self._gerar_perfil_psicologico(demograficos, arquetipo, contexto_nicho)),
+            'digital': ([], lambda r: self._gerar_contexto_digital(demograficos)),
+            'dia_vida': (['digital'], lambda r: self._gerar_dia_na_vida(demograficos, digital=r['digital'])),
+            'dores_objetivos': (['lote', 'psicologico'], lambda r: lote(r).get('dores_objetivos') or self._gerar_dores_objetivos(demograficos, r['psicologico'], contexto_nicho)),
+            'comportamento': (['psicologico'], lambda r: self._gerar_comportamento_consumo(demograficos, r['psicologico'], contexto_nicho)),
+            'historia': (['lote', 'psicologico', 'dores_objetivos'], lambda r: lote(r).get('historia') or self._gerar_historia_pessoal(demograficos, r['psicologico'], r['dores_objetivos'])),
+            'jornada': (['comportamento'], lambda r: self._gerar_jornada_cliente(demograficos, r['comportamento'], contexto_nicho)),
+            'drivers': (['psicologico', 'dores_objetivos'], lambda r: self._identificar_drivers_efetivos(r['psicologico'], r['dores_objetivos'])),
+            'estrategia': (['psicologico', 'drivers'], lambda r: self._gerar_estrategia_abordagem(demograficos, r['psicologico'], r['drivers'])),
+            'scripts': (['psicologico', 'estrategia'], lambda r: self._gerar_scripts_personalizados(demograficos, r['psicologico'], r['estrategia'])),
+            'metricas': (['psicologico', 'comportamento'], lambda r: self._calcular_metricas_conversao(r['psicologico'], r['comportamento']))
+        }
+        secoes = await self._executar_grafo(grafo)
 
         avatar = AvatarCompleto(
             id_avatar=avatar_id,
             dados_demograficos=demograficos,
-            perfil_psicologico=psicologico,
-            contexto_digital=digital,
-            dores_objetivos=dores_objetivos,
-            comportamento_consumo=comportamento,
-            historia_pessoal=historia,
-            dia_na_vida=dia_vida,
-            jornada_cliente=jornada,
-            drivers_mentais_efetivos=drivers_efetivos,
-            estrategia_abordagem=estrategia,
-            scripts_personalizados=scripts,
-            metricas_conversao=metricas
+            perfil_psicologico=secoes['psicologico'],
+            contexto_digital=secoes['digital'],
+            dores_objetivos=secoes['dores_objetivos'],
+            comportamento_consumo=secoes['comportamento'],
+            historia_pessoal=secoes['historia'],
+            dia_na_vida=secoes['dia_vida'],
+            jornada_cliente=secoes['jornada'],
+            drivers_mentais_efetivos=secoes['drivers'],
+            estrategia_abordagem=secoes['estrategia'],
+            scripts_personalizados=secoes['scripts'],
+            metricas_conversao=secoes['metricas']
         )
         return avatar
 
+    @staticmethod
+    async def _executar_grafo(grafo: Dict[str, Tuple[List[str], Callable[[Dict[str, Any]], Any]]]) -> Dict[str, Any]:
+        """Executa cada nó do grafo assim que suas dependências terminam"""
+        tarefas: Dict[str, asyncio.Task] = {}
+
+        async def executar(nome: str):
+            dependencias, funcao = grafo[nome]
+            resultados = {dep: await tarefas[dep] for dep in dependencias}
+            valor = funcao(resultados)
+            return await valor if inspect.isawaitable(valor) else valor
+
+        # As tarefas só começam no primeiro await, quando todas já existem
+        for nome in grafo:
+            tarefas[nome] = asyncio.create_task(executar(nome))
+        try:
+            await asyncio.gather(*tarefas.values())
+        finally:
+            for tarefa in tarefas.values():
+                tarefa.cancel()
+        return {nome: tarefa.result() for nome, tarefa in tarefas.items()}
+
+    async def _gerar_secoes_em_lote(self, demograficos: DadosDemograficos, arquetipo: Dict[str, Any],
+                                    contexto_nicho: str) -> Dict[str, Any]:
+        """
+        Perfil psicológico, dores/objetivos e história numa única chamada JSON.
+        Retorna só as seções válidas; as ausentes caem na geração individual.
+        """
+        prompt = self._prompt_perfil_psicologico(demograficos, arquetipo, contexto_nicho) + """
+        ## SEÇÕES ADICIONAIS (MESMA RESPOSTA)
+        Com base no perfil psicológico acima, identifique também as dores e objetivos
+        ESPECÍFICOS desta pessoa no nicho e escreva uma história pessoal REALISTA
+        (background, momentos marcantes da carreira, desafios, conquistas, situação
+        atual; máximo 300 palavras, tom narrativo e humanizado).
+        Responda com UM ÚNICO JSON:
+        {
+            "perfil_psicologico": { ...campos do formato acima... },
+            "dores_objetivos": {
+                "dor_primaria_emocional": "...",
+                "dor_secundaria_pratica": "...",
+                "frustracao_principal": "...",
+                "objetivo_principal": "...",
+                "objetivo_secundario": "...",
+                "sonho_secreto": "...",
+                "maior_medo": "...",
+                "maior_desejo": "..."
+            },
+            "historia_pessoal": "texto da história"
+        }
+        """
+        secoes: Dict[str, Any] = {}
+        try:
+            api = self.api_manager.get_active_api('qwen') if self.api_manager else None
+            if not api:
+                logger.warning("Nenhuma API disponível para geração em lote, gerando seções individualmente.")
+                return secoes
+
+            response = await self._generate_with_ai(prompt, api)
+            dados = json.loads(response[response.find('{'):response.rfind('}') + 1])
+        except Exception as e:
+            logger.error(f"❌ Erro na geração em lote: {e}")
+            return secoes
+
+        try:
+            secoes['psicologico'] = PerfilPsicologico(**dados['perfil_psicologico'])
+        except Exception as e:
+            logger.warning(f"⚠️ Perfil psicológico inválido no lote: {e}")
+        try:
+            secoes['dores_objetivos'] = DoresEObjetivos(**dados['dores_objetivos'])
+        except Exception as e:
+            logger.warning(f"⚠️ Dores/objetivos inválidos no lote: {e}")
+        historia = dados.get('historia_pessoal')
+        if isinstance(historia, str) and historia.strip():
+            secoes['historia'] = historia.strip()
+
+        logger.info(f"📦 Lote gerou {len(secoes)}/3 seções para {demograficos.nome_completo}")
+        return secoes
+
     def _gerar_dados_demograficos(self, arquetipo: Dict[str, Any]) -> DadosDemograficos:
         """Gera dados demográficos baseados em dados REAIS do arquétipo"""
         # Usar dados reais extraídos do arquétipo
@@ -454,9 +540,9 @@ class AvatarGenerationSystem:
             filhos=filhos
         )
 
-    async def _gerar_perfil_psicologico(self, demograficos: DadosDemograficos, 
-                                      arquetipo: Dict[str, Any], contexto_nicho: str) -> PerfilPsicologico:
-        """Gera perfil psicológico detalhado usando IA baseado em dados REAIS"""
+    def _prompt_perfil_psicologico(self, demograficos: DadosDemograficos,
+                                   arquetipo: Dict[str, Any], contexto_nicho: str) -> str:
+        """Prompt do perfil psicológico baseado em dados REAIS"""
         
         # Incorpora dados reais das etapas 1 e 2
         dores_reais = arquetipo.get('dores_reais', ['Estagnação profissional'])
@@ -508,6 +594,12 @@ class AvatarGenerationSystem:
         }}
         CRÍTICO: Use APENAS dados reais extraídos das etapas 1 e 2. NÃO invente características.
         """
+        return prompt
+
+    async def _gerar_perfil_psicologico(self, demograficos: DadosDemograficos, 
+                                      arquetipo: Dict[str, Any], contexto_nicho: str) -> PerfilPsicologico:
+        """Gera perfil psicológico detalhado usando IA baseado em dados REAIS"""
+        prompt = self._prompt_perfil_psicologico(demograficos, arquetipo, contexto_nicho)
         try:
             api = self.api_manager.get_active_api('qwen')
             if not api:
@@ -601,7 +693,7 @@ class AvatarGenerationSystem:
         )
 
     def _gerar_contexto_digital(self, demograficos: DadosDemograficos, 
-                               psicologico: PerfilPsicologico) -> ContextoDigital:
+                               psicologico: Optional[PerfilPsicologico] = None) -> ContextoDigital:
         """Gera contexto digital baseado no perfil"""
         # Plataformas baseadas na idade e perfil
         if demograficos.idade < 30:
@@ -770,7 +862,8 @@ class AvatarGenerationSystem:
             return "História pessoal não disponível"
 
     async def _gerar_dia_na_vida(self, demograficos: DadosDemograficos,
-                                psicologico: PerfilPsicologico, digital: ContextoDigital) -> str:
+                                psicologico: Optional[PerfilPsicologico] = None,
+                                digital: ContextoDigital = None) -> str:
         """Gera descrição de um dia típico"""
         return f"""
         **6:30** - Acorda e verifica WhatsApp e Instagram por 15 minutos
@@ -872,7 +965,8 @@ class AvatarGenerationSystem:
         """
         try:
             # Chama o método `generate` da instância da API (MockAPI ou real)
-            response = await api.generate(prompt, max_tokens=2048, temperature=0.7)
+            async with self._limite_llm():
+                response = await api.generate(prompt, max_tokens=2048, temperature=0.7)
             return response.strip()
         except Exception as e:
             logger.error(f"❌ Erro na geração com IA: {e}")
@@ -1160,7 +1254,7 @@ Sistema completo com 4 avatares únicos e realistas, cada um representando um se
         return manual
 
 # Instância global
-avatar_system = AvatarGenerationSystem()
+avatar_system = service_registry.register('avatar_system', AvatarGenerationSystem)
 
 def get_avatar_system() -> AvatarGenerationSystem:
     """Retorna instância do sistema de avatares"""
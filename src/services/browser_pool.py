@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - Browser Pool
+Pool compartilhado de contextos headless (Playwright) para captura de screenshots
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+from typing import Dict, Any, List, Optional, Callable, Awaitable, TypeVar
+
+# Optional Playwright import with fallback
+try:
+    from playwright.async_api import async_playwright
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    PLAYWRIGHT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Tipos de recurso bloqueados por padrão (não afetam o screenshot)
+DEFAULT_BLOCKED_RESOURCE_TYPES = 'font,media,websocket,eventsource,manifest'
+
+# Domínios de rastreamento/publicidade bloqueados em todas as páginas
+TRACKER_DOMAINS = (
+    'google-analytics.com', 'googletagmanager.com', 'googlesyndication.com',
+    'doubleclick.net', 'googleadservices.com', 'connect.facebook.net',
+    'hotjar.com', 'clarity.ms', 'segment.io', 'segment.com', 'mixpanel.com',
+    'amplitude.com', 'taboola.com', 'outbrain.com', 'criteo.com', 'criteo.net',
+    'scorecardresearch.com', 'quantserve.com', 'adnxs.com', 'ads-twitter.com',
+    'analytics.tiktok.com', 'bat.bing.com', 'newrelic.com', 'nr-data.net'
+)
+
+
+def is_tracker_url(url: str) -> bool:
+    """True se o host da URL pertence a um domínio de rastreamento conhecido"""
+    host = (urlparse(url).hostname or '').lower()
+    return any(host == domain or host.endswith('.' + domain) for domain in TRACKER_DOMAINS)
+
+
+class _PooledContext:
+    """Contexto de navegador reaproveitado até BROWSER_CONTEXT_MAX_PAGES páginas"""
+
+    def __init__(self, context):
+        self.context = context
+        self.pages_served = 0
+
+
+class _DomainGate:
+    """Concorrência e intervalo mínimo entre navegações para um domínio"""
+
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.lock = asyncio.Lock()
+        self.last_navigation = 0.0
+        self.users = 0
+
+
+class BrowserPool:
+    """
+    Pool de contextos Playwright mantidos aquecidos.
+
+    O Playwright vincula navegador e páginas ao event loop que os criou, e
+    os workflows rodam em loops diferentes; por isso o pool tem uma thread
+    própria com um event loop de vida longa. run() agenda o trabalho da
+    página nesse loop e aguarda o resultado a partir de qualquer loop.
+
+    - até BROWSER_POOL_SIZE contextos abertos ao mesmo tempo
+    - cada contexto é reciclado após BROWSER_CONTEXT_MAX_PAGES páginas
+    - no máximo BROWSER_DOMAIN_CONCURRENCY páginas por domínio, com
+      BROWSER_DOMAIN_DELAY segundos entre navegações ao mesmo domínio
+      (domínios ociosos há mais que esse intervalo são descartados)
+    - fontes, mídia e rastreadores são bloqueados (BROWSER_BLOCK_RESOURCES)
+    """
+
+    def __init__(self):
+        self.size = max(1, int(os.getenv('BROWSER_POOL_SIZE', '4')))
+        self.max_pages_per_context = max(1, int(os.getenv('BROWSER_CONTEXT_MAX_PAGES', '25')))
+        self.domain_concurrency = max(1, int(os.getenv('BROWSER_DOMAIN_CONCURRENCY', '2')))
+        self.domain_delay = float(os.getenv('BROWSER_DOMAIN_DELAY', '1.0'))
+        self.page_timeout = int(os.getenv('BROWSER_PAGE_TIMEOUT', '30000'))
+        self.headless = os.getenv('PLAYWRIGHT_HEADLESS', 'True').lower() == 'true'
+        self.block_resources = os.getenv('BROWSER_BLOCK_RESOURCES', 'true').lower() == 'true'
+        self.blocked_resource_types = {
+            resource_type.strip()
+            for resource_type in os.getenv('BROWSER_BLOCKED_RESOURCE_TYPES', DEFAULT_BLOCKED_RESOURCE_TYPES).split(',')
+            if resource_type.strip()
+        }
+        self.viewport = {'width': 1920, 'height': 1080}
+        self.user_agent = os.getenv(
+            'BROWSER_USER_AGENT',
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+        )
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+        # Estado do loop do pool (acessado apenas dentro dele)
+        self._playwright = None
+        self._browser = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle: List[_PooledContext] = []
+        self._domains: Dict[str, _DomainGate] = {}
+        self._launch_checked = False
+        self._launch_error: Optional[str] = None
+
+        self.stats = {
+            'pages': 0,
+            'failures': 0,
+            'browsers_launched': 0,
+            'contexts_created': 0,
+            'contexts_recycled': 0,
+            'blocked_requests': 0
+        }
+
+    @property
+    def available(self) -> bool:
+        """Playwright instalado e sem falha conhecida ao abrir o navegador"""
+        return PLAYWRIGHT_AVAILABLE and self._launch_error is None
+
+    async def ensure_ready(self) -> bool:
+        """
+        Verifica uma única vez que o navegador realmente abre.
+
+        Sem os binários do Chromium (playwright install) o import funciona
+        mas toda captura falharia; nesse caso retorna False e os chamadores
+        usam o fallback.
+        """
+        if not PLAYWRIGHT_AVAILABLE:
+            return False
+        if not self._launch_checked:
+            future = asyncio.run_coroutine_threadsafe(self._check_launch(), self._ensure_loop())
+            await asyncio.wrap_future(future)
+        return self._launch_error is None
+
+    # Loop dedicado
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def _run():
+                    asyncio.set_event_loop(loop)
+                    self._start_lock = asyncio.Lock()
+                    self._slots = asyncio.Semaphore(self.size)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=_run, name='browser-pool', daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    async def run(self, url: str, action: Callable[[Any], Awaitable[T]]) -> T:
+        """
+        Executa action(page) no loop do pool com uma página nova para url.
+
+        action recebe a página já com timeout padrão configurado (a
+        navegação é feita por ela) e roda inteiramente no loop do pool, então
+        deve usar apenas operações da página.
+        """
+        if not PLAYWRIGHT_AVAILABLE:
+            raise RuntimeError("Playwright não instalado")
+
+        async def _job():
+            async with self._page(url) as page:
+                return await action(page)
+
+        future = asyncio.run_coroutine_threadsafe(_job(), self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    # Execução dentro do loop do pool
+
+    async def _check_launch(self):
+        if self._launch_checked:
+            return
+        try:
+            await self._ensure_browser()
+        except Exception as e:
+            self._launch_error = str(e)
+            logger.warning(f"⚠️ Navegador do pool não abriu, usando fallback: {e}")
+        self._launch_checked = True
+
+    async def _ensure_browser(self):
+        async with self._start_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            if self._browser is not None:
+                logger.warning("⚠️ Navegador do pool desconectado, reiniciando")
+                self._idle.clear()
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
+            )
+            self.stats['browsers_launched'] += 1
+            logger.info(f"🌐 Navegador do pool iniciado ({self.size} contextos)")
+
+    async def _new_context(self) -> _PooledContext:
+        context = await self._browser.new_context(
+            viewport=self.viewport,
+            user_agent=self.user_agent,
+            ignore_https_errors=True
+        )
+        context.set_default_timeout(self.page_timeout)
+        if self.block_resources:
+            await context.route('**/*', self._filter_request)
+        self.stats['contexts_created'] += 1
+        return _PooledContext(context)
+
+    async def _filter_request(self, route):
+        request = route.request
+        if request.resource_type in self.blocked_resource_types or is_tracker_url(request.url):
+            self.stats['blocked_requests'] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def _domain_gate(self, url: str) -> _DomainGate:
+        domain = (urlparse(url).hostname or '').lower()
+        gate = self._domains.get(domain)
+        if gate is None:
+            self._evict_idle_gates()
+            gate = self._domains[domain] = _DomainGate(self.domain_concurrency)
+        gate.users += 1
+        return gate
+
+    def _evict_idle_gates(self):
+        """Descarta domínios sem páginas em uso e cujo intervalo já passou"""
+        now = time.monotonic()
+        idle = [
+            domain for domain, gate in self._domains.items()
+            if gate.users == 0 and now - gate.last_navigation >= self.domain_delay
+        ]
+        for domain in idle:
+            del self._domains[domain]
+
+    async def _wait_turn(self, gate: _DomainGate):
+        """Espaça navegações ao mesmo domínio em domain_delay segundos"""
+        async with gate.lock:
+            wait = gate.last_navigation + self.domain_delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            gate.last_navigation = time.monotonic()
+
+    async def _release_context(self, pooled: _PooledContext, healthy: bool):
+        pooled.pages_served += 1
+        connected = self._browser is not None and self._browser.is_connected()
+        if healthy and connected and pooled.pages_served < self.max_pages_per_context:
+            self._idle.append(pooled)
+            return
+        self.stats['contexts_recycled'] += 1
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def _page(self, url: str):
+        # Vaga do domínio antes da global: um domínio saturado não prende as vagas dos outros
+        gate = self._domain_gate(url)
+        try:
+            async with gate.semaphore, self._slots:
+                await self._ensure_browser()
+                pooled = self._idle.pop() if self._idle else await self._new_context()
+                page = None
+                healthy = True
+                try:
+                    await self._wait_turn(gate)
+                    page = await pooled.context.new_page()
+                    yield page
+                    self.stats['pages'] += 1
+                except Exception:
+                    self.stats['failures'] += 1
+                    healthy = self._browser.is_connected()
+                    raise
+                finally:
+                    if page is not None:
+                        try:
+                            await page.close()
+                        except Exception:
+                            healthy = False
+                    await self._release_context(pooled, healthy)
+        finally:
+            gate.users -= 1
+
+    async def _close_all(self):
+        for pooled in self._idle:
+            try:
+                await pooled.context.close()
+            except Exception:
+                pass
+        self._idle.clear()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+    def shutdown(self, timeout: float = 10.0):
+        """Fecha navegador e para o loop do pool (hook de encerramento)"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_all(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao fechar navegador do pool: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if thread:
+            thread.join(timeout)
+        loop.close()
+        logger.info("🌐 Pool de navegadores encerrado")
+
+    def get_status(self) -> Dict[str, Any]:
+        """Configuração e contadores do pool"""
+        return {
+            'available': self.available,
+            'launch_error': self._launch_error,
+            'running': self._loop is not None,
+            'size': self.size,
+            'idle_contexts': len(self._idle),
+            'tracked_domains': len(self._domains),
+            'max_pages_per_context': self.max_pages_per_context,
+            'domain_concurrency': self.domain_concurrency,
+            'domain_delay': self.domain_delay,
+            'block_resources': self.block_resources,
+            **self.stats
+        }
+
+
+# Instância global
+browser_pool = BrowserPool()
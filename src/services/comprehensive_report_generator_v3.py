@@ -11,6 +11,7 @@ import json
 from typing import Dict, Any, List
 from datetime import datetime
 from pathlib import Path
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -739,4 +740,4 @@ Este relatório consolida a análise ultra-detalhada realizada pelo sistema ARQV
         return self.compile_final_markdown_report(session_id)
 
 # Instância global
-comprehensive_report_generator_v3 = ComprehensiveReportGeneratorV3()
+comprehensive_report_generator_v3 = service_registry.register('comprehensive_report_generator_v3', ComprehensiveReportGeneratorV3)
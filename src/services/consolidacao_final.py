@@ -12,7 +12,8 @@ import json
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from pathlib import Path
-from services.auto_save_manager import auto_save_manager, salvar_etapa, salvar_erro
+from services.auto_save_manager import auto_save_manager, salvar_etapa, salvar_erro, EscritasPendentesError
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -78,6 +79,7 @@ class ConsolidacaoFinal:
                 'qualidade_dados': validacao_qualidade,
                 'tipo_relatorio': 'minimo' if (force_minimal or not validacao_qualidade['qualidade_suficiente']) else 'completo',
                 'arquivos_intermediarios': self._listar_arquivos_intermediarios(session_id),
+                'dados_parciais': dados_coletados.get('dados_parciais', False),
                 'garantia_dados': 'Todos os dados intermediários preservados',
                 'acesso_direto': f"relatorios_intermediarios/{session_id}/"
             }
@@ -112,12 +114,18 @@ class ConsolidacaoFinal:
             'dados_pipeline': dados_pipeline,
             'etapas_salvas': {},
             'arquivos_encontrados': [],
-            'componentes_disponiveis': []
+            'componentes_disponiveis': [],
+            'dados_parciais': False
         }
         
         try:
-            # Coleta etapas salvas
-            etapas_salvas = auto_save_manager.listar_etapas_salvas(session_id)
+            # Coleta etapas salvas (sem listar o disco se a fila não drenou)
+            try:
+                etapas_salvas = auto_save_manager.listar_etapas_salvas(session_id)
+            except EscritasPendentesError as e:
+                logger.error(f"❌ Consolidação com dados parciais: {e}")
+                dados_coletados['dados_parciais'] = True
+                etapas_salvas = {}
             dados_coletados['etapas_salvas'] = etapas_salvas
             
             # Recupera dados de cada etapa
@@ -699,4 +707,4 @@ GARANTIA:
             }
 
 # Instância global
-consolidacao_final = ConsolidacaoFinal()
\ No newline at end of file
+consolidacao_final = service_registry.register('consolidacao_final', ConsolidacaoFinal)
\ No newline at end of file
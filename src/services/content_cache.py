@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - Content Cache
+Cache persistente (SQLite) de páginas extraídas, limitado por LRU, com validadores HTTP
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+from services.service_registry import service_registry
+from services.sqlite_connections import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+
+class ContentCache:
+    """
+    Cache de conteúdo extraído por URL.
+
+    Entradas com menos de CONTENT_CACHE_TTL segundos são servidas direto;
+    entradas mais antigas continuam guardadas com ETag/Last-Modified para
+    revalidação condicional (304 renova a entrada sem baixar/parsear de novo).
+    O tamanho é limitado por CONTENT_CACHE_MAX_ENTRIES e
+    CONTENT_CACHE_MAX_BYTES, descartando as menos acessadas (LRU).
+    URLs que falharam ficam no cache negativo por CONTENT_CACHE_NEGATIVE_TTL
+    segundos e depois voltam a ser tentadas.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = Path(db_path or os.getenv('CONTENT_CACHE_PATH', 'analyses_data/cache/content.db'))
+        self.enabled = os.getenv('CONTENT_CACHE_ENABLED', 'true').lower() == 'true'
+        self.ttl = int(os.getenv('CONTENT_CACHE_TTL', str(24 * 3600)))
+        self.negative_ttl = int(os.getenv('CONTENT_CACHE_NEGATIVE_TTL', '1800'))
+        self.max_entries = int(os.getenv('CONTENT_CACHE_MAX_ENTRIES', '5000'))
+        self.max_bytes = int(os.getenv('CONTENT_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+        self.max_failed = int(os.getenv('CONTENT_CACHE_MAX_FAILED', '20000'))
+
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'stores': 0,
+            'evictions': 0,
+            'negative_hits': 0
+        }
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = SQLiteConnections(self.db_path)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexão da thread atual (aberta e configurada uma única vez)"""
+        return self._db.connection()
+
+    def _init_database(self):
+        """Inicializa banco de dados SQLite"""
+        try:
+            with self._connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS content_entries (
+                        key TEXT PRIMARY KEY,
+                        url TEXT NOT NULL,
+                        content TEXT NOT NULL,
+                        metadata TEXT NOT NULL,
+                        etag TEXT,
+                        last_modified TEXT,
+                        size_bytes INTEGER NOT NULL,
+                        fetched_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_content_entries_accessed_at
+                    ON content_entries(accessed_at)
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS failed_urls (
+                        key TEXT PRIMARY KEY,
+                        url TEXT NOT NULL,
+                        error TEXT,
+                        failed_until REAL NOT NULL
+                    )
+                """)
+        except Exception as e:
+            logger.error(f"❌ Erro ao inicializar cache de conteúdo: {e}")
+            self.enabled = False
+
+    @staticmethod
+    def make_key(url: str) -> str:
+        """Chave da URL (sem fragmento)"""
+        return hashlib.sha256(url.split('#', 1)[0].strip().encode('utf-8')).hexdigest()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Entrada da URL ou None.
+
+        Retorna content, metadata, etag, last_modified e fresh (False quando
+        passou do TTL e deve ser revalidada antes do uso).
+        """
+        if not self.enabled:
+            return None
+
+        key = self.make_key(url)
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT content, metadata, etag, last_modified, fetched_at FROM content_entries WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE content_entries SET accessed_at = ? WHERE key = ?", (now, key))
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao ler cache de conteúdo: {e}")
+            return None
+
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+
+        content, metadata, etag, last_modified, fetched_at = row
+        fresh = now - fetched_at <= self.ttl
+        self.stats['hits' if fresh else 'stale_hits'] += 1
+        return {
+            'content': content,
+            'metadata': json.loads(metadata),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresh': fresh
+        }
+
+    def set(self, url: str, content: str, metadata: Dict[str, Any],
+            etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Armazena a extração e aplica os limites de entradas/bytes"""
+        if not self.enabled:
+            return
+
+        key = self.make_key(url)
+        now = time.time()
+        try:
+            serialized = json.dumps(metadata or {}, ensure_ascii=False, default=str)
+            size_bytes = len(content.encode('utf-8')) + len(serialized)
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    """INSERT OR REPLACE INTO content_entries
+                       (key, url, content, metadata, etag, last_modified, size_bytes, fetched_at, accessed_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (key, url, content, serialized, etag, last_modified, size_bytes, now, now)
+                )
+                conn.execute("DELETE FROM failed_urls WHERE key = ?", (key,))
+                self._evict_locked(conn)
+            self.stats['stores'] += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao gravar cache de conteúdo: {e}")
+
+    def _evict_locked(self, conn: sqlite3.Connection):
+        """Remove as entradas menos acessadas acima de max_entries ou max_bytes"""
+        evicted = conn.execute(
+            """DELETE FROM content_entries WHERE key IN (
+                   SELECT key FROM content_entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+               )""",
+            (self.max_entries,)
+        ).rowcount
+        evicted += conn.execute(
+            """DELETE FROM content_entries WHERE key IN (
+                   SELECT key FROM (
+                       SELECT key, SUM(size_bytes) OVER (ORDER BY accessed_at DESC, key) AS running_bytes
+                       FROM content_entries
+                   ) WHERE running_bytes > ?
+               )""",
+            (self.max_bytes,)
+        ).rowcount
+        self.stats['evictions'] += evicted
+
+    def mark_revalidated(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Servidor respondeu 304: a entrada volta a ser fresca"""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    """UPDATE content_entries
+                       SET fetched_at = ?, accessed_at = ?,
+                           etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)
+                       WHERE key = ?""",
+                    (now, now, etag, last_modified, self.make_key(url))
+                )
+            self.stats['revalidated'] += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao renovar cache de conteúdo: {e}")
+
+    def mark_failed(self, url: str, error: str = None):
+        """Cache negativo: não tenta a URL de novo antes de negative_ttl"""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO failed_urls (key, url, error, failed_until) VALUES (?, ?, ?, ?)",
+                    (self.make_key(url), url, (error or '')[:500], now + self.negative_ttl)
+                )
+                conn.execute("DELETE FROM failed_urls WHERE failed_until < ?", (now,))
+                conn.execute(
+                    """DELETE FROM failed_urls WHERE key IN (
+                           SELECT key FROM failed_urls ORDER BY failed_until DESC LIMIT -1 OFFSET ?
+                       )""",
+                    (self.max_failed,)
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao gravar cache negativo: {e}")
+
+    def is_failed(self, url: str) -> bool:
+        """True se a URL falhou há menos de negative_ttl segundos"""
+        if not self.enabled:
+            return False
+
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT failed_until FROM failed_urls WHERE key = ?", (self.make_key(url),)
+                ).fetchone()
+        except Exception:
+            return False
+        if row and row[0] > time.time():
+            self.stats['negative_hits'] += 1
+            return True
+        return False
+
+    def clear(self):
+        """Remove todas as entradas"""
+        if not self.enabled:
+            return
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM content_entries")
+            conn.execute("DELETE FROM failed_urls")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Tamanho do cache e contadores"""
+        entries, total_bytes, failed = 0, 0, 0
+        try:
+            with self._connect() as conn:
+                entries, total_bytes = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM content_entries"
+                ).fetchone()
+                failed = conn.execute(
+                    "SELECT COUNT(*) FROM failed_urls WHERE failed_until > ?", (time.time(),)
+                ).fetchone()[0]
+        except Exception:
+            pass
+        return {
+            'enabled': self.enabled,
+            'entries': entries,
+            'total_bytes': total_bytes,
+            'failed_urls': failed,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            **self.stats
+        }
+
+
+# Instância global
+content_cache = service_registry.register('content_cache', ContentCache)
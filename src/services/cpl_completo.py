@@ -18,6 +18,7 @@ from .enhanced_ai_manager import enhanced_ai_manager
 from .cpl_generator_service import cpl_generator_service
 from .cpl_protocol_1 import cpl_protocol_1
 from .auto_save_manager import salvar_etapa, salvar_erro
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -394,4 +395,4 @@ class CPLCompleto:
         }
 
 # Instância global do módulo
-cpl_completo = CPLCompleto()
\ No newline at end of file
+cpl_completo = service_registry.register('cpl_completo', CPLCompleto)
\ No newline at end of file
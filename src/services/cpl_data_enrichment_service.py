@@ -14,6 +14,7 @@ from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import requests
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -568,4 +569,4 @@ class CPLDataEnrichmentService:
         )
 
 # Instância global do serviço
-cpl_data_enrichment_service = CPLDataEnrichmentService()
\ No newline at end of file
+cpl_data_enrichment_service = service_registry.register('cpl_data_enrichment_service', CPLDataEnrichmentService)
\ No newline at end of file
@@ -16,6 +16,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from pathlib import Path
 from dataclasses import dataclass, asdict
+from services.service_registry import service_registry
 
 # Importações locais
 try:
@@ -1506,4 +1507,4 @@ class CPLGeneratorService:
             return []
 
 # Instância global do serviço
-cpl_generator_service = CPLGeneratorService()
\ No newline at end of file
+cpl_generator_service = service_registry.register('cpl_generator_service', CPLGeneratorService)
\ No newline at end of file
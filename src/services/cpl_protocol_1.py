@@ -12,6 +12,7 @@ import asyncio
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from pathlib import Path
+from services.service_registry import service_registry
 
 # Imports condicionais para evitar erros de dependência
 try:
@@ -351,4 +352,4 @@ class CPLProtocol1:
             logger.error(f"❌ Erro ao salvar resultados: {e}")
 
 # Instância global para compatibilidade
-cpl_protocol_1 = CPLProtocol1()
\ No newline at end of file
+cpl_protocol_1 = service_registry.register('cpl_protocol_1', CPLProtocol1)
\ No newline at end of file
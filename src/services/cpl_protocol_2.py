@@ -12,6 +12,7 @@ import asyncio
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from pathlib import Path
+from services.service_registry import service_registry
 
 # Imports condicionais para evitar erros de dependência
 try:
@@ -513,4 +514,4 @@ class CPLProtocol2:
             logger.error(f"❌ Erro ao salvar resultados: {e}")
 
 # Instância global para compatibilidade
-cpl_protocol_2 = CPLProtocol2()
\ No newline at end of file
+cpl_protocol_2 = service_registry.register('cpl_protocol_2', CPLProtocol2)
\ No newline at end of file
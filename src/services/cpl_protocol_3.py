@@ -12,6 +12,7 @@ import asyncio
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from pathlib import Path
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -267,4 +268,4 @@ class CPLProtocol3:
             logger.error(f"❌ Erro ao salvar resultados: {e}")
 
 # Instância global para compatibilidade
-cpl_protocol_3 = CPLProtocol3()
\ No newline at end of file
+cpl_protocol_3 = service_registry.register('cpl_protocol_3', CPLProtocol3)
\ No newline at end of file
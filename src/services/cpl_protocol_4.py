@@ -12,6 +12,7 @@ import asyncio
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from pathlib import Path
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -265,4 +266,4 @@ class CPLProtocol4:
             logger.error(f"❌ Erro ao salvar resultados: {e}")
 
 # Instância global para compatibilidade
-cpl_protocol_4 = CPLProtocol4()
\ No newline at end of file
+cpl_protocol_4 = service_registry.register('cpl_protocol_4', CPLProtocol4)
\ No newline at end of file
@@ -12,6 +12,7 @@ import asyncio
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from pathlib import Path
+from services.service_registry import service_registry
 
 # Imports dos outros protocolos
 try:
@@ -296,4 +297,4 @@ class CPLProtocol5:
             logger.error(f"❌ Erro ao salvar resultados: {e}")
 
 # Instância global para compatibilidade
-cpl_protocol_5 = CPLProtocol5()
\ No newline at end of file
+cpl_protocol_5 = service_registry.register('cpl_protocol_5', CPLProtocol5)
\ No newline at end of file
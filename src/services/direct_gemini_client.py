@@ -14,6 +14,7 @@ import threading
 from typing import Dict, List, Optional, Any
 import google.generativeai as genai
 from datetime import datetime
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -196,4 +197,4 @@ class DirectGeminiClient:
         }
 
 # Instância global
-direct_gemini_client = DirectGeminiClient()
+direct_gemini_client = service_registry.register('direct_gemini_client', DirectGeminiClient)
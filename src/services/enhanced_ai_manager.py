@@ -10,16 +10,25 @@ import os
 import logging
 import asyncio
 import json
+import queue
+import threading
 import aiohttp
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, AsyncIterator, Iterator
 from datetime import datetime
 from dotenv import load_dotenv
 
+from services.http_client_registry import http_client_registry, iter_sse_data
+from services.llm_response_cache import llm_response_cache
+from services.service_registry import service_registry
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Trechos em trânsito entre o stream e a rota síncrona (contrapressão)
+STREAM_QUEUE_SIZE = int(os.getenv('AI_STREAM_QUEUE_SIZE', '64'))
+
 class EnhancedAIManager:
     """Gerenciador de IA aprimorado com hierarquia OpenRouter e fallbacks"""
 
@@ -58,6 +67,9 @@ class EnhancedAIManager:
             }
         ]
         
+        # Modelo usado por generate_response (chat) nas rotas com e sem streaming
+        self.default_response_model = 'x-ai/grok-4-fast:free'
+        
         self.search_orchestrator = None
         
         # Importar search orchestrator se disponível
@@ -136,6 +148,13 @@ class EnhancedAIManager:
     ) -> Optional[str]:
         """Gera conteúdo usando OpenRouter com rotação de chaves"""
         
+        # Cache persistente compartilhado com o OpenRouterHierarchyManager
+        cache_key = llm_response_cache.make_key(model_name, prompt, system_prompt, temperature, max_tokens)
+        cached = await llm_response_cache.get_async(cache_key)
+        if cached:
+            logger.info(f"💾 Resposta de {model_name} servida do cache")
+            return cached["content"]
+        
         # Preparar mensagens
         messages = []
         if system_prompt:
@@ -164,7 +183,7 @@ class EnhancedAIManager:
                     "stream": False
                 }
                 
-                async with aiohttp.ClientSession() as session:
+                async with http_client_registry.session('openrouter') as session:
                     async with session.post(
                         "https://openrouter.ai/api/v1/chat/completions",
                         headers=headers,
@@ -176,6 +195,8 @@ class EnhancedAIManager:
                             result = await response.json()
                             content = result["choices"][0]["message"]["content"]
                             logger.info(f"✅ OpenRouter {model_name} sucesso")
+                            if content:
+                                await llm_response_cache.set_async(cache_key, model_name, {"content": content, "model_used": model_name})
                             return content
                         else:
                             error_text = await response.text()
@@ -245,11 +266,12 @@ class EnhancedAIManager:
     def generate_response(
         self,
         prompt: str,
-        model: str = "x-ai/grok-4-fast:free",
+        model: Optional[str] = None,
         max_tokens: int = 4000,
         temperature: float = 0.7
     ) -> Dict[str, Any]:
         """Gera resposta síncrona usando hierarquia de modelos"""
+        model = model or self.default_response_model
         try:
             # Executar geração assíncrona de forma síncrona
             import asyncio
@@ -268,11 +290,11 @@ class EnhancedAIManager:
                 # Se já há um loop rodando, criar task
                 import concurrent.futures
                 with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, _async_generate())
+                    future = executor.submit(http_client_registry.run, _async_generate())
                     content = future.result(timeout=180)
             except RuntimeError:
                 # Nenhum loop rodando, executar diretamente
-                content = asyncio.run(_async_generate())
+                content = http_client_registry.run(_async_generate())
             
             return {
                 'success': True,
@@ -314,17 +336,8 @@ class EnhancedAIManager:
         max_tokens = max_tokens or 4000
         temperature = temperature or 0.7
         
-        # Se modelo específico foi solicitado, tentar apenas ele
-        if model_override:
-            target_models = [m for m in self.model_hierarchy if m['name'] == model_override]
-            if not target_models:
-                # Se modelo não encontrado, usar hierarquia normal
-                target_models = self.model_hierarchy
-        else:
-            target_models = self.model_hierarchy
-        
         # Tentar cada modelo na hierarquia
-        for model_config in target_models:
+        for model_config in self._target_models(model_override):
             try:
                 logger.info(f"🤖 Tentando {model_config['name']} ({model_config['provider']})")
                 
@@ -362,6 +375,231 @@ class EnhancedAIManager:
         logger.error("❌ Todos os modelos da hierarquia falharam")
         raise Exception("Todos os modelos de IA falharam. Verifique as configurações das APIs.")
     
+    def _target_models(self, model_override: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Modelos a tentar: apenas o solicitado (se existir na hierarquia) ou a hierarquia completa"""
+        if model_override:
+            target_models = [m for m in self.model_hierarchy if m['name'] == model_override]
+            if target_models:
+                return target_models
+        return self.model_hierarchy
+
+    async def _stream_with_openrouter(
+        self,
+        prompt: str,
+        model_name: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.7,
+        system_prompt: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Versão em streaming de _generate_with_openrouter (troca de chave só antes do primeiro token)"""
+
+        cache_key = llm_response_cache.make_key(model_name, prompt, system_prompt, temperature, max_tokens)
+        cached = await llm_response_cache.get_async(cache_key)
+        if cached:
+            logger.info(f"💾 Resposta de {model_name} servida do cache (stream)")
+            yield cached["content"]
+            return
+
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+
+        for attempt in range(len(self.openrouter_keys)):
+            api_key = self._get_next_openrouter_key()
+            if not api_key:
+                continue
+
+            chunks: List[str] = []
+            try:
+                headers = {
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json",
+                    "HTTP-Referer": "https://github.com/joscarmao/v1800finalv2",
+                    "X-Title": "ARQV30 Enhanced v3.0"
+                }
+
+                payload = {
+                    "model": model_name,
+                    "messages": messages,
+                    "max_tokens": max_tokens,
+                    "temperature": temperature,
+                    "stream": True
+                }
+
+                async with http_client_registry.session('openrouter') as session:
+                    async with session.post(
+                        "https://openrouter.ai/api/v1/chat/completions",
+                        headers=headers,
+                        json=payload,
+                        timeout=aiohttp.ClientTimeout(total=None, sock_read=120)
+                    ) as response:
+
+                        if response.status != 200:
+                            logger.warning(f"⚠️ OpenRouter key {attempt + 1} falhou: {response.status}")
+                            continue
+
+                        async for data in iter_sse_data(response):
+                            try:
+                                chunk = json.loads(data)
+                            except json.JSONDecodeError:
+                                continue
+                            if chunk.get("error"):
+                                raise Exception(chunk["error"].get("message", "erro no stream"))
+                            delta = (chunk.get("choices") or [{}])[0].get("delta", {}).get("content")
+                            if delta:
+                                chunks.append(delta)
+                                yield delta
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                if chunks:
+                    raise
+                logger.warning(f"⚠️ Erro OpenRouter key {attempt + 1}: {str(e)[:100]}")
+                continue
+
+            if chunks:
+                logger.info(f"✅ OpenRouter {model_name} streaming concluído")
+                await llm_response_cache.set_async(cache_key, model_name, {"content": "".join(chunks), "model_used": model_name})
+                return
+
+        logger.error(f"❌ Todas as chaves OpenRouter falharam para {model_name}")
+
+    async def stream_text(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        model_override: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Versão em streaming de generate_text: produz trechos de texto à medida
+        que o modelo gera. Gemini direto (fallback final) entrega a resposta
+        em um único trecho.
+        """
+        max_tokens = max_tokens or 4000
+        temperature = temperature or 0.7
+
+        for model_config in self._target_models(model_override):
+            emitted = False
+            try:
+                logger.info(f"🌊 Streaming com {model_config['name']} ({model_config['provider']})")
+
+                if model_config['provider'] == 'openrouter':
+                    async for delta in self._stream_with_openrouter(
+                        prompt=prompt,
+                        model_name=model_config['name'],
+                        max_tokens=min(max_tokens, model_config['max_tokens']),
+                        temperature=temperature,
+                        system_prompt=system_prompt
+                    ):
+                        emitted = True
+                        yield delta
+
+                elif model_config['provider'] == 'gemini_direct':
+                    result = await self._generate_with_gemini_direct(
+                        prompt=prompt,
+                        max_tokens=min(max_tokens, model_config['max_tokens']),
+                        temperature=temperature,
+                        system_prompt=system_prompt
+                    )
+                    if result:
+                        emitted = True
+                        yield result
+                else:
+                    logger.warning(f"⚠️ Provider desconhecido: {model_config['provider']}")
+                    continue
+
+                if emitted:
+                    return
+                logger.warning(f"⚠️ {model_config['name']} não retornou resultado")
+
+            except Exception as e:
+                if emitted:
+                    raise
+                logger.error(f"❌ Erro com {model_config['name']}: {str(e)[:100]}")
+                continue
+
+        logger.error("❌ Todos os modelos da hierarquia falharam")
+        raise Exception("Todos os modelos de IA falharam. Verifique as configurações das APIs.")
+
+    def iter_text_sync(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        model_override: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Ponte síncrona para stream_text (rotas Flask): o stream roda em um
+        event loop próprio numa thread e os trechos chegam por uma fila
+        limitada. Exceções do stream são relançadas no consumidor; se o
+        consumidor encerrar o gerador (cliente desconectado), o stream é
+        cancelado e a conexão com o provedor é fechada.
+        """
+        chunks: "queue.Queue" = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        finished = object()
+        stopped = threading.Event()
+        producer: Dict[str, Any] = {}
+
+        async def _put(item):
+            # Espera sem bloquear o loop, para que o cancelamento seja atendido
+            while True:
+                try:
+                    chunks.put_nowait(item)
+                    return
+                except queue.Full:
+                    await asyncio.sleep(0.05)
+
+        async def _produce():
+            producer['loop'] = asyncio.get_running_loop()
+            producer['task'] = asyncio.current_task()
+            if stopped.is_set():
+                return
+            try:
+                try:
+                    async for delta in self.stream_text(
+                        prompt=prompt,
+                        system_prompt=system_prompt,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        model_override=model_override
+                    ):
+                        await _put(delta)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    await _put(e)
+                    return
+                await _put(finished)
+            except asyncio.CancelledError:
+                logger.info("🛑 Stream de IA cancelado: consumidor encerrado")
+
+        threading.Thread(
+            target=http_client_registry.run, args=(_produce(),), daemon=True, name="ai-stream"
+        ).start()
+
+        try:
+            while True:
+                item = chunks.get()
+                if item is finished:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+            task = producer.get('task')
+            if task is not None and not task.done():
+                try:
+                    producer['loop'].call_soon_threadsafe(task.cancel)
+                except RuntimeError:
+                    pass  # Loop já encerrado
+
     def generate_text_sync(
         self,
         prompt: str,
@@ -655,6 +893,7 @@ Seja específico, use números quando relevante e forneça insights acionáveis.
         return {
             "gemini_status": self.gemini_client.get_status(),
             "search_orchestrator_available": self.search_orchestrator is not None,
+            "response_cache": llm_response_cache.get_stats(),
             "timestamp": datetime.now().isoformat()
         }
 
@@ -670,7 +909,7 @@ Seja específico, use números quando relevante e forneça insights acionáveis.
         logger.info("✅ Estatísticas Gemini resetadas")
 
 # Instância global para uso em todo o projeto
-enhanced_ai_manager = EnhancedAIManager()
+enhanced_ai_manager = service_registry.register('enhanced_ai_manager', EnhancedAIManager)
 
 # Funções de conveniência para uso direto
 async def generate_ai_text(
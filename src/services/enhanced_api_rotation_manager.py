@@ -5,11 +5,10 @@ ATUALIZADO: Implementa fallbacks Jina->EXA, Qwen->Gemini, Supadata para insights
 """
 
 import os
-import time
 import random
 import logging
 from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 import json
 from datetime import datetime, timedelta
@@ -22,6 +21,9 @@ try:
 except ImportError:
     AIOHTTP_AVAILABLE = False
 from dotenv import load_dotenv
+from services.service_registry import service_registry
+from services.rate_limiter import KeyLimiter, KeySelector, parse_retry_after, recovery_timer
+from services.api_health_store import api_health_store, api_key_id, SCOPE_API_KEY
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -49,14 +51,28 @@ class APIEndpoint:
     rate_limit_reset: datetime = None
     requests_made: int = 0
     max_requests_per_minute: int = 60
+    max_tokens_per_minute: int = 0  # 0 = sem limite de TPM
+    limiter: Optional[KeyLimiter] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.limiter is None:
+            self.limiter = KeyLimiter(self.name, self.max_requests_per_minute, self.max_tokens_per_minute)
+
+class APIRateLimitedError(Exception):
+    """Provedor respondeu 429 (retry_after = valor bruto do header Retry-After)"""
+
+    def __init__(self, api_name: str, retry_after: Optional[float] = None):
+        super().__init__(f"API {api_name} retornou 429 (Retry-After: {retry_after})")
+        self.api_name = api_name
+        self.retry_after = retry_after
 
 class EnhancedAPIRotationManager:
     """
     Gerenciador avançado de rotação de APIs com:
     - Fallback automático entre modelos
-    - Rate limiting inteligente
+    - Rate limiting por chave (token buckets de RPM/TPM, Retry-After)
     - Health checking
-    - Balanceamento de carga
+    - Balanceamento de carga (least_loaded ou weighted_round_robin via API_KEY_SELECTION)
     """
     
     def __init__(self):
@@ -96,8 +112,11 @@ class EnhancedAPIRotationManager:
         self.lock = threading.Lock()
         self.health_check_interval = 300  # 5 minutos
         self.last_health_check = {}
+        self.selector = KeySelector(os.getenv('API_KEY_SELECTION', 'least_loaded'))
+        self._quota_apis = set()  # chaves com cota por período no store compartilhado
         
         self._load_api_configurations()
+        self._apply_rate_limit_overrides()
         self._initialize_health_monitoring()
     
     def _load_api_configurations(self):
@@ -349,6 +368,42 @@ class EnhancedAPIRotationManager:
         except Exception as e:
             logger.error(f"❌ Erro ao carregar configurações de API: {e}")
     
+    def _apply_rate_limit_overrides(self):
+        """
+        Limites por serviço via .env: <SERVICO>_MAX_RPM, <SERVICO>_MAX_TPM e
+        <SERVICO>_QUOTA (requisições por <SERVICO>_QUOTA_PERIOD segundos, padrão 1 dia)
+        """
+        for service, apis in self.apis.items():
+            quota = int(os.getenv(f'{service.upper()}_QUOTA', '0'))
+            if quota:
+                period = float(os.getenv(f'{service.upper()}_QUOTA_PERIOD', str(24 * 3600)))
+                for api in apis:
+                    api_health_store.set_quota(SCOPE_API_KEY, api_key_id(api.api_key), quota, period, api.name)
+                    self._quota_apis.add(api.name)
+                logger.info(f"⚙️ Cota de {service}: {quota} requisições a cada {period:.0f}s por chave")
+            
+            rpm = os.getenv(f'{service.upper()}_MAX_RPM')
+            tpm = os.getenv(f'{service.upper()}_MAX_TPM')
+            if not (rpm or tpm):
+                continue
+            for api in apis:
+                api.max_requests_per_minute = int(rpm) if rpm else api.max_requests_per_minute
+                api.max_tokens_per_minute = int(tpm) if tpm else api.max_tokens_per_minute
+                api.limiter = KeyLimiter(api.name, api.max_requests_per_minute, api.max_tokens_per_minute)
+            logger.info(f"⚙️ Limites de {service}: {rpm or 'padrão'} RPM, {tpm or 'sem limite de'} TPM")
+    
+    def _service_for(self, api_name: str) -> Optional[str]:
+        """Serviço ao qual a chave pertence (ex.: openrouter_1 → qwen)"""
+        for service, apis in self.apis.items():
+            if any(api.name == api_name for api in apis):
+                return service
+        return None
+    
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Estimativa grosseira de tokens (~4 caracteres por token)"""
+        return len(text or '') // 4
+    
     def _get_base_url(self, service: str) -> str:
         """Retorna URL base para cada serviço"""
         urls = {
@@ -365,47 +420,56 @@ class EnhancedAPIRotationManager:
         for service in self.apis:
             self.last_health_check[service] = datetime.now() - timedelta(minutes=10)
     
-    def get_active_api(self, service: str, force_check: bool = False) -> Optional[APIEndpoint]:
+    def get_active_api(self, service: str, force_check: bool = False, tokens: int = 0) -> Optional[APIEndpoint]:
         """
-        Retorna API ativa para o serviço especificado com rotação automática
+        Retorna API ativa para o serviço especificado, já reservando 1 requisição
+        (e `tokens` do TPM) no token bucket da chave escolhida
         """
-        with self.lock:
-            if service not in self.apis or not self.apis[service]:
-                logger.warning(f"⚠️ Nenhuma API disponível para {service}")
-                return None
-            
-            # Health check se necessário
-            if force_check or self._needs_health_check(service):
-                self._perform_health_check(service)
-            
-            # Encontrar API ativa com rotação automática
-            apis = self.apis[service]
-            start_index = self.current_api_index[service]
-            
-            # Verificar se a API atual está disponível
-            current_api = apis[start_index]
-            if self._is_api_available(current_api):
-                current_api.last_used = datetime.now()
-                current_api.requests_made += 1
-                logger.info(f"🔄 Continuando com API {current_api.name} para {service}")
-                return current_api
-            
-            # Se API atual não está disponível, rotar automaticamente
-            logger.info(f"🔄 API atual indisponível, rotacionando {service}...")
-            for i in range(1, len(apis)):  # Começar da próxima API
-                index = (start_index + i) % len(apis)
-                api = apis[index]
-                
-                if self._is_api_available(api):
-                    self.current_api_index[service] = index
-                    api.last_used = datetime.now()
-                    api.requests_made += 1
-                    logger.info(f"✅ Rotação automática: API {api.name} para {service}")
-                    return api
-            
-            logger.error(f"❌ Nenhuma API disponível para {service} após rotação")
-            return None
-    
+        # A cota compartilhada é debitada no SQLite fora do lock; se estiver
+        # esgotada, a chave sai da disputa e a seleção recomeça
+        exhausted = set()
+        while True:
+            with self.lock:
+                if service not in self.apis or not self.apis[service]:
+                    logger.warning(f"⚠️ Nenhuma API disponível para {service}")
+                    return None
+
+                # Health check se necessário
+                if force_check or self._needs_health_check(service):
+                    self._perform_health_check(service)
+                    force_check = False
+
+                apis = self.apis[service]
+                candidates = [api for api in apis if api.name not in exhausted and self._is_api_available(api)]
+                if not candidates:
+                    logger.error(f"❌ Nenhuma API disponível para {service} após rotação")
+                    return None
+
+                # Seleção entre as chaves com saldo (least_loaded / weighted_round_robin)
+                limiter = self.selector.choose([api.limiter for api in candidates], tokens)
+                if limiter is None:
+                    wait = min(api.limiter.retry_in(tokens) for api in candidates)
+                    logger.warning(f"⏳ Todas as chaves de {service} no limite de taxa (próxima livre em {wait:.1f}s)")
+                    return None
+
+                api = next(api for api in candidates if api.limiter is limiter)
+                if api.name not in self._quota_apis:
+                    return self._select_api(service, api)
+
+            if api_health_store.consume_quota(SCOPE_API_KEY, api_key_id(api.api_key)):
+                with self.lock:
+                    return self._select_api(service, api)
+            logger.warning(f"📉 Cota de {api.name} esgotada no período")
+            exhausted.add(api.name)
+
+    def _select_api(self, service: str, api: APIEndpoint) -> APIEndpoint:
+        """Registra a escolha (chamado com self.lock)"""
+        self.current_api_index[service] = self.apis[service].index(api)
+        api.last_used = datetime.now()
+        api.requests_made += 1
+        logger.info(f"🔄 API {api.name} selecionada para {service} ({self.selector.strategy})")
+        return api
+
     def _needs_health_check(self, service: str) -> bool:
         """Verifica se precisa fazer health check"""
         last_check = self.last_health_check.get(service)
@@ -420,16 +484,10 @@ class EnhancedAPIRotationManager:
                 if api.status == APIStatus.OFFLINE:
                     continue
                 
-                # Reset rate limit se expirou
+                # Reset rate limit se expirou (o limite por minuto fica com o token bucket)
                 if api.rate_limit_reset and datetime.now() > api.rate_limit_reset:
                     api.status = APIStatus.ACTIVE
                     api.rate_limit_reset = None
-                    api.requests_made = 0
-                
-                # Verificar se está rate limited
-                if api.requests_made >= api.max_requests_per_minute:
-                    api.status = APIStatus.RATE_LIMITED
-                    api.rate_limit_reset = datetime.now() + timedelta(minutes=1)
             
             self.last_health_check[service] = datetime.now()
             
@@ -441,6 +499,10 @@ class EnhancedAPIRotationManager:
         if api.status == APIStatus.OFFLINE:
             return False
         
+        # Cooldown/sem créditos/cota descobertos por qualquer worker
+        if api_health_store.is_blocked(SCOPE_API_KEY, api_key_id(api.api_key)):
+            return False
+        
         if api.status == APIStatus.RATE_LIMITED:
             if api.rate_limit_reset and datetime.now() > api.rate_limit_reset:
                 api.status = APIStatus.ACTIVE
@@ -455,6 +517,9 @@ class EnhancedAPIRotationManager:
     
     def mark_api_error(self, service: str, api_name: str, error: Exception):
         """Marca API como com erro e força rotação imediata"""
+        service = service if service in self.apis else self._service_for(api_name)
+        if not service:
+            return
         with self.lock:
             for i, api in enumerate(self.apis[service]):
                 if api.name == api_name:
@@ -484,12 +549,18 @@ class EnhancedAPIRotationManager:
                     
                     # Recuperação mais rápida - 1 minuto para tentar novamente
                     self._schedule_api_recovery(service, api_name, recovery_time=60)
+                    failed = api
                     break
+            else:
+                return
+
+        # Saúde compartilhada fora do lock
+        api_health_store.record_result(SCOPE_API_KEY, api_key_id(failed.api_key), False, failed.name)
+        api_health_store.set_cooldown(SCOPE_API_KEY, api_key_id(failed.api_key), 60, str(error), failed.name)
     
     def _schedule_api_recovery(self, service: str, api_name: str, recovery_time: int = 60):
-        """Agenda recuperação automática da API após período de cooldown"""
+        """Agenda recuperação automática da API após período de cooldown (temporizador único)"""
         def recover_api():
-            time.sleep(recovery_time)  # Cooldown configurável (padrão 1 minuto)
             with self.lock:
                 for api in self.apis[service]:
                     if api.name == api_name:
@@ -498,21 +569,46 @@ class EnhancedAPIRotationManager:
                         logger.info(f"✅ API {api_name} RECUPERADA automaticamente após {recovery_time}s")
                         break
         
-        import threading
-        threading.Thread(target=recover_api, daemon=True).start()
+        recovery_timer.schedule(f"{service}:{api_name}", recovery_time, recover_api)
         logger.info(f"⏱️ Recuperação de {api_name} agendada para {recovery_time} segundos")
     
-    def mark_api_rate_limited(self, service: str, api_name: str, reset_time: Optional[datetime] = None):
-        """Marca API como rate limited"""
+    def mark_api_rate_limited(self, service: str, api_name: str, reset_time: Optional[datetime] = None,
+                              retry_after: Any = None):
+        """
+        Marca API como rate limited.
+
+        retry_after aceita o valor do header Retry-After (segundos ou HTTP-date);
+        sem ele usa reset_time ou 1 minuto.
+        """
+        service = service if service in self.apis else self._service_for(api_name)
+        if not service:
+            return
+        seconds = parse_retry_after(retry_after)
+        if seconds is None:
+            seconds = (reset_time - datetime.now()).total_seconds() if reset_time else 60.0
+        seconds = max(seconds, 1.0)
         with self.lock:
             for api in self.apis[service]:
                 if api.name == api_name:
                     api.status = APIStatus.RATE_LIMITED
-                    api.rate_limit_reset = reset_time or (datetime.now() + timedelta(minutes=1))
+                    api.rate_limit_reset = datetime.now() + timedelta(seconds=seconds)
+                    api.limiter.block_for(seconds)
                     logger.warning(f"⚠️ API {api_name} rate limited até {api.rate_limit_reset}")
+                    limited = api
                     break
+            else:
+                return
+
+        api_health_store.set_cooldown(SCOPE_API_KEY, api_key_id(limited.api_key), seconds, "rate limited", limited.name)
+    
+    def record_usage(self, api: APIEndpoint, estimated_tokens: int, actual_tokens: int):
+        """Requisição bem-sucedida: acerta o TPM da chave e conta o sucesso na saúde compartilhada"""
+        if api and api.limiter:
+            api.limiter.record_tokens(estimated_tokens, actual_tokens)
+        if api:
+            api_health_store.record_result(SCOPE_API_KEY, api_key_id(api.api_key), True, api.name)
     
-    def get_fallback_api(self, service_type: str, failed_service: str = None) -> Optional[APIEndpoint]:
+    def get_fallback_api(self, service_type: str, failed_service: str = None, tokens: int = 0) -> Optional[APIEndpoint]:
         """
         Retorna API de fallback baseada nas cadeias configuradas
         """
@@ -535,7 +631,7 @@ class EnhancedAPIRotationManager:
             for service_name in chain[i]:
                 if service_name in self.apis and self.apis[service_name]:
                     # Usar get_active_api para obter API disponível
-                    api = self.get_active_api(service_name)
+                    api = self.get_active_api(service_name, tokens=tokens)
                     if api:
                         logger.info(f"🔄 Fallback para {service_name} (tipo: {service_type})")
                         return api
@@ -543,17 +639,17 @@ class EnhancedAPIRotationManager:
         logger.error(f"❌ Nenhum fallback disponível para {service_type}")
         return None
 
-    def get_api_with_fallback(self, service_type: str) -> Optional[APIEndpoint]:
+    def get_api_with_fallback(self, service_type: str, tokens: int = 0) -> Optional[APIEndpoint]:
         """
         Obtém API com fallback automático
         """
         # Tentar obter API primária
-        api = self.get_active_api_by_type(service_type)
+        api = self.get_active_api_by_type(service_type, tokens)
         if api:
             return api
         
         # Se falhou, tentar fallback
-        return self.get_fallback_api(service_type)
+        return self.get_fallback_api(service_type, tokens=tokens)
     
     def get_fallback_model(self, model_name: str) -> tuple[str, Optional[APIEndpoint]]:
         """
@@ -579,7 +675,7 @@ class EnhancedAPIRotationManager:
             logger.warning(f"⚠️ Nenhuma API disponível para {model_name}")
             return model_name, None
 
-    def get_active_api_by_type(self, service_type: str) -> Optional[APIEndpoint]:
+    def get_active_api_by_type(self, service_type: str, tokens: int = 0) -> Optional[APIEndpoint]:
         """
         Obtém API ativa baseada no tipo de serviço
         """
@@ -592,7 +688,7 @@ class EnhancedAPIRotationManager:
         for service_name in primary_services:
             if service_name in self.apis and self.apis[service_name]:
                 # Usar o método get_active_api existente
-                api = self.get_active_api(service_name)
+                api = self.get_active_api(service_name, tokens=tokens)
                 if api:
                     return api
         
@@ -602,6 +698,8 @@ class EnhancedAPIRotationManager:
         """Retorna relatório de status das APIs"""
         report = {
             'timestamp': datetime.now().isoformat(),
+            'selection_strategy': self.selector.strategy,
+            'pending_recoveries': recovery_timer.pending(),
             'services': {}
         }
         
@@ -616,13 +714,18 @@ class EnhancedAPIRotationManager:
             }
             
             for api in apis:
+                shared = api_health_store.get(SCOPE_API_KEY, api_key_id(api.api_key)) or {}
                 service_status[api.status.value] += 1
                 service_status['apis'].append({
                     'name': api.name,
                     'status': api.status.value,
                     'error_count': api.error_count,
                     'requests_made': api.requests_made,
-                    'last_used': api.last_used.isoformat() if api.last_used else None
+                    'last_used': api.last_used.isoformat() if api.last_used else None,
+                    'rate_limit': api.limiter.get_stats(),
+                    'shared_available': shared.get('available', True),
+                    'shared_error_rate': shared.get('error_rate', 0.0),
+                    'quota_used': shared.get('quota_used', 0)
                 })
             
             report['services'][service] = service_status
@@ -638,6 +741,7 @@ class EnhancedAPIRotationManager:
                 api.error_count = 0
                 if api.status == APIStatus.ERROR:
                     api.status = APIStatus.ACTIVE
+                api_health_store.clear(SCOPE_API_KEY, api_key_id(api.api_key))
         
         logger.info(f"✅ Erros resetados para: {', '.join(services_to_reset)}")
     
@@ -679,6 +783,7 @@ class EnhancedAPIRotationManager:
         Método generate_text para compatibilidade com código legado
         Usa rotação automática de APIs para geração de texto
         """
+        api = None
         try:
             # Determinar tipo de serviço baseado no modelo
             service_type = 'ai_generation'
@@ -690,8 +795,10 @@ class EnhancedAPIRotationManager:
                 elif 'gpt' in model.lower():
                     service_type = 'ai_generation'
             
-            # Obter API com fallback automático
-            api = self.get_api_with_fallback(service_type)
+            # Obter API com fallback automático (reservando os tokens estimados no TPM);
+            # em thread, pois a cota compartilhada é debitada no SQLite
+            estimated_tokens = self.estimate_tokens(prompt) + kwargs.get('max_tokens', 4000)
+            api = await asyncio.to_thread(self.get_api_with_fallback, service_type, estimated_tokens)
             if not api:
                 raise Exception("Nenhuma API disponível para geração de texto")
             
@@ -699,6 +806,7 @@ class EnhancedAPIRotationManager:
             response = await self._make_api_call(api, prompt, model, **kwargs)
             
             if response:
+                self.record_usage(api, estimated_tokens, self.estimate_tokens(prompt) + self.estimate_tokens(response))
                 logger.info(f"✅ Texto gerado com sucesso via {api.name}")
                 return response
             else:
@@ -708,7 +816,7 @@ class EnhancedAPIRotationManager:
             logger.error(f"❌ Erro na geração de texto: {e}")
             # Tentar fallback se disponível
             try:
-                fallback_api = self.get_fallback_api(service_type)
+                fallback_api = await asyncio.to_thread(self.get_fallback_api, service_type, tokens=estimated_tokens)
                 if fallback_api and fallback_api != api:
                     response = await self._make_api_call(fallback_api, prompt, model, **kwargs)
                     if response:
@@ -737,10 +845,14 @@ class EnhancedAPIRotationManager:
                 logger.warning(f"⚠️ Tipo de API não reconhecido: {api.name}")
                 return None
                 
+        except APIRateLimitedError as e:
+            logger.warning(f"⚠️ {e}")
+            self.mark_api_rate_limited(self._service_for(api.name), api.name, retry_after=e.retry_after)
+            raise
         except Exception as e:
             logger.error(f"❌ Erro na chamada da API {api.name}: {e}")
             # Marcar API como com erro
-            self.mark_api_error(api.name.split('_')[0], api.name, e)
+            self.mark_api_error(self._service_for(api.name), api.name, e)
             raise e
     
     async def _call_openrouter_api(self, api: APIEndpoint, prompt: str, model: str = None, **kwargs) -> str:
@@ -772,6 +884,8 @@ class EnhancedAPIRotationManager:
                     if response.status == 200:
                         result = await response.json()
                         return result['choices'][0]['message']['content']
+                    elif response.status == 429:
+                        raise APIRateLimitedError(api.name, response.headers.get('Retry-After'))
                     else:
                         error_text = await response.text()
                         raise Exception(f"OpenRouter API error {response.status}: {error_text}")
@@ -806,6 +920,8 @@ class EnhancedAPIRotationManager:
                     if response.status == 200:
                         result = await response.json()
                         return result['candidates'][0]['content']['parts'][0]['text']
+                    elif response.status == 429:
+                        raise APIRateLimitedError(api.name, response.headers.get('Retry-After'))
                     else:
                         error_text = await response.text()
                         raise Exception(f"Gemini API error {response.status}: {error_text}")
@@ -841,6 +957,8 @@ class EnhancedAPIRotationManager:
                     if response.status == 200:
                         result = await response.json()
                         return result['choices'][0]['message']['content']
+                    elif response.status == 429:
+                        raise APIRateLimitedError(api.name, response.headers.get('Retry-After'))
                     else:
                         error_text = await response.text()
                         raise Exception(f"Groq API error {response.status}: {error_text}")
@@ -876,6 +994,8 @@ class EnhancedAPIRotationManager:
                     if response.status == 200:
                         result = await response.json()
                         return result['choices'][0]['message']['content']
+                    elif response.status == 429:
+                        raise APIRateLimitedError(api.name, response.headers.get('Retry-After'))
                     else:
                         error_text = await response.text()
                         raise Exception(f"OpenAI API error {response.status}: {error_text}")
@@ -923,7 +1043,7 @@ class EnhancedAPIRotationManager:
         """
 
 # Instância global
-api_rotation_manager = EnhancedAPIRotationManager()
+api_rotation_manager = service_registry.register('api_rotation_manager', EnhancedAPIRotationManager)
 
 def get_api_manager() -> EnhancedAPIRotationManager:
     """Retorna instância do gerenciador de APIs"""
@@ -16,6 +16,7 @@ from typing import Dict, List, Any, Optional, Tuple
 from urllib.parse import urlparse, parse_qs
 import trafilatura
 from bs4 import BeautifulSoup
+from services.service_registry import service_registry
 try:
     import instaloader
     HAS_INSTALOADER = True
@@ -589,4 +590,4 @@ class EnhancedInstagramExtractor:
         }
 
 # Instância global do extrator
-enhanced_instagram_extractor = EnhancedInstagramExtractor()
\ No newline at end of file
+enhanced_instagram_extractor = service_registry.register('enhanced_instagram_extractor', EnhancedInstagramExtractor)
\ No newline at end of file
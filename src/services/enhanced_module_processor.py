@@ -11,11 +11,14 @@ import asyncio
 import json
 from typing import Dict, List, Any
 from datetime import datetime
+from graphlib import TopologicalSorter
 from pathlib import Path
 
 # Import do Enhanced AI Manager
 from services.enhanced_ai_manager import enhanced_ai_manager
 from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.http_client_registry import PROVIDER_LIMITS
+from services.service_registry import service_registry
 # CORREÇÃO 1: Importar os módulos implementados
 try:
     from services.cpl_devastador_protocol import CPLDevastadorProtocol
@@ -144,7 +147,8 @@ class EnhancedModuleProcessor:
                 'description': 'Protocolo completo para criação de sequência de 4 CPLs de alta performance',
                 'use_active_search': True,
                 'type': 'specialized',
-                'requires': ['sintese_master', 'avatar_data', 'contexto_estrategico', 'dados_web']
+                'requires': ['sintese_master', 'avatar_data', 'contexto_estrategico', 'dados_web'],
+                'depends_on': ['avatars']
             },
             # Módulos adicionais para completar os 26 módulos
             'analise_sentimento': {
@@ -179,7 +183,35 @@ class EnhancedModuleProcessor:
             }
         }
 
-        logger.info("🚀 Enhanced Module Processor inicializado")
+        # Módulos independentes rodam em paralelo; o limite acompanha a
+        # capacidade da rotação de chaves (chaves OpenRouter x requisições por chave)
+        self.max_concurrency = self._get_max_concurrency()
+
+        logger.info(f"🚀 Enhanced Module Processor inicializado (concorrência: {self.max_concurrency})")
+
+    def _get_max_concurrency(self) -> int:
+        """Número de módulos gerados simultaneamente"""
+        configured = os.getenv('MODULE_MAX_CONCURRENCY')
+        if configured:
+            return max(1, int(configured))
+
+        per_key = int(os.getenv('MODULE_CONCURRENCY_PER_API_KEY', '2'))
+        api_keys = max(1, len(getattr(self.ai_manager, 'openrouter_keys', []) or []))
+        return max(1, min(PROVIDER_LIMITS['openrouter'][0], api_keys * per_key))
+
+    def _get_module_graph(self) -> Dict[str, List[str]]:
+        """Dependências entre módulos ('depends_on' em modules_config), validadas"""
+        graph = {}
+        for module_name, config in self.modules_config.items():
+            depends_on = [d for d in config.get('depends_on', []) if d in self.modules_config]
+            missing = set(config.get('depends_on', [])) - set(depends_on)
+            if missing:
+                logger.warning(f"⚠️ Dependências desconhecidas ignoradas em {module_name}: {sorted(missing)}")
+            graph[module_name] = depends_on
+
+        # Falha cedo em ciclos (graphlib.CycleError)
+        tuple(TopologicalSorter(graph).static_order())
+        return graph
 
     async def generate_all_modules(self, session_id: str) -> Dict[str, Any]:
         """Gera todos os módulos (16 padrão + 1 especializado CPL)"""
@@ -201,77 +233,22 @@ class EnhancedModuleProcessor:
         modules_dir = Path(f"analyses_data/{session_id}/modules")
         modules_dir.mkdir(parents=True, exist_ok=True)
 
-        # Gera cada módulo
-        for module_name, config in self.modules_config.items():
-            try:
-                logger.info(f"📝 Gerando módulo: {module_name}")
+        # Gera os módulos respeitando dependências, com concorrência limitada
+        graph = self._get_module_graph()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks: Dict[str, asyncio.Task] = {}
 
-                # Verifica se é o módulo especializado CPL
-                if module_name == 'cpl_completo':
-                    # CORREÇÃO 2: Usar método direto do protocolo CPL
-                    try:
-                        from services.cpl_devastador_protocol import CPLDevastadorProtocol
-                        cpl_protocol = CPLDevastadorProtocol()
-
-                        # Corrigida a referência a 'context' para 'base_data' e corrigida a chave 'publico'
-                        tema = base_data.get('contexto_estrategico', {}).get('tema', 'Produto/Serviço')
-                        segmento = base_data.get('contexto_estrategico', {}).get('segmento', 'Mercado')
-                        publico_alvo = base_data.get('contexto_estrategico', {}).get('publico_alvo', 'Público-alvo')
-
-                        cpl_content = await cpl_protocol.executar_protocolo_completo(
-                            tema=tema,
-                            segmento=segmento,
-                            publico_alvo=publico_alvo,
-                            session_id=session_id
-                        )
-                    except ImportError:
-                        logger.warning("CPL Protocol não disponível, usando conteúdo padrão")
-                        cpl_content = {
-                            'titulo': 'Protocolo de CPLs Devastadores',
-                            'descricao': 'Módulo CPL em desenvolvimento',
-                            'status': 'fallback'
-                        }
-                else:
-                    # Gera conteúdo do módulo padrão
-                    if config.get('use_active_search', False):
-                        content = await self.ai_manager.generate_with_active_search(
-                            prompt=self._get_module_prompt(module_name, config, base_data),
-                            context=base_data.get('context', ''),
-                            session_id=session_id
-                        )
-                    else:
-                        content = await self.ai_manager.generate_text(
-                            prompt=self._get_module_prompt(module_name, config, base_data)
-                        )
-
-                    # CORREÇÃO: Verificar se a IA recusou gerar conteúdo
-                    if self._is_ai_refusal(content):
-                        logger.warning(f"⚠️ IA recusou gerar {module_name}, usando fallback")
-                        content = self._generate_fallback_content(module_name, config, base_data)
-                    
-                    # Verificar se conteúdo é válido
-                    if not content or len(content.strip()) < 100:
-                        logger.warning(f"⚠️ Conteúdo insuficiente para {module_name}, gerando fallback")
-                        content = self._generate_fallback_content(module_name, config, base_data)
-
-                    # Salva módulo padrão
-                    module_path = modules_dir / f"{module_name}.md"
-                    with open(module_path, 'w', encoding='utf-8') as f:
-                        f.write(content)
-
-                results["successful_modules"] += 1
-                results["modules_generated"].append(module_name)
-
-                logger.info(f"✅ Módulo {module_name} gerado com sucesso")
-
-            except Exception as e:
-                logger.error(f"❌ Erro ao gerar módulo {module_name}: {e}")
-                salvar_erro(f"modulo_{module_name}", e, contexto={"session_id": session_id})
-                results["failed_modules"] += 1
-                results["modules_failed"].append({
-                    "module": module_name,
-                    "error": str(e)
-                })
+        async def run_module(module_name: str):
+            depends_on = graph[module_name]
+            if depends_on:
+                await asyncio.gather(*(tasks[d] for d in depends_on), return_exceptions=True)
+            async with semaphore:
+                await self._generate_module(module_name, self.modules_config[module_name], base_data, session_id, modules_dir, results)
+
+        for module_name in TopologicalSorter(graph).static_order():
+            tasks[module_name] = asyncio.create_task(run_module(module_name))
+
+        await asyncio.gather(*tasks.values())
 
         # Gera relatório consolidado
         await self._generate_consolidated_report(session_id, results)
@@ -280,6 +257,79 @@ class EnhancedModuleProcessor:
 
         return results
 
+    async def _generate_module(self, module_name: str, config: Dict[str, Any], base_data: Dict[str, Any],
+                               session_id: str, modules_dir: Path, results: Dict[str, Any]) -> None:
+        """Gera e salva um módulo, registrando o resultado em results"""
+        try:
+            logger.info(f"📝 Gerando módulo: {module_name}")
+
+            # Verifica se é o módulo especializado CPL
+            if module_name == 'cpl_completo':
+                # CORREÇÃO 2: Usar método direto do protocolo CPL
+                try:
+                    from services.cpl_devastador_protocol import CPLDevastadorProtocol
+                    cpl_protocol = CPLDevastadorProtocol()
+
+                    # Corrigida a referência a 'context' para 'base_data' e corrigida a chave 'publico'
+                    tema = base_data.get('contexto_estrategico', {}).get('tema', 'Produto/Serviço')
+                    segmento = base_data.get('contexto_estrategico', {}).get('segmento', 'Mercado')
+                    publico_alvo = base_data.get('contexto_estrategico', {}).get('publico_alvo', 'Público-alvo')
+
+                    cpl_content = await cpl_protocol.executar_protocolo_completo(
+                        tema=tema,
+                        segmento=segmento,
+                        publico_alvo=publico_alvo,
+                        session_id=session_id
+                    )
+                except ImportError:
+                    logger.warning("CPL Protocol não disponível, usando conteúdo padrão")
+                    cpl_content = {
+                        'titulo': 'Protocolo de CPLs Devastadores',
+                        'descricao': 'Módulo CPL em desenvolvimento',
+                        'status': 'fallback'
+                    }
+            else:
+                # Gera conteúdo do módulo padrão
+                if config.get('use_active_search', False):
+                    content = await self.ai_manager.generate_with_active_search(
+                        prompt=self._get_module_prompt(module_name, config, base_data),
+                        context=base_data.get('context', ''),
+                        session_id=session_id
+                    )
+                else:
+                    content = await self.ai_manager.generate_text(
+                        prompt=self._get_module_prompt(module_name, config, base_data)
+                    )
+
+                # CORREÇÃO: Verificar se a IA recusou gerar conteúdo
+                if self._is_ai_refusal(content):
+                    logger.warning(f"⚠️ IA recusou gerar {module_name}, usando fallback")
+                    content = self._generate_fallback_content(module_name, config, base_data)
+                
+                # Verificar se conteúdo é válido
+                if not content or len(content.strip()) < 100:
+                    logger.warning(f"⚠️ Conteúdo insuficiente para {module_name}, gerando fallback")
+                    content = self._generate_fallback_content(module_name, config, base_data)
+
+                # Salva módulo padrão
+                module_path = modules_dir / f"{module_name}.md"
+                with open(module_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+
+            results["successful_modules"] += 1
+            results["modules_generated"].append(module_name)
+
+            logger.info(f"✅ Módulo {module_name} gerado com sucesso")
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao gerar módulo {module_name}: {e}")
+            salvar_erro(f"modulo_{module_name}", e, contexto={"session_id": session_id})
+            results["failed_modules"] += 1
+            results["modules_failed"].append({
+                "module": module_name,
+                "error": str(e)
+            })
+
     def _load_base_data(self, session_id: str) -> Dict[str, Any]:
         """Carrega dados base da sessão"""
         try:
@@ -809,7 +859,7 @@ Este relatório consolida {results['successful_modules']} módulos especializado
             salvar_erro("relatorio_consolidado", e, contexto={"session_id": session_id})
 
 # Instância global
-enhanced_module_processor = EnhancedModuleProcessor()
+enhanced_module_processor = service_registry.register('enhanced_module_processor', EnhancedModuleProcessor)
 
 # Função auxiliar para criação do protocolo CPL (mantida para compatibilidade de chamada)
 async def create_devastating_cpl_protocol(sintese_master: Dict[str, Any],
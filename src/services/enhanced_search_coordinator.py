@@ -14,6 +14,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from services.exa_client import exa_client
 # from services.production_search_manager import production_search_manager
 from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -354,4 +355,4 @@ class EnhancedSearchCoordinator:
             }
 
 # Instância global
-enhanced_search_coordinator = EnhancedSearchCoordinator()
+enhanced_search_coordinator = service_registry.register('enhanced_search_coordinator', EnhancedSearchCoordinator)
@@ -14,6 +14,7 @@ from datetime import datetime
 from pathlib import Path
 from dataclasses import dataclass, asdict
 from enum import Enum
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -458,6 +459,13 @@ TORNE-SE O MAIOR EXPERT NESTE MERCADO BASEADO NO QUE APRENDEU!
         """Carrega arquivo consolidado.json da pesquisa web"""
         try:
             consolidado_path = Path(f"analyses_data/pesquisa_web/{session_id}/consolidado.json")
+
+            # Log JSONL append-only tem prioridade sobre o snapshot compactado
+            if consolidado_path.with_suffix('.jsonl').exists():
+                from services.auto_save_manager import auto_save_manager
+                trechos = list(auto_save_manager.iterar_consolidado(session_id))
+                logger.info(f"✅ Consolidação carregada: {len(trechos)} trechos")
+                return {'session_id': session_id, 'trechos': trechos, 'total_trechos': len(trechos)}
             
             if not consolidado_path.exists():
                 logger.warning(f"⚠️ Consolidado não encontrado: {consolidado_path}")
@@ -1576,7 +1584,7 @@ TORNE-SE O MAIOR EXPERT NESTE MERCADO BASEADO NO QUE APRENDEU!
 # ============================================================================
 
 # Instância global
-enhanced_synthesis_engine = EnhancedSynthesisEngine()
+enhanced_synthesis_engine = service_registry.register('enhanced_synthesis_engine', EnhancedSynthesisEngine)
 
 
 # Funções auxiliares para uso externo
@@ -14,6 +14,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import requests
 from dataclasses import dataclass, asdict
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -777,4 +778,4 @@ class EnhancedViralReportGenerator:
             logger.error(f"❌ Erro ao salvar relatório viral: {e}")
 
 # Instância global do gerador
-enhanced_viral_report_generator = EnhancedViralReportGenerator()
\ No newline at end of file
+enhanced_viral_report_generator = service_registry.register('enhanced_viral_report_generator', EnhancedViralReportGenerator)
\ No newline at end of file
@@ -11,6 +11,7 @@ import requests
 import json
 from typing import Dict, List, Optional, Any
 from datetime import datetime
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -179,4 +180,4 @@ class ExaClient:
             return None
 
 # Instância global
-exa_client = ExaClient()
\ No newline at end of file
+exa_client = service_registry.register('exa_client', ExaClient)
\ No newline at end of file
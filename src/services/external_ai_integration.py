@@ -12,6 +12,7 @@ import json
 from typing import Dict, Any, Optional
 from datetime import datetime
 import asyncio
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -196,4 +197,4 @@ class ExternalAIVerifierIntegration:
         }
 
 # Instância global
-external_ai_integration = ExternalAIVerifierIntegration()
\ No newline at end of file
+external_ai_integration = service_registry.register('external_ai_integration', ExternalAIVerifierIntegration)
\ No newline at end of file
@@ -12,6 +12,7 @@ import time
 import json
 from typing import Dict, List, Any, Optional
 from datetime import datetime
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -775,4 +776,4 @@ class FirecrwalSocialClient:
         return [theme for theme, score in sorted_themes if score > 2]
 
 # Instância global
-firecrwal_social_client = FirecrwalSocialClient()
\ No newline at end of file
+firecrwal_social_client = service_registry.register('firecrwal_social_client', FirecrwalSocialClient)
\ No newline at end of file
@@ -10,6 +10,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import json
 import re
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -1242,4 +1243,4 @@ class FuturePredictionEngine:
 
 
 # Instância global
-future_prediction_engine = FuturePredictionEngine()
\ No newline at end of file
+future_prediction_engine = service_registry.register('future_prediction_engine', FuturePredictionEngine)
\ No newline at end of file
@@ -14,6 +14,7 @@ import aiohttp
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from dotenv import load_dotenv
+from services.service_registry import service_registry
 
 load_dotenv()
 
@@ -250,7 +251,7 @@ class GeminiDirectClient:
         }
 
 # Instância global
-gemini_direct_client = GeminiDirectClient()
+gemini_direct_client = service_registry.register('gemini_direct_client', GeminiDirectClient)
 
 # Funções de conveniência
 async def generate_with_gemini_direct(
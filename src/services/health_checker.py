@@ -2,6 +2,7 @@ import logging
 import time
 from typing import Dict, Any, List
 from datetime import datetime
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -463,4 +464,4 @@ class HealthChecker:
             }
 
 # Instância global
-health_checker = HealthChecker()
\ No newline at end of file
+health_checker = service_registry.register('health_checker', HealthChecker)
\ No newline at end of file
@@ -16,6 +16,7 @@ from datetime import datetime
 from pathlib import Path
 import markdown
 from markdown.extensions import codehilite, tables, toc
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -856,4 +857,4 @@ class HTMLReportConverter:
         }
 
 # Instância global do conversor
-html_report_converter = HTMLReportConverter()
\ No newline at end of file
+html_report_converter = service_registry.register('html_report_converter', HTMLReportConverter)
\ No newline at end of file
@@ -14,6 +14,7 @@ import re
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from pathlib import Path
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -636,7 +637,7 @@ class HTMLReportGenerator:
             raise
 
 # Instância global
-html_report_generator = HTMLReportGenerator()
+html_report_generator = service_registry.register('html_report_generator', HTMLReportGenerator)
 
 def get_html_report_generator() -> HTMLReportGenerator:
     """Retorna instância do gerador de relatórios HTML"""
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - HTTP Client Registry
+Pool compartilhado de conexões aiohttp para provedores de busca e LLM
+"""
+
+import os
+import asyncio
+import logging
+import threading
+import weakref
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, AsyncIterator
+
+# Optional aiohttp import with fallback
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Limites por provedor: (requisições simultâneas, timeout total em segundos)
+PROVIDER_LIMITS = {
+    'openrouter': (int(os.getenv('HTTP_LIMIT_OPENROUTER', '8')), 120),
+    'serper': (int(os.getenv('HTTP_LIMIT_SERPER', '5')), 30),
+    'exa': (int(os.getenv('HTTP_LIMIT_EXA', '5')), 30),
+    'jina': (int(os.getenv('HTTP_LIMIT_JINA', '5')), 45),
+    'firecrawl': (int(os.getenv('HTTP_LIMIT_FIRECRAWL', '3')), 60),
+    'google': (int(os.getenv('HTTP_LIMIT_GOOGLE', '5')), 30),
+    'youtube': (int(os.getenv('HTTP_LIMIT_YOUTUBE', '5')), 30),
+    'supadata': (int(os.getenv('HTTP_LIMIT_SUPADATA', '3')), 60),
+    'web': (int(os.getenv('HTTP_LIMIT_WEB', '20')), 30),
+    'default': (int(os.getenv('HTTP_LIMIT_DEFAULT', '10')), 60)
+}
+
+
+class _LimitedRequest:
+    """
+    Requisição que ocupa uma vaga do semáforo do provedor apenas enquanto
+    está em andamento (da conexão até a liberação da resposta).
+    """
+
+    def __init__(self, semaphore: asyncio.Semaphore, factory):
+        self._semaphore = semaphore
+        self._factory = factory
+        self._context = None
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        try:
+            self._context = self._factory()
+            return await self._context.__aenter__()
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            return await self._context.__aexit__(exc_type, exc, tb)
+        finally:
+            self._semaphore.release()
+
+    def __await__(self):
+        # Uso sem "async with": a vaga é liberada ao receber os headers
+        async def _request():
+            async with self._semaphore:
+                return await self._factory()
+        return _request().__await__()
+
+
+class PooledSession:
+    """
+    Visão de um provedor sobre a sessão compartilhada do event loop.
+
+    Expõe a mesma interface usada pelos serviços (get/post/request), aplicando
+    o timeout e os headers padrão do provedor sem fechar a sessão ao sair.
+    O limite de concorrência do provedor vale por requisição.
+    """
+
+    def __init__(self, session: "aiohttp.ClientSession", timeout: "aiohttp.ClientTimeout",
+                 headers: Optional[Dict[str, str]] = None, semaphore: Optional[asyncio.Semaphore] = None):
+        self._session = session
+        self._timeout = timeout
+        self._headers = headers or {}
+        self._semaphore = semaphore
+
+    def request(self, method: str, url: str, **kwargs):
+        kwargs.setdefault('timeout', self._timeout)
+        if self._headers:
+            kwargs['headers'] = {**self._headers, **(kwargs.get('headers') or {})}
+        if self._semaphore is None:
+            return self._session.request(method, url, **kwargs)
+        return _LimitedRequest(self._semaphore, lambda: self._session.request(method, url, **kwargs))
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def head(self, url: str, **kwargs):
+        return self.request('HEAD', url, **kwargs)
+
+    @property
+    def closed(self) -> bool:
+        return self._session.closed
+
+
+class _LoopPool:
+    """Sessão, connector e semáforos de um event loop"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop_ref = weakref.ref(loop)
+        self.connector = aiohttp.TCPConnector(
+            limit=int(os.getenv('HTTP_POOL_LIMIT', '100')),
+            limit_per_host=int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', '10')),
+            ttl_dns_cache=300,
+            keepalive_timeout=float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', '60'))
+        )
+        self.session = aiohttp.ClientSession(connector=self.connector)
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+class HTTPClientRegistry:
+    """
+    Registro de clientes HTTP do processo.
+
+    aiohttp vincula sessões ao event loop; como cada workflow roda em seu
+    próprio loop, o registro mantém uma sessão (com pool de conexões por host
+    e keep-alive) por loop, e um semáforo por provedor dentro de cada loop.
+    Quem cria o loop encerra a sessão antes de fechá-lo: run() no lugar de
+    asyncio.run(), close_event_loop() no lugar de loop.close(), ou
+    close_loop() de dentro do loop; shutdown() fecha as que restarem no
+    encerramento do processo.
+    aiohttp não negocia HTTP/2; o ganho vem da reutilização de conexões.
+    """
+
+    def __init__(self):
+        self._pools: Dict[int, _LoopPool] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'sessions_created': 0,
+            'sessions_closed': 0,
+            'sessions_abandoned': 0,
+            'requests_by_provider': {}
+        }
+
+    def _get_pool(self) -> _LoopPool:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # Descarta pools de loops fechados sem close_loop(): sem o loop
+            # não há como aguardar session.close(), os sockets ficam para o GC
+            for loop_id, pool in list(self._pools.items()):
+                pool_loop = pool.loop_ref()
+                if pool_loop is None or pool_loop.is_closed():
+                    del self._pools[loop_id]
+                    if not pool.session.closed:
+                        self.stats['sessions_abandoned'] += 1
+                        logger.warning(f"⚠️ Pool HTTP do event loop {loop_id} descartado sem close_loop()")
+
+            pool = self._pools.get(id(loop))
+            if pool is None or pool.loop_ref() is not loop or pool.session.closed:
+                pool = self._pools[id(loop)] = _LoopPool(loop)
+                self.stats['sessions_created'] += 1
+                logger.info(f"🔌 Pool HTTP criado para event loop {id(loop)}")
+            return pool
+
+    @asynccontextmanager
+    async def session(self, provider: str = 'default', timeout: Optional["aiohttp.ClientTimeout"] = None,
+                      headers: Optional[Dict[str, str]] = None):
+        """
+        Sessão pooled para um provedor, respeitando seu limite de concorrência.
+
+        Uso:
+            async with http_client_registry.session('serper', timeout=timeout) as session:
+                async with session.post(url, json=payload) as response:
+                    ...
+        """
+        if not AIOHTTP_AVAILABLE:
+            raise RuntimeError("aiohttp não instalado")
+
+        limit, default_timeout = PROVIDER_LIMITS.get(provider, PROVIDER_LIMITS['default'])
+        pool = self._get_pool()
+
+        semaphore = pool.semaphores.get(provider)
+        if semaphore is None:
+            semaphore = pool.semaphores[provider] = asyncio.Semaphore(limit)
+
+        requests_by_provider = self.stats['requests_by_provider']
+        requests_by_provider[provider] = requests_by_provider.get(provider, 0) + 1
+
+        yield PooledSession(
+            pool.session,
+            timeout or aiohttp.ClientTimeout(total=default_timeout),
+            headers,
+            semaphore
+        )
+
+    async def close_loop(self):
+        """Fecha a sessão do event loop atual (chamar antes do loop terminar)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pool = self._pools.pop(id(loop), None)
+        if pool and not pool.session.closed:
+            await pool.session.close()
+            self.stats['sessions_closed'] += 1
+
+    def run(self, coro):
+        """asyncio.run que fecha as conexões do loop antes de cancelar as tarefas restantes"""
+        async def _runner():
+            try:
+                return await coro
+            finally:
+                await self.close_loop()
+        return asyncio.run(_runner())
+
+    def close_event_loop(self, loop: asyncio.AbstractEventLoop):
+        """Fecha a sessão do loop e depois o loop (para loops de asyncio.new_event_loop())"""
+        try:
+            if not loop.is_closed():
+                loop.run_until_complete(self.close_loop())
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao fechar pool HTTP: {e}")
+        finally:
+            loop.close()
+
+    def shutdown(self, timeout: float = 5.0):
+        """Fecha as sessões de todos os loops ainda ativos (hook de encerramento)"""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+
+        for pool in pools:
+            loop = pool.loop_ref()
+            if loop is None or loop.is_closed() or pool.session.closed:
+                continue
+            try:
+                if loop.is_running():
+                    asyncio.run_coroutine_threadsafe(pool.session.close(), loop).result(timeout)
+                else:
+                    loop.run_until_complete(pool.session.close())
+                self.stats['sessions_closed'] += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao fechar pool HTTP: {e}")
+
+        logger.info("🔌 Pools HTTP encerrados")
+
+    def get_status(self) -> Dict[str, Any]:
+        """Estatísticas do registro"""
+        with self._lock:
+            active = len(self._pools)
+        return {
+            'active_pools': active,
+            **self.stats
+        }
+
+
+async def iter_sse_data(response: "aiohttp.ClientResponse") -> AsyncIterator[str]:
+    """
+    Lê uma resposta Server-Sent Events e produz o conteúdo de cada campo data.
+
+    Linhas de comentário (": OPENROUTER PROCESSING") são ignoradas e o
+    marcador [DONE] encerra a leitura.
+    """
+    async for raw_line in response.content:
+        line = raw_line.decode('utf-8', errors='ignore').strip()
+        if not line.startswith('data:'):
+            continue
+        data = line[5:].strip()
+        if data == '[DONE]':
+            break
+        if data:
+            yield data
+
+
+# Instância global
+http_client_registry = HTTPClientRegistry()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - Image Analysis Cache
+Cache persistente (SQLite) de OCR e análise de cores endereçado pelo conteúdo da imagem
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+from services.service_registry import service_registry
+from services.sqlite_connections import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+# Parâmetros por consulta IN (abaixo do limite de 999 de builds antigos do SQLite)
+SQL_IN_CHUNK = 500
+
+
+def hamming_distance(hash_a: str, hash_b: str) -> int:
+    """Distância de Hamming entre dois hashes hexadecimais de 64 bits"""
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count('1')
+
+
+class ImageAnalysisCache:
+    """
+    Cache de análises de imagem entre sessões.
+
+    A chave é o sha256 do conteúdo: só a mesma imagem reaproveita o OCR.
+    O dHash de 64 bits fica ao lado para o reaproveitamento de quase
+    duplicatas, desligado por padrão (IMAGE_CACHE_MAX_DISTANCE=0) porque
+    capturas com o mesmo layout e textos diferentes ficam a 0-2 bits de
+    distância e receberiam o OCR de outra página.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = Path(db_path or os.getenv('IMAGE_CACHE_PATH', 'analyses_data/cache/image_analysis.db'))
+        self.enabled = os.getenv('IMAGE_CACHE_ENABLED', 'true').lower() == 'true'
+        self.max_distance = int(os.getenv('IMAGE_CACHE_MAX_DISTANCE', '0'))
+        self.max_entries = int(os.getenv('IMAGE_CACHE_MAX_ENTRIES', '50000'))
+
+        self._lock = threading.Lock()
+        self.stats = {
+            'exact_hits': 0,
+            'near_hits': 0,
+            'misses': 0,
+            'stores': 0
+        }
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = SQLiteConnections(self.db_path)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexão da thread atual (aberta e configurada uma única vez)"""
+        return self._db.connection()
+
+    def _init_database(self):
+        """Inicializa banco de dados SQLite"""
+        try:
+            with self._connect() as conn:
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(image_analysis)")}
+                if columns and 'content_hash' not in columns:
+                    # Versão anterior, chaveada só por dHash: as entradas não são confiáveis
+                    conn.execute("DROP TABLE image_analysis")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS image_analysis (
+                        content_hash TEXT PRIMARY KEY,
+                        dhash TEXT NOT NULL,
+                        analysis TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_image_analysis_created_at
+                    ON image_analysis(created_at)
+                """)
+        except Exception as e:
+            logger.error(f"❌ Erro ao inicializar cache de imagens: {e}")
+            self.enabled = False
+
+    @staticmethod
+    def _select_analyses(conn: sqlite3.Connection, content_hashes: List[str]) -> Dict[str, str]:
+        """{sha256: análise serializada} via chave primária, em blocos de SQL_IN_CHUNK"""
+        rows = {}
+        for i in range(0, len(content_hashes), SQL_IN_CHUNK):
+            chunk = content_hashes[i:i + SQL_IN_CHUNK]
+            rows.update(conn.execute(
+                f"SELECT content_hash, analysis FROM image_analysis WHERE content_hash IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall())
+        return rows
+
+    def lookup_many(self, images: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Busca análises para várias imagens de uma vez.
+
+        Recebe {sha256: dhash} e retorna {sha256: análise}. O acerto exato é
+        pelo sha256; com IMAGE_CACHE_MAX_DISTANCE > 0 as que sobram procuram
+        o dHash mais próximo, lendo só a coluna de hashes.
+        """
+        if not self.enabled or not images:
+            return {}
+
+        try:
+            with self._lock, self._connect() as conn:
+                found = self._select_analyses(conn, list(images))
+                missing = [content_hash for content_hash in images if content_hash not in found]
+                near, near_rows = {}, {}
+                if self.max_distance and missing:
+                    near = self._nearest(conn, {content_hash: images[content_hash] for content_hash in missing})
+                    near_rows = self._select_analyses(conn, list(set(near.values())))
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao ler cache de imagens: {e}")
+            return {}
+
+        results = {content_hash: json.loads(analysis) for content_hash, analysis in found.items()}
+        self.stats['exact_hits'] += len(results)
+        for content_hash, known_hash in near.items():
+            if known_hash in near_rows:
+                results[content_hash] = json.loads(near_rows[known_hash])
+                self.stats['near_hits'] += 1
+        self.stats['misses'] += len(images) - len(results)
+        return results
+
+    def _nearest(self, conn: sqlite3.Connection, images: Dict[str, str]) -> Dict[str, str]:
+        """{sha256 pedido: sha256 conhecido} com dHash a até max_distance bits"""
+        known = [(int(dhash, 16), content_hash) for content_hash, dhash in conn.execute(
+            "SELECT content_hash, dhash FROM image_analysis"
+        )]
+        matches = {}
+        for content_hash, dhash in images.items():
+            target = int(dhash, 16)
+            best = None
+            for known_int, known_hash in known:
+                distance = bin(target ^ known_int).count('1')
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, known_hash)
+            if best:
+                matches[content_hash] = best[1]
+        return matches
+
+    def store_many(self, analyses: Dict[str, Tuple[str, Dict[str, Any]]]):
+        """Armazena {sha256: (dhash, análise)} e descarta os mais antigos acima do limite"""
+        if not self.enabled or not analyses:
+            return
+
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                conn.executemany(
+                    """INSERT OR REPLACE INTO image_analysis (content_hash, dhash, analysis, created_at)
+                       VALUES (?, ?, ?, ?)""",
+                    [
+                        (content_hash, dhash, json.dumps(analysis, ensure_ascii=False, default=str), now)
+                        for content_hash, (dhash, analysis) in analyses.items()
+                    ]
+                )
+                conn.execute(
+                    """DELETE FROM image_analysis WHERE content_hash IN (
+                           SELECT content_hash FROM image_analysis ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                       )""",
+                    (self.max_entries,)
+                )
+            self.stats['stores'] += len(analyses)
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao gravar cache de imagens: {e}")
+
+    def clear(self):
+        """Remove todas as entradas"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM image_analysis")
+        logger.info("🧹 Cache de imagens limpo")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de hit/miss e ocupação"""
+        entries = 0
+        try:
+            with self._connect() as conn:
+                entries = conn.execute("SELECT COUNT(*) FROM image_analysis").fetchone()[0]
+        except Exception:
+            pass
+
+        lookups = self.stats['exact_hits'] + self.stats['near_hits'] + self.stats['misses']
+        return {
+            'enabled': self.enabled,
+            **self.stats,
+            'hit_rate': round((self.stats['exact_hits'] + self.stats['near_hits']) / lookups, 3) if lookups else 0.0,
+            'entries': entries,
+            'max_distance': self.max_distance
+        }
+
+
+# Instância global
+image_analysis_cache = service_registry.register('image_analysis_cache', ImageAnalysisCache)
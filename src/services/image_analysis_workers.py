@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - Image Analysis Workers
+Hash, OCR e análise de cores executados nos workers do Predictive Analytics Engine
+
+Importa só o que a análise de imagens usa: os processos 'spawn' importam
+este módulo para desserializar a tarefa, sem carregar o motor inteiro.
+"""
+
+import os
+import hashlib
+import logging
+from pathlib import Path
+from collections import Counter
+from typing import Dict, Any, Tuple, Optional
+
+try:
+    from PIL import Image
+    import pytesseract
+    HAS_OCR = True
+except ImportError:
+    HAS_OCR = False
+
+try:
+    import cv2
+    import numpy as np
+    HAS_OPENCV = True
+except ImportError:
+    HAS_OPENCV = False
+
+logger = logging.getLogger(__name__)
+
+OCR_MAX_SIDE = int(os.getenv('PREDICTIVE_OCR_MAX_SIDE', '2000'))
+
+
+def compute_dhash(image: "Image.Image", hash_size: int = 8) -> str:
+    """
+    dHash de 64 bits (gradiente horizontal de uma miniatura em tons de cinza).
+
+    Robusto a redimensionamento e compressão; só aproxima capturas
+    parecidas, a identidade da imagem vem do sha256 do conteúdo.
+    """
+    thumbnail = image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(thumbnail.getdata())
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
+
+def hash_image_file(path: str) -> Tuple[Optional[Tuple[str, str]], Optional[str]]:
+    """
+    ((sha256, dhash), erro) de um arquivo de imagem.
+
+    O sha256 do conteúdo identifica a imagem; o dHash só aproxima o layout
+    e não distingue capturas com o mesmo layout e textos diferentes.
+    """
+    try:
+        with open(path, 'rb') as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+        with Image.open(path) as image:
+            return (content_hash, compute_dhash(image)), None
+    except Exception as e:
+        return None, str(e)
+
+
+def preprocess_for_ocr(image: "Image.Image") -> "Image.Image":
+    """Tons de cinza e redução para OCR_MAX_SIDE no maior lado"""
+    image = image.convert('L')
+    width, height = image.size
+    if max(width, height) > OCR_MAX_SIDE:
+        scale = OCR_MAX_SIDE / max(width, height)
+        image = image.resize((int(width * scale), int(height * scale)), Image.LANCZOS)
+    return image
+
+
+def analyze_image_colors(img_path: Path) -> Dict[str, Any]:
+    """Analisa cores predominantes em uma imagem."""
+    if not HAS_OPENCV:
+        return {}
+        
+    try:
+        # Carrega imagem
+        image = cv2.imread(str(img_path))
+        if image is None:
+            return {}
+            
+        # Converte para RGB
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        
+        # Reduz dimensões para análise mais rápida
+        height, width = image.shape[:2]
+        if max(height, width) > 200:
+            scale = 200 / max(height, width)
+            image = cv2.resize(image, (int(width * scale), int(height * scale)))
+        
+        # Converte para lista de pixels
+        pixels = image.reshape(-1, 3)
+        
+        # Aplica K-means para encontrar cores dominantes
+        k = 5  # número de cores dominantes
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 100, 0.2)
+        _, labels, centers = cv2.kmeans(
+            pixels.astype(np.float32), k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS
+        )
+        
+        # Conta pixels por cluster
+        counts = Counter(labels.flatten())
+        
+        # Ordena cores por frequência
+        sorted_colors = sorted(counts.items(), key=lambda x: x[1], reverse=True)
+        
+        # Formata resultados
+        dominant_colors = []
+        for i, (label, count) in enumerate(sorted_colors):
+            color = centers[label].astype(int)
+            percentage = count / len(pixels) * 100
+            dominant_colors.append({
+                "color_rgb": color.tolist(),
+                "color_hex": '#{:02x}{:02x}{:02x}'.format(color[0], color[1], color[2]),
+                "percentage": percentage
+            })
+        
+        return {
+            "dominant_colors": dominant_colors,
+            "total_colors_analyzed": k,
+            "color_diversity": len([c for c in counts if counts[c] / len(pixels) > 0.05])  # cores com mais de 5%
+        }
+    except Exception as e:
+        logger.error(f"❌ Erro na análise de cores da imagem {img_path}: {e}")
+        return {}
+
+
+def analyze_image_file(path: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    OCR e análise de cores de uma imagem (executada nos workers).
+
+    Retorna (análise, erro); a análise traz ocr_text e, com OpenCV,
+    color_analysis.
+    """
+    try:
+        with Image.open(path) as image:
+            ocr_text = pytesseract.image_to_string(preprocess_for_ocr(image), lang='por')
+        analysis = {"ocr_text": ocr_text}
+        if HAS_OPENCV:
+            analysis["color_analysis"] = analyze_image_colors(Path(path))
+        return analysis, None
+    except Exception as e:
+        return None, str(e)
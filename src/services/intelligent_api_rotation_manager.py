@@ -19,6 +19,8 @@ import threading
 import requests
 import aiohttp
 from pathlib import Path
+from services.service_registry import service_registry
+from services.api_health_store import api_health_store, api_key_id, SCOPE_API_KEY
 
 logger = logging.getLogger(__name__)
 
@@ -262,8 +264,9 @@ class IntelligentAPIRotationManager:
             available_apis = []
             
             for api in self.apis[api_type]:
-                # Verificar se API está blacklistada
-                if exclude_blacklisted and self._is_blacklisted(api):
+                # Verificar se API está blacklistada (local ou por outro worker)
+                if exclude_blacklisted and (self._is_blacklisted(api) or
+                                            api_health_store.is_blocked(SCOPE_API_KEY, api_key_id(api.api_key))):
                     continue
                 
                 # Verificar se API está ativa
@@ -311,6 +314,7 @@ class IntelligentAPIRotationManager:
                 api.no_credits_count = 0  # Reset contador de créditos
                 api.status = APIStatus.ACTIVE
                 self.stats.successful_requests += 1
+                api_health_store.record_result(SCOPE_API_KEY, api_key_id(api.api_key), True, api.name)
                 
                 logger.debug(f"✅ API {api.name} - Sucesso")
                 
@@ -318,6 +322,7 @@ class IntelligentAPIRotationManager:
                 api.error_count += 1
                 api.last_error_message = error_message
                 self.stats.failed_requests += 1
+                api_health_store.record_result(SCOPE_API_KEY, api_key_id(api.api_key), False, api.name)
                 
                 # Analisar tipo de erro
                 error_type = self._analyze_error(error_message, response_data)
@@ -328,7 +333,7 @@ class IntelligentAPIRotationManager:
                     
                     # Blacklistar se exceder limite
                     if api.no_credits_count >= self.max_no_credits_attempts:
-                        self._blacklist_api(api, "Sem créditos")
+                        self._blacklist_api(api, "Sem créditos", no_credits=True)
                         
                 elif error_type == "auth_error":
                     logger.error(f"🔐 API {api.name} - Erro de autenticação")
@@ -337,6 +342,7 @@ class IntelligentAPIRotationManager:
                 elif error_type == "rate_limit":
                     api.status = APIStatus.RATE_LIMITED
                     api.rate_limit_reset = datetime.now() + timedelta(minutes=5)
+                    api_health_store.set_cooldown(SCOPE_API_KEY, api_key_id(api.api_key), 300, "rate limit", api.name)
                     logger.warning(f"⏱️ API {api.name} - Rate limit")
                     
                 else:
@@ -381,12 +387,18 @@ class IntelligentAPIRotationManager:
         
         return "generic_error"
     
-    def _blacklist_api(self, api: APIEndpoint, reason: str):
-        """Blacklista uma API por período determinado"""
+    def _blacklist_api(self, api: APIEndpoint, reason: str, no_credits: bool = False):
+        """Blacklista uma API por período determinado (também para os demais workers)"""
         
         api.status = APIStatus.BLACKLISTED
         api.blacklisted_until = datetime.now() + timedelta(hours=self.blacklist_duration_hours)
         
+        duration = self.blacklist_duration_hours * 3600
+        if no_credits:
+            api_health_store.mark_credits_exhausted(SCOPE_API_KEY, api_key_id(api.api_key), duration, reason, api.name)
+        else:
+            api_health_store.set_cooldown(SCOPE_API_KEY, api_key_id(api.api_key), duration, reason, api.name)
+        
         logger.warning(f"🚫 API {api.name} blacklistada por {self.blacklist_duration_hours}h - Razão: {reason}")
         
         # Salvar informação de blacklist
@@ -544,6 +556,7 @@ class IntelligentAPIRotationManager:
                 status['apis'][api_type] = []
                 
                 for api in api_list:
+                    shared = api_health_store.get(SCOPE_API_KEY, api_key_id(api.api_key)) or {}
                     api_status = {
                         'name': api.name,
                         'status': api.status.value,
@@ -554,7 +567,9 @@ class IntelligentAPIRotationManager:
                         'success_rate': (api.success_count / max(api.total_requests, 1)) * 100,
                         'last_used': api.last_used.isoformat() if api.last_used else None,
                         'blacklisted_until': api.blacklisted_until.isoformat() if api.blacklisted_until else None,
-                        'last_error': api.last_error_message
+                        'last_error': api.last_error_message,
+                        'shared_available': shared.get('available', True),
+                        'shared_error_rate': shared.get('error_rate', 0.0)
                     }
                     
                     status['apis'][api_type].append(api_status)
@@ -568,11 +583,12 @@ class IntelligentAPIRotationManager:
             for api_list in self.apis.values():
                 for api in api_list:
                     if api.name == api_name:
-                        if api.status == APIStatus.BLACKLISTED:
+                        if api.status == APIStatus.BLACKLISTED or api_health_store.is_blocked(SCOPE_API_KEY, api_key_id(api.api_key)):
                             api.status = APIStatus.ACTIVE
                             api.blacklisted_until = None
                             api.error_count = 0
                             api.no_credits_count = 0
+                            api_health_store.clear(SCOPE_API_KEY, api_key_id(api.api_key))
                             
                             logger.info(f"✅ API {api_name} forçadamente removida da blacklist")
                             return True
@@ -584,4 +600,4 @@ class IntelligentAPIRotationManager:
             return False
 
 # Instância global do gerenciador
-intelligent_api_rotation_manager = IntelligentAPIRotationManager()
\ No newline at end of file
+intelligent_api_rotation_manager = service_registry.register('intelligent_api_rotation_manager', IntelligentAPIRotationManager)
\ No newline at end of file
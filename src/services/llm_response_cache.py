@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - LLM Response Cache
+Cache persistente (SQLite) de respostas de LLM endereçado por conteúdo
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+from services.service_registry import service_registry
+from services.sqlite_connections import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """
+    Cache de respostas de LLM com TTL e limites LRU.
+
+    A chave é o SHA-256 de (modelo, prompt transformado, system prompt,
+    temperatura, max_tokens). Entradas expiradas são ignoradas na leitura e
+    removidas na limpeza; acima dos limites de entradas/bytes, as menos
+    recentemente usadas são descartadas.
+
+    Cada thread reutiliza sua própria conexão; em código assíncrono use
+    get_async/set_async, que executam a consulta fora do event loop.
+    """
+
+    def __init__(self, db_path: str = None, ttl_seconds: int = None,
+                 max_entries: int = None, max_bytes: int = None):
+        self.db_path = Path(db_path or os.getenv('LLM_CACHE_PATH', 'analyses_data/cache/llm_responses.db'))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000'))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv('LLM_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+        self.enabled = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'expired': 0
+        }
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = SQLiteConnections(self.db_path)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexão da thread atual (aberta e configurada uma única vez)"""
+        return self._db.connection()
+
+    def _count(self, stat: str, amount: int = 1):
+        with self._lock:
+            self.stats[stat] += amount
+
+    def _init_database(self):
+        """Inicializa banco de dados SQLite"""
+        try:
+            with self._connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS llm_responses (
+                        key TEXT PRIMARY KEY,
+                        model TEXT NOT NULL,
+                        response TEXT NOT NULL,
+                        size_bytes INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL,
+                        hit_count INTEGER NOT NULL DEFAULT 0
+                    )
+                """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access
+                    ON llm_responses(last_access)
+                """)
+        except Exception as e:
+            logger.error(f"❌ Erro ao inicializar cache de LLM: {e}")
+            self.enabled = False
+
+    @staticmethod
+    def make_key(model: str, prompt: str, system_prompt: Optional[str],
+                 temperature: Optional[float], max_tokens: Optional[int]) -> str:
+        """Gera chave de conteúdo para a requisição"""
+        payload = json.dumps(
+            [model, prompt, system_prompt or "", temperature, max_tokens],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retorna resposta cacheada ou None"""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row is None:
+                    self._count('misses')
+                    return None
+
+                response, created_at = row
+                if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                    self._count('expired')
+                    self._count('misses')
+                    return None
+
+                conn.execute(
+                    "UPDATE llm_responses SET last_access = ?, hit_count = hit_count + 1 WHERE key = ?",
+                    (now, key)
+                )
+                self._count('hits')
+                return json.loads(response)
+
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao ler cache de LLM: {e}")
+            self._count('misses')
+            return None
+
+    async def get_async(self, key: str) -> Optional[Dict[str, Any]]:
+        """get() em thread separada, sem bloquear o event loop"""
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self.get, key)
+
+    def set(self, key: str, model: str, response: Dict[str, Any]):
+        """Armazena resposta e aplica os limites LRU"""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        try:
+            serialized = json.dumps(response, ensure_ascii=False, default=str)
+            with self._connect() as conn:
+                conn.execute(
+                    """INSERT OR REPLACE INTO llm_responses
+                       (key, model, response, size_bytes, created_at, last_access, hit_count)
+                       VALUES (?, ?, ?, ?, ?, ?, 0)""",
+                    (key, model, serialized, len(serialized.encode('utf-8')), now, now)
+                )
+                self._count('stores')
+                self._enforce_limits(conn, now)
+
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao gravar cache de LLM: {e}")
+
+    async def set_async(self, key: str, model: str, response: Dict[str, Any]):
+        """set() em thread separada, sem bloquear o event loop"""
+        if not self.enabled:
+            return
+        await asyncio.to_thread(self.set, key, model, response)
+
+    def _enforce_limits(self, conn: sqlite3.Connection, now: float):
+        """Remove expirados e as entradas menos recentemente usadas acima dos limites"""
+        if self.ttl_seconds:
+            cursor = conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            if cursor.rowcount:
+                self._count('expired', cursor.rowcount)
+
+        count, total_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_responses"
+        ).fetchone()
+
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size_bytes in conn.execute(
+            "SELECT key, size_bytes FROM llm_responses ORDER BY last_access ASC"
+        ).fetchall():
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            count -= 1
+            total_bytes -= size_bytes
+            evicted += 1
+
+        if evicted:
+            self._count('evictions', evicted)
+
+    def clear(self):
+        """Remove todas as entradas"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_responses")
+        logger.info("🧹 Cache de LLM limpo")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de hit/miss e ocupação"""
+        entries, total_bytes = 0, 0
+        try:
+            with self._connect() as conn:
+                entries, total_bytes = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_responses"
+                ).fetchone()
+        except Exception:
+            pass
+
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            'enabled': self.enabled,
+            **self.stats,
+            'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0,
+            'entries': entries,
+            'size_bytes': total_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes
+        }
+
+
+# Instância global
+llm_response_cache = service_registry.register('llm_response_cache', LLMResponseCache)
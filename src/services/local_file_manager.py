@@ -12,9 +12,13 @@ import time
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 import uuid
+from services.service_registry import service_registry
+from services.session_catalog import session_catalog
 
 logger = logging.getLogger(__name__)
 
+CATALOG_KIND = 'local_analyses'
+
 class LocalFileManager:
     """Gerenciador de arquivos locais para análises"""
     
@@ -199,18 +203,74 @@ class LocalFileManager:
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(metadata, f, ensure_ascii=False, indent=2)
             
+            session_catalog.upsert(CATALOG_KIND, filename[:-5], *self._catalog_entry(metadata, file_path))
             return file_path
             
         except Exception as e:
             logger.error(f"❌ Erro ao salvar metadados: {str(e)}")
             return None
     
-    def list_local_analyses(self) -> List[Dict[str, Any]]:
-        """Lista análises salvas localmente"""
+    @staticmethod
+    def _catalog_entry(metadata: Dict[str, Any], metadata_path: str) -> tuple:
+        """(resumo, tamanho, colunas indexadas) de uma análise para o catálogo"""
+        project_data = metadata.get('project_data', {})
+        summary = {
+            'analysis_id': metadata.get('analysis_id'),
+            'timestamp': metadata.get('timestamp'),
+            'created_at': metadata.get('created_at'),
+            'segmento': project_data.get('segmento'),
+            'produto': project_data.get('produto'),
+            'total_files': metadata.get('total_files', 0),
+            'quality_score': metadata.get('quality_score', 0),
+            'processing_time': metadata.get('processing_time', 0)
+        }
+        size_bytes = os.path.getsize(metadata_path) + sum(
+            saved.get('size', 0) for saved in metadata.get('files_saved', [])
+        )
+        return summary, size_bytes, {'name': project_data.get('produto')}
+
+    def rebuild_catalog(self) -> int:
+        """Reconstrói o catálogo de análises locais a partir dos metadados em disco"""
+        metadata_dir = os.path.join(self.base_dir, 'metadata')
+        entries = []
+        for filename in os.listdir(metadata_dir) if os.path.exists(metadata_dir) else []:
+            if not filename.endswith('_metadata.json'):
+                continue
+            file_path = os.path.join(metadata_dir, filename)
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                entries.append((filename[:-5], *self._catalog_entry(metadata, file_path)))
+            except Exception as e:
+                logger.error(f"❌ Erro ao ler metadata {filename}: {str(e)}")
+        return session_catalog.rebuild(CATALOG_KIND, metadata_dir, entries)
+
+    def list_local_analyses(self, limit: int = None, offset: int = 0, segmento: str = None,
+                            search: str = None) -> List[Dict[str, Any]]:
+        """Lista análises salvas localmente (mais recentes primeiro) pelo catálogo indexado"""
+        
+        if session_catalog.enabled:
+            try:
+                if not session_catalog.is_current(CATALOG_KIND, os.path.join(self.base_dir, 'metadata')):
+                    self.rebuild_catalog()
+                analyses, _ = session_catalog.query(
+                    CATALOG_KIND, segmento=segmento, search=search,
+                    limit=limit, offset=offset, order_by='created_at'
+                )
+                return analyses
+            except Exception as e:
+                logger.warning(f"⚠️ Catálogo indisponível, varrendo metadados: {str(e)}")
+        
+        return self._scan_local_analyses(limit, offset, segmento, search)
+    
+    def _scan_local_analyses(self, limit: int = None, offset: int = 0, segmento: str = None,
+                             search: str = None) -> List[Dict[str, Any]]:
+        """Listagem lendo cada metadado (catálogo desativado ou indisponível)"""
         
         try:
             analyses = []
             metadata_dir = os.path.join(self.base_dir, 'metadata')
+            needle = (search or '').lower()
             
             if not os.path.exists(metadata_dir):
                 return []
@@ -222,25 +282,21 @@ class LocalFileManager:
                         with open(file_path, 'r', encoding='utf-8') as f:
                             metadata = json.load(f)
                         
-                        analyses.append({
-                            'analysis_id': metadata.get('analysis_id'),
-                            'timestamp': metadata.get('timestamp'),
-                            'created_at': metadata.get('created_at'),
-                            'segmento': metadata.get('project_data', {}).get('segmento'),
-                            'produto': metadata.get('project_data', {}).get('produto'),
-                            'total_files': metadata.get('total_files', 0),
-                            'quality_score': metadata.get('quality_score', 0),
-                            'processing_time': metadata.get('processing_time', 0)
-                        })
+                        summary, _, _ = self._catalog_entry(metadata, file_path)
+                        if segmento and summary['segmento'] != segmento:
+                            continue
+                        if needle and needle not in f"{summary['produto'] or ''} {summary['segmento'] or ''}".lower():
+                            continue
+                        analyses.append(summary)
                         
                     except Exception as e:
                         logger.error(f"❌ Erro ao ler metadata {filename}: {str(e)}")
                         continue
             
             # Ordena por data de criação (mais recente primeiro)
-            analyses.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+            analyses.sort(key=lambda x: x.get('created_at') or '', reverse=True)
             
-            return analyses
+            return analyses[offset:offset + limit] if limit is not None else analyses[offset:]
             
         except Exception as e:
             logger.error(f"❌ Erro ao listar análises locais: {str(e)}")
@@ -275,6 +331,8 @@ class LocalFileManager:
                         except Exception as e:
                             logger.error(f"❌ Erro ao remover {file}: {str(e)}")
             
+            session_catalog.remove_prefix(CATALOG_KIND, analysis_id[:8])
+            
             if deleted_files > 0:
                 logger.info(f"✅ Análise {analysis_id} removida: {deleted_files} arquivos")
                 return True
@@ -383,4 +441,4 @@ class LocalFileManager:
             return {}
 
 # Instância global
-local_file_manager = LocalFileManager()
\ No newline at end of file
+local_file_manager = service_registry.register('local_file_manager', LocalFileManager)
\ No newline at end of file
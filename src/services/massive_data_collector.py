@@ -19,12 +19,14 @@ from services.real_search_orchestrator import real_search_orchestrator
 from services.social_media_extractor import SocialMediaExtractor
 social_media_extractor = SocialMediaExtractor()
 from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.http_client_registry import http_client_registry
 
 # Importa novos serviços da Etapa 1
 # from services.search_api_manager import search_api_manager  # REMOVIDO - não existe
 from services.trendfinder_client import trendfinder_client
 from services.supadata_mcp_client import supadata_client
 from services.visual_content_capture import visual_content_capture
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -76,7 +78,7 @@ class MassiveDataCollector:
                     self.execute_massive_collection(query, context, session_id)
                 )
             finally:
-                loop.close()
+                http_client_registry.close_event_loop(loop)
                 
         except Exception as e:
             logger.error(f"Erro na coleta de dados: {e}")
@@ -750,4 +752,4 @@ class MassiveDataCollector:
         pass
 
 # Instância global
-massive_data_collector = MassiveDataCollector()
+massive_data_collector = service_registry.register('massive_data_collector', MassiveDataCollector)
@@ -17,6 +17,7 @@ import time
 from services.alibaba_websailor import alibaba_websailor
 from services.real_search_orchestrator import RealSearchOrchestrator
 from services.auto_save_manager import auto_save_manager # Importação movida para o topo
+from services.service_registry import service_registry
 
 # Adicionar o diretório src ao path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
@@ -35,6 +36,12 @@ class MassiveSearchEngine:
         self.min_size_bytes = self.min_size_kb * 1024
         self.data_dir = os.getenv('DATA_DIR', 'analyses_data')
 
+        # Buscas simultâneas por provedor
+        self.provider_concurrency = {
+            'alibaba_websailor': int(os.getenv('MASSIVE_SEARCH_WEBSAILOR_CONCURRENCY', '3')),
+            'real_search_orchestrator': int(os.getenv('MASSIVE_SEARCH_ORCHESTRATOR_CONCURRENCY', '5'))
+        }
+
         os.makedirs(self.data_dir, exist_ok=True)
 
         logger.info(f"🔍 Massive Search Engine inicializado - Mínimo: {self.min_size_kb}KB")
@@ -85,50 +92,69 @@ class MassiveSearchEngine:
             logger.info(f"📋 {len(search_queries)} queries geradas para busca massiva ILIMITADA")
 
             # Executar buscas com LIMITE INTELIGENTE para performance
-            search_count = 0
             max_queries = min(15, len(search_queries))  # LIMITE: máximo 15 queries
-            
-            for query in search_queries[:max_queries]:  # LIMITADO para performance
-                if (time.time() - start_time) > TIME_LIMIT_SECONDS:
-                    logger.warning(f"⏰ Limite de tempo de {TIME_LIMIT_SECONDS/60} minutos atingido. Encerrando busca massiva.")
+            queries = search_queries[:max_queries]
+
+            # Fan-out: cada query dispara WebSailor e Real Search em paralelo,
+            # limitados por semáforo de provedor; resultados entram à medida que chegam
+            semaphores = {
+                'alibaba_websailor': asyncio.Semaphore(self.provider_concurrency['alibaba_websailor']),
+                'real_search_orchestrator': asyncio.Semaphore(self.provider_concurrency['real_search_orchestrator'])
+            }
+            searchers = {
+                'alibaba_websailor': self._search_alibaba_websailor,
+                'real_search_orchestrator': self._search_real_orchestrator
+            }
+            result_keys = {
+                'alibaba_websailor': 'alibaba_websailor_results',
+                'real_search_orchestrator': 'real_search_orchestrator_results'
+            }
+
+            async def run_search(api_name: str, query: str):
+                async with semaphores[api_name]:
+                    logger.info(f"🔍 {api_name}: {query}")
+                    return api_name, query, await searchers[api_name](query, session_id)
+
+            pending = {
+                asyncio.create_task(run_search(api_name, query))
+                for query in queries
+                for api_name in searchers
+            }
+
+            current_size = len(json.dumps(massive_data, ensure_ascii=False).encode('utf-8'))
+            completed_queries = set()
+
+            while pending:
+                remaining = TIME_LIMIT_SECONDS - (time.time() - start_time)
+                if remaining <= 0:
+                    logger.warning(f"⏰ Limite de tempo de {TIME_LIMIT_SECONDS/60} minutos atingido. Cancelando {len(pending)} buscas pendentes.")
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
                     break
 
-                search_count += 1
-                logger.info(f"🔍 Busca {search_count}: {query}")
-
-                # ALIBABA WebSailor - PRINCIPAL
-                try:
-                    websailor_result = await self._search_alibaba_websailor(query, session_id)
-                    if websailor_result:
-                        massive_data['busca_massiva']['alibaba_websailor_results'].append(websailor_result)
-                        massive_data['metadata']['apis_used'].append('alibaba_websailor')
-                        
-                        # SALVAMENTO SIMULTÂNEO - NOVO
-                        await self._save_search_result_simultaneously(websailor_result, session_id, 'alibaba_websailor')
-                        logger.info(f"✅ ALIBABA WebSailor: dados coletados e salvos simultaneamente")
-                except Exception as e:
-                    logger.warning(f"⚠️ ALIBABA WebSailor falhou: {e}")
-
-                # Real Search Orchestrator - EXECUTAR TAMBÉM
-                try:
-                    real_search_result = await self._search_real_orchestrator(query, session_id)
-                    if real_search_result:
-                        massive_data['busca_massiva']['real_search_orchestrator_results'].append(real_search_result)
-                        massive_data['metadata']['apis_used'].append('real_search_orchestrator')
-                        
-                        # SALVAMENTO SIMULTÂNEO - NOVO
-                        await self._save_search_result_simultaneously(real_search_result, session_id, 'real_search_orchestrator')
-                        logger.info(f"✅ Real Search Orchestrator: dados coletados e salvos simultaneamente")
-                except Exception as e:
-                    logger.warning(f"⚠️ Real Search Orchestrator falhou: {e}")
-
-                # Verificar tamanho atual - SEM LIMITES
-                current_json = json.dumps(massive_data, ensure_ascii=False, indent=2)
-                current_size = len(current_json.encode('utf-8'))
-                logger.info(f"📊 Tamanho atual: {current_size/1024:.1f}KB (SEM LIMITES)")
-
-                # Pequena pausa entre buscas
-                await asyncio.sleep(0.5)  # Reduzido para acelerar
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    try:
+                        api_name, query, result = task.result()
+                    except Exception as e:
+                        logger.warning(f"⚠️ Busca falhou: {e}")
+                        continue
+
+                    if not result:
+                        continue
+
+                    massive_data['busca_massiva'][result_keys[api_name]].append(result)
+                    massive_data['metadata']['apis_used'].append(api_name)
+                    completed_queries.add(query)
+
+                    # SALVAMENTO SIMULTÂNEO - o tamanho serializado alimenta o contador
+                    current_size += await self._save_search_result_simultaneously(result, session_id, api_name)
+                    logger.info(f"✅ {api_name}: dados de '{query}' coletados e salvos ({current_size/1024:.1f}KB acumulados)")
+
+            search_count = len(completed_queries)
+            logger.info(f"📊 {search_count}/{len(queries)} queries com resultados - {current_size/1024:.1f}KB")
 
             # CONSOLIDAÇÃO FINAL - NOVO PROCESSO
             logger.info("🔄 Consolidando TODOS os dados para IA da etapa 2...")
@@ -288,16 +314,27 @@ class MassiveSearchEngine:
             logger.error(f"❌ Real Search Orchestrator falhou: {e}")
             return None
 
-    async def _save_search_result_simultaneously(self, result: Dict[str, Any], session_id: str, api_name: str):
-        """Salva resultados de busca individualmente e simultaneamente."""
+    async def _save_search_result_simultaneously(self, result: Dict[str, Any], session_id: str, api_name: str) -> int:
+        """
+        Salva resultados de busca individualmente e simultaneamente.
+
+        Retorna o tamanho em bytes do resultado serializado (0 em caso de erro).
+        """
         try:
             filename = f"BUSCA_SIMULTANEA_{api_name}_{session_id}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}.json"
             filepath = os.path.join(self.data_dir, filename)
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+            payload = json.dumps(result, ensure_ascii=False, default=str).encode('utf-8')
+
+            def _write():
+                with open(filepath, 'wb') as f:
+                    f.write(payload)
+
+            await asyncio.to_thread(_write)
             logger.debug(f"💾 Resultado simultâneo salvo: {filename}")
+            return len(payload)
         except Exception as e:
             logger.error(f"❌ Erro ao salvar resultado simultâneo para {api_name}: {e}")
+            return 0
 
     def _calculate_final_size(self, massive_data: Dict[str, Any]) -> float:
         """Calcula tamanho final em KB"""
@@ -535,6 +572,6 @@ class MassiveSearchEngine:
 
 
 # Instância global
-massive_search_engine = MassiveSearchEngine()
+massive_search_engine = service_registry.register('massive_search_engine', MassiveSearchEngine)
 
 
@@ -13,6 +13,7 @@ from services.ai_manager import ai_manager
 from services.production_search_manager import production_search_manager
 from services.auto_save_manager import auto_save_manager
 from datetime import datetime
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -581,4 +582,4 @@ class MasterAnalysisEngine:
         """
 
 # Instância global
-master_analysis_engine = MasterAnalysisEngine()
\ No newline at end of file
+master_analysis_engine = service_registry.register('master_analysis_engine', MasterAnalysisEngine)
\ No newline at end of file
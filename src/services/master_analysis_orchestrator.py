@@ -15,6 +15,8 @@ from services.massive_data_collector import massive_data_collector
 from services.enhanced_module_processor import enhanced_module_processor
 from services.comprehensive_report_generator_v3 import comprehensive_report_generator_v3
 from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.http_client_registry import http_client_registry
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -217,7 +219,7 @@ class MasterAnalysisOrchestrator:
                     enhanced_module_processor.generate_all_modules(session_id)
                 )
             finally:
-                loop.close()
+                http_client_registry.close_event_loop(loop)
             
             if progress_callback:
                 progress_callback(3.9, "✅ Todos os módulos processados")
@@ -289,4 +291,4 @@ class MasterAnalysisOrchestrator:
         logger.info("🔄 Master Analysis Orchestrator resetado")
 
 # Instância global
-master_analysis_orchestrator = MasterAnalysisOrchestrator()
+master_analysis_orchestrator = service_registry.register('master_analysis_orchestrator', MasterAnalysisOrchestrator)
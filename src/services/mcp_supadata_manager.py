@@ -9,6 +9,7 @@ import os
 import requests
 import logging
 from typing import Dict, List, Any, Optional
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -625,7 +626,7 @@ class MCPSupadataManager:
         }
 
 # Instância global CORRIGIDA
-mcp_supadata_manager = MCPSupadataManager()
+mcp_supadata_manager = service_registry.register('mcp_supadata_manager', MCPSupadataManager)
 
 def get_supadata_manager():
     """Retorna a instância global do MCP Supadata Manager"""
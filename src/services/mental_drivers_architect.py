@@ -12,6 +12,7 @@ import json
 from typing import Dict, List, Any, Optional
 from services.ai_manager import ai_manager
 from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -505,4 +506,4 @@ RETORNE APENAS JSON VÁLIDO:
         }
 
 # Instância global
-mental_drivers_architect = MentalDriversArchitect()
\ No newline at end of file
+mental_drivers_architect = service_registry.register('mental_drivers_architect', MentalDriversArchitect)
\ No newline at end of file
@@ -16,6 +16,7 @@ from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 import re
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -414,7 +415,7 @@ class MiddleOutTransform:
         return self.compression_stats.copy()
 
 # Instância global
-middle_out_transform = MiddleOutTransform()
+middle_out_transform = service_registry.register('middle_out_transform', MiddleOutTransform)
 
 def get_middle_out_transform() -> MiddleOutTransform:
     """Retorna instância do Middle Out Transform"""
@@ -13,11 +13,17 @@ import asyncio
 import aiohttp
 import re
 import math
+from collections import deque
 from typing import Dict, List, Optional, Any, Union, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
+from services.http_client_registry import http_client_registry
+from services.llm_response_cache import llm_response_cache
+from services.service_registry import service_registry
+from services.api_health_store import api_health_store, SCOPE_OPENROUTER_MODEL
+
 load_dotenv()
 
 # Configuração de logging
@@ -418,10 +424,13 @@ class AIModel:
     temperature: float
     is_free: bool
     priority: int
+    # Nível da hierarquia: a ordenação por latência só reordena dentro do nível
+    tier: int = 1
     status: str = "active"  # active, failed, disabled
     last_used: Optional[datetime] = None
     failure_count: int = 0
     success_count: int = 0
+    failed_until: Optional[datetime] = None
     # Configuração do transformer
     transforms: Optional[List[str]] = None
     middle_out_config: Optional[MiddleOutConfig] = None
@@ -438,6 +447,9 @@ class OpenRouterHierarchyManager:
         # Inicializar Middle-Out Transformer
         self.middle_out_transformer = MiddleOutTransformer()
 
+        # Cache persistente de respostas (SQLite)
+        self.response_cache = llm_response_cache
+
         # HIERARQUIA DEFINIDA COM GROK-4 COMO PRIMÁRIO
         self.models_hierarchy = [
             AIModel(
@@ -448,6 +460,7 @@ class OpenRouterHierarchyManager:
                 temperature=0.7,
                 is_free=True,
                 priority=1,
+                tier=1,
                 transforms=["middle-out"],
                 middle_out_config=MiddleOutConfig(
                     enabled=True,
@@ -464,6 +477,7 @@ class OpenRouterHierarchyManager:
                 temperature=0.7,
                 is_free=True,
                 priority=2,
+                tier=2,
                 transforms=["middle-out"],
                 middle_out_config=MiddleOutConfig(
                     enabled=True,
@@ -480,6 +494,7 @@ class OpenRouterHierarchyManager:
                 temperature=0.7,
                 is_free=True,
                 priority=3,
+                tier=2,
                 transforms=["middle-out"],
                 middle_out_config=MiddleOutConfig(
                     enabled=True,
@@ -496,6 +511,7 @@ class OpenRouterHierarchyManager:
                 temperature=0.7,
                 is_free=False, # Pago
                 priority=4,
+                tier=3,
                 transforms=["middle-out"],
                 middle_out_config=MiddleOutConfig(
                     enabled=True,
@@ -512,6 +528,7 @@ class OpenRouterHierarchyManager:
                 temperature=0.7,
                 is_free=False, # Pago
                 priority=5,
+                tier=3,
                 transforms=["middle-out"],
                 middle_out_config=MiddleOutConfig(
                     enabled=True,
@@ -522,11 +539,19 @@ class OpenRouterHierarchyManager:
             )
         ]
 
+        # Agendador de fallback: prazo total, hedge e ordenação adaptativa por latência
+        self.default_deadline_seconds = float(os.getenv('OPENROUTER_DEADLINE_SECONDS', '300'))
+        self.hedge_enabled = os.getenv('OPENROUTER_HEDGE', 'false').lower() == 'true'
+        self.default_hedge_delay_seconds = float(os.getenv('OPENROUTER_HEDGE_DELAY', '30'))
+        self.adaptive_ordering = os.getenv('OPENROUTER_ADAPTIVE_ORDER', 'true').lower() == 'true'
+        self.latency_samples: Dict[str, deque] = {}
+
         # Estatísticas de uso
         self.usage_stats = {
             "total_requests": 0,
             "successful_requests": 0,
             "failed_requests": 0,
+            "hedged_requests": 0,
             "model_usage": {},
             "transformer_usage": {},
             "last_reset": datetime.now()
@@ -569,35 +594,40 @@ class OpenRouterHierarchyManager:
         self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
         return key
 
+    def _build_headers(self) -> Dict[str, str]:
+        """Headers da API OpenRouter com a próxima chave da rotação"""
+        return {
+            "Authorization": f"Bearer {self._get_current_api_key()}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://github.com/joscarmao/v1800finalv2",
+            "X-Title": "ARQV30 Enhanced v3.0"
+        }
+
     def _get_next_available_model(self) -> Optional[AIModel]:
         """Obtém próximo modelo disponível na hierarquia"""
-        for model in sorted(self.models_hierarchy, key=lambda x: x.priority):
-            if model.status == "active":
-                return model
-
-        logger.error("❌ Nenhum modelo disponível na hierarquia!")
-        return None
+        candidates = self._get_candidate_models()
+        return candidates[0] if candidates else None
 
     def _mark_model_failed(self, model: AIModel, error: str, duration: int = 300):
         """Marca modelo como falhado temporariamente"""
         model.failure_count += 1
         model.status = "failed"
 
-        logger.warning(f"⚠️ Modelo {model.name} marcado como falhado: {error}")
-
-        # Reabilitar após 'duration' segundos
-        async def reactivate_model():
-            await asyncio.sleep(duration)
-            model.status = "active"
-            logger.info(f"✅ Modelo {model.name} reativado após {duration}s")
+        # Reabilitado em _get_candidate_models após 'duration' segundos
+        model.failed_until = datetime.now() + timedelta(seconds=duration)
+        
+        # Compartilhado com os demais workers
+        api_health_store.record_result(SCOPE_OPENROUTER_MODEL, model.name, False)
+        api_health_store.set_cooldown(SCOPE_OPENROUTER_MODEL, model.name, duration, error)
 
-        asyncio.create_task(reactivate_model())
+        logger.warning(f"⚠️ Modelo {model.name} marcado como falhado: {error}")
 
     def _mark_model_success(self, model: AIModel):
         """Marca modelo como bem-sucedido"""
         model.success_count += 1
         model.last_used = datetime.now()
         model.status = "active"
+        api_health_store.record_result(SCOPE_OPENROUTER_MODEL, model.name, True)
 
     def _apply_middle_out_transform(self, prompt: str, system_prompt: Optional[str], model: AIModel) -> Tuple[str, Optional[str], Dict[str, Any]]:
         """Aplica transformação middle-out se configurada para o modelo"""
@@ -639,36 +669,146 @@ class OpenRouterHierarchyManager:
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
         model_override: Optional[str] = None,
-        enable_transforms: bool = True
+        enable_transforms: bool = True,
+        use_cache: bool = True,
+        deadline_seconds: Optional[float] = None,
+        token_budget: Optional[int] = None,
+        hedge: Optional[bool] = None
     ) -> Dict[str, Any]:
         """
         Gera completion usando hierarquia de modelos com Middle-Out Transformer
 
+        A hierarquia é percorrida de forma iterativa sob um prazo total e um
+        orçamento de tokens. Com hedge habilitado, se o modelo atual passar do
+        seu p95 de latência o próximo modelo é disparado em paralelo; a primeira
+        resposta válida vence e a outra requisição é cancelada.
+
         Args:
             prompt: Prompt do usuário
             system_prompt: Prompt do sistema (opcional)
             max_tokens: Máximo de tokens (opcional)
             temperature: Temperatura (opcional)
-            model_override: Forçar modelo específico (opcional)
+            model_override: Forçar modelo inicial (opcional; demais ficam como fallback)
             enable_transforms: Habilitar transformações (padrão: True)
+            use_cache: Consultar/gravar o cache de respostas (padrão: True)
+            deadline_seconds: Prazo total da chamada (padrão: OPENROUTER_DEADLINE_SECONDS)
+            token_budget: Máximo de tokens (prompt + resposta) que a chamada pode consumir
+            hedge: Disparar o próximo modelo após o p95 de latência (padrão: OPENROUTER_HEDGE)
 
         Returns:
             Dict com resposta e metadados
         """
         self.usage_stats["total_requests"] += 1
 
-        # Determinar modelo a usar
-        if model_override:
-            target_model = next((m for m in self.models_hierarchy if m.name == model_override), None)
-            if not target_model:
-                logger.error(f"❌ Modelo override não encontrado: {model_override}")
-                target_model = self._get_next_available_model()
-        else:
-            target_model = self._get_next_available_model()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (deadline_seconds or self.default_deadline_seconds)
+        hedge = self.hedge_enabled if hedge is None else hedge
 
-        if not target_model:
+        candidates = self._get_candidate_models(model_override)
+        if not candidates:
             raise Exception("Nenhum modelo disponível")
 
+        # Orçamento de tokens: cada tentativa reserva prompt estimado + max_tokens
+        prompt_tokens_estimate = (len(prompt) + len(system_prompt or "")) // 4
+        remaining_budget = token_budget
+
+        def reserve_tokens(model: AIModel) -> Optional[int]:
+            nonlocal remaining_budget
+            requested = max_tokens or model.max_tokens
+            if remaining_budget is None:
+                return requested
+            allowed = min(requested, remaining_budget - prompt_tokens_estimate)
+            if allowed <= 0:
+                return None
+            remaining_budget -= prompt_tokens_estimate + allowed
+            return allowed
+
+        def start_attempt(model: AIModel) -> Optional[asyncio.Task]:
+            model_max_tokens = reserve_tokens(model)
+            if model_max_tokens is None:
+                logger.warning(f"💰 Orçamento de tokens esgotado antes de {model.name}")
+                return None
+            return asyncio.create_task(self._attempt_model(
+                model, prompt, system_prompt, model_max_tokens, temperature,
+                enable_transforms, use_cache, deadline
+            ))
+
+        # Fila de candidatos: sem hedge, um modelo por vez; com hedge, até dois
+        # em voo, o segundo disparado quando o primeiro passa do seu p95
+        index = 0
+        in_flight: Dict[asyncio.Task, AIModel] = {}
+        budget_exhausted = False
+
+        def launch_next() -> bool:
+            nonlocal index, budget_exhausted
+            if index >= len(candidates) or budget_exhausted:
+                return False
+            model = candidates[index]
+            index += 1
+            task = start_attempt(model)
+            if task is None:
+                budget_exhausted = True
+                return False
+            in_flight[task] = model
+            return True
+
+        try:
+            while loop.time() < deadline:
+                if not in_flight:
+                    if not launch_next():
+                        break
+
+                remaining = max(0.0, deadline - loop.time())
+                timeout = remaining
+                can_hedge = hedge and len(in_flight) == 1 and index < len(candidates) and not budget_exhausted
+                if can_hedge:
+                    current = next(iter(in_flight.values()))
+                    timeout = min(remaining, self._get_hedge_delay(current))
+
+                done, _ = await asyncio.wait(
+                    set(in_flight), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    if can_hedge and loop.time() < deadline:
+                        slow_model = next(iter(in_flight.values()))
+                        if launch_next():
+                            self.usage_stats["hedged_requests"] += 1
+                            logger.info(f"🏁 Hedge: {candidates[index - 1].name} disparado após {timeout:.1f}s sem resposta de {slow_model.name}")
+                    continue
+
+                for task in done:
+                    model = in_flight.pop(task)
+                    if not task.cancelled() and task.exception() is None:
+                        return task.result()
+                    if not task.cancelled():
+                        logger.warning(f"⚠️ {model.name}: {task.exception()}")
+                    if index < len(candidates):
+                        logger.info(f"🔄 Tentando próximo modelo: {candidates[index].name}")
+        finally:
+            # Cancela requisições perdedoras ou pendentes no prazo
+            for task in in_flight:
+                task.cancel()
+
+        # Todos os modelos falharam, o orçamento ou o prazo acabaram
+        self.usage_stats["failed_requests"] += 1
+        if loop.time() >= deadline:
+            raise Exception("Prazo esgotado antes de algum modelo da hierarquia responder")
+        if budget_exhausted:
+            raise Exception("Orçamento de tokens esgotado")
+        raise Exception("Todos os modelos da hierarquia falharam")
+
+    def _prepare_request(
+        self,
+        target_model: AIModel,
+        prompt: str,
+        system_prompt: Optional[str],
+        max_tokens: int,
+        temperature: Optional[float],
+        enable_transforms: bool,
+        use_cache: bool
+    ) -> Tuple[Dict[str, Any], str, Dict[str, Any], Optional[str]]:
+        """Monta payload, aplica middle-out e calcula a chave de cache"""
         # Aplicar transformação middle-out se habilitada
         transformed_prompt = prompt
         transformed_system = system_prompt
@@ -689,7 +829,7 @@ class OpenRouterHierarchyManager:
         request_params = {
             "model": target_model.name,
             "messages": messages,
-            "max_tokens": max_tokens or target_model.max_tokens,
+            "max_tokens": max_tokens,
             "temperature": temperature or target_model.temperature,
             "stream": False
         }
@@ -699,29 +839,70 @@ class OpenRouterHierarchyManager:
             request_params["transforms"] = target_model.transforms
             logger.info(f"🔧 Aplicando transforms: {target_model.transforms} para {target_model.name}")
 
-        # Tentar com modelo atual
+        # Cache de respostas endereçado por conteúdo
+        cache_key = None
+        if use_cache and self.response_cache.enabled:
+            cache_key = self.response_cache.make_key(
+                target_model.name,
+                transformed_prompt,
+                transformed_system,
+                request_params["temperature"],
+                request_params["max_tokens"]
+            )
+
+        return request_params, transformed_prompt, transform_metadata, cache_key
+
+    async def _attempt_model(
+        self,
+        target_model: AIModel,
+        prompt: str,
+        system_prompt: Optional[str],
+        max_tokens: int,
+        temperature: Optional[float],
+        enable_transforms: bool,
+        use_cache: bool,
+        deadline: float
+    ) -> Dict[str, Any]:
+        """Executa até 3 tentativas em um modelo, respeitando o prazo total"""
+        loop = asyncio.get_running_loop()
+
+        request_params, transformed_prompt, transform_metadata, cache_key = self._prepare_request(
+            target_model, prompt, system_prompt, max_tokens, temperature, enable_transforms, use_cache
+        )
+
+        cached = await self.response_cache.get_async(cache_key) if cache_key else None
+        if cached:
+            self.usage_stats["successful_requests"] += 1
+            logger.info(f"💾 Resposta de {target_model.name} servida do cache")
+            return {
+                **cached,
+                "cached": True,
+                "timestamp": datetime.now().isoformat()
+            }
+
+        last_error = "sem resposta"
         for attempt in range(3):  # Até 3 tentativas
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+
+            started = time.monotonic()
             try:
-                api_key = self._get_current_api_key()
-                headers = {
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "https://github.com/joscarmao/v1800finalv2",
-                    "X-Title": "ARQV30 Enhanced v3.0"
-                }
+                headers = self._build_headers()
 
                 logger.info(f"🤖 Tentativa {attempt + 1} com {target_model.name}")
 
-                async with aiohttp.ClientSession() as session:
+                async with http_client_registry.session('openrouter') as session:
                     async with session.post(
                         target_model.endpoint,
                         headers=headers,
                         json=request_params,
-                        timeout=aiohttp.ClientTimeout(total=120)
+                        timeout=aiohttp.ClientTimeout(total=min(120, remaining))
                     ) as response:
 
                         if response.status == 200:
                             result = await response.json()
+                            self._record_latency(target_model, time.monotonic() - started)
 
                             # Sucesso!
                             self._mark_model_success(target_model)
@@ -734,7 +915,7 @@ class OpenRouterHierarchyManager:
 
                             logger.info(f"✅ Sucesso com {target_model.name}")
 
-                            return {
+                            completion = {
                                 "content": result["choices"][0]["message"]["content"],
                                 "model_used": target_model.name,
                                 "provider": target_model.provider,
@@ -747,57 +928,109 @@ class OpenRouterHierarchyManager:
                                 "transformed_prompt_length": len(transformed_prompt)
                             }
 
+                            if cache_key and completion["content"]:
+                                await self.response_cache.set_async(cache_key, target_model.name, completion)
+
+                            return completion
+
                         else:
                             error_text = await response.text()
+                            last_error = f"HTTP {response.status}"
                             logger.error(f"❌ Erro HTTP {response.status}: {error_text}")
 
                             # Se erro 429 (rate limit) ou contém "rate", marcar modelo como falhado por curto período
                             if response.status == 429 or "rate" in error_text.lower():
                                 logger.warning(f"⚠️ Modelo {target_model.name} com rate limit, tentando próximo")
-                                self._mark_model_failed(target_model, f"HTTP {response.status}", duration=60) # 1 minuto apenas
-                                break  # Sair do loop de tentativas para este modelo e tentar o próximo
+                                self._mark_model_failed(target_model, last_error, duration=60) # 1 minuto apenas
+                                raise Exception(f"{target_model.name}: {last_error}")
 
                             # Para outros erros, tentar novamente
                             if attempt == 2:  # Última tentativa
-                                self._mark_model_failed(target_model, f"HTTP {response.status}")
+                                self._mark_model_failed(target_model, last_error)
                                 break
 
-                            await asyncio.sleep(2 ** attempt)  # Backoff exponencial
-
             except asyncio.TimeoutError:
+                last_error = "Timeout"
                 logger.error(f"⏰ Timeout com {target_model.name}")
                 if attempt == 2:
-                    self._mark_model_failed(target_model, "Timeout")
+                    self._mark_model_failed(target_model, last_error)
                     break
-                await asyncio.sleep(2 ** attempt)
+
+            except asyncio.CancelledError:
+                logger.info(f"✂️ Requisição a {target_model.name} cancelada")
+                raise
 
             except Exception as e:
-                logger.error(f"❌ Erro com {target_model.name}: {str(e)}")
+                if target_model.status == "failed":
+                    raise
+                last_error = str(e)
+                logger.error(f"❌ Erro com {target_model.name}: {last_error}")
                 if attempt == 2:
-                    self._mark_model_failed(target_model, str(e))
+                    self._mark_model_failed(target_model, last_error)
                     break
-                await asyncio.sleep(2 ** attempt)
-
-        # Se chegou aqui, o modelo atual falhou - tentar próximo na hierarquia
-        remaining_models = [m for m in self.models_hierarchy if m.status == "active" and m.priority > target_model.priority]
-
-        if remaining_models:
-            next_model = min(remaining_models, key=lambda x: x.priority)
-            logger.info(f"🔄 Tentando próximo modelo: {next_model.name}")
-
-            # Chamada recursiva com próximo modelo
-            return await self.generate_completion(
-                prompt=prompt,
-                system_prompt=system_prompt,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                model_override=next_model.name,
-                enable_transforms=enable_transforms
-            )
 
-        # Todos os modelos falharam
-        self.usage_stats["failed_requests"] += 1
-        raise Exception("Todos os modelos da hierarquia falharam")
+            # Backoff exponencial limitado pelo prazo restante
+            await asyncio.sleep(min(2 ** attempt, max(0.0, deadline - loop.time())))
+
+        raise Exception(f"{target_model.name}: {last_error}")
+
+    def _get_candidate_models(self, model_override: Optional[str] = None) -> List[AIModel]:
+        """
+        Ordem de tentativa dos modelos ativos.
+
+        Os níveis configurados (tier) são sempre respeitados. Com ordenação
+        adaptativa, dentro de cada nível os modelos com menor p95 medido vêm
+        primeiro; os ainda sem medição mantêm a ordem de prioridade.
+        """
+        now = datetime.now()
+        for model in self.models_hierarchy:
+            if model.status == "failed" and model.failed_until and now >= model.failed_until:
+                model.status = "active"
+                model.failed_until = None
+                logger.info(f"✅ Modelo {model.name} reativado")
+
+        # Modelos em cooldown em qualquer worker ficam de fora
+        shared_failed = api_health_store.blocked(SCOPE_OPENROUTER_MODEL)
+        active = [m for m in self.models_hierarchy if m.status == "active" and m.name not in shared_failed]
+
+        if self.adaptive_ordering:
+            def sort_key(model: AIModel):
+                p95 = self._latency_percentile(model, 0.95)
+                return (model.tier, p95 if p95 is not None else float('inf'), model.priority)
+        else:
+            def sort_key(model: AIModel):
+                return (model.tier, model.priority)
+
+        ordered = sorted(active, key=sort_key)
+
+        if model_override:
+            override = next((m for m in self.models_hierarchy if m.name == model_override), None)
+            if override:
+                ordered = [override] + [m for m in ordered if m is not override]
+            else:
+                logger.error(f"❌ Modelo override não encontrado: {model_override}")
+
+        if not ordered:
+            logger.error("❌ Nenhum modelo disponível na hierarquia!")
+        return ordered
+
+    def _record_latency(self, model: AIModel, seconds: float):
+        """Registra latência de uma resposta bem-sucedida"""
+        samples = self.latency_samples.setdefault(model.name, deque(maxlen=100))
+        samples.append(seconds)
+
+    def _latency_percentile(self, model: AIModel, percentile: float) -> Optional[float]:
+        """Percentil de latência do modelo (None sem amostras suficientes)"""
+        samples = self.latency_samples.get(model.name)
+        if not samples or len(samples) < 3:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(math.ceil(percentile * len(ordered))) - 1)]
+
+    def _get_hedge_delay(self, model: AIModel) -> float:
+        """Tempo de espera antes de disparar o hedge para o modelo"""
+        p95 = self._latency_percentile(model, 0.95)
+        return p95 if p95 is not None else self.default_hedge_delay_seconds
 
     def get_status(self) -> Dict[str, Any]:
         """Retorna status atual do gerenciador"""
@@ -807,10 +1040,14 @@ class OpenRouterHierarchyManager:
                     "name": model.name,
                     "provider": model.provider,
                     "priority": model.priority,
+                    "tier": model.tier,
                     "status": model.status,
+                    "shared_error_rate": api_health_store.error_rate(SCOPE_OPENROUTER_MODEL, model.name),
                     "success_count": model.success_count,
                     "failure_count": model.failure_count,
                     "last_used": model.last_used.isoformat() if model.last_used else None,
+                    "latency_p50": self._latency_percentile(model, 0.50),
+                    "latency_p95": self._latency_percentile(model, 0.95),
                     "transforms": model.transforms,
                     "middle_out_enabled": model.middle_out_config.enabled if model.middle_out_config else False
                 }
@@ -819,7 +1056,8 @@ class OpenRouterHierarchyManager:
             "usage_stats": self.usage_stats,
             "api_keys_count": len(self.api_keys),
             "active_models": len([m for m in self.models_hierarchy if m.status == "active"]),
-            "middle_out_metrics": self.middle_out_transformer.get_metrics()
+            "middle_out_metrics": self.middle_out_transformer.get_metrics(),
+            "response_cache": self.response_cache.get_stats()
         }
 
     def reset_failed_models(self):
@@ -827,7 +1065,9 @@ class OpenRouterHierarchyManager:
         for model in self.models_hierarchy:
             if model.status == "failed":
                 model.status = "active"
+                model.failed_until = None
                 logger.info(f"✅ Modelo {model.name} reativado manualmente")
+        api_health_store.clear(SCOPE_OPENROUTER_MODEL)
 
     def update_middle_out_config(self, model_name: str, config: MiddleOutConfig):
         """Atualiza configuração middle-out para um modelo específico"""
@@ -856,7 +1096,7 @@ class OpenRouterHierarchyManager:
         self.middle_out_transformer.reset_metrics()
 
 # Instância global para uso em todo o projeto
-openrouter_manager = OpenRouterHierarchyManager()
+openrouter_manager = service_registry.register('openrouter_manager', OpenRouterHierarchyManager)
 
 # Função de conveniência para uso direto
 async def generate_ai_response(
@@ -7,6 +7,7 @@ Lista de modelos disponíveis (mantém APIs externas nas análises)
 
 import logging
 from typing import Dict, List, Any
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -215,4 +216,4 @@ class OpenRouterModelsService:
         return any(model['id'] == model_id for model in models)
 
 # Instância global
-openrouter_models = OpenRouterModelsService()
\ No newline at end of file
+openrouter_models = service_registry.register('openrouter_models', OpenRouterModelsService)
\ No newline at end of file
@@ -12,6 +12,7 @@ import json
 from typing import Dict, List, Any, Optional
 from services.ai_manager import ai_manager
 from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -857,4 +858,4 @@ RETORNE APENAS JSON VÁLIDO:
         }
 
 # Instância global
-pre_pitch_architect = PrePitchArchitect()
\ No newline at end of file
+pre_pitch_architect = service_registry.register('pre_pitch_architect', PrePitchArchitect)
\ No newline at end of file
@@ -12,6 +12,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from services.ai_manager import ai_manager
 from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -600,4 +601,4 @@ ESTRUTURA 3 AULAS:
 
 
 # Instância global
-pre_pitch_architect_advanced = PrePitchArchitectAdvanced()
\ No newline at end of file
+pre_pitch_architect_advanced = service_registry.register('pre_pitch_architect_advanced', PrePitchArchitectAdvanced)
\ No newline at end of file
@@ -11,12 +11,16 @@ import json
 import asyncio
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional, Callable
 from datetime import datetime, timedelta
 from pathlib import Path
 from collections import Counter, defaultdict
 import re
 import warnings
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 warnings.filterwarnings('ignore')
 
 # Imports condicionais para análise avançada
@@ -55,19 +59,6 @@ try:
 except ImportError:
     HAS_GENSIM = False
 
-try:
-    from PIL import Image
-    import pytesseract
-    HAS_OCR = True
-except ImportError:
-    HAS_OCR = False
-
-try:
-    import cv2
-    HAS_OPENCV = True
-except ImportError:
-    HAS_OPENCV = False
-
 try:
     from prophet import Prophet
     HAS_PROPHET = True
@@ -89,9 +80,55 @@ except ImportError:
     HAS_NETWORKX = False
 
 from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.session_corpus import SessionCorpus
+from services.predictive_text_scoring import (
+    calculate_readability_metrics, extract_emotional_indicators, identify_persuasion_elements, score_texts
+)
+from services.image_analysis_workers import HAS_OCR, HAS_OPENCV, analyze_image_colors, analyze_image_file, hash_image_file
 
 logger = logging.getLogger(__name__)
 
+# Estágio NLP em lote: spaCy via nlp.pipe e pontuação por documento em pool de processos
+NLP_BATCH_SIZE = int(os.getenv('PREDICTIVE_NLP_BATCH_SIZE', '16'))
+NLP_PROCESSES = int(os.getenv('PREDICTIVE_NLP_PROCESSES', '1'))
+SCORING_WORKERS = int(os.getenv('PREDICTIVE_SCORING_WORKERS', str(min(4, os.cpu_count() or 1))))
+SCORING_POOL_MIN_DOCS = int(os.getenv('PREDICTIVE_SCORING_POOL_MIN_DOCS', '8'))
+MAX_NLP_CHARS = 1000000  # Limita para performance
+
+# Componentes do pipeline que a análise textual não consome
+UNUSED_SPACY_COMPONENTS = ['lemmatizer', 'trainable_lemmatizer', 'textcat', 'textcat_multilabel', 'entity_linker']
+ENTITY_LABELS = ['PERSON', 'ORG', 'GPE', 'PRODUCT', 'EVENT']
+
+# Análise visual: OCR em pool de processos com pré-processamento e cache por conteúdo
+OCR_WORKERS = int(os.getenv('PREDICTIVE_OCR_WORKERS', str(SCORING_WORKERS)))
+VISUAL_CACHE_FILENAME = ".visual_analysis.json"
+VISUAL_CACHE_VERSION = 2
+
+_process_pools: Dict[str, ProcessPoolExecutor] = {}
+_process_pools_lock = threading.Lock()
+
+
+def _get_process_pool(name: str, workers: int) -> ProcessPoolExecutor:
+    """Pool de processos compartilhado por nome; 'spawn' evita fork de um processo com threads"""
+    with _process_pools_lock:
+        pool = _process_pools.get(name)
+        if pool is None:
+            pool = _process_pools[name] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            logger.info(f"⚙️ Pool de processos '{name}' criado com {workers} processos")
+        return pool
+
+
+def _reset_process_pool(name: str):
+    """Descarta um pool quebrado para que a próxima chamada crie outro"""
+    with _process_pools_lock:
+        pool = _process_pools.pop(name, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 class PredictiveAnalyticsEngine:
     """Motor de Análise Preditiva e Insights Profundos Ultra-Avançado"""
 
@@ -139,15 +176,19 @@ class PredictiveAnalyticsEngine:
         
         # Inicializa TF-IDF
         if HAS_SKLEARN:
-            self.tfidf_vectorizer = TfidfVectorizer(
-                max_features=self.config['max_features_tfidf'],
-                stop_words=self._get_portuguese_stopwords(),
-                ngram_range=(1, 2),
-                min_df=2,
-                max_df=0.8
-            )
+            self.tfidf_vectorizer = self._build_tfidf_vectorizer()
             logger.info("✅ TF-IDF Vectorizer configurado")
 
+    def _build_tfidf_vectorizer(self) -> "TfidfVectorizer":
+        """Cria um TF-IDF Vectorizer com a configuração do motor"""
+        return TfidfVectorizer(
+            max_features=self.config['max_features_tfidf'],
+            stop_words=self._get_portuguese_stopwords(),
+            ngram_range=(1, 2),
+            min_df=2,
+            max_df=0.8
+        )
+
     def _get_portuguese_stopwords(self) -> List[str]:
         """Retorna lista de stopwords em português"""
         return [
@@ -172,8 +213,9 @@ class PredictiveAnalyticsEngine:
         """
         logger.info(f"🔮 INICIANDO ANÁLISE PREDITIVA ULTRA-AVANÇADA para sessão: {session_id}")
         
-        session_dir = Path(f"analyses_data/{session_id}")
-        if not session_dir.exists():
+        corpus = SessionCorpus(session_id)
+        session_dir = corpus.session_dir
+        if not corpus.exists():
             logger.error(f"❌ Diretório da sessão não encontrado: {session_dir}")
             return {"success": False, "error": "Diretório da sessão não encontrado"}
 
@@ -209,33 +251,25 @@ class PredictiveAnalyticsEngine:
         }
 
         try:
-            # FASE 1: Análise Textual Ultra-Profunda
-            logger.info("🧠 FASE 1: Análise textual ultra-profunda...")
-            insights["textual_insights"] = await self._perform_ultra_textual_analysis(session_dir)
-            
-            # FASE 2: Análise de Tendências Temporais
-            logger.info("📈 FASE 2: Análise de tendências temporais...")
-            insights["temporal_trends"] = await self._perform_temporal_analysis(session_dir)
-            
-            # FASE 3: Análise Visual Avançada (OCR + Computer Vision)
-            logger.info("👁️ FASE 3: Análise visual avançada...")
-            insights["visual_insights"] = await self._perform_advanced_visual_analysis(session_dir)
-            
-            # FASE 4: Análise de Rede e Conectividade
-            logger.info("🕸️ FASE 4: Análise de rede e conectividade...")
-            insights["network_analysis"] = await self._perform_network_analysis(session_dir)
-            
-            # FASE 5: Dinâmica de Sentimentos
-            logger.info("💭 FASE 5: Análise de dinâmica de sentimentos...")
-            insights["sentiment_dynamics"] = await self._analyze_sentiment_dynamics(session_dir)
-            
-            # FASE 6: Evolução de Tópicos
-            logger.info("🔄 FASE 6: Análise de evolução de tópicos...")
-            insights["topic_evolution"] = await self._analyze_topic_evolution(session_dir)
-            
-            # FASE 7: Padrões de Engajamento
-            logger.info("📊 FASE 7: Análise de padrões de engajamento...")
-            insights["engagement_patterns"] = await self._analyze_engagement_patterns(session_dir)
+            # Leitura única dos arquivos da sessão, compartilhada por todas as fases
+            await asyncio.to_thread(corpus.load)
+
+            # FASES 1-7 são independentes entre si e rodam em paralelo sobre o mesmo corpus
+            logger.info("🧠 FASES 1-7: textual, temporal, visual, rede, sentimentos, tópicos e engajamento...")
+            independent_phases = {
+                "textual_insights": self._perform_ultra_textual_analysis(corpus),
+                "temporal_trends": self._perform_temporal_analysis(corpus),
+                "visual_insights": self._perform_advanced_visual_analysis(corpus),
+                "network_analysis": self._perform_network_analysis(corpus),
+                "sentiment_dynamics": self._analyze_sentiment_dynamics(corpus),
+                "topic_evolution": self._analyze_topic_evolution(corpus),
+                "engagement_patterns": self._analyze_engagement_patterns(corpus)
+            }
+            phase_results = await asyncio.gather(*independent_phases.values(), return_exceptions=True)
+            for key, phase_result in zip(independent_phases, phase_results):
+                if isinstance(phase_result, BaseException):
+                    raise phase_result
+                insights[key] = phase_result
             
             # FASE 8: Geração de Previsões Ultra-Avançadas
             logger.info("🔮 FASE 8: Geração de previsões ultra-avançadas...")
@@ -259,7 +293,7 @@ class PredictiveAnalyticsEngine:
             
             # FASE 13: Avaliação de Qualidade dos Dados
             logger.info("🔍 FASE 13: Avaliação de qualidade dos dados...")
-            insights["data_quality_assessment"] = await self._assess_data_quality(session_dir)
+            insights["data_quality_assessment"] = await self._assess_data_quality(corpus)
             
             # FASE 14: Recomendações Estratégicas
             logger.info("💡 FASE 14: Geração de recomendações estratégicas...")
@@ -272,10 +306,10 @@ class PredictiveAnalyticsEngine:
             # Salva insights preditivos
             insights_path = session_dir / "insights_preditivos.json"
             with open(insights_path, 'w', encoding='utf-8') as f:
-                json.dump(insights, f, ensure_ascii=False, indent=2)
+                json.dump(insights, f, ensure_ascii=False, indent=2, default=str)
             
             # Salva também como etapa
-            salvar_etapa("insights_preditivos_completos", insights, categoria="analise_preditiva")
+            salvar_etapa("insights_preditivos_completos", insights, categoria="analise_preditiva", session_id=session_id)
             
             logger.info(f"✅ ANÁLISE PREDITIVA ULTRA-AVANÇADA CONCLUÍDA: {insights_path}")
             return insights
@@ -290,7 +324,7 @@ class PredictiveAnalyticsEngine:
                 "timestamp": datetime.now().isoformat()
             }
 
-    async def _perform_ultra_textual_analysis(self, session_dir: Path) -> Dict[str, Any]:
+    async def _perform_ultra_textual_analysis(self, corpus: SessionCorpus) -> Dict[str, Any]:
         """Realiza análise textual ultra-profunda com NLP avançado"""
         
         results = {
@@ -309,61 +343,56 @@ class PredictiveAnalyticsEngine:
         }
 
         # Coleta dados textuais
-        textual_data = self._gather_comprehensive_textual_data(session_dir)
+        textual_data = self._gather_comprehensive_textual_data(corpus)
         results["total_documents_processed"] = len(textual_data)
 
         if not textual_data:
             logger.warning("⚠️ Nenhum dado textual encontrado para análise")
             return results
 
+        # Documentos elegíveis, na ordem das fontes
+        sources = [
+            source for source, text_content in textual_data.items()
+            if len(text_content) >= self.config['min_text_length']
+        ]
+        texts = [textual_data[source] for source in sources]
+        with_sentiment = bool(HAS_VADER and self.sentiment_analyzer)
+
+        # spaCy (thread) e pontuação por documento (pool de processos) rodam em paralelo fora do event loop
+        spacy_task = asyncio.to_thread(self._run_spacy_stage, sources, texts)
+        spacy_results, scores = await asyncio.gather(spacy_task, self._run_scoring_stage(texts, with_sentiment))
+
         all_texts = []
+        analyzed_sources = []
         all_entities = []
         sentiment_scores = []
-        
-        # Processa cada documento
-        for source, text_content in textual_data.items():
-            if len(text_content) < self.config['min_text_length']:
-                continue
-                
-            try:
-                # Análise com SpaCy
-                if HAS_SPACY and self.nlp_model:
-                    doc = self.nlp_model(text_content[:1000000])  # Limita para performance
-                    
-                    # Extração de entidades nomeadas
-                    for ent in doc.ents:
-                        if ent.label_ in ['PERSON', 'ORG', 'GPE', 'PRODUCT', 'EVENT']:
-                            all_entities.append((ent.text.strip(), ent.label_))
-                    
-                    # Análise de padrões linguísticos
-                    linguistic_patterns = self._analyze_linguistic_patterns(doc)
-                    results["linguistic_patterns"][source] = linguistic_patterns
-                
-                # Análise de sentimento
-                if HAS_VADER and self.sentiment_analyzer:
-                    sentiment = self.sentiment_analyzer.polarity_scores(text_content)
-                    sentiment_scores.append(sentiment)
-                    results["sentiment_analysis"][source] = sentiment
-                
-                # Análise de legibilidade
-                readability = self._calculate_readability_metrics(text_content)
-                results["readability_metrics"][source] = readability
-                
-                # Indicadores emocionais
-                emotional_indicators = self._extract_emotional_indicators(text_content)
-                results["emotional_indicators"][source] = emotional_indicators
-                
-                # Elementos de persuasão
-                persuasion_elements = self._identify_persuasion_elements(text_content)
-                results["persuasion_elements"][source] = persuasion_elements
-                
-                all_texts.append(text_content)
-                results["total_words_analyzed"] += len(text_content.split())
-                
-            except Exception as e:
-                logger.error(f"❌ Erro na análise textual de {source}: {e}")
+
+        for source, text_content, (score, score_error) in zip(sources, texts, scores):
+            spacy_result = spacy_results.get(source)
+            if spacy_result is not None:
+                entities, linguistic_patterns, spacy_error = spacy_result
+                if spacy_error:
+                    logger.error(f"❌ Erro na análise textual de {source}: {spacy_error}")
+                    continue
+                all_entities.extend(entities)
+                results["linguistic_patterns"][source] = linguistic_patterns
+
+            if score_error:
+                logger.error(f"❌ Erro na análise textual de {source}: {score_error}")
                 continue
 
+            if with_sentiment:
+                sentiment_scores.append(score["sentiment"])
+                results["sentiment_analysis"][source] = score["sentiment"]
+
+            results["readability_metrics"][source] = score["readability"]
+            results["emotional_indicators"][source] = score["emotional_indicators"]
+            results["persuasion_elements"][source] = score["persuasion_elements"]
+
+            all_texts.append(text_content)
+            analyzed_sources.append(source)
+            results["total_words_analyzed"] += len(text_content.split())
+
         # Análise agregada
         if all_entities:
             entity_counter = Counter(all_entities)
@@ -374,29 +403,108 @@ class PredictiveAnalyticsEngine:
         # Extração de tópicos com LDA
         if HAS_SKLEARN and HAS_GENSIM and all_texts:
             try:
-                topics = self._extract_topics_lda(all_texts)
+                topics = await asyncio.to_thread(self._extract_topics_lda, all_texts)
                 results["key_topics"] = topics
                 
-                # Clustering semântico
-                clusters = self._perform_semantic_clustering(all_texts)
+                # Clustering semântico (TF-IDF memorizado no corpus)
+                clusters = await asyncio.to_thread(
+                    self._perform_semantic_clustering, all_texts,
+                    lambda: corpus.tfidf(analyzed_sources, self._build_tfidf_vectorizer)
+                )
                 results["semantic_clusters"] = clusters
                 
             except Exception as e:
                 logger.error(f"❌ Erro na extração de tópicos: {e}")
 
+        token_lists = corpus.tokens_for(analyzed_sources)
+
         # Densidade de palavras-chave
         if all_texts:
-            keyword_density = self._calculate_keyword_density(all_texts)
+            keyword_density = self._calculate_keyword_density(all_texts, token_lists)
             results["keyword_density"] = keyword_density
 
         # Temas emergentes
-        emerging_themes = self._identify_emerging_themes(all_texts)
+        emerging_themes = self._identify_emerging_themes(all_texts, token_lists)
         results["emerging_themes"] = emerging_themes
 
         logger.info("✅ Análise textual ultra-profunda concluída")
         return results
 
-    async def _perform_temporal_analysis(self, session_dir: Path) -> Dict[str, Any]:
+    def _run_spacy_stage(self, sources: List[str], texts: List[str]) -> Dict[str, Tuple[List[Tuple[str, str]], Dict[str, Any], Optional[str]]]:
+        """
+        Processa os documentos em lote com nlp.pipe.
+
+        Retorna, por fonte, (entidades, padrões linguísticos, erro). Componentes
+        não usados ficam desativados; PREDICTIVE_NLP_PROCESSES > 1 distribui o
+        lote entre processos do próprio spaCy. Se o lote falhar, os documentos
+        são reprocessados um a um para isolar o que falhou.
+        """
+        if not (HAS_SPACY and self.nlp_model) or not texts:
+            return {}
+
+        disabled = [name for name in UNUSED_SPACY_COMPONENTS if name in self.nlp_model.pipe_names]
+        truncated = [text[:MAX_NLP_CHARS] for text in texts]
+        stage_results = {}
+
+        try:
+            docs = self.nlp_model.pipe(
+                truncated,
+                batch_size=NLP_BATCH_SIZE,
+                n_process=NLP_PROCESSES,
+                disable=disabled
+            )
+            for source, doc in zip(sources, docs):
+                stage_results[source] = self._summarize_spacy_doc(doc)
+            return stage_results
+
+        except Exception as e:
+            logger.warning(f"⚠️ Lote spaCy falhou ({e}), processando documentos individualmente")
+
+        with self.nlp_model.select_pipes(disable=disabled):
+            for source, text in zip(sources, truncated):
+                if source in stage_results:
+                    continue
+                try:
+                    stage_results[source] = self._summarize_spacy_doc(self.nlp_model(text))
+                except Exception as e:
+                    stage_results[source] = ([], {}, str(e))
+        return stage_results
+
+    def _summarize_spacy_doc(self, doc) -> Tuple[List[Tuple[str, str]], Dict[str, Any], Optional[str]]:
+        """Extrai entidades nomeadas e padrões linguísticos de um Doc"""
+        entities = [(ent.text.strip(), ent.label_) for ent in doc.ents if ent.label_ in ENTITY_LABELS]
+        return entities, self._analyze_linguistic_patterns(doc), None
+
+    async def _run_scoring_stage(self, texts: List[str], with_sentiment: bool) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Pontua VADER, legibilidade, emoções e persuasão por documento.
+
+        Lotes pequenos rodam numa thread; acima de PREDICTIVE_SCORING_POOL_MIN_DOCS
+        os documentos são divididos em fatias entre os processos do pool. Se o
+        pool não estiver disponível, cai para a thread com o mesmo resultado.
+        """
+        if not texts:
+            return []
+
+        if SCORING_WORKERS <= 1 or len(texts) < SCORING_POOL_MIN_DOCS:
+            return await asyncio.to_thread(score_texts, texts, with_sentiment)
+
+        chunk_size = max(1, -(-len(texts) // (SCORING_WORKERS * 4)))
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        loop = asyncio.get_running_loop()
+
+        try:
+            pool = _get_process_pool('scoring', SCORING_WORKERS)
+            chunk_results = await asyncio.gather(*[
+                loop.run_in_executor(pool, score_texts, chunk, with_sentiment) for chunk in chunks
+            ])
+            return [score for chunk_result in chunk_results for score in chunk_result]
+        except (BrokenProcessPool, OSError, RuntimeError) as e:
+            logger.warning(f"⚠️ Pool de processos indisponível ({e}), pontuando em thread")
+            _reset_process_pool('scoring')
+            return await asyncio.to_thread(score_texts, texts, with_sentiment)
+
+    async def _perform_temporal_analysis(self, corpus: SessionCorpus) -> Dict[str, Any]:
         """Analisa tendências temporais e padrões de crescimento"""
         
         results = {
@@ -411,7 +519,7 @@ class PredictiveAnalyticsEngine:
         }
 
         # Carrega dados com timestamps
-        temporal_data = self._gather_temporal_data(session_dir)
+        temporal_data = self._gather_temporal_data(corpus)
         
         if not temporal_data:
             logger.warning("⚠️ Dados temporais insuficientes para análise")
@@ -419,6 +527,14 @@ class PredictiveAnalyticsEngine:
 
         results["data_points_analyzed"] = len(temporal_data)
 
+        # pandas/Prophet fora do event loop: as demais fases seguem em paralelo
+        await asyncio.to_thread(self._compute_temporal_trends, temporal_data, results)
+
+        logger.info("✅ Análise temporal concluída")
+        return results
+
+    def _compute_temporal_trends(self, temporal_data: List[Dict[str, Any]], results: Dict[str, Any]):
+        """Preenche results com crescimento, sazonalidade, velocidade, anomalias e previsões"""
         try:
             # Converte para DataFrame para análise
             df = pd.DataFrame(temporal_data)
@@ -456,10 +572,7 @@ class PredictiveAnalyticsEngine:
         except Exception as e:
             logger.error(f"❌ Erro na análise temporal: {e}")
 
-        logger.info("✅ Análise temporal concluída")
-        return results
-
-    async def _perform_advanced_visual_analysis(self, session_dir: Path) -> Dict[str, Any]:
+    async def _perform_advanced_visual_analysis(self, corpus: SessionCorpus) -> Dict[str, Any]:
         """Realiza análise visual avançada com OCR e Computer Vision"""
         
         results = {
@@ -478,23 +591,25 @@ class PredictiveAnalyticsEngine:
             logger.warning("⚠️ OCR não disponível - análise visual limitada")
             return results
 
-        files_dir = Path(f"analyses_data/files/{session_id}")
+        files_dir = corpus.files_dir
         if not files_dir.exists():
             logger.info("📂 Diretório de screenshots não encontrado")
             return results
 
         extracted_texts = []
-        visual_features = []
 
-        for img_file in files_dir.glob("*.png"):
+        # OCR/cores de todas as imagens de uma vez (cache + pool de processos)
+        image_analyses = await self._analyze_images(files_dir, corpus.image_paths)
+
+        for img_file in corpus.image_paths:
+            analysis, error = image_analyses.get(img_file.name, (None, "imagem não analisada"))
+            if error:
+                logger.error(f"❌ Erro na análise visual de {img_file.name}: {error}")
+                continue
+
             try:
-                logger.info(f"🔍 Analisando imagem: {img_file.name}")
-                
-                # Carrega imagem
-                image = Image.open(img_file)
-                
                 # OCR para extração de texto
-                ocr_text = pytesseract.image_to_string(image, lang='por')
+                ocr_text = analysis["ocr_text"]
                 if ocr_text.strip():
                     extracted_texts.append(ocr_text)
                     results["text_extracted_ocr"].append({
@@ -505,8 +620,7 @@ class PredictiveAnalyticsEngine:
                 
                 # Análise de cores (se OpenCV disponível)
                 if HAS_OPENCV:
-                    color_analysis = self._analyze_image_colors(img_file)
-                    results["color_analysis"][img_file.name] = color_analysis
+                    results["color_analysis"][img_file.name] = analysis.get("color_analysis", {})
                 
                 # Análise de layout e elementos UI
                 ui_elements = self._detect_ui_elements(ocr_text)
@@ -541,7 +655,159 @@ class PredictiveAnalyticsEngine:
         logger.info(f"✅ Análise visual concluída: {results['screenshots_processed']} imagens processadas")
         return results
 
-    async def _perform_network_analysis(self, session_dir: Path) -> Dict[str, Any]:
+    async def _analyze_images(self, files_dir: Path, image_paths: List[Path]) -> Dict[str, Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        OCR e análise de cores das imagens, retornando {arquivo: (análise, erro)}.
+
+        Ordem de reaproveitamento:
+        1. cache ao lado das imagens (.visual_analysis.json), válido enquanto
+           tamanho e mtime do arquivo não mudarem; reexecuções não abrem as imagens;
+        2. outra imagem do mesmo lote com o mesmo conteúdo (sha256) ou, com
+           IMAGE_CACHE_MAX_DISTANCE > 0, com dHash próximo;
+        3. cache global por conteúdo (image_analysis_cache), compartilhado entre sessões.
+        Só o que sobra vai para o OCR, distribuído no pool de processos.
+        """
+        from services.image_analysis_cache import image_analysis_cache, hamming_distance
+
+        sidecar_path = files_dir / VISUAL_CACHE_FILENAME
+        sidecar = await asyncio.to_thread(self._load_visual_sidecar, sidecar_path)
+        analyses: Dict[str, Tuple[Optional[Dict[str, Any]], Optional[str]]] = {}
+        fingerprints: Dict[str, Tuple[int, int]] = {}
+        pending: List[Path] = []
+
+        for img_file in image_paths:
+            try:
+                stat = img_file.stat()
+            except OSError as e:
+                analyses[img_file.name] = (None, str(e))
+                continue
+            fingerprints[img_file.name] = (stat.st_size, stat.st_mtime_ns)
+            entry = sidecar.get(img_file.name)
+            if entry and (entry.get("size"), entry.get("mtime_ns")) == fingerprints[img_file.name]:
+                analyses[img_file.name] = (entry["analysis"], None)
+            else:
+                pending.append(img_file)
+
+        if not pending:
+            if image_paths:
+                logger.info(f"💾 Análise visual servida do cache local: {len(image_paths)} imagens")
+            return analyses
+
+        # sha256 do conteúdo e hash perceptual das imagens novas ou alteradas
+        hashes = await asyncio.gather(*[asyncio.to_thread(hash_image_file, str(path)) for path in pending])
+        image_hashes: Dict[str, Tuple[str, str]] = {}
+        for img_file, (hash_pair, error) in zip(pending, hashes):
+            if error:
+                analyses[img_file.name] = (None, error)
+            else:
+                image_hashes[img_file.name] = hash_pair
+
+        # Agrupa duplicatas do lote pelo conteúdo (e, se habilitado, quase-duplicatas pelo dHash):
+        # só o representante de cada grupo é analisado
+        representatives: Dict[str, str] = {}
+        representative_of: Dict[str, str] = {}
+        for name, (content_hash, dhash) in image_hashes.items():
+            if content_hash in representatives:
+                match = content_hash
+            else:
+                match = next((
+                    rep_hash for rep_hash, rep_name in representatives.items()
+                    if image_analysis_cache.max_distance
+                    and hamming_distance(dhash, image_hashes[rep_name][1]) <= image_analysis_cache.max_distance
+                ), None)
+            if match is None:
+                representatives[content_hash] = name
+                match = content_hash
+            representative_of[name] = match
+
+        cached = await asyncio.to_thread(image_analysis_cache.lookup_many, {
+            rep_hash: image_hashes[name][1] for rep_hash, name in representatives.items()
+        })
+        to_ocr = [name for rep_hash, name in representatives.items() if rep_hash not in cached]
+        ocr_results = await self._run_ocr_stage([str(files_dir / name) for name in to_ocr])
+
+        by_hash: Dict[str, Tuple[Optional[Dict[str, Any]], Optional[str]]] = {
+            rep_hash: (analysis, None) for rep_hash, analysis in cached.items()
+        }
+        new_entries = {}
+        for name, result in zip(to_ocr, ocr_results):
+            rep_hash, dhash = image_hashes[name]
+            by_hash[rep_hash] = result
+            if result[0] is not None:
+                new_entries[rep_hash] = (dhash, result[0])
+
+        for name, rep_hash in representative_of.items():
+            analyses[name] = by_hash[rep_hash]
+
+        logger.info(
+            f"👁️ Imagens: {len(image_paths) - len(pending)} do cache local, "
+            f"{len(image_hashes) - len(to_ocr)} reaproveitadas por hash, {len(to_ocr)} com OCR"
+        )
+
+        await asyncio.to_thread(image_analysis_cache.store_many, new_entries)
+        await asyncio.to_thread(
+            self._save_visual_sidecar, sidecar_path, analyses, fingerprints, image_hashes, sidecar
+        )
+        return analyses
+
+    async def _run_ocr_stage(self, paths: List[str]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """OCR no pool de processos; em thread se houver uma única imagem ou o pool falhar"""
+        if not paths:
+            return []
+
+        if OCR_WORKERS <= 1 or len(paths) == 1:
+            return await asyncio.to_thread(lambda: [analyze_image_file(path) for path in paths])
+
+        loop = asyncio.get_running_loop()
+        try:
+            pool = _get_process_pool('ocr', OCR_WORKERS)
+            return await asyncio.gather(*[
+                loop.run_in_executor(pool, analyze_image_file, path) for path in paths
+            ])
+        except (BrokenProcessPool, OSError, RuntimeError) as e:
+            logger.warning(f"⚠️ Pool de OCR indisponível ({e}), processando em thread")
+            _reset_process_pool('ocr')
+            return await asyncio.to_thread(lambda: [analyze_image_file(path) for path in paths])
+
+    def _load_visual_sidecar(self, sidecar_path: Path) -> Dict[str, Dict[str, Any]]:
+        """Entradas do cache de análise visual salvo ao lado das imagens"""
+        try:
+            with open(sidecar_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == VISUAL_CACHE_VERSION:
+                return data.get("images", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ Cache visual ilegível em {sidecar_path}: {e}")
+        return {}
+
+    def _save_visual_sidecar(self, sidecar_path: Path, analyses: Dict[str, Tuple[Optional[Dict[str, Any]], Optional[str]]],
+                             fingerprints: Dict[str, Tuple[int, int]], image_hashes: Dict[str, Tuple[str, str]],
+                             previous: Dict[str, Dict[str, Any]]):
+        """Grava as análises bem-sucedidas ao lado das imagens (escrita atômica)"""
+        images = {}
+        for name, (analysis, error) in analyses.items():
+            if error or name not in fingerprints:
+                continue
+            size, mtime_ns = fingerprints[name]
+            images[name] = {
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "sha256": image_hashes[name][0] if name in image_hashes else previous.get(name, {}).get("sha256"),
+                "dhash": image_hashes[name][1] if name in image_hashes else previous.get(name, {}).get("dhash"),
+                "analysis": analysis
+            }
+
+        try:
+            tmp_path = sidecar_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": VISUAL_CACHE_VERSION, "images": images}, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, sidecar_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível salvar cache visual em {sidecar_path}: {e}")
+
+    async def _perform_network_analysis(self, corpus: SessionCorpus) -> Dict[str, Any]:
         """Realiza análise de rede e conectividade entre entidades"""
         
         results = {
@@ -561,7 +827,7 @@ class PredictiveAnalyticsEngine:
 
         try:
             # Carrega dados de entidades e relacionamentos
-            entities_data = self._extract_entities_relationships(session_dir)
+            entities_data = self._extract_entities_relationships(corpus)
             
             if not entities_data:
                 logger.warning("⚠️ Dados insuficientes para análise de rede")
@@ -613,7 +879,7 @@ class PredictiveAnalyticsEngine:
         logger.info("✅ Análise de rede concluída")
         return results
 
-    async def _analyze_sentiment_dynamics(self, session_dir: Path) -> Dict[str, Any]:
+    async def _analyze_sentiment_dynamics(self, corpus: SessionCorpus) -> Dict[str, Any]:
         """Analisa dinâmica e evolução de sentimentos"""
         
         results = {
@@ -632,7 +898,7 @@ class PredictiveAnalyticsEngine:
 
         try:
             # Carrega dados com sentimentos
-            sentiment_data = self._gather_sentiment_data(session_dir)
+            sentiment_data = self._gather_sentiment_data(corpus)
             
             if not sentiment_data:
                 logger.warning("⚠️ Dados insuficientes para análise de sentimento")
@@ -660,7 +926,7 @@ class PredictiveAnalyticsEngine:
         logger.info("✅ Análise de dinâmica de sentimentos concluída")
         return results
 
-    async def _analyze_topic_evolution(self, session_dir: Path) -> Dict[str, Any]:
+    async def _analyze_topic_evolution(self, corpus: SessionCorpus) -> Dict[str, Any]:
         """Analisa evolução e mudança de tópicos ao longo do tempo"""
         
         results = {
@@ -675,7 +941,7 @@ class PredictiveAnalyticsEngine:
 
         try:
             # Carrega dados temporais de tópicos
-            topic_data = self._gather_topic_temporal_data(session_dir)
+            topic_data = self._gather_topic_temporal_data(corpus)
             
             if not topic_data:
                 logger.warning("⚠️ Dados insuficientes para análise de evolução de tópicos")
@@ -701,7 +967,7 @@ class PredictiveAnalyticsEngine:
         logger.info("✅ Análise de evolução de tópicos concluída")
         return results
 
-    async def _analyze_engagement_patterns(self, session_dir: Path) -> Dict[str, Any]:
+    async def _analyze_engagement_patterns(self, corpus: SessionCorpus) -> Dict[str, Any]:
         """Analisa padrões de engajamento e interação"""
         
         results = {
@@ -716,7 +982,7 @@ class PredictiveAnalyticsEngine:
 
         try:
             # Carrega dados de engajamento
-            engagement_data = self._gather_engagement_data(session_dir)
+            engagement_data = self._gather_engagement_data(corpus)
             
             if not engagement_data:
                 logger.warning("⚠️ Dados de engajamento insuficientes")
@@ -873,17 +1139,9 @@ class PredictiveAnalyticsEngine:
         return scenarios
 
     # Métodos auxiliares para análise textual
-    def _gather_comprehensive_textual_data(self, session_dir: Path) -> Dict[str, str]:
-        """Coleta dados textuais de arquivos na pasta da sessão."""
-        textual_data = {}
-        text_files = [f for f in session_dir.glob("*.txt")]
-        for text_file in text_files:
-            try:
-                with open(text_file, "r", encoding="utf-8") as f:
-                    textual_data[text_file.name] = f.read()
-            except Exception as e:
-                logger.error(f"❌ Erro ao ler arquivo de texto {text_file.name}: {e}")
-        return textual_data
+    def _gather_comprehensive_textual_data(self, corpus: SessionCorpus) -> Dict[str, str]:
+        """Dados textuais (.txt) da pasta da sessão, já lidos pelo corpus."""
+        return dict(corpus.texts)
 
     def _extract_topics_lda(self, texts: List[str]) -> List[Dict[str, Any]]:
         """Extrai tópicos de um conjunto de textos usando LDA."""
@@ -919,7 +1177,7 @@ class PredictiveAnalyticsEngine:
             logger.error(f"❌ Erro ao extrair tópicos com LDA: {e}")
             return []
 
-    def _perform_semantic_clustering(self, texts: List[str]) -> Dict[str, Any]:
+    def _perform_semantic_clustering(self, texts: List[str], tfidf_provider: Optional[Callable[[], Tuple[Any, Any]]] = None) -> Dict[str, Any]:
         """Realiza clustering semântico de textos usando TF-IDF e KMeans."""
         if not HAS_SKLEARN:
             logger.warning("⚠️ Scikit-learn não disponível para clustering semântico.")
@@ -927,8 +1185,11 @@ class PredictiveAnalyticsEngine:
 
         try:
             # Transforma os textos em vetores TF-IDF
-            self.tfidf_vectorizer.fit(texts)
-            X = self.tfidf_vectorizer.transform(texts)
+            if tfidf_provider:
+                vectorizer, X = tfidf_provider()
+            else:
+                vectorizer = self.tfidf_vectorizer
+                X = vectorizer.fit_transform(texts)
             
             num_clusters = min(self.config["n_clusters_kmeans"], len(texts))
             if num_clusters == 0:
@@ -944,7 +1205,7 @@ class PredictiveAnalyticsEngine:
             # Extrai as palavras-chave para cada cluster
             cluster_keywords = {}
             order_centroids = kmeans_model.cluster_centers_.argsort()[:, ::-1]
-            terms = self.tfidf_vectorizer.get_feature_names_out()
+            terms = vectorizer.get_feature_names_out()
             for i in range(num_clusters):
                 cluster_keywords[f"cluster_{i}"] = [terms[ind] for ind in order_centroids[i, :10]]
 
@@ -953,13 +1214,15 @@ class PredictiveAnalyticsEngine:
             logger.error(f"❌ Erro ao realizar clustering semântico: {e}")
             return {}
 
-    def _calculate_keyword_density(self, texts: List[str]) -> Dict[str, float]:
+    def _calculate_keyword_density(self, texts: List[str], token_lists: Optional[List[List[str]]] = None) -> Dict[str, float]:
         """Calcula a densidade de palavras-chave em um conjunto de textos."""
         if not texts:
             return {}
 
-        combined_text = " ".join(texts).lower()
-        words = [word for word in re.findall(r'\b\w+\b', combined_text) if word not in self._get_portuguese_stopwords()]
+        if token_lists is None:
+            token_lists = [re.findall(r'\b\w+\b', text.lower()) for text in texts]
+        stop_words = set(self._get_portuguese_stopwords())
+        words = [word for tokens in token_lists for word in tokens if word not in stop_words]
         word_counts = Counter(words)
         total_words = len(words)
 
@@ -969,7 +1232,7 @@ class PredictiveAnalyticsEngine:
         density = {word: (count / total_words) * 100 for word, count in word_counts.most_common(50)}
         return density
 
-    def _identify_emerging_themes(self, texts: List[str]) -> List[str]:
+    def _identify_emerging_themes(self, texts: List[str], token_lists: Optional[List[List[str]]] = None) -> List[str]:
         """Identifica temas emergentes analisando a frequência e co-ocorrência de termos."""
         if not texts:
             return []
@@ -977,10 +1240,10 @@ class PredictiveAnalyticsEngine:
         # Para simplificar, usaremos uma abordagem baseada em frequência e n-grams
         # Uma abordagem mais avançada envolveria análise temporal de tópicos ou detecção de anomalias em termos.
         
-        all_words = []
-        for text in texts:
-            words = [word for word in re.findall(r'\b\w+\b', text.lower()) if word not in self._get_portuguese_stopwords()]
-            all_words.extend(words)
+        if token_lists is None:
+            token_lists = [re.findall(r'\b\w+\b', text.lower()) for text in texts]
+        stop_words = set(self._get_portuguese_stopwords())
+        all_words = [word for tokens in token_lists for word in tokens if word not in stop_words]
 
         word_freq = Counter(all_words)
         
@@ -991,36 +1254,9 @@ class PredictiveAnalyticsEngine:
         
         return emerging_themes
 
-    def _gather_temporal_data(self, session_dir: Path) -> List[Dict[str, Any]]:
-        """Simula a coleta de dados temporais de arquivos na sessão."""
-        temporal_data = []
-        # Exemplo: busca por arquivos JSON que contenham dados com timestamps
-        # Em um cenário real, isso leria dados de logs, eventos, etc.
-        for f in session_dir.glob("*.json"):
-            try:
-                with open(f, 'r', encoding='utf-8') as infile:
-                    data = json.load(infile)
-                    if isinstance(data, list):
-                        for item in data:
-                            if "timestamp" in item and "value" in item:
-                                try:
-                                    item["timestamp"] = datetime.fromisoformat(item["timestamp"])
-                                    temporal_data.append(item)
-                                except ValueError:
-                                    continue
-                    elif isinstance(data, dict):
-                        if "timestamp" in data and "value" in data:
-                            try:
-                                data["timestamp"] = datetime.fromisoformat(data["timestamp"])
-                                temporal_data.append(data)
-                            except ValueError:
-                                continue
-            except json.JSONDecodeError:
-                continue
-        
-        # Ordena os dados por timestamp
-        temporal_data.sort(key=lambda x: x["timestamp"])
-        return temporal_data
+    def _gather_temporal_data(self, corpus: SessionCorpus) -> List[Dict[str, Any]]:
+        """Registros com timestamp e value dos JSONs da sessão, ordenados por timestamp."""
+        return [dict(row) for row in corpus.timestamped_values]
 
     def _analyze_growth_patterns(self, temporal_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analisa padrões de crescimento em dados temporais."""
@@ -1186,7 +1422,7 @@ class PredictiveAnalyticsEngine:
             return {}
 
     # Métodos auxiliares para análise de rede
-    def _extract_entities_relationships(self, session_dir: Path) -> Dict[str, Any]:
+    def _extract_entities_relationships(self, corpus: SessionCorpus) -> Dict[str, Any]:
         """Extrai entidades e relacionamentos dos dados da sessão."""
         # Simulação - em um cenário real, isso extrairia dados dos arquivos da sessão
         return {
@@ -1203,7 +1439,7 @@ class PredictiveAnalyticsEngine:
         }
 
     # Métodos auxiliares para análise de sentimento
-    def _gather_sentiment_data(self, session_dir: Path) -> List[Dict[str, Any]]:
+    def _gather_sentiment_data(self, corpus: SessionCorpus) -> List[Dict[str, Any]]:
         """Coleta dados de sentimento dos arquivos da sessão."""
         # Simulação - em um cenário real, isso extrairia dados dos arquivos da sessão
         return [
@@ -1317,7 +1553,7 @@ class PredictiveAnalyticsEngine:
         }
 
     # Métodos auxiliares para análise de tópicos
-    def _gather_topic_temporal_data(self, session_dir: Path) -> List[Dict[str, Any]]:
+    def _gather_topic_temporal_data(self, corpus: SessionCorpus) -> List[Dict[str, Any]]:
         """Coleta dados temporais de tópicos dos arquivos da sessão."""
         # Simulação - em um cenário real, isso extrairia dados dos arquivos da sessão
         return [
@@ -1425,9 +1661,12 @@ class PredictiveAnalyticsEngine:
         return {"transitions": transitions}
 
     # Métodos auxiliares para análise de engajamento
-    def _gather_engagement_data(self, session_dir: Path) -> List[Dict[str, Any]]:
+    def _gather_engagement_data(self, corpus: SessionCorpus) -> List[Dict[str, Any]]:
         """Coleta dados de engajamento dos arquivos da sessão."""
-        # Simulação - em um cenário real, isso extrairia dados dos arquivos da sessão
+        if corpus.engagement_rows:
+            return [dict(row) for row in corpus.engagement_rows]
+
+        # Simulação quando a sessão não traz métricas de engajamento
         return [
             {"timestamp": datetime.now() - timedelta(days=5), "views": 100, "likes": 10, "comments": 2, "shares": 1},
             {"timestamp": datetime.now() - timedelta(days=4), "views": 150, "likes": 15, "comments": 3, "shares": 2},
@@ -2555,7 +2794,7 @@ class PredictiveAnalyticsEngine:
         }
 
     # Métodos auxiliares para avaliação de qualidade dos dados
-    async def _assess_data_quality(self, session_dir: Path) -> Dict[str, Any]:
+    async def _assess_data_quality(self, corpus: SessionCorpus) -> Dict[str, Any]:
         """Avalia a qualidade dos dados utilizados na análise."""
         # Simulação - em um cenário real, isso analisaria os dados em detalhe
         return {
@@ -3005,185 +3244,22 @@ class PredictiveAnalyticsEngine:
     # Métodos auxiliares para cálculo de métricas de legibilidade
     def _calculate_readability_metrics(self, text: str) -> Dict[str, Any]:
         """Calcula métricas de legibilidade de um texto."""
-        try:
-            # Contagem básica
-            sentences = re.split(r'[.!?]+', text)
-            sentences = [s.strip() for s in sentences if s.strip()]
-            words = re.findall(r'\b\w+\b', text)
-            syllables = sum(len(re.findall(r'[aeiouAEIOUáéíóúÁÉÍÓÚâêôÂÊÔãõÃÕ]', word)) for word in words)
-            
-            # Métricas de legibilidade
-            avg_sentence_length = len(words) / len(sentences) if sentences else 0
-            avg_syllables_per_word = syllables / len(words) if words else 0
-            
-            # Flesch Reading Ease (adaptado para português)
-            flesch_score = max(0, min(100, 206.835 - (1.015 * avg_sentence_length) - (84.6 * avg_syllables_per_word)))
-            
-            # Flesch-Kincaid Grade Level (adaptado para português)
-            fk_grade = max(0, (0.39 * avg_sentence_length) + (11.8 * avg_syllables_per_word) - 15.59)
-            
-            # Gunning Fog Index
-            complex_words = sum(1 for word in words if avg_syllables_per_word > 2)
-            fog_index = 0.4 * (avg_sentence_length + 100 * (complex_words / len(words))) if words else 0
-            
-            return {
-                "flesch_reading_ease": flesch_score,
-                "flesch_kincaid_grade": fk_grade,
-                "gunning_fog_index": fog_index,
-                "avg_sentence_length": avg_sentence_length,
-                "avg_syllables_per_word": avg_syllables_per_word,
-                "total_sentences": len(sentences),
-                "total_words": len(words),
-                "total_syllables": syllables
-            }
-        except Exception as e:
-            logger.error(f"❌ Erro no cálculo de métricas de legibilidade: {e}")
-            return {}
+        return calculate_readability_metrics(text)
 
     # Métodos auxiliares para extração de indicadores emocionais
     def _extract_emotional_indicators(self, text: str) -> Dict[str, Any]:
         """Extrai indicadores emocionais de um texto."""
-        try:
-            # Listas de palavras emocionais (simplificado)
-            positive_words = ["bom", "excelente", "maravilhoso", "feliz", "satisfeito", "gostei", "amo", "perfeito", "incrível"]
-            negative_words = ["ruim", "péssimo", "terrível", "triste", "insatisfeito", "odeio", "detestei", "horrível", "desastre"]
-            
-            words = re.findall(r'\b\w+\b', text.lower())
-            
-            positive_count = sum(1 for word in words if word in positive_words)
-            negative_count = sum(1 for word in words if word in negative_words)
-            
-            total_emotional_words = positive_count + negative_count
-            emotional_ratio = positive_count / negative_count if negative_count > 0 else float('inf') if positive_count > 0 else 0
-            
-            return {
-                "positive_word_count": positive_count,
-                "negative_word_count": negative_count,
-                "total_emotional_words": total_emotional_words,
-                "emotional_ratio": emotional_ratio,
-                "emotional_density": total_emotional_words / len(words) if words else 0,
-                "dominant_emotion": "positive" if positive_count > negative_count else "negative" if negative_count > positive_count else "neutral"
-            }
-        except Exception as e:
-            logger.error(f"❌ Erro na extração de indicadores emocionais: {e}")
-            return {}
+        return extract_emotional_indicators(text)
 
     # Métodos auxiliares para identificação de elementos de persuasão
     def _identify_persuasion_elements(self, text: str) -> Dict[str, Any]:
         """Identifica elementos de persuasão em um texto."""
-        try:
-            # Padrões para elementos persuasivos (simplificado)
-            social_proof_patterns = [
-                r"milhares? de (pessoas|clientes|usuários)",
-                r"\d+% dos (clientes|usuários)",
-                r"mais de \d+ (pessoas|clientes|usuários)"
-            ]
-            
-            scarcity_patterns = [
-                r"por tempo limitado",
-                r"últimas (unidades|oportunidades|vagas)",
-                r"apenas \d+ (unidades|oportunidades|vagas)"
-            ]
-            
-            authority_patterns = [
-                r"especialistas? (recomendam|indicam)",
-                r"conforme (estudos|pesquisas)",
-                r"comprovado (cientificamente|clinicamente)"
-            ]
-            
-            urgency_patterns = [
-                r"agora",
-                r"imediatamente",
-                r"hoje mesmo",
-                r"não perca"
-            ]
-            
-            # Contagem de ocorrências
-            social_proof_count = sum(len(re.findall(pattern, text.lower())) for pattern in social_proof_patterns)
-            scarcity_count = sum(len(re.findall(pattern, text.lower())) for pattern in scarcity_patterns)
-            authority_count = sum(len(re.findall(pattern, text.lower())) for pattern in authority_patterns)
-            urgency_count = sum(len(re.findall(pattern, text.lower())) for pattern in urgency_patterns)
-            
-            return {
-                "social_proof": {
-                    "count": social_proof_count,
-                    "present": social_proof_count > 0
-                },
-                "scarcity": {
-                    "count": scarcity_count,
-                    "present": scarcity_count > 0
-                },
-                "authority": {
-                    "count": authority_count,
-                    "present": authority_count > 0
-                },
-                "urgency": {
-                    "count": urgency_count,
-                    "present": urgency_count > 0
-                },
-                "total_persuasion_elements": social_proof_count + scarcity_count + authority_count + urgency_count,
-                "persuasion_intensity": "alta" if social_proof_count + scarcity_count + authority_count + urgency_count > 5 else "média" if social_proof_count + scarcity_count + authority_count + urgency_count > 2 else "baixa"
-            }
-        except Exception as e:
-            logger.error(f"❌ Erro na identificação de elementos de persuasão: {e}")
-            return {}
+        return identify_persuasion_elements(text)
 
     # Métodos auxiliares para análise de cores em imagens
     def _analyze_image_colors(self, img_path: Path) -> Dict[str, Any]:
         """Analisa cores predominantes em uma imagem."""
-        if not HAS_OPENCV:
-            return {}
-            
-        try:
-            # Carrega imagem
-            image = cv2.imread(str(img_path))
-            if image is None:
-                return {}
-                
-            # Converte para RGB
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            
-            # Reduz dimensões para análise mais rápida
-            height, width = image.shape[:2]
-            if max(height, width) > 200:
-                scale = 200 / max(height, width)
-                image = cv2.resize(image, (int(width * scale), int(height * scale)))
-            
-            # Converte para lista de pixels
-            pixels = image.reshape(-1, 3)
-            
-            # Aplica K-means para encontrar cores dominantes
-            k = 5  # número de cores dominantes
-            criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 100, 0.2)
-            _, labels, centers = cv2.kmeans(
-                pixels.astype(np.float32), k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS
-            )
-            
-            # Conta pixels por cluster
-            counts = Counter(labels.flatten())
-            
-            # Ordena cores por frequência
-            sorted_colors = sorted(counts.items(), key=lambda x: x[1], reverse=True)
-            
-            # Formata resultados
-            dominant_colors = []
-            for i, (label, count) in enumerate(sorted_colors):
-                color = centers[label].astype(int)
-                percentage = count / len(pixels) * 100
-                dominant_colors.append({
-                    "color_rgb": color.tolist(),
-                    "color_hex": '#{:02x}{:02x}{:02x}'.format(color[0], color[1], color[2]),
-                    "percentage": percentage
-                })
-            
-            return {
-                "dominant_colors": dominant_colors,
-                "total_colors_analyzed": k,
-                "color_diversity": len([c for c in counts if counts[c] / len(pixels) > 0.05])  # cores com mais de 5%
-            }
-        except Exception as e:
-            logger.error(f"❌ Erro na análise de cores da imagem {img_path}: {e}")
-            return {}
+        return analyze_image_colors(img_path)
 
     # Métodos auxiliares para detecção de elementos UI
     def _detect_ui_elements(self, ocr_text: str) -> Dict[str, Any]:
@@ -3673,7 +3749,7 @@ class PredictiveAnalyticsEngine:
             return []
 
     # Métodos auxiliares para coleta de dados temporais de tópicos
-    def _gather_topic_temporal_data(self, session_dir: Path) -> List[Dict[str, Any]]:
+    def _gather_topic_temporal_data(self, corpus: SessionCorpus) -> List[Dict[str, Any]]:
         """Coleta dados temporais de tópicos dos arquivos da sessão."""
         # Simulação - em um cenário real, isso extrairia dados dos arquivos da sessão
         return [
@@ -3792,9 +3868,12 @@ class PredictiveAnalyticsEngine:
             return {}
 
     # Métodos auxiliares para coleta de dados de engajamento
-    def _gather_engagement_data(self, session_dir: Path) -> List[Dict[str, Any]]:
+    def _gather_engagement_data(self, corpus: SessionCorpus) -> List[Dict[str, Any]]:
         """Coleta dados de engajamento dos arquivos da sessão."""
-        # Simulação - em um cenário real, isso extrairia dados dos arquivos da sessão
+        if corpus.engagement_rows:
+            return [dict(row) for row in corpus.engagement_rows]
+
+        # Simulação quando a sessão não traz métricas de engajamento
         return [
             {"timestamp": datetime.now() - timedelta(days=5), "views": 100, "likes": 10, "comments": 2, "shares": 1},
             {"timestamp": datetime.now() - timedelta(days=4), "views": 150, "likes": 15, "comments": 3, "shares": 2},
@@ -4961,7 +5040,7 @@ class PredictiveAnalyticsEngine:
         }
 
     # Métodos auxiliares para avaliação de qualidade dos dados
-    async def _assess_data_quality(self, session_dir: Path) -> Dict[str, Any]:
+    async def _assess_data_quality(self, corpus: SessionCorpus) -> Dict[str, Any]:
         """Avalia a qualidade dos dados utilizados na análise."""
         # Simulação - em um cenário real, isso analisaria os dados em detalhe
         return {
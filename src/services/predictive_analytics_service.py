@@ -13,8 +13,9 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 from pathlib import Path
 
-# Import do engine existente
-from engine.predictive_analytics_engine import PredictiveAnalyticsEngine
+# Motor otimizado: corpus lido uma vez, spaCy em lote, pontuação e OCR em pool
+from services.predictive_analytics_engine import PredictiveAnalyticsEngine
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -470,4 +471,4 @@ class PredictiveAnalyticsService:
             }
 
 # Instância global do serviço
-predictive_analytics_service = PredictiveAnalyticsService()
\ No newline at end of file
+predictive_analytics_service = service_registry.register('predictive_analytics_service', PredictiveAnalyticsService)
\ No newline at end of file
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - Predictive Text Scoring
+Pontuação por documento executada nos workers do Predictive Analytics Engine
+
+Importa só o que a pontuação usa: os processos 'spawn' importam este módulo
+para desserializar a tarefa, sem carregar spaCy, sklearn, gensim e afins.
+"""
+
+import re
+import logging
+from typing import Dict, Any, List, Tuple, Optional
+
+try:
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    HAS_VADER = True
+except ImportError:
+    HAS_VADER = False
+
+logger = logging.getLogger(__name__)
+
+_worker_sentiment_analyzer = None
+
+
+def calculate_readability_metrics(text: str) -> Dict[str, Any]:
+    """Calcula métricas de legibilidade de um texto."""
+    try:
+        # Contagem básica
+        sentences = re.split(r'[.!?]+', text)
+        sentences = [s.strip() for s in sentences if s.strip()]
+        words = re.findall(r'\b\w+\b', text)
+        syllables = sum(len(re.findall(r'[aeiouAEIOUáéíóúÁÉÍÓÚâêôÂÊÔãõÃÕ]', word)) for word in words)
+
+        # Métricas de legibilidade
+        avg_sentence_length = len(words) / len(sentences) if sentences else 0
+        avg_syllables_per_word = syllables / len(words) if words else 0
+
+        # Flesch Reading Ease (adaptado para português)
+        flesch_score = max(0, min(100, 206.835 - (1.015 * avg_sentence_length) - (84.6 * avg_syllables_per_word)))
+
+        # Flesch-Kincaid Grade Level (adaptado para português)
+        fk_grade = max(0, (0.39 * avg_sentence_length) + (11.8 * avg_syllables_per_word) - 15.59)
+
+        # Gunning Fog Index
+        complex_words = sum(1 for word in words if avg_syllables_per_word > 2)
+        fog_index = 0.4 * (avg_sentence_length + 100 * (complex_words / len(words))) if words else 0
+
+        return {
+            "flesch_reading_ease": flesch_score,
+            "flesch_kincaid_grade": fk_grade,
+            "gunning_fog_index": fog_index,
+            "avg_sentence_length": avg_sentence_length,
+            "avg_syllables_per_word": avg_syllables_per_word,
+            "total_sentences": len(sentences),
+            "total_words": len(words),
+            "total_syllables": syllables
+        }
+    except Exception as e:
+        logger.error(f"❌ Erro no cálculo de métricas de legibilidade: {e}")
+        return {}
+
+
+def extract_emotional_indicators(text: str) -> Dict[str, Any]:
+    """Extrai indicadores emocionais de um texto."""
+    try:
+        # Listas de palavras emocionais (simplificado)
+        positive_words = ["bom", "excelente", "maravilhoso", "feliz", "satisfeito", "gostei", "amo", "perfeito", "incrível"]
+        negative_words = ["ruim", "péssimo", "terrível", "triste", "insatisfeito", "odeio", "detestei", "horrível", "desastre"]
+
+        words = re.findall(r'\b\w+\b', text.lower())
+
+        positive_count = sum(1 for word in words if word in positive_words)
+        negative_count = sum(1 for word in words if word in negative_words)
+
+        total_emotional_words = positive_count + negative_count
+        emotional_ratio = positive_count / negative_count if negative_count > 0 else float('inf') if positive_count > 0 else 0
+
+        return {
+            "positive_word_count": positive_count,
+            "negative_word_count": negative_count,
+            "total_emotional_words": total_emotional_words,
+            "emotional_ratio": emotional_ratio,
+            "emotional_density": total_emotional_words / len(words) if words else 0,
+            "dominant_emotion": "positive" if positive_count > negative_count else "negative" if negative_count > positive_count else "neutral"
+        }
+    except Exception as e:
+        logger.error(f"❌ Erro na extração de indicadores emocionais: {e}")
+        return {}
+
+
+def identify_persuasion_elements(text: str) -> Dict[str, Any]:
+    """Identifica elementos de persuasão em um texto."""
+    try:
+        # Padrões para elementos persuasivos (simplificado)
+        social_proof_patterns = [
+            r"milhares? de (pessoas|clientes|usuários)",
+            r"\d+% dos (clientes|usuários)",
+            r"mais de \d+ (pessoas|clientes|usuários)"
+        ]
+
+        scarcity_patterns = [
+            r"por tempo limitado",
+            r"últimas (unidades|oportunidades|vagas)",
+            r"apenas \d+ (unidades|oportunidades|vagas)"
+        ]
+
+        authority_patterns = [
+            r"especialistas? (recomendam|indicam)",
+            r"conforme (estudos|pesquisas)",
+            r"comprovado (cientificamente|clinicamente)"
+        ]
+
+        urgency_patterns = [
+            r"agora",
+            r"imediatamente",
+            r"hoje mesmo",
+            r"não perca"
+        ]
+
+        # Contagem de ocorrências
+        social_proof_count = sum(len(re.findall(pattern, text.lower())) for pattern in social_proof_patterns)
+        scarcity_count = sum(len(re.findall(pattern, text.lower())) for pattern in scarcity_patterns)
+        authority_count = sum(len(re.findall(pattern, text.lower())) for pattern in authority_patterns)
+        urgency_count = sum(len(re.findall(pattern, text.lower())) for pattern in urgency_patterns)
+
+        return {
+            "social_proof": {
+                "count": social_proof_count,
+                "present": social_proof_count > 0
+            },
+            "scarcity": {
+                "count": scarcity_count,
+                "present": scarcity_count > 0
+            },
+            "authority": {
+                "count": authority_count,
+                "present": authority_count > 0
+            },
+            "urgency": {
+                "count": urgency_count,
+                "present": urgency_count > 0
+            },
+            "total_persuasion_elements": social_proof_count + scarcity_count + authority_count + urgency_count,
+            "persuasion_intensity": "alta" if social_proof_count + scarcity_count + authority_count + urgency_count > 5 else "média" if social_proof_count + scarcity_count + authority_count + urgency_count > 2 else "baixa"
+        }
+    except Exception as e:
+        logger.error(f"❌ Erro na identificação de elementos de persuasão: {e}")
+        return {}
+
+
+def score_text(text: str, with_sentiment: bool) -> Dict[str, Any]:
+    """
+    Pontuação independente de spaCy para um documento (executada nos workers).
+
+    O analisador VADER é criado uma vez por processo.
+    """
+    global _worker_sentiment_analyzer
+
+    scores = {}
+    if with_sentiment:
+        if _worker_sentiment_analyzer is None:
+            _worker_sentiment_analyzer = SentimentIntensityAnalyzer()
+        scores["sentiment"] = _worker_sentiment_analyzer.polarity_scores(text)
+
+    scores["readability"] = calculate_readability_metrics(text)
+    scores["emotional_indicators"] = extract_emotional_indicators(text)
+    scores["persuasion_elements"] = identify_persuasion_elements(text)
+    return scores
+
+
+def _score_text_safe(text: str, with_sentiment: bool) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Como score_text, mas devolve o erro em vez de propagar (um documento não derruba o lote)"""
+    try:
+        return score_text(text, with_sentiment), None
+    except Exception as e:
+        return None, str(e)
+
+
+def score_texts(texts: List[str], with_sentiment: bool) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """Pontua vários documentos em sequência (uma tarefa do pool por lote)"""
+    return [_score_text_safe(text, with_sentiment) for text in texts]
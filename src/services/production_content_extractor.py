@@ -9,6 +9,7 @@ Mantido apenas para compatibilidade
 from typing import Dict, List, Optional, Any
 import os
 import logging
+from services.service_registry import service_registry
 # from .robust_content_extractor import robust_content_extractor
 
 logger = logging.getLogger(__name__)
@@ -57,4 +58,4 @@ class ProductionContentExtractor:
 
 
 # Instância global para compatibilidade
-production_content_extractor = ProductionContentExtractor()
+production_content_extractor = service_registry.register('production_content_extractor', ProductionContentExtractor)
@@ -13,6 +13,7 @@ from typing import Dict, List, Optional, Any
 from urllib.parse import quote_plus
 from bs4 import BeautifulSoup
 import json
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -245,4 +246,4 @@ class ProductionSearchManager:
         return status
 
 # Instância global
-production_search_manager = ProductionSearchManager()
\ No newline at end of file
+production_search_manager = service_registry.register('production_search_manager', ProductionSearchManager)
\ No newline at end of file
@@ -10,6 +10,7 @@ import logging
 from typing import Dict, Any, Optional, Callable, List
 from datetime import datetime
 from services.auto_save_manager import salvar_etapa
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -320,4 +321,4 @@ class ProgressTrackerManager:
         self.logger.info("🔄 Todas as sessões resetadas")
 
 # Instância global para compatibilidade
-progress_tracker = ProgressTrackerManager()
\ No newline at end of file
+progress_tracker = service_registry.register('progress_tracker', ProgressTrackerManager)
\ No newline at end of file
@@ -5,16 +5,44 @@ ARQV30 Enhanced v2.0 - Psychological Agents System
 Sistema completo de agentes psicológicos especializados
 """
 
+import os
 import logging
 import time
 import json
-from typing import Dict, List, Any, Optional
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Callable
 from datetime import datetime
 from services.ai_manager import ai_manager
 from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.http_client_registry import http_client_registry
+from services.progress_tracker_enhanced import progress_tracker
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
+# Agentes executados ao mesmo tempo e prazo de cada um (segundos)
+AGENTS_CONCURRENCY = int(os.getenv('PSYCHOLOGICAL_AGENTS_CONCURRENCY', '6'))
+AGENT_TIMEOUT = float(os.getenv('PSYCHOLOGICAL_AGENT_TIMEOUT', '180'))
+
+# Threads dos agentes, compartilhadas entre as análises. A chamada de IA de
+# um agente que estourou o prazo não pode ser interrompida e segue ocupando
+# a thread até responder; a folga acima de AGENTS_CONCURRENCY absorve essas
+# threads sem deixar o total crescer sem limite entre sessões.
+AGENTS_THREADS = int(os.getenv('PSYCHOLOGICAL_AGENTS_THREADS', str(AGENTS_CONCURRENCY * 2)))
+agents_executor = ThreadPoolExecutor(max_workers=AGENTS_THREADS, thread_name_prefix='psychological-agent')
+
+# Fallback de cada agente, usado em erro ou timeout
+AGENT_FALLBACKS = {
+    'arqueologist': '_generate_archaeological_fallback',
+    'visceral_master': '_generate_visceral_fallback',
+    'drivers_architect': '_generate_drivers_fallback',
+    'visual_director': '_generate_visual_fallback',
+    'anti_objection': '_generate_anti_objection_fallback',
+    'pre_pitch_architect': '_generate_pre_pitch_fallback'
+}
+
 class PsychologicalAgentsSystem:
     """Sistema de agentes psicológicos especializados"""
 
@@ -28,6 +56,8 @@ class PsychologicalAgentsSystem:
             'anti_objection': AntiObjectionAgent(),
             'pre_pitch_architect': PrePitchArchitectAgent()
         }
+        self.max_concurrency = AGENTS_CONCURRENCY
+        self.agent_timeout = AGENT_TIMEOUT
 
         logger.info("Sistema de Agentes Psicológicos inicializado")
 
@@ -65,9 +95,36 @@ class PsychologicalAgentsSystem:
     def execute_complete_psychological_analysis(
         self,
         data: Dict[str, Any],
-        session_id: str = None
+        session_id: str = None,
+        progress_callback: Optional[Callable] = None
+    ) -> Dict[str, Any]:
+        """Executa análise psicológica completa com todos os agentes (interface síncrona)"""
+        coro = self.execute_complete_psychological_analysis_async(data, session_id, progress_callback)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return http_client_registry.run(coro)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(http_client_registry.run, coro).result()
+
+    async def execute_complete_psychological_analysis_async(
+        self,
+        data: Dict[str, Any],
+        session_id: str = None,
+        progress_callback: Optional[Callable] = None
     ) -> Dict[str, Any]:
-        """Executa análise psicológica completa com todos os agentes"""
+        """
+        Executa todos os agentes em paralelo (até max_concurrency ao mesmo tempo).
+
+        Os agentes são independentes até a consolidação, então a latência total
+        é a do agente mais lento. Cada agente tem prazo de agent_timeout
+        segundos, contado desde o envio ao agents_executor; em erro ou timeout
+        entra o fallback do próprio agente. No timeout o agente é cancelado:
+        se ainda estava na fila do executor ele não chega a rodar; se já
+        estava rodando, termina a chamada de IA em andamento e o resultado é
+        descartado. Cada conclusão é reportada ao progress_callback (ou ao
+        progress_tracker da sessão) assim que acontece.
+        """
 
         logger.info("🧠 Iniciando análise psicológica completa...")
 
@@ -82,27 +139,43 @@ class PsychologicalAgentsSystem:
             'psychological_metrics': {}
         }
 
-        # Executa cada agente em sequência
-        for agent_name, agent in self.agents.items():
-            try:
-                logger.info(f"🎭 Executando agente: {agent_name}")
-
-                # Usa dados limpos para cada agente
-                agent_result = agent.execute_analysis(clean_data, session_id)
-                results['agents_results'][agent_name] = agent_result
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        completed = []
+        loop = asyncio.get_running_loop()
 
-                # Salva resultado de cada agente
-                salvar_etapa(f"agente_{agent_name}", agent_result, categoria="analise_completa")
-
-                logger.info(f"✅ Agente {agent_name} concluído")
-
-            except Exception as e:
-                logger.error(f"❌ Erro no agente {agent_name}: {e}")
-                salvar_erro(f"agente_{agent_name}", e, contexto=data)
-                results['agents_results'][agent_name] = {
-                    'error': str(e),
-                    'status': 'failed'
-                }
+        async def run_agent(agent_name: str, agent) -> Any:
+            async with semaphore:
+                logger.info(f"🎭 Executando agente: {agent_name}")
+                started = time.time()
+                cancelled = threading.Event()
+                try:
+                    # Usa dados limpos para cada agente (agentes são síncronos: rodam em thread)
+                    agent_result = await asyncio.wait_for(
+                        loop.run_in_executor(
+                            agents_executor, self._run_agent_unless_cancelled,
+                            agent_name, agent, clean_data, session_id, cancelled
+                        ),
+                        timeout=self.agent_timeout
+                    )
+                    logger.info(f"✅ Agente {agent_name} concluído em {time.time() - started:.1f}s")
+                except asyncio.TimeoutError:
+                    cancelled.set()
+                    logger.error(f"⏰ Agente {agent_name} excedeu {self.agent_timeout:.0f}s - usando fallback")
+                    agent_result = self._agent_fallback(agent_name, clean_data, f"timeout após {self.agent_timeout:.0f}s")
+                except Exception as e:
+                    logger.error(f"❌ Erro no agente {agent_name}: {e}")
+                    await asyncio.to_thread(salvar_erro, f"agente_{agent_name}", e, contexto=data)
+                    agent_result = self._agent_fallback(agent_name, clean_data, str(e))
+
+            # Salva resultado de cada agente
+            await asyncio.to_thread(salvar_etapa, f"agente_{agent_name}", agent_result, categoria="analise_completa")
+
+            completed.append(agent_name)
+            self._report_agent_progress(session_id, progress_callback, agent_name, agent_result, len(completed))
+            return agent_result
+
+        agent_results = await asyncio.gather(*(run_agent(name, agent) for name, agent in self.agents.items()))
+        results['agents_results'] = dict(zip(self.agents, agent_results))
 
         # Consolida análise final
         results['consolidated_analysis'] = self._consolidate_psychological_analysis(results['agents_results'])
@@ -112,10 +185,71 @@ class PsychologicalAgentsSystem:
         safe_results = self._clean_for_serialization(results)
         
         # Salva análise consolidada
-        salvar_etapa("analise_psicologica_completa", safe_results, categoria="analise_completa")
+        await asyncio.to_thread(salvar_etapa, "analise_psicologica_completa", safe_results, categoria="analise_completa")
 
         return safe_results
 
+    @staticmethod
+    def _run_agent_unless_cancelled(
+        agent_name: str,
+        agent,
+        data: Dict[str, Any],
+        session_id: Optional[str],
+        cancelled: threading.Event
+    ) -> Any:
+        """Executa o agente na thread do executor, exceto se o prazo já acabou na fila"""
+        if cancelled.is_set():
+            logger.info(f"⏭️ Agente {agent_name} cancelado antes de iniciar")
+            return None
+        result = agent.execute_analysis(data, session_id)
+        if cancelled.is_set():
+            logger.info(f"🗑️ Agente {agent_name} terminou após o prazo - resultado descartado")
+        return result
+
+    def _agent_fallback(self, agent_name: str, data: Dict[str, Any], reason: str) -> Dict[str, Any]:
+        """Resultado de fallback do agente (ou marcação de falha se não houver)"""
+        fallback = getattr(self.agents[agent_name], AGENT_FALLBACKS.get(agent_name, ''), None)
+        if fallback:
+            try:
+                result = fallback(data)
+                result['fallback_reason'] = reason
+                return result
+            except Exception as e:
+                logger.error(f"❌ Fallback do agente {agent_name} falhou: {e}")
+        return {
+            'error': reason,
+            'status': 'failed'
+        }
+
+    def _report_agent_progress(
+        self,
+        session_id: Optional[str],
+        progress_callback: Optional[Callable],
+        agent_name: str,
+        agent_result: Dict[str, Any],
+        completed: int
+    ):
+        """
+        Publica a conclusão de um agente no progresso da sessão.
+
+        A contagem de agentes vai na mensagem; a etapa da sessão (do
+        pipeline inteiro) é mantida, sem mexer no percentual nem no ETA.
+        """
+        total = len(self.agents)
+        status = agent_result.get('status', 'ok') if isinstance(agent_result, dict) else 'ok'
+        message = f"Agente {agent_name} concluído ({completed}/{total})"
+        try:
+            if progress_callback:
+                progress_callback(message)
+            elif session_id and session_id in progress_tracker.sessions:
+                current_step = progress_tracker.sessions[session_id].current_step
+                progress_tracker.update_progress(
+                    session_id, current_step, message,
+                    details=f"agentes concluídos: {completed}/{total} | status: {status}"
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao reportar progresso do agente {agent_name}: {e}")
+
     def _consolidate_psychological_analysis(self, agents_results: Dict[str, Any]) -> Dict[str, Any]:
         """Consolida resultados de todos os agentes"""
 
@@ -1064,4 +1198,4 @@ RETORNE JSON com orquestração completa:
         return self._extract_pre_pitch_insights("", data)
 
 # Instância global
-psychological_agents = PsychologicalAgentsSystem()
\ No newline at end of file
+psychological_agents = service_registry.register('psychological_agents', PsychologicalAgentsSystem)
\ No newline at end of file
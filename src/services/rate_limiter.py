@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - Rate Limiter
+Token buckets por chave (RPM/TPM), seleção de chaves e temporizador único de recuperação
+"""
+
+import os
+import sys
+import time
+import heapq
+import random
+import logging
+import itertools
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, List, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+# Retry-After acima disso é tratado como este teto (segundos)
+MAX_RETRY_AFTER = float(os.getenv('RATE_LIMIT_MAX_RETRY_AFTER', '3600'))
+
+# Ajuste adaptativo (AIMD) da taxa após 429: corta pela metade, recupera a cada sucesso
+RATE_DECREASE_FACTOR = 0.5
+RATE_INCREASE_STEP = float(os.getenv('RATE_LIMIT_INCREASE_STEP', '0.005'))
+MIN_RATE_FACTOR = 0.1
+
+SELECTION_STRATEGIES = ('least_loaded', 'weighted_round_robin')
+
+
+class TokenBucket:
+    """
+    Balde de tokens com recarga contínua.
+
+    Começa cheio (permite rajada de `capacity`) e recarrega
+    `refill_per_second` tokens por segundo. O saldo pode ficar negativo
+    via `debit` para acertar consumo real maior que o estimado.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.base_capacity = self.capacity
+        self.base_refill_per_second = self.refill_per_second
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def scale(self, factor: float):
+        """Ajusta capacidade e recarga para `factor` x os valores configurados"""
+        self._refill()
+        self.capacity = self.base_capacity * factor
+        self.refill_per_second = self.base_refill_per_second * factor
+        self._tokens = min(self._tokens, self.capacity)
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+            self._updated = now
+
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def has(self, amount: float = 1) -> bool:
+        return self.available() >= min(amount, self.capacity)
+
+    def consume(self, amount: float = 1):
+        self._refill()
+        self._tokens -= min(amount, self.capacity)
+
+    def debit(self, amount: float):
+        """Ajuste sem checagem (positivo consome, negativo devolve)"""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - amount)
+
+    def drain(self):
+        self._refill()
+        self._tokens = min(self._tokens, 0.0)
+
+    def time_until(self, amount: float = 1) -> float:
+        """Segundos até haver `amount` tokens"""
+        missing = min(amount, self.capacity) - self.available()
+        if missing <= 0:
+            return 0.0
+        return missing / self.refill_per_second if self.refill_per_second > 0 else float('inf')
+
+    def utilization(self) -> float:
+        """Fração consumida da capacidade (0 = cheio, 1 = vazio)"""
+        if self.capacity <= 0:
+            return 0.0
+        return min(1.0, max(0.0, 1.0 - self.available() / self.capacity))
+
+
+class KeyLimiter:
+    """
+    Limites de uma chave de API: balde de requisições (RPM), balde de
+    tokens de LLM (TPM, opcional) e bloqueio explícito vindo de
+    Retry-After / 429.
+
+    Cada 429 também reduz a taxa efetiva pela metade (a chave pode ter
+    limite real menor que o configurado); cada requisição aceita devolve
+    RATE_INCREASE_STEP até voltar ao configurado.
+    """
+
+    def __init__(self, name: str, rpm: int, tpm: int = 0, weight: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.weight = weight or max(rpm, 1)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.rpm_bucket = TokenBucket(rpm, rpm / 60.0, clock) if rpm > 0 else None
+        self.tpm_bucket = TokenBucket(tpm, tpm / 60.0, clock) if tpm > 0 else None
+        self.blocked_until = 0.0
+        self.rate_factor = 1.0
+        self.stats = {
+            'acquired': 0,
+            'throttled': 0,
+            'rate_limited': 0,
+            'tokens': 0
+        }
+
+    def _buckets_ok(self, tokens: int) -> bool:
+        if self._clock() < self.blocked_until:
+            return False
+        if self.rpm_bucket and not self.rpm_bucket.has(1):
+            return False
+        if self.tpm_bucket and tokens and not self.tpm_bucket.has(tokens):
+            return False
+        return True
+
+    def can_acquire(self, tokens: int = 0) -> bool:
+        with self._lock:
+            return self._buckets_ok(tokens)
+
+    def try_acquire(self, tokens: int = 0) -> bool:
+        """Consome 1 requisição e `tokens` do TPM se ambos couberem"""
+        with self._lock:
+            if not self._buckets_ok(tokens):
+                self.stats['throttled'] += 1
+                return False
+            if self.rpm_bucket:
+                self.rpm_bucket.consume(1)
+            if self.tpm_bucket and tokens:
+                self.tpm_bucket.consume(tokens)
+            self.stats['acquired'] += 1
+            self.stats['tokens'] += tokens
+            if self.rate_factor < 1.0:
+                self._set_rate_factor(self.rate_factor + RATE_INCREASE_STEP)
+            return True
+
+    def _set_rate_factor(self, factor: float):
+        self.rate_factor = min(1.0, max(MIN_RATE_FACTOR, factor))
+        for bucket in (self.rpm_bucket, self.tpm_bucket):
+            if bucket:
+                bucket.scale(self.rate_factor)
+
+    def record_tokens(self, estimated: int, actual: int):
+        """Acerta o TPM com o consumo real informado pela resposta"""
+        with self._lock:
+            if self.tpm_bucket:
+                self.tpm_bucket.debit(actual - estimated)
+            self.stats['tokens'] += actual - estimated
+
+    def block_for(self, seconds: float):
+        """429 recebido: bloqueia a chave por `seconds`, reduz a taxa e zera o saldo de RPM"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, self._clock() + seconds)
+            self._set_rate_factor(self.rate_factor * RATE_DECREASE_FACTOR)
+            if self.rpm_bucket:
+                self.rpm_bucket.drain()
+            self.stats['rate_limited'] += 1
+
+    def unblock(self):
+        with self._lock:
+            self.blocked_until = 0.0
+
+    def retry_in(self, tokens: int = 0) -> float:
+        """Segundos até a chave aceitar nova requisição"""
+        with self._lock:
+            wait = max(0.0, self.blocked_until - self._clock())
+            if self.rpm_bucket:
+                wait = max(wait, self.rpm_bucket.time_until(1))
+            if self.tpm_bucket and tokens:
+                wait = max(wait, self.tpm_bucket.time_until(tokens))
+            return wait
+
+    def load(self) -> float:
+        """Carga atual: maior utilização entre RPM e TPM (decai sozinha com o tempo)"""
+        with self._lock:
+            return max(
+                self.rpm_bucket.utilization() if self.rpm_bucket else 0.0,
+                self.tpm_bucket.utilization() if self.tpm_bucket else 0.0
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'rpm': self.rpm,
+            'tpm': self.tpm,
+            'load': round(self.load(), 3),
+            'rate_factor': round(self.rate_factor, 3),
+            'blocked_for': round(max(0.0, self.blocked_until - self._clock()), 1),
+            **self.stats
+        }
+
+
+class KeySelector:
+    """
+    Escolhe e reserva a chave para a próxima requisição.
+
+    - least_loaded: chave com menor utilização dos baldes
+    - weighted_round_robin: round-robin suave ponderado por `weight`
+      (padrão = RPM da chave)
+
+    Chaves sem saldo ou bloqueadas são puladas.
+    """
+
+    def __init__(self, strategy: str = 'least_loaded'):
+        if strategy not in SELECTION_STRATEGIES:
+            logger.warning(f"⚠️ Estratégia de seleção desconhecida '{strategy}', usando least_loaded")
+            strategy = 'least_loaded'
+        self.strategy = strategy
+        self._lock = threading.Lock()
+        self._current_weights: Dict[str, float] = {}
+
+    def choose(self, limiters: List[KeyLimiter], tokens: int = 0) -> Optional[KeyLimiter]:
+        with self._lock:
+            eligible = [limiter for limiter in limiters if limiter.can_acquire(tokens)]
+            while eligible:
+                if self.strategy == 'weighted_round_robin':
+                    chosen = self._next_weighted(eligible)
+                else:
+                    chosen = min(eligible, key=lambda limiter: limiter.load())
+                if chosen.try_acquire(tokens):
+                    return chosen
+                eligible.remove(chosen)
+            return None
+
+    def _next_weighted(self, eligible: List[KeyLimiter]) -> KeyLimiter:
+        total = 0
+        best = None
+        for limiter in eligible:
+            current = self._current_weights.get(limiter.name, 0) + limiter.weight
+            self._current_weights[limiter.name] = current
+            total += limiter.weight
+            if best is None or current > self._current_weights[best.name]:
+                best = limiter
+        self._current_weights[best.name] -= total
+        return best
+
+
+def parse_retry_after(value: Any, now: Optional[datetime] = None) -> Optional[float]:
+    """Converte Retry-After (segundos ou HTTP-date) em segundos; None se inválido"""
+    if value is None or value == '':
+        return None
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        try:
+            when = parsedate_to_datetime(str(value))
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - (now or datetime.now(timezone.utc))).total_seconds()
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class RecoveryTimer:
+    """
+    Temporizador único para recuperações agendadas.
+
+    Um thread daemon dorme até o próximo prazo de um heap; reagendar a
+    mesma chave substitui o agendamento anterior. Substitui um thread
+    dormindo por erro.
+    """
+
+    def __init__(self, name: str = 'recovery-timer'):
+        self.name = name
+        self._heap: List = []
+        self._active: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, key: str, delay: float, callback: Callable[[], None]):
+        with self._cond:
+            seq = next(self._seq)
+            self._active[key] = seq
+            heapq.heappush(self._heap, (time.monotonic() + delay, seq, key, callback))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel(self, key: str):
+        with self._cond:
+            self._active.pop(key, None)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._active)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                deadline, seq, key, callback = self._heap[0]
+                wait = deadline - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+                if self._active.get(key) != seq:
+                    continue
+                del self._active[key]
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"❌ Erro na recuperação agendada {key}: {e}")
+
+
+# Instância global
+recovery_timer = RecoveryTimer()
+
+
+# ===== Simulação (python -m services.rate_limiter bench) =====
+
+class _SimClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _simulate(strategy: str, keys: int, rpm: int, tpm: int, load: float,
+              minutes: int, seed: int) -> Dict[str, float]:
+    """
+    Simula `minutes` minutos de tráfego Poisson a `load` x capacidade total.
+
+    O provedor aplica o limite real de cada chave (a última chave tem só
+    metade do RPM configurado) e responde 429 com Retry-After. 'legacy'
+    reproduz o gerenciador anterior: fica na mesma chave até um erro e a
+    recupera 60s depois.
+    """
+    rng = random.Random(seed)
+    clock = _SimClock()
+    names = [f"key_{i + 1}" for i in range(keys)]
+    real_rpm = [rpm] * (keys - 1) + [rpm // 2]
+    provider = [(TokenBucket(r, r / 60.0, clock), TokenBucket(tpm, tpm / 60.0, clock) if tpm else None)
+                for r in real_rpm]
+
+    limiters = [KeyLimiter(name, rpm, tpm, clock=clock) for name in names]
+    selector = KeySelector(strategy) if strategy != 'legacy' else None
+    legacy_index = 0
+    legacy_down_until = [0.0] * keys
+
+    rate_per_second = load * keys * rpm / 60.0
+    end = minutes * 60.0
+    served = throttled_429 = rejected = 0
+    per_key = [0] * keys
+
+    while True:
+        clock.now += rng.expovariate(rate_per_second)
+        if clock.now >= end:
+            break
+        tokens = rng.randint(200, 1500) if tpm else 0
+
+        if selector is None:
+            index = None
+            for step in range(keys):
+                candidate = (legacy_index + step) % keys
+                if clock.now >= legacy_down_until[candidate]:
+                    index = legacy_index = candidate
+                    break
+        else:
+            chosen = selector.choose(limiters, tokens)
+            index = names.index(chosen.name) if chosen else None
+
+        if index is None:
+            rejected += 1
+            continue
+
+        rpm_bucket, tpm_bucket = provider[index]
+        if rpm_bucket.has(1) and (tpm_bucket is None or tpm_bucket.has(tokens)):
+            rpm_bucket.consume(1)
+            if tpm_bucket:
+                tpm_bucket.consume(tokens)
+            served += 1
+            per_key[index] += 1
+            continue
+
+        throttled_429 += 1
+        retry_after = max(rpm_bucket.time_until(1), tpm_bucket.time_until(tokens) if tpm_bucket else 0.0)
+        if selector is None:
+            legacy_down_until[index] = clock.now + 60
+        else:
+            limiters[index].block_for(retry_after)
+
+    offered = served + throttled_429 + rejected
+    return {
+        'oferecidas': offered,
+        'atendidas': served,
+        '429': throttled_429,
+        'sem chave livre': rejected,
+        'atendidas/min': served / minutes,
+        'limite RPM real/min': sum(real_rpm),
+        'maior/menor uso por chave': max(per_key) / max(1, min(per_key))
+    }
+
+
+def run_benchmark(keys: int = 4, rpm: int = 60, tpm: int = 60000, load: float = 0.9,
+                  minutes: int = 30, seed: int = 7) -> Dict[str, Dict[str, float]]:
+    """Compara a rotação anterior (sticky) com least_loaded e weighted_round_robin"""
+    return {
+        strategy: _simulate(strategy, keys, rpm, tpm, load, minutes, seed)
+        for strategy in ('legacy',) + SELECTION_STRATEGIES
+    }
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'bench':
+        print("Uso: python -m services.rate_limiter bench [chaves] [rpm] [carga]")
+        sys.exit(1)
+    keys = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    rpm = int(sys.argv[3]) if len(sys.argv) > 3 else 60
+    load = float(sys.argv[4]) if len(sys.argv) > 4 else 0.9
+    print(f"{keys} chaves x {rpm} RPM, carga {load:.0%} da capacidade configurada (30 min simulados)")
+    for strategy, metrics in run_benchmark(keys, rpm, load=load).items():
+        print(f"\n[{strategy}]")
+        for label, value in metrics.items():
+            print(f"  {label:<28} {value:10.1f}")
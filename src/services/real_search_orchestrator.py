@@ -9,11 +9,12 @@ import os
 import logging
 import asyncio
 import time
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote_plus
 import json
+import functools
 import requests
 
 # Optional aiohttp import with fallback
@@ -23,11 +24,17 @@ try:
 except ImportError:
     AIOHTTP_AVAILABLE = False
 
+from services.http_client_registry import http_client_registry
+from services.search_result_cache import search_result_cache
+from services.api_health_store import api_health_store, SCOPE_SEARCH_PROVIDER
+from services.rate_limiter import parse_retry_after
+
 # Importa função para salvar trechos de pesquisa web
 from services.auto_save_manager import salvar_trecho_pesquisa_web
 
 # Sistema de remoção de duplicatas
 from utils.duplicate_remover import remove_duplicates_from_results, get_duplicate_stats
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +42,41 @@ logger = logging.getLogger(__name__)
 if not AIOHTTP_AVAILABLE:
     logger.warning("aiohttp não instalado – usando fallback síncrono com requests para Real Search Orchestrator")
 
+# Pausa (s) após HTTP 429 sem Retry-After
+SEARCH_RATE_LIMIT_COOLDOWN = float(os.getenv('SEARCH_RATE_LIMIT_COOLDOWN', '60'))
+
+# Provedores cujos resultados geram trechos salvos na sessão
+SESSION_BOUND_PROVIDERS = {'JINA', 'FIRECRAWL'}
+
+
+def cached_search(provider: str):
+    """
+    Coloca o cache de buscas entre sessões na frente de um _search_<provedor>.
+
+    Em hits de provedores que salvam trechos na sessão, os trechos são
+    regravados para a sessão atual; a revalidação em segundo plano roda
+    sem session_id para não duplicá-los.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, query: str, *args, **kwargs):
+            session_id = kwargs.get('session_id', args[0] if args else None)
+
+            def replay(result: Dict[str, Any]):
+                if session_id and provider in SESSION_BOUND_PROVIDERS:
+                    self._save_extracted_results(result.get('results', []), provider.lower(), session_id)
+
+            return await search_result_cache.get_or_fetch(
+                provider,
+                query,
+                fetch=lambda: func(self, query, *args, **kwargs),
+                refresh=lambda: func(self, query),
+                on_hit=replay
+            )
+        return wrapper
+    return decorator
+
+
 class RealSearchOrchestrator:
     """Orquestrador de busca REAL massiva - ZERO SIMULAÇÃO"""
 
@@ -43,8 +85,7 @@ class RealSearchOrchestrator:
         self.api_keys = self._load_all_api_keys()
         self.key_indices = {provider: 0 for provider in self.api_keys.keys()}
         
-        # Sistema de fallback para APIs sem créditos
-        self.failed_providers = set()  # Provedores que falharam por falta de créditos
+        # Sistema de fallback para APIs sem créditos (failed_providers vem do store compartilhado)
         self.provider_retry_count = {provider: 0 for provider in self.api_keys.keys()}
 
         # Provedores em ordem de prioridade
@@ -90,9 +131,20 @@ class RealSearchOrchestrator:
         except Exception as e:
             logger.error(f"❌ Erro ao salvar erro {error_type}: {e}")
 
+    def _is_rate_limit_error(self, error_response: Any, status_code: int = None) -> bool:
+        """Detecta rate limit temporário (429): pausa curta, não falta de créditos"""
+        if status_code == 429:
+            return True
+        if isinstance(error_response, str):
+            error_lower = error_response.lower()
+            return 'rate limit' in error_lower or 'too many requests' in error_lower
+        return False
+
     def _is_credits_error(self, error_response: Any, status_code: int = None) -> bool:
         """Detecta se o erro é por falta de créditos/quota"""
-        if status_code in [400, 402, 429]:  # Bad Request, Payment Required, Too Many Requests
+        if self._is_rate_limit_error(error_response, status_code):
+            return False
+        if status_code in [400, 402]:  # Bad Request, Payment Required
             return True
             
         if isinstance(error_response, str):
@@ -105,7 +157,6 @@ class RealSearchOrchestrator:
                 'billing',
                 'subscription',
                 'limit exceeded',
-                'rate limit',
                 'no credits',
                 'out of credits'
             ]
@@ -113,15 +164,29 @@ class RealSearchOrchestrator:
         
         return False
 
+    @property
+    def failed_providers(self) -> Set[str]:
+        """Provedores sem créditos/em cooldown em qualquer worker"""
+        return set(api_health_store.blocked(SCOPE_SEARCH_PROVIDER))
+
     def _mark_provider_failed(self, provider: str, reason: str = "credits"):
-        """Marca provedor como falhado temporariamente"""
-        self.failed_providers.add(provider)
+        """Marca provedor sem créditos por SEARCH_CACHE_NEGATIVE_TTL (para todos os workers)"""
+        api_health_store.record_result(SCOPE_SEARCH_PROVIDER, provider, False)
         self.provider_retry_count[provider] = self.provider_retry_count.get(provider, 0) + 1
+        search_result_cache.block_provider(provider, reason)
         logger.warning(f"⚠️ Provedor {provider} marcado como falhado: {reason}")
 
+    def _mark_provider_rate_limited(self, provider: str, retry_after: Any = None) -> float:
+        """Cooldown curto após 429, respeitando Retry-After; retorna a pausa em segundos"""
+        seconds = parse_retry_after(retry_after) or SEARCH_RATE_LIMIT_COOLDOWN
+        api_health_store.record_result(SCOPE_SEARCH_PROVIDER, provider, False)
+        search_result_cache.cooldown_provider(provider, seconds, "rate limit (HTTP 429)")
+        return seconds
+
     def _get_available_providers(self) -> List[str]:
         """Retorna lista de provedores disponíveis (não falhados)"""
-        return [p for p in self.providers if p not in self.failed_providers]
+        failed = self.failed_providers
+        return [p for p in self.providers if p not in failed]
 
     def _generate_fallback_search_results(self, query: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Gera resultados estruturados básicos quando todas as APIs falham"""
@@ -488,6 +553,7 @@ class RealSearchOrchestrator:
             salvar_erro('alibaba_websailor_error', {'error': str(e)})
             return {'success': False, 'error': str(e)}
 
+    @cached_search('FIRECRAWL')
     async def _search_firecrawl(self, query: str, session_id: str = None) -> Dict[str, Any]:
         """Busca REAL usando Firecrawl - SEARCH + SCRAPE"""
         try:
@@ -497,7 +563,7 @@ class RealSearchOrchestrator:
 
             if AIOHTTP_AVAILABLE:
                 timeout = aiohttp.ClientTimeout(total=30)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_client_registry.session('firecrawl', timeout=timeout) as session:
                     headers = {
                         'Authorization': f'Bearer {api_key}',
                         'Content-Type': 'application/json'
@@ -514,6 +580,11 @@ class RealSearchOrchestrator:
                         if response.status != 200:
                             error_text = await response.text()
                             
+                            if self._is_rate_limit_error(error_text, response.status):
+                                seconds = self._mark_provider_rate_limited('FIRECRAWL', response.headers.get('Retry-After'))
+                                logger.warning(f"⚠️ Firecrawl com rate limit - pausa de {seconds:.0f}s")
+                                return {'success': False, 'error': 'Rate limited', 'skip': True, 'retry_after': seconds}
+
                             # Detecta erros de créditos
                             if self._is_credits_error(error_text, response.status):
                                 logger.warning(f"⚠️ Firecrawl sem créditos - marcando como falhado: {error_text}")
@@ -578,6 +649,7 @@ class RealSearchOrchestrator:
             self._salvar_erro('firecrawl_error', {'error': str(e)})
             return {'success': False, 'error': str(e)}
 
+    @cached_search('JINA')
     async def _search_jina(self, query: str, session_id: str = None) -> Dict[str, Any]:
         """Busca REAL usando Jina AI"""
         try:
@@ -596,7 +668,7 @@ class RealSearchOrchestrator:
 
             if AIOHTTP_AVAILABLE:
                 timeout = aiohttp.ClientTimeout(total=30)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_client_registry.session('jina', timeout=timeout) as session:
                     for search_url in search_urls:
                         try:
                             jina_url = f"{self.service_urls['JINA']}{search_url}"
@@ -633,6 +705,7 @@ class RealSearchOrchestrator:
             self._salvar_erro('jina_error', {'error': str(e)})
             return {'success': False, 'error': str(e)}
 
+    @cached_search('GOOGLE')
     async def _search_google(self, query: str) -> Dict[str, Any]:
         """Busca REAL usando Google Custom Search"""
         try:
@@ -644,7 +717,7 @@ class RealSearchOrchestrator:
 
             if AIOHTTP_AVAILABLE:
                 timeout = aiohttp.ClientTimeout(total=30)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_client_registry.session('google', timeout=timeout) as session:
                     params = {
                         'key': api_key,
                         'cx': cse_id,
@@ -693,6 +766,7 @@ class RealSearchOrchestrator:
             self._salvar_erro('google_error', {'error': str(e)})
             return {'success': False, 'error': str(e)}
 
+    @cached_search('YOUTUBE')
     async def _search_youtube(self, query: str) -> Dict[str, Any]:
         """Busca REAL no YouTube com foco em conteúdo viral"""
         try:
@@ -702,7 +776,7 @@ class RealSearchOrchestrator:
 
             if AIOHTTP_AVAILABLE:
                 timeout = aiohttp.ClientTimeout(total=30)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_client_registry.session('youtube', timeout=timeout) as session:
                     params = {
                         'part': "snippet,id",
                         'q': f"{query} Brasil",
@@ -802,7 +876,7 @@ class RealSearchOrchestrator:
 
             if AIOHTTP_AVAILABLE:
                 timeout = aiohttp.ClientTimeout(total=45)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_client_registry.session('supadata', timeout=timeout) as session:
                     headers = {
                         'Authorization': f'Bearer {api_key}',
                         'Content-Type': 'application/json'
@@ -873,7 +947,7 @@ class RealSearchOrchestrator:
 
             if AIOHTTP_AVAILABLE:
                 timeout = aiohttp.ClientTimeout(total=30)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_client_registry.session('web', timeout=timeout) as session:
                     headers = {
                         'Authorization': f'Bearer {api_key}',
                         'Content-Type': 'application/json'
@@ -938,6 +1012,7 @@ class RealSearchOrchestrator:
             self._salvar_erro('twitter_error', {'error': str(e)})
             return {'success': False, 'error': str(e)}
 
+    @cached_search('EXA')
     async def _search_exa(self, query: str) -> Dict[str, Any]:
         """Busca REAL usando Exa Neural Search"""
         try:
@@ -947,7 +1022,7 @@ class RealSearchOrchestrator:
 
             if AIOHTTP_AVAILABLE:
                 timeout = aiohttp.ClientTimeout(total=30)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_client_registry.session('exa', timeout=timeout) as session:
                     headers = {
                         'x-api-key': api_key,
                         'Content-Type': 'application/json'
@@ -1004,6 +1079,7 @@ class RealSearchOrchestrator:
             self._salvar_erro('exa_error', {'error': str(e)})
             return {'success': False, 'error': str(e)}
 
+    @cached_search('SERPER')
     async def _search_serper(self, query: str) -> Dict[str, Any]:
         """Busca REAL usando Serper"""
         try:
@@ -1013,7 +1089,7 @@ class RealSearchOrchestrator:
 
             if AIOHTTP_AVAILABLE:
                 timeout = aiohttp.ClientTimeout(total=30)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_client_registry.session('serper', timeout=timeout) as session:
                     headers = {
                         'X-API-KEY': api_key,
                         'Content-Type': 'application/json'
@@ -1055,6 +1131,11 @@ class RealSearchOrchestrator:
                         else:
                             error_text = await response.text()
                             
+                            if self._is_rate_limit_error(error_text, response.status):
+                                seconds = self._mark_provider_rate_limited('SERPER', response.headers.get('Retry-After'))
+                                logger.warning(f"⚠️ Serper com rate limit - pausa de {seconds:.0f}s")
+                                return {'success': False, 'error': 'Rate limited', 'skip': True, 'retry_after': seconds}
+
                             # Detecta erros de créditos
                             if self._is_credits_error(error_text, response.status):
                                 logger.warning(f"⚠️ Serper sem créditos - marcando como falhado: {error_text}")
@@ -1135,88 +1216,93 @@ class RealSearchOrchestrator:
                 valid_results.append(result)
 
         # NOVA FUNCIONALIDADE: Salva trechos de conteúdo extraído (com deduplicação)
-        if session_id and valid_results:
-            try:
-                # Sistema de deduplicação por URL
-                seen_urls = set()
-                unique_results = []
-                for result in valid_results:
+        self._save_extracted_results(valid_results, provider, session_id)
+
+        return valid_results[:15]  # Máximo 15 por provedor
+
+    def _save_extracted_results(self, valid_results: List[Dict[str, Any]], provider: str, session_id: str = None):
+        """Salva trechos de resultados extraídos na sessão (também reaplicado em hits do cache de buscas)"""
+        if not (session_id and valid_results):
+            return
+        try:
+            # Sistema de deduplicação por URL
+            seen_urls = set()
+            unique_results = []
+            for result in valid_results:
+                url = result.get('url', '')
+                if url and url not in seen_urls:
+                    seen_urls.add(url)
+                    unique_results.append(result)
+
+            if unique_results:
+                logger.info(f"🔍 Salvando {len(unique_results)} resultados únicos de {provider} (removidas {len(valid_results) - len(unique_results)} duplicatas)")
+                for i, result in enumerate(unique_results):
+                    # Calcula score de qualidade baseado no tamanho e completude do conteúdo
+                    title = result.get('title', '')
+                    snippet = result.get('snippet', '')
                     url = result.get('url', '')
-                    if url and url not in seen_urls:
-                        seen_urls.add(url)
-                        unique_results.append(result)
-
-                if unique_results:
-                    logger.info(f"🔍 Salvando {len(unique_results)} resultados únicos de {provider} (removidas {len(valid_results) - len(unique_results)} duplicatas)")
-                    for i, result in enumerate(unique_results):
-                        # Calcula score de qualidade baseado no tamanho e completude do conteúdo
-                        title = result.get('title', '')
-                        snippet = result.get('snippet', '')
-                        url = result.get('url', '') or source_url or ''
-
-                        logger.info(f"📝 Resultado {i+1}: title={len(title)} chars, snippet={len(snippet)} chars, url={url[:50]}...")
-
-                        # Apenas salva se tiver URL real - NÃO GERA URLs DE EXEMPLO
-                        if not url or not url.startswith('http') or 'example.com' in url:
-                            logger.debug(f"🔍 URL inválida ignorada (evitando spam): {url[:30]}...")
-                            continue
 
-                        # Conteúdo completo para salvar
-                        full_content = f"Título: {title}\n\nDescrição: {snippet}\n\nURL: {url}"
-
-                        # Score de qualidade REAL baseado em completude e relevância
-                        quality_score = 0.0
-                        if title and len(title) > 20:
-                            quality_score += 30.0
-                        if snippet and len(snippet) > 50:
-                            quality_score += 40.0
-                        if url and url.startswith('http') and 'example.com' not in url:
-                            quality_score += 30.0
-
-                        # Bonus por relevância ao nicho
-                        if any(keyword in (title + snippet).lower() for keyword in ['patchwork', 'costura', 'quilting', 'artesanato']):
-                            quality_score += 20.0
-
-                        # Log apenas se score for significativo
-                        if quality_score >= 50.0:
-                            logger.info(f"💯 Quality score: {quality_score} - {title[:50]}...")
-
-                        # Salva APENAS se for dados reais válidos - ZERO SIMULAÇÃO
-                        if (quality_score >= 30.0 and url and url.startswith('http') and
-                            'example.com' not in url and len(title) > 10):
-                            try:
-                                # USA INTERFACE UNIFICADA DO AUTO SAVE MANAGER
-                                from services.auto_save_manager import auto_save_manager
-
-                                content_data = {
-                                    'url': url,
-                                    'titulo': title,
-                                    'conteudo': full_content,
-                                    'metodo_extracao': provider,
-                                    'qualidade': quality_score,
-                                    'platform': 'web',
-                                    'metadata': {
-                                        'provider': provider,
-                                        'extraction_timestamp': datetime.now().isoformat(),
-                                        'result_index': i,
-                                        'total_results': len(unique_results)
-                                    }
-                                }
+                    logger.info(f"📝 Resultado {i+1}: title={len(title)} chars, snippet={len(snippet)} chars, url={url[:50]}...")
 
-                                save_result = auto_save_manager.save_extracted_content(content_data, session_id or 'default_session')
-                                if not save_result.get('success'):
-                                    logger.error(f"❌ Falha no salvamento via AutoSaveManager: {save_result.get('error')}")
+                    # Apenas salva se tiver URL real - NÃO GERA URLs DE EXEMPLO
+                    if not url or not url.startswith('http') or 'example.com' in url:
+                        logger.debug(f"🔍 URL inválida ignorada (evitando spam): {url[:30]}...")
+                        continue
 
-                            except Exception as save_error:
-                                logger.error(f"❌ Erro ao salvar resultado REAL {i+1}: {save_error}")
-                        else:
-                            logger.debug(f"🔍 Dados rejeitados (qualidade baixa): título={len(title)} chars")
+                    # Conteúdo completo para salvar
+                    full_content = f"Título: {title}\n\nDescrição: {snippet}\n\nURL: {url}"
+
+                    # Score de qualidade REAL baseado em completude e relevância
+                    quality_score = 0.0
+                    if title and len(title) > 20:
+                        quality_score += 30.0
+                    if snippet and len(snippet) > 50:
+                        quality_score += 40.0
+                    if url and url.startswith('http') and 'example.com' not in url:
+                        quality_score += 30.0
+
+                    # Bonus por relevância ao nicho
+                    if any(keyword in (title + snippet).lower() for keyword in ['patchwork', 'costura', 'quilting', 'artesanato']):
+                        quality_score += 20.0
+
+                    # Log apenas se score for significativo
+                    if quality_score >= 50.0:
+                        logger.info(f"💯 Quality score: {quality_score} - {title[:50]}...")
+
+                    # Salva APENAS se for dados reais válidos - ZERO SIMULAÇÃO
+                    if (quality_score >= 30.0 and url and url.startswith('http') and
+                        'example.com' not in url and len(title) > 10):
+                        try:
+                            # USA INTERFACE UNIFICADA DO AUTO SAVE MANAGER
+                            from services.auto_save_manager import auto_save_manager
 
-            except Exception as e:
-                logger.error(f"❌ Erro ao salvar trechos de {provider}: {e}")
-                self._salvar_erro('content_extraction_save_error', {'provider': provider, 'error': str(e)})
+                            content_data = {
+                                'url': url,
+                                'titulo': title,
+                                'conteudo': full_content,
+                                'metodo_extracao': provider,
+                                'qualidade': quality_score,
+                                'platform': 'web',
+                                'metadata': {
+                                    'provider': provider,
+                                    'extraction_timestamp': datetime.now().isoformat(),
+                                    'result_index': i,
+                                    'total_results': len(unique_results)
+                                }
+                            }
 
-        return valid_results[:15]  # Máximo 15 por provedor
+                            save_result = auto_save_manager.save_extracted_content(content_data, session_id or 'default_session')
+                            if not save_result.get('success'):
+                                logger.error(f"❌ Falha no salvamento via AutoSaveManager: {save_result.get('error')}")
+
+                        except Exception as save_error:
+                            logger.error(f"❌ Erro ao salvar resultado REAL {i+1}: {save_error}")
+                    else:
+                        logger.debug(f"🔍 Dados rejeitados (qualidade baixa): título={len(title)} chars")
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao salvar trechos de {provider}: {e}")
+            self._salvar_erro('content_extraction_save_error', {'provider': provider, 'error': str(e)})
 
     def _identify_viral_content(self, all_social_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Identifica conteúdo viral para captura de screenshots"""
@@ -1668,4 +1754,4 @@ class RealSearchOrchestrator:
 
 
 # Instância global
-real_search_orchestrator = RealSearchOrchestrator()
\ No newline at end of file
+real_search_orchestrator = service_registry.register('real_search_orchestrator', RealSearchOrchestrator)
\ No newline at end of file
@@ -8,268 +8,490 @@ Extrator de conteúdo robusto com remoção de duplicatas
 import os
 import logging
 import requests
-import time
-from typing import Dict, List, Any, Optional
+import asyncio
+from typing import Dict, List, Any, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
-import hashlib
 import re
 
 # Sistema de remoção de duplicatas
 from utils.duplicate_remover import remove_duplicates_from_results
+from services.service_registry import service_registry
+from services.content_cache import content_cache
+from services.http_client_registry import http_client_registry, AIOHTTP_AVAILABLE
+
+if AIOHTTP_AVAILABLE:
+    import aiohttp
+
+# Parsers opcionais (mais rápidos que html.parser)
+try:
+    import lxml.html
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    import trafilatura
+    HAS_TRAFILATURA = True
+except ImportError:
+    HAS_TRAFILATURA = False
 
 logger = logging.getLogger(__name__)
 
+# Conteúdo menor que isso não é considerado extração válida
+MIN_CONTENT_LENGTH = 100
+
+REMOVED_TAGS = ['script', 'style', 'nav', 'header', 'footer', 'aside']
+
+CONTENT_SELECTORS = [
+    'article', 'main', '.content', '.post-content',
+    '.entry-content', '.article-content', '.post-body'
+]
+
+
+def _selector_xpath(selector: str) -> str:
+    """Converte os seletores de CONTENT_SELECTORS (tag ou .classe) em XPath"""
+    if selector.startswith('.'):
+        return f"//*[contains(concat(' ', normalize-space(@class), ' '), ' {selector[1:]} ')]"
+    return f"//{selector}"
+
+
+def _empty_metadata(url: str) -> Dict[str, Any]:
+    return {
+        'url': url,
+        'title': '',
+        'description': '',
+        'keywords': [],
+        'author': '',
+        'published_date': '',
+        'image': ''
+    }
+
+
+def _apply_meta_tag(metadata: Dict[str, Any], name: str, property_attr: str, content: str):
+    name, property_attr = (name or '').lower(), (property_attr or '').lower()
+    content = content or ''
+    if name in ['description', 'og:description'] or property_attr == 'og:description':
+        metadata['description'] = content
+    elif name == 'keywords':
+        metadata['keywords'] = [k.strip() for k in content.split(',')]
+    elif name == 'author' or property_attr == 'article:author':
+        metadata['author'] = content
+    elif property_attr in ['article:published_time', 'og:published_time']:
+        metadata['published_date'] = content
+    elif property_attr == 'og:image':
+        metadata['image'] = content
+
+
+def _parse_with_lxml(html: str, url: str) -> Tuple[str, Dict[str, Any]]:
+    tree = lxml.html.fromstring(html)
+    metadata = _empty_metadata(url)
+
+    title = tree.findtext('.//title')
+    if title:
+        metadata['title'] = title.strip()
+    for tag in tree.iter('meta'):
+        _apply_meta_tag(metadata, tag.get('name'), tag.get('property'), tag.get('content'))
+
+    etree.strip_elements(tree, *REMOVED_TAGS, with_tail=False)
+
+    content = ""
+    for selector in CONTENT_SELECTORS:
+        elements = tree.xpath(_selector_xpath(selector))
+        if elements:
+            content = ' '.join(elem.text_content() for elem in elements)
+            break
+
+    # Se não encontrou com seletores específicos, pega o body
+    if not content:
+        body = tree.find('.//body')
+        content = body.text_content() if body is not None else ''
+
+    return content, metadata
+
+
+def _parse_with_bs4(html: str, url: str) -> Tuple[str, Dict[str, Any]]:
+    soup = BeautifulSoup(html, 'html.parser')
+    metadata = _empty_metadata(url)
+
+    title_tag = soup.find('title')
+    if title_tag:
+        metadata['title'] = title_tag.get_text().strip()
+    for tag in soup.find_all('meta'):
+        _apply_meta_tag(metadata, tag.get('name', ''), tag.get('property', ''), tag.get('content', ''))
+
+    # Remove scripts, styles e outros elementos desnecessários
+    for element in soup(REMOVED_TAGS):
+        element.decompose()
+
+    content = ""
+    for selector in CONTENT_SELECTORS:
+        elements = soup.select(selector)
+        if elements:
+            content = ' '.join([elem.get_text(strip=True) for elem in elements])
+            break
+
+    if not content:
+        body = soup.find('body')
+        if body:
+            content = body.get_text(strip=True)
+
+    return content, metadata
+
+
+def parse_document(raw: bytes, encoding: Optional[str], url: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Extrai (texto principal, metadados) do HTML.
+
+    CPU-bound: no caminho assíncrono roda via asyncio.to_thread. Usa
+    trafilatura para o texto principal quando instalado, lxml para os
+    metadados e seletores, e BeautifulSoup/html.parser como último recurso.
+    """
+    if encoding:
+        html = raw.decode(encoding, errors='replace')
+    else:
+        try:
+            html = raw.decode('utf-8')
+        except UnicodeDecodeError:
+            html = raw.decode('latin-1')
+
+    if HAS_LXML:
+        try:
+            content, metadata = _parse_with_lxml(html, url)
+        except (etree.ParserError, ValueError):
+            content, metadata = _parse_with_bs4(html, url)
+    else:
+        content, metadata = _parse_with_bs4(html, url)
+
+    if HAS_TRAFILATURA:
+        try:
+            main_text = trafilatura.extract(html, url=url, include_comments=False)
+            if main_text and len(main_text) > MIN_CONTENT_LENGTH:
+                content = main_text
+        except Exception as e:
+            logger.debug(f"trafilatura falhou para {url}: {e}")
+
+    # Limpa e normaliza conteúdo
+    return re.sub(r'\s+', ' ', content).strip(), metadata
+
+
 class RobustContentExtractor:
-    """Extrator de conteúdo robusto com anti-duplicatas"""
-    
+    """
+    Extrator de conteúdo robusto com anti-duplicatas.
+
+    Extrações ficam no content_cache (SQLite, limitado por LRU), com
+    revalidação condicional via ETag/Last-Modified e cache negativo com
+    expiração para URLs que falharam. Os lotes usam o pool aiohttp do
+    http_client_registry com até EXTRACTOR_CONCURRENCY downloads simultâneos;
+    o parsing roda fora do event loop.
+    """
+
     def __init__(self):
         """Inicializa extrator"""
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        
-        # Cache para evitar re-extrações
-        self.content_cache = {}
-        self.failed_urls = set()
-        
+        }
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+
         # Controle de tentativas e timeouts
         self.max_retries = 2
         self.default_timeout = 10  # Timeout mais agressivo
+        self.concurrency = max(1, int(os.getenv('EXTRACTOR_CONCURRENCY', '20')))
+        self.max_html_bytes = int(os.getenv('EXTRACTOR_MAX_HTML_BYTES', str(3 * 1024 * 1024)))
         self.problematic_domains = {
             'instagram.com', 'facebook.com', 'twitter.com', 'x.com',
             'linkedin.com', 'tiktok.com', 'youtube.com'
         }
-        
+
         logger.info("🔧 RobustContentExtractor inicializado com timeouts otimizados")
-    
-    def extract_content(self, url: str, timeout: int = 15) -> Optional[str]:
-        """Extrai conteúdo de uma URL"""
-        if not url or url in self.failed_urls:
+
+    # Busca e cache
+
+    @staticmethod
+    def _conditional_headers(cached: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """If-None-Match/If-Modified-Since para revalidar uma entrada expirada"""
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    @staticmethod
+    def _store(url: str, parsed: Tuple[str, Dict[str, Any]], etag: Optional[str],
+               last_modified: Optional[str]) -> Optional[Dict[str, Any]]:
+        content, metadata = parsed
+        if content and len(content) > MIN_CONTENT_LENGTH:  # Só cacheia conteúdo substancial
+            content_cache.set(url, content, metadata, etag, last_modified)
+            return {'content': content, 'metadata': metadata}
+        content_cache.mark_failed(url, 'conteúdo insuficiente')
+        return None
+
+    def _fetch_document(self, url: str, timeout: int) -> Optional[Dict[str, Any]]:
+        """Versão síncrona (requests) de _fetch_document_async"""
+        if not url or content_cache.is_failed(url):
+            return None
+
+        cached = content_cache.get(url)
+        if cached and cached['fresh']:
+            return cached
+
+        try:
+            response = self.session.get(url, timeout=timeout, headers=self._conditional_headers(cached), stream=True)
+            with response:
+                if response.status_code == 304 and cached:
+                    content_cache.mark_revalidated(url, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                    return cached
+                response.raise_for_status()
+                raw = response.raw.read(self.max_html_bytes, decode_content=True)
+                declared = 'charset' in response.headers.get('Content-Type', '').lower()
+                parsed = parse_document(raw, response.encoding if declared else None, url)
+            return self._store(url, parsed, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+        except Exception as e:
+            if cached:
+                return cached
+            logger.warning(f"Erro ao extrair conteúdo de {url}: {e}")
+            content_cache.mark_failed(url, str(e))
+            return None
+
+    async def _fetch_document_async(self, url: str, timeout: int) -> Optional[Dict[str, Any]]:
+        """
+        Conteúdo e metadados da URL: do cache se fresco, revalidado com GET
+        condicional se expirado, ou baixado e parseado. Em erro de rede serve
+        a entrada expirada, se houver; sem ela a URL vai para o cache negativo.
+        """
+        if not url or await asyncio.to_thread(content_cache.is_failed, url):
             return None
-            
-        # Verifica cache
-        url_hash = hashlib.md5(url.encode()).hexdigest()
-        if url_hash in self.content_cache:
-            return self.content_cache[url_hash]
-        
+
+        cached = await asyncio.to_thread(content_cache.get, url)
+        if cached and cached['fresh']:
+            return cached
+
         try:
-            response = self.session.get(url, timeout=timeout)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove scripts, styles e outros elementos desnecessários
-            for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
-                element.decompose()
-            
-            # Extrai texto principal
-            content_selectors = [
-                'article', 'main', '.content', '.post-content', 
-                '.entry-content', '.article-content', '.post-body'
-            ]
-            
-            content = ""
-            for selector in content_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    content = ' '.join([elem.get_text(strip=True) for elem in elements])
-                    break
-            
-            # Se não encontrou com seletores específicos, pega o body
-            if not content:
-                body = soup.find('body')
-                if body:
-                    content = body.get_text(strip=True)
-            
-            # Limpa e normaliza conteúdo
-            content = re.sub(r'\s+', ' ', content).strip()
-            
-            # Cache o resultado
-            if content and len(content) > 100:  # Só cacheia conteúdo substancial
-                self.content_cache[url_hash] = content
-                return content
-            else:
-                self.failed_urls.add(url)
-                return None
-                
+            async with http_client_registry.session(
+                'web', timeout=aiohttp.ClientTimeout(total=timeout), headers=self.headers
+            ) as session:
+                async with session.get(url, headers=self._conditional_headers(cached)) as response:
+                    etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+                    if response.status == 304 and cached:
+                        await asyncio.to_thread(content_cache.mark_revalidated, url, etag, last_modified)
+                        return cached
+                    response.raise_for_status()
+                    raw = await self._read_body(response)
+                    encoding = response.charset
+
+            parsed = await asyncio.to_thread(parse_document, raw, encoding, url)
+            return await asyncio.to_thread(self._store, url, parsed, etag, last_modified)
+
         except Exception as e:
+            if cached:
+                return cached
             logger.warning(f"Erro ao extrair conteúdo de {url}: {e}")
-            self.failed_urls.add(url)
+            await asyncio.to_thread(content_cache.mark_failed, url, str(e))
             return None
-    
+
+    async def _read_body(self, response) -> bytes:
+        """
+        Corpo da resposta até max_html_bytes.
+
+        content.read(n) devolve só o que já está no buffer (um pedaço do
+        corpo); iter_chunked lê até o fim ou até o limite.
+        """
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_html_bytes:
+                break
+        return b''.join(chunks)[:self.max_html_bytes]
+
+    @staticmethod
+    def _run_sync(coro):
+        """Executa a corrotina a partir de código síncrono, com ou sem loop ativo"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return http_client_registry.run(coro)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(http_client_registry.run, coro).result()
+
+    # API síncrona
+
+    def extract_content(self, url: str, timeout: int = 15) -> Optional[str]:
+        """Extrai conteúdo de uma URL"""
+        document = self._fetch_document(url, timeout)
+        return document['content'] if document else None
+
     def extract_metadata(self, url: str, timeout: int = 15) -> Dict[str, Any]:
-        """Extrai metadados de uma URL"""
+        """
+        Extrai metadados de uma URL.
+
+        Vale também para páginas com pouco texto: não consulta nem alimenta
+        o cache negativo, que é sobre conteúdo insuficiente.
+        """
+        cached = content_cache.get(url)
+        if cached and cached['fresh']:
+            return cached['metadata']
+
         try:
-            response = self.session.get(url, timeout=timeout)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            metadata = {
-                'url': url,
-                'title': '',
-                'description': '',
-                'keywords': [],
-                'author': '',
-                'published_date': '',
-                'image': ''
-            }
-            
-            # Título
-            title_tag = soup.find('title')
-            if title_tag:
-                metadata['title'] = title_tag.get_text().strip()
-            
-            # Meta tags
-            meta_tags = soup.find_all('meta')
-            for tag in meta_tags:
-                name = tag.get('name', '').lower()
-                property_attr = tag.get('property', '').lower()
-                content = tag.get('content', '')
-                
-                if name in ['description', 'og:description'] or property_attr == 'og:description':
-                    metadata['description'] = content
-                elif name == 'keywords':
-                    metadata['keywords'] = [k.strip() for k in content.split(',')]
-                elif name == 'author' or property_attr == 'article:author':
-                    metadata['author'] = content
-                elif property_attr in ['article:published_time', 'og:published_time']:
-                    metadata['published_date'] = content
-                elif property_attr == 'og:image':
-                    metadata['image'] = content
-            
+            response = self.session.get(url, timeout=timeout, stream=True)
+            with response:
+                response.raise_for_status()
+                raw = response.raw.read(self.max_html_bytes, decode_content=True)
+                declared = 'charset' in response.headers.get('Content-Type', '').lower()
+                content, metadata = parse_document(raw, response.encoding if declared else None, url)
+            if content and len(content) > MIN_CONTENT_LENGTH:
+                content_cache.set(url, content, metadata, response.headers.get('ETag'), response.headers.get('Last-Modified'))
             return metadata
-            
+
         except Exception as e:
             logger.warning(f"Erro ao extrair metadados de {url}: {e}")
             return {'url': url, 'error': str(e)}
-    
-    def batch_extract(self, urls: List[str], max_workers: int = 5) -> Dict[str, Optional[str]]:
+
+    def batch_extract(self, urls: List[str], max_workers: int = None) -> Dict[str, Optional[str]]:
         """Extrai conteúdo de múltiplas URLs em paralelo"""
-        if not urls:
-            return {}
-        
-        logger.info(f"🔄 Extraindo conteúdo de {len(urls)} URLs...")
-        
-        results = {}
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submete todas as tarefas
+        if AIOHTTP_AVAILABLE:
+            return self._run_sync(self.batch_extract_async(urls, max_workers))
+
+        documents = self._batch_fetch_threaded(urls, max_workers)
+        return self._unique_contents(urls, documents)
+
+    def batch_extract_with_metadata(self, urls: List[str], max_workers: int = None) -> List[Dict[str, Any]]:
+        """Extrai conteúdo e metadados de múltiplas URLs"""
+        if AIOHTTP_AVAILABLE:
+            return self._run_sync(self.batch_extract_with_metadata_async(urls, max_workers))
+
+        documents = self._batch_fetch_threaded(urls, max_workers)
+        return self._unique_articles(documents)
+
+    def _batch_fetch_threaded(self, urls: List[str], max_workers: int = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fallback sem aiohttp: requests em um pool de threads"""
+        documents = {}
+        with ThreadPoolExecutor(max_workers=max_workers or 5) as executor:
             future_to_url = {
-                executor.submit(self.extract_content, url): url 
-                for url in urls if url not in self.failed_urls
+                executor.submit(self._fetch_document, url, self.default_timeout): url
+                for url in dict.fromkeys(urls) if url
             }
-            
-            # Coleta resultados
             for future in as_completed(future_to_url):
                 url = future_to_url[future]
                 try:
-                    content = future.result()
-                    results[url] = content
+                    documents[url] = future.result()
                 except Exception as e:
                     logger.warning(f"Erro ao processar {url}: {e}")
-                    results[url] = None
-        
-        # Remove duplicatas dos resultados
+                    documents[url] = None
+        return documents
+
+    # API assíncrona
+
+    async def extract_content_async(self, url: str, timeout: int = 15) -> Optional[str]:
+        """Extrai conteúdo de uma URL sem bloquear o event loop"""
+        document = await self._fetch_document_async(url, timeout)
+        return document['content'] if document else None
+
+    async def _batch_fetch_async(self, urls: List[str], concurrency: int = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        unique_urls = [url for url in dict.fromkeys(urls) if url]
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def _fetch(url: str):
+            async with semaphore:
+                return await self._fetch_document_async(url, self.default_timeout)
+
+        logger.info(f"🔄 Extraindo conteúdo de {len(unique_urls)} URLs...")
+        results = await asyncio.gather(*(_fetch(url) for url in unique_urls), return_exceptions=True)
+
+        documents = {}
+        for url, result in zip(unique_urls, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Erro ao processar {url}: {result}")
+                result = None
+            documents[url] = result
+        return documents
+
+    async def batch_extract_async(self, urls: List[str], concurrency: int = None) -> Dict[str, Optional[str]]:
+        """Extrai conteúdo de múltiplas URLs com downloads concorrentes"""
+        if not urls:
+            return {}
+        documents = await self._batch_fetch_async(urls, concurrency)
+        return self._unique_contents(urls, documents)
+
+    async def batch_extract_with_metadata_async(self, urls: List[str], concurrency: int = None) -> List[Dict[str, Any]]:
+        """Extrai conteúdo e metadados de múltiplas URLs com downloads concorrentes"""
+        if not urls:
+            return []
+        documents = await self._batch_fetch_async(urls, concurrency)
+        return self._unique_articles(documents)
+
+    # Pós-processamento
+
+    @staticmethod
+    def _unique_contents(urls: List[str], documents: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Optional[str]]:
+        """{url: conteúdo} sem duplicatas; URLs duplicadas ou que falharam ficam com None"""
         articles = []
-        for url, content in results.items():
-            if content:
+        for url, document in documents.items():
+            if document:
                 articles.append({
                     'url': url,
-                    'content': content,
-                    'text': content  # Alias para compatibilidade
+                    'content': document['content'],
+                    'text': document['content']  # Alias para compatibilidade
                 })
-        
+
         # Aplica remoção de duplicatas
         unique_articles = remove_duplicates_from_results(articles, "articles")
-        
-        # Converte de volta para o formato esperado
-        unique_results = {}
-        for article in unique_articles:
-            unique_results[article['url']] = article['content']
-        
+        unique_results = {article['url']: article['content'] for article in unique_articles}
+
         # Adiciona URLs que falharam
         for url in urls:
             if url not in unique_results:
                 unique_results[url] = None
-        
+
         logger.info(f"✅ Extração concluída: {len(unique_articles)} artigos únicos de {len(urls)} URLs")
-        
         return unique_results
-    
-    def batch_extract_with_metadata(self, urls: List[str], max_workers: int = 5) -> List[Dict[str, Any]]:
-        """Extrai conteúdo e metadados de múltiplas URLs"""
-        if not urls:
-            return []
-        
-        logger.info(f"🔄 Extraindo conteúdo e metadados de {len(urls)} URLs...")
-        
+
+    @staticmethod
+    def _unique_articles(documents: Dict[str, Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Artigos com conteúdo e metadados, sem duplicatas"""
         articles = []
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submete tarefas para conteúdo e metadados
-            future_to_url = {}
-            
-            for url in urls:
-                if url not in self.failed_urls:
-                    content_future = executor.submit(self.extract_content, url)
-                    metadata_future = executor.submit(self.extract_metadata, url)
-                    future_to_url[content_future] = ('content', url)
-                    future_to_url[metadata_future] = ('metadata', url)
-            
-            # Coleta resultados
-            url_data = {}
-            for future in as_completed(future_to_url):
-                data_type, url = future_to_url[future]
-                try:
-                    result = future.result()
-                    if url not in url_data:
-                        url_data[url] = {}
-                    url_data[url][data_type] = result
-                except Exception as e:
-                    logger.warning(f"Erro ao processar {data_type} de {url}: {e}")
-        
-        # Combina dados
-        for url, data in url_data.items():
-            content = data.get('content')
-            metadata = data.get('metadata', {})
-            
-            if content and len(content) > 100:  # Só inclui conteúdo substancial
-                article = {
-                    'url': url,
-                    'content': content,
-                    'text': content,  # Alias
-                    'title': metadata.get('title', ''),
-                    'description': metadata.get('description', ''),
-                    'author': metadata.get('author', ''),
-                    'published_date': metadata.get('published_date', ''),
-                    'keywords': metadata.get('keywords', []),
-                    'image': metadata.get('image', '')
-                }
-                articles.append(article)
-        
+        for url, document in documents.items():
+            if not document:
+                continue
+            content, metadata = document['content'], document['metadata']
+            articles.append({
+                'url': url,
+                'content': content,
+                'text': content,  # Alias
+                'title': metadata.get('title', ''),
+                'description': metadata.get('description', ''),
+                'author': metadata.get('author', ''),
+                'published_date': metadata.get('published_date', ''),
+                'keywords': metadata.get('keywords', []),
+                'image': metadata.get('image', '')
+            })
+
         # Remove duplicatas
         unique_articles = remove_duplicates_from_results(articles, "articles")
-        
+
         logger.info(f"✅ Extração com metadados concluída: {len(unique_articles)} artigos únicos")
-        
+
         return unique_articles
-    
+
     def clear_cache(self):
         """Limpa cache de conteúdo"""
-        self.content_cache.clear()
-        self.failed_urls.clear()
+        content_cache.clear()
         logger.info("🧹 Cache do extrator limpo")
-    
-    def get_cache_stats(self) -> Dict[str, int]:
+
+    def get_cache_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas do cache"""
+        stats = content_cache.get_stats()
         return {
-            'cached_contents': len(self.content_cache),
-            'failed_urls': len(self.failed_urls)
+            'cached_contents': stats['entries'],
+            'failed_urls': stats['failed_urls'],
+            **stats
         }
 
 # Instância global
-robust_content_extractor = RobustContentExtractor()
\ No newline at end of file
+robust_content_extractor = service_registry.register('robust_content_extractor', RobustContentExtractor)
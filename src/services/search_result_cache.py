@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - Search Result Cache
+Cache persistente (SQLite) de resultados de busca por provedor, compartilhado entre sessões
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
+import logging
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
+from services.service_registry import service_registry
+from services.sqlite_connections import SQLiteConnections
+from services.api_health_store import api_health_store, SCOPE_SEARCH_PROVIDER
+
+logger = logging.getLogger(__name__)
+
+# TTL padrão por provedor (segundos); sobrescrever com SEARCH_CACHE_TTL_<PROVEDOR>
+DEFAULT_PROVIDER_TTLS = {
+    'SERPER': 24 * 3600,
+    'GOOGLE': 24 * 3600,
+    'EXA': 3 * 24 * 3600,
+    'JINA': 12 * 3600,
+    'FIRECRAWL': 3 * 24 * 3600,
+    'YOUTUBE': 6 * 3600,
+    'DEFAULT': 12 * 3600
+}
+
+
+class SearchResultCache:
+    """
+    Cache de resultados de busca com TTL por provedor.
+
+    A chave é (provedor, query normalizada). Entradas dentro do TTL são
+    servidas diretamente; entre o TTL e TTL x (1 + SEARCH_CACHE_STALE_FACTOR)
+    são servidas como "stale" enquanto uma revalidação roda em segundo plano.
+    Provedores sem créditos ficam bloqueados por SEARCH_CACHE_NEGATIVE_TTL
+    segundos e provedores com rate limit por um cooldown curto; os bloqueios
+    vivem no api_health_store, valendo para todas as sessões e workers.
+    Cada thread reutiliza sua conexão; get_or_fetch acessa o SQLite fora do
+    event loop.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = Path(db_path or os.getenv('SEARCH_CACHE_PATH', 'analyses_data/cache/search_results.db'))
+        self.enabled = os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() == 'true'
+        self.stale_factor = float(os.getenv('SEARCH_CACHE_STALE_FACTOR', '1.0'))
+        self.negative_ttl = int(os.getenv('SEARCH_CACHE_NEGATIVE_TTL', '3600'))
+        self.max_entries = int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', '20000'))
+
+        self._lock = threading.Lock()
+        self._revalidating = set()
+        self._background_tasks = set()
+        self.stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'revalidations': 0,
+            'blocked_skips': 0
+        }
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = SQLiteConnections(self.db_path)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexão da thread atual (aberta e configurada uma única vez)"""
+        return self._db.connection()
+
+    def _init_database(self):
+        """Inicializa banco de dados SQLite"""
+        try:
+            with self._connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS search_results (
+                        key TEXT PRIMARY KEY,
+                        provider TEXT NOT NULL,
+                        query TEXT NOT NULL,
+                        response TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_search_results_created_at
+                    ON search_results(created_at)
+                """)
+        except Exception as e:
+            logger.error(f"❌ Erro ao inicializar cache de buscas: {e}")
+            self.enabled = False
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Minúsculas, sem acentos e com espaços colapsados"""
+        decomposed = unicodedata.normalize('NFKD', query or '')
+        without_accents = ''.join(c for c in decomposed if not unicodedata.combining(c))
+        return ' '.join(without_accents.lower().split())
+
+    @classmethod
+    def make_key(cls, provider: str, query: str) -> str:
+        """Gera chave para (provedor, query normalizada)"""
+        payload = f"{provider.upper()}\0{cls.normalize_query(query)}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_ttl(self, provider: str) -> int:
+        """TTL do provedor em segundos"""
+        provider = provider.upper()
+        default = DEFAULT_PROVIDER_TTLS.get(provider, DEFAULT_PROVIDER_TTLS['DEFAULT'])
+        return int(os.getenv(f'SEARCH_CACHE_TTL_{provider}', str(default)))
+
+    def get(self, provider: str, query: str) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """Retorna (resultado, fresco) ou None se ausente/expirado além da janela stale"""
+        if not self.enabled:
+            return None
+
+        ttl = self.get_ttl(provider)
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT response, created_at FROM search_results WHERE key = ?",
+                    (self.make_key(provider, query),)
+                ).fetchone()
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao ler cache de buscas: {e}")
+            return None
+
+        if row is None:
+            return None
+
+        response, created_at = row
+        age = time.time() - created_at
+        if age > ttl * (1 + self.stale_factor):
+            return None
+        return json.loads(response), age <= ttl
+
+    def set(self, provider: str, query: str, result: Dict[str, Any]):
+        """Armazena resultado e descarta os mais antigos acima do limite"""
+        if not self.enabled:
+            return
+
+        try:
+            serialized = json.dumps(result, ensure_ascii=False, default=str)
+            with self._connect() as conn:
+                conn.execute(
+                    """INSERT OR REPLACE INTO search_results (key, provider, query, response, created_at)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    (self.make_key(provider, query), provider.upper(), self.normalize_query(query), serialized, time.time())
+                )
+                conn.execute(
+                    """DELETE FROM search_results WHERE key IN (
+                           SELECT key FROM search_results ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                       )""",
+                    (self.max_entries,)
+                )
+            self.stats['stores'] += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao gravar cache de buscas: {e}")
+
+    def block_provider(self, provider: str, reason: str = "credits", seconds: int = None):
+        """Cache negativo: bloqueia provedor sem créditos para todas as sessões"""
+        seconds = seconds if seconds is not None else self.negative_ttl
+        api_health_store.mark_credits_exhausted(SCOPE_SEARCH_PROVIDER, provider.upper(), seconds, reason)
+        logger.info(f"🚫 Provedor {provider} bloqueado por {seconds}s: {reason}")
+
+    def cooldown_provider(self, provider: str, seconds: float, reason: str = "rate limit"):
+        """Pausa curta (rate limit): o provedor volta após `seconds`"""
+        api_health_store.set_cooldown(SCOPE_SEARCH_PROVIDER, provider.upper(), seconds, reason)
+        logger.info(f"⏳ Provedor {provider} em cooldown por {seconds:.0f}s: {reason}")
+
+    def is_provider_blocked(self, provider: str) -> bool:
+        """Verifica se o provedor está sem créditos ou em cooldown"""
+        return api_health_store.is_blocked(SCOPE_SEARCH_PROVIDER, provider.upper())
+
+    def unblock_provider(self, provider: str):
+        """Remove o bloqueio do provedor"""
+        api_health_store.clear(SCOPE_SEARCH_PROVIDER, provider.upper())
+
+    @staticmethod
+    def _is_cacheable(result: Any) -> bool:
+        return isinstance(result, dict) and bool(result.get('success')) and bool(result.get('results'))
+
+    async def get_or_fetch(
+        self,
+        provider: str,
+        query: str,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]],
+        refresh: Optional[Callable[[], Awaitable[Dict[str, Any]]]] = None,
+        on_hit: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Serve do cache ou busca no provedor.
+
+        Args:
+            provider: Nome do provedor (SERPER, EXA, ...)
+            query: Query original
+            fetch: Busca real (usada em miss)
+            refresh: Busca usada na revalidação em segundo plano (padrão: fetch)
+            on_hit: Chamado com o resultado cacheado (ex.: reaplicar efeitos da sessão)
+        """
+        if await asyncio.to_thread(self.is_provider_blocked, provider):
+            self.stats['blocked_skips'] += 1
+            logger.info(f"⏭️ {provider} pulado - sem créditos ou em cooldown")
+            return {'success': False, 'error': 'Provider blocked', 'skip': True, 'cached': True}
+
+        cached = await asyncio.to_thread(self.get, provider, query)
+        if cached:
+            result, fresh = cached
+            if fresh:
+                self.stats['hits'] += 1
+            else:
+                self.stats['stale_hits'] += 1
+                self._schedule_revalidation(provider, query, refresh or fetch)
+            logger.info(f"💾 {provider} servido do cache{'' if fresh else ' (stale, revalidando)'}: {query}")
+            if on_hit:
+                on_hit(result)
+            return {**result, 'cached': True}
+
+        self.stats['misses'] += 1
+        result = await fetch()
+        await asyncio.to_thread(self._store_or_block, provider, query, result)
+        return result
+
+    def _store_or_block(self, provider: str, query: str, result: Any):
+        if self._is_cacheable(result):
+            self.set(provider, query, result)
+        elif isinstance(result, dict) and result.get('skip') and not self.is_provider_blocked(provider):
+            if result.get('retry_after'):
+                self.cooldown_provider(provider, result['retry_after'], result.get('error', 'rate limit'))
+            else:
+                self.block_provider(provider, result.get('error', 'credits'))
+
+    def _schedule_revalidation(self, provider: str, query: str, refresh: Callable[[], Awaitable[Dict[str, Any]]]):
+        """
+        Revalida em segundo plano no event loop atual (uma por chave).
+
+        A tarefa vive no loop do workflow; se o loop terminar antes, a
+        revalidação é descartada e a próxima leitura stale tenta de novo.
+        """
+        key = self.make_key(provider, query)
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        async def _revalidate():
+            try:
+                await asyncio.to_thread(self._store_or_block, provider, query, await refresh())
+                self.stats['revalidations'] += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Revalidação de {provider} falhou: {e}")
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        task = asyncio.get_running_loop().create_task(_revalidate())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def clear(self):
+        """Remove todas as entradas e bloqueios"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM search_results")
+        api_health_store.clear(SCOPE_SEARCH_PROVIDER)
+        logger.info("🧹 Cache de buscas limpo")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de hit/miss, ocupação e provedores bloqueados"""
+        entries = 0
+        try:
+            with self._connect() as conn:
+                entries = conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0]
+        except Exception:
+            pass
+        blocked = sorted(api_health_store.blocked(SCOPE_SEARCH_PROVIDER))
+
+        lookups = self.stats['hits'] + self.stats['stale_hits'] + self.stats['misses']
+        return {
+            'enabled': self.enabled,
+            **self.stats,
+            'hit_rate': round((self.stats['hits'] + self.stats['stale_hits']) / lookups, 3) if lookups else 0.0,
+            'entries': entries,
+            'blocked_providers': blocked
+        }
+
+
+# Instância global
+search_result_cache = service_registry.register('search_result_cache', SearchResultCache)
@@ -10,6 +10,7 @@ import subprocess
 import glob
 import os  # Importado para os.path.exists
 from pathlib import Path
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -140,7 +141,7 @@ class SeleniumChecker:
         return results
 
 # Instância global
-selenium_checker = SeleniumChecker()
+selenium_checker = service_registry.register('selenium_checker', SeleniumChecker)
 
 # Executa verificação na importação
 if __name__ != "__main__":
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - Service Registry
+Registro de singletons construídos sob demanda e perfil de tempo de importação
+"""
+
+import os
+import sys
+import time
+import builtins
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class LazyService:
+    """
+    Proxy de um singleton construído no primeiro uso.
+
+    Os módulos continuam exportando o mesmo nome (ex.: alibaba_websailor);
+    o primeiro acesso a um atributo constrói a instância real e os acessos
+    seguintes são repassados a ela.
+    """
+
+    __slots__ = ('_service_name', '_factory', '_instance', '_lock', '_registry')
+
+    def __init__(self, name: str, factory: Callable[[], Any], registry: "ServiceRegistry"):
+        object.__setattr__(self, '_service_name', name)
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, '_registry', registry)
+
+    def _get_instance(self) -> Any:
+        instance = object.__getattribute__(self, '_instance')
+        if instance is not None:
+            return instance
+
+        with object.__getattribute__(self, '_lock'):
+            instance = object.__getattribute__(self, '_instance')
+            if instance is None:
+                name = object.__getattribute__(self, '_service_name')
+                started = time.perf_counter()
+                instance = object.__getattribute__(self, '_factory')()
+                object.__setattr__(self, '_instance', instance)
+                object.__getattribute__(self, '_registry')._record_build(name, time.perf_counter() - started)
+            return instance
+
+    @property
+    def is_built(self) -> bool:
+        return object.__getattribute__(self, '_instance') is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._get_instance(), attr)
+
+    def __setattr__(self, attr: str, value: Any):
+        setattr(self._get_instance(), attr, value)
+
+    def __delattr__(self, attr: str):
+        delattr(self._get_instance(), attr)
+
+    def __call__(self, *args, **kwargs):
+        return self._get_instance()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        name = object.__getattribute__(self, '_service_name')
+        state = 'construído' if self.is_built else 'pendente'
+        return f"<LazyService {name} ({state})>"
+
+
+class ServiceRegistry:
+    """
+    Registro dos singletons de serviço do processo.
+
+    Com LAZY_SERVICES=true (padrão) os singletons só são construídos no
+    primeiro uso, então importar blueprints não carrega modelos nem varre
+    chaves de API. warm_up() constrói antecipadamente os serviços pedidos
+    (ex.: pelo endpoint /api/system/warmup logo após o boot do worker).
+    """
+
+    def __init__(self):
+        self.lazy = os.getenv('LAZY_SERVICES', 'true').lower() == 'true'
+        self._services: Dict[str, LazyService] = {}
+        self._build_times: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> LazyService:
+        """Registra um singleton e devolve seu proxy (construído agora se LAZY_SERVICES=false)"""
+        service = LazyService(name, factory, self)
+        with self._lock:
+            self._services[name] = service
+        if not self.lazy:
+            service._get_instance()
+        return service
+
+    def _record_build(self, name: str, seconds: float):
+        with self._lock:
+            self._build_times[name] = seconds
+        logger.info(f"🧩 Serviço {name} construído em {seconds * 1000:.0f}ms")
+
+    def get(self, name: str) -> Any:
+        """Instância real do serviço (construindo se necessário)"""
+        return self._services[name]._get_instance()
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Constrói os serviços pedidos (todos se None) e relata tempo e erros de cada um"""
+        with self._lock:
+            targets = list(names) if names is not None else list(self._services)
+
+        report = {}
+        for name in targets:
+            service = self._services.get(name)
+            if service is None:
+                report[name] = {'status': 'unknown'}
+                continue
+            if service.is_built:
+                report[name] = {'status': 'already_built', 'build_ms': round(self._build_times.get(name, 0) * 1000, 1)}
+                continue
+            try:
+                service._get_instance()
+                report[name] = {'status': 'built', 'build_ms': round(self._build_times.get(name, 0) * 1000, 1)}
+            except Exception as e:
+                logger.error(f"❌ Falha ao construir serviço {name}: {e}")
+                report[name] = {'status': 'error', 'error': str(e)}
+        return report
+
+    def get_status(self) -> Dict[str, Any]:
+        """Serviços registrados, construídos e tempo de construção"""
+        with self._lock:
+            services = {
+                name: {
+                    'built': service.is_built,
+                    'build_ms': round(self._build_times[name] * 1000, 1) if name in self._build_times else None
+                }
+                for name, service in self._services.items()
+            }
+        return {
+            'lazy': self.lazy,
+            'registered': len(services),
+            'built': sum(1 for info in services.values() if info['built']),
+            'services': services
+        }
+
+
+class ImportProfiler:
+    """
+    Mede o custo de importação por módulo (similar a python -X importtime).
+
+    Enquanto ativo, envolve builtins.__import__ e registra, para cada módulo
+    carregado pela primeira vez, o tempo acumulado (incluindo dependências)
+    e o tempo próprio (descontando as importações aninhadas).
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv('IMPORT_PROFILE', 'false').lower() == 'true'
+        self._original_import = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.records: Dict[str, Dict[str, float]] = {}
+        self.sections: List[Dict[str, Any]] = []
+
+    def start(self):
+        """Instala o hook de importação (no-op se IMPORT_PROFILE=false ou já ativo)"""
+        if not self.enabled or self._original_import is not None:
+            return
+
+        original_import = self._original_import = builtins.__import__
+        profiler = self
+
+        def _profiled_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original_import(name, globals, locals, fromlist, level)
+
+            stack = getattr(profiler._local, 'stack', None)
+            if stack is None:
+                stack = profiler._local.stack = []
+            stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - started
+                nested = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                with profiler._lock:
+                    if name not in profiler.records:
+                        profiler.records[name] = {'cumulative': elapsed, 'self': elapsed - nested}
+
+        builtins.__import__ = _profiled_import
+        logger.info("⏱️ Perfil de importação ativo")
+
+    def stop(self):
+        """Remove o hook de importação"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def section(self, name: str) -> "_ImportSection":
+        """Context manager que cronometra um bloco de importações (sempre ativo)"""
+        return _ImportSection(self, name)
+
+    def report(self, top: int = 30) -> Dict[str, Any]:
+        """Blocos cronometrados e os módulos mais caros por tempo próprio"""
+        with self._lock:
+            modules = sorted(
+                ({'module': name, 'self_ms': round(r['self'] * 1000, 1), 'cumulative_ms': round(r['cumulative'] * 1000, 1)}
+                 for name, r in self.records.items()),
+                key=lambda r: r['self_ms'],
+                reverse=True
+            )
+        return {
+            'enabled': self.enabled,
+            'sections': list(self.sections),
+            'total_sections_ms': round(sum(s['ms'] for s in self.sections), 1),
+            'modules_profiled': len(modules),
+            'top_modules': modules[:top]
+        }
+
+    def log_report(self, top: int = 15):
+        """Escreve o relatório no log de inicialização"""
+        report = self.report(top)
+        logger.info(f"⏱️ Importações da aplicação: {report['total_sections_ms']}ms")
+        for section in report['sections']:
+            logger.info(f"   {section['name']}: {section['ms']}ms")
+        for module in report['top_modules']:
+            logger.info(f"   {module['module']}: {module['self_ms']}ms próprio / {module['cumulative_ms']}ms acumulado")
+
+
+class _ImportSection:
+    def __init__(self, profiler: ImportProfiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed_ms = round((time.perf_counter() - self.started) * 1000, 1)
+        with self.profiler._lock:
+            self.profiler.sections.append({'name': self.name, 'ms': elapsed_ms})
+        return False
+
+
+# Instâncias globais
+service_registry = ServiceRegistry()
+import_profiler = ImportProfiler()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - Session Catalog
+Catálogo indexado (SQLite) de sessões e análises salvas em disco
+
+Uso para reconstruir a partir dos arquivos existentes:
+    python -m services.session_catalog rebuild [sessions|analyses|local_analyses]
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+from services.service_registry import service_registry
+from services.sqlite_connections import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+# Colunas pelas quais a listagem pode ser ordenada
+SORTABLE_COLUMNS = ('updated_at', 'created_at', 'name', 'status', 'segmento', 'size_bytes')
+
+# Colunas filtráveis lidas do resumo de cada item
+INDEXED_COLUMNS = ('name', 'status', 'segmento', 'created_at', 'updated_at')
+
+
+class SessionCatalog:
+    """
+    Índice das listagens de sessões/análises.
+
+    Cada tipo de registro (kind) mantém uma linha por item com os campos
+    filtráveis (nome, status, segmento, datas, tamanho) e o resumo JSON que
+    a listagem devolve. Os gerenciadores atualizam o catálogo a cada
+    gravação/remoção; na primeira consulta de um tipo ainda não catalogado
+    (ou cujo diretório de origem mudou), o catálogo é reconstruído a partir
+    do disco.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = Path(db_path or os.getenv('SESSION_CATALOG_PATH', 'analyses_data/cache/catalog.db'))
+        self.enabled = os.getenv('SESSION_CATALOG_ENABLED', 'true').lower() == 'true'
+
+        self._lock = threading.Lock()
+        self.stats = {
+            'queries': 0,
+            'upserts': 0,
+            'removals': 0,
+            'rebuilds': 0
+        }
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = SQLiteConnections(self.db_path)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexão da thread atual (aberta e configurada uma única vez)"""
+        return self._db.connection()
+
+    def _init_database(self):
+        """Inicializa banco de dados SQLite"""
+        try:
+            with self._connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS catalog_entries (
+                        kind TEXT NOT NULL,
+                        id TEXT NOT NULL,
+                        name TEXT,
+                        status TEXT,
+                        segmento TEXT,
+                        created_at TEXT,
+                        updated_at TEXT,
+                        size_bytes INTEGER NOT NULL DEFAULT 0,
+                        summary TEXT NOT NULL,
+                        PRIMARY KEY (kind, id)
+                    )
+                """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_catalog_kind_updated
+                    ON catalog_entries(kind, updated_at DESC)
+                """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_catalog_kind_status
+                    ON catalog_entries(kind, status)
+                """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_catalog_kind_segmento
+                    ON catalog_entries(kind, segmento)
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS catalog_sources (
+                        kind TEXT PRIMARY KEY,
+                        source_dir TEXT NOT NULL,
+                        rebuilt_at REAL NOT NULL
+                    )
+                """)
+        except Exception as e:
+            logger.error(f"❌ Erro ao inicializar catálogo de sessões: {e}")
+            self.enabled = False
+
+    @staticmethod
+    def _row(kind: str, entry_id: str, summary: Dict[str, Any], size_bytes: int,
+             fields: Optional[Dict[str, Any]] = None) -> Tuple:
+        """Linha da tabela; fields sobrescreve as colunas indexadas lidas do resumo"""
+        indexed = {column: summary.get(column) for column in INDEXED_COLUMNS}
+        indexed.update(fields or {})
+        return (
+            kind,
+            entry_id,
+            indexed['name'],
+            indexed['status'],
+            indexed['segmento'],
+            indexed['created_at'],
+            indexed['updated_at'] or indexed['created_at'],
+            int(size_bytes or 0),
+            json.dumps(summary, ensure_ascii=False, default=str)
+        )
+
+    def is_current(self, kind: str, source_dir: str) -> bool:
+        """True se o tipo já foi catalogado a partir deste diretório"""
+        if not self.enabled:
+            return False
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT source_dir FROM catalog_sources WHERE kind = ?", (kind,)
+                ).fetchone()
+        except Exception:
+            return False
+        return bool(row and row[0] == os.path.abspath(source_dir))
+
+    def upsert(self, kind: str, entry_id: str, summary: Dict[str, Any], size_bytes: int = 0,
+               fields: Optional[Dict[str, Any]] = None):
+        """Insere/atualiza o resumo de um item"""
+        if not self.enabled:
+            return
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    """INSERT OR REPLACE INTO catalog_entries
+                       (kind, id, name, status, segmento, created_at, updated_at, size_bytes, summary)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    self._row(kind, entry_id, summary, size_bytes, fields)
+                )
+            self.stats['upserts'] += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao atualizar catálogo ({kind}/{entry_id}): {e}")
+
+    def remove(self, kind: str, entry_id: str):
+        """Remove um item do catálogo"""
+        if not self.enabled:
+            return
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute("DELETE FROM catalog_entries WHERE kind = ? AND id = ?", (kind, entry_id))
+            self.stats['removals'] += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao remover do catálogo ({kind}/{entry_id}): {e}")
+
+    def remove_prefix(self, kind: str, prefix: str):
+        """Remove os itens cujo id começa com prefix"""
+        if not self.enabled or not prefix:
+            return
+        escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        try:
+            with self._lock, self._connect() as conn:
+                deleted = conn.execute(
+                    "DELETE FROM catalog_entries WHERE kind = ? AND id LIKE ? ESCAPE '\\'",
+                    (kind, f"{escaped}%")
+                ).rowcount
+            self.stats['removals'] += deleted
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao remover do catálogo ({kind}/{prefix}*): {e}")
+
+    def rebuild(self, kind: str, source_dir: str,
+                entries: Iterable[Tuple[str, Dict[str, Any], int, Optional[Dict[str, Any]]]]) -> int:
+        """
+        Substitui todos os itens de um tipo pelos lidos do disco.
+
+        entries: iterável de (id, resumo, tamanho em bytes, colunas indexadas ou None).
+        """
+        if not self.enabled:
+            return 0
+
+        rows = [self._row(kind, *entry) for entry in entries]
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM catalog_entries WHERE kind = ?", (kind,))
+            conn.executemany(
+                """INSERT OR REPLACE INTO catalog_entries
+                   (kind, id, name, status, segmento, created_at, updated_at, size_bytes, summary)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO catalog_sources (kind, source_dir, rebuilt_at) VALUES (?, ?, ?)",
+                (kind, os.path.abspath(source_dir), time.time())
+            )
+
+        self.stats['rebuilds'] += 1
+        logger.info(f"🗂️ Catálogo '{kind}' reconstruído: {len(rows)} itens de {source_dir}")
+        return len(rows)
+
+    def query(
+        self,
+        kind: str,
+        status: Optional[str] = None,
+        segmento: Optional[str] = None,
+        search: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        order_by: str = 'updated_at',
+        descending: bool = True
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Lista resumos filtrados e paginados.
+
+        Returns:
+            (resumos da página, total de itens que atendem aos filtros)
+        """
+        if order_by not in SORTABLE_COLUMNS:
+            order_by = 'updated_at'
+
+        conditions, params = ["kind = ?"], [kind]
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if segmento:
+            conditions.append("segmento = ?")
+            params.append(segmento)
+        if search:
+            conditions.append("(name LIKE ? OR segmento LIKE ?)")
+            params.extend([f"%{search}%", f"%{search}%"])
+        where = " AND ".join(conditions)
+
+        with self._lock, self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM catalog_entries WHERE {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"""SELECT summary FROM catalog_entries WHERE {where}
+                    ORDER BY {order_by} {'DESC' if descending else 'ASC'}, id
+                    LIMIT ? OFFSET ?""",
+                params + [limit if limit is not None else -1, max(0, offset)]
+            ).fetchall()
+
+        self.stats['queries'] += 1
+        return [json.loads(row[0]) for row in rows], total
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Itens por tipo e contadores"""
+        kinds = {}
+        try:
+            with self._connect() as conn:
+                kinds = dict(conn.execute(
+                    "SELECT kind, COUNT(*) FROM catalog_entries GROUP BY kind"
+                ).fetchall())
+        except Exception:
+            pass
+        return {
+            'enabled': self.enabled,
+            **self.stats,
+            'entries': kinds
+        }
+
+
+# Instância global
+session_catalog = service_registry.register('session_catalog', SessionCatalog)
+
+
+def rebuild_all(kinds: Optional[List[str]] = None) -> Dict[str, int]:
+    """Reconstrói os catálogos a partir do disco (todos ou os tipos pedidos)"""
+    from services.session_persistence import session_persistence
+    from services.local_file_manager import local_file_manager
+    from database import db_manager
+
+    rebuilders = {
+        'sessions': session_persistence.rebuild_catalog,
+        'analyses': db_manager.rebuild_catalog,
+        'local_analyses': local_file_manager.rebuild_catalog
+    }
+    return {kind: rebuilder() for kind, rebuilder in rebuilders.items() if not kinds or kind in kinds}
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if len(sys.argv) < 2 or sys.argv[1] != 'rebuild':
+        print("Uso: python -m services.session_catalog rebuild [sessions|analyses|local_analyses]")
+        sys.exit(1)
+    for kind, count in rebuild_all(sys.argv[2:]).items():
+        print(f"{kind}: {count} itens catalogados")
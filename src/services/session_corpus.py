@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - Session Corpus
+Carregamento único dos arquivos de uma sessão, compartilhado pelas fases da análise preditiva
+"""
+
+import re
+import json
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, List, Tuple, Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+ENGAGEMENT_FIELDS = ('views', 'likes', 'comments', 'shares')
+
+
+class SessionCorpus:
+    """
+    Conteúdo de analyses_data/<session_id> lido uma única vez.
+
+    load() percorre a pasta da sessão uma vez, guardando os .txt como texto e
+    os .json já parseados. As visões derivadas (tokens, TF-IDF, dados
+    temporais, linhas de engajamento) são calculadas na primeira consulta e
+    memorizadas; como as fases rodam em paralelo, cada visão é protegida
+    por lock e calculada uma única vez.
+    """
+
+    def __init__(self, session_id: str, base_dir: str = "analyses_data"):
+        self.session_id = session_id
+        self.session_dir = Path(base_dir) / session_id
+        self.files_dir = Path(base_dir) / "files" / session_id
+
+        self.texts: Dict[str, str] = {}
+        self.json_documents: Dict[str, Any] = {}
+        self.image_paths: List[Path] = []
+        self.loaded = False
+
+        self._views: Dict[Any, Any] = {}
+        self._views_lock = threading.Lock()
+        self._view_locks: Dict[Any, threading.Lock] = {}
+
+    def exists(self) -> bool:
+        return self.session_dir.exists()
+
+    def load(self) -> "SessionCorpus":
+        """Lê e parseia cada arquivo da sessão uma única vez"""
+        if self.loaded:
+            return self
+
+        for path in sorted(self.session_dir.iterdir()) if self.exists() else []:
+            if not path.is_file():
+                continue
+            suffix = path.suffix.lower()
+            try:
+                if suffix == '.txt':
+                    self.texts[path.name] = path.read_text(encoding='utf-8')
+                elif suffix == '.json':
+                    self.json_documents[path.name] = json.loads(path.read_text(encoding='utf-8'))
+            except json.JSONDecodeError:
+                continue
+            except Exception as e:
+                logger.error(f"❌ Erro ao ler arquivo {path.name}: {e}")
+
+        if self.files_dir.exists():
+            self.image_paths = sorted(self.files_dir.glob("*.png"))
+
+        self.loaded = True
+        logger.info(
+            f"📚 Corpus da sessão {self.session_id}: {len(self.texts)} textos, "
+            f"{len(self.json_documents)} JSONs, {len(self.image_paths)} imagens"
+        )
+        return self
+
+    def _memoize(self, key: Any, builder: Callable[[], Any]) -> Any:
+        """Calcula a visão uma única vez, mesmo com várias fases pedindo ao mesmo tempo"""
+        if key in self._views:
+            return self._views[key]
+
+        with self._views_lock:
+            lock = self._view_locks.setdefault(key, threading.Lock())
+
+        with lock:
+            if key not in self._views:
+                self._views[key] = builder()
+            return self._views[key]
+
+    # Visões derivadas
+
+    @property
+    def tokens(self) -> Dict[str, List[str]]:
+        """Palavras em minúsculas de cada texto, por fonte"""
+        return self._memoize('tokens', lambda: {
+            source: WORD_PATTERN.findall(text.lower()) for source, text in self.texts.items()
+        })
+
+    def tokens_for(self, sources: Sequence[str]) -> List[List[str]]:
+        """Listas de tokens das fontes pedidas, na mesma ordem"""
+        tokens = self.tokens
+        return [tokens[source] for source in sources]
+
+    def tfidf(self, sources: Sequence[str], vectorizer_factory: Callable[[], Any]) -> Tuple[Any, Any]:
+        """
+        (vectorizer ajustado, matriz TF-IDF) para as fontes pedidas.
+
+        Cada conjunto de fontes recebe seu próprio vectorizer, então fases e
+        sessões concorrentes não disputam uma instância compartilhada.
+        """
+        sources = tuple(sources)
+
+        def _build():
+            vectorizer = vectorizer_factory()
+            matrix = vectorizer.fit_transform([self.texts[source] for source in sources])
+            return vectorizer, matrix
+
+        return self._memoize(('tfidf', sources), _build)
+
+    @property
+    def json_records(self) -> List[Dict[str, Any]]:
+        """Todos os objetos de nível superior dos JSONs (itens de listas ou o próprio dict)"""
+        def _build():
+            records = []
+            for data in self.json_documents.values():
+                if isinstance(data, list):
+                    records.extend(item for item in data if isinstance(item, dict))
+                elif isinstance(data, dict):
+                    records.append(data)
+            return records
+
+        return self._memoize('json_records', _build)
+
+    @property
+    def timestamped_values(self) -> List[Dict[str, Any]]:
+        """Registros com timestamp ISO e value, com timestamp convertido e ordenados"""
+        def _build():
+            rows = []
+            for record in self.json_records:
+                if "timestamp" in record and "value" in record:
+                    try:
+                        timestamp = datetime.fromisoformat(record["timestamp"])
+                    except (TypeError, ValueError):
+                        continue
+                    rows.append({**record, "timestamp": timestamp})
+            rows.sort(key=lambda row: row["timestamp"])
+            return rows
+
+        return self._memoize('timestamped_values', _build)
+
+    @property
+    def engagement_rows(self) -> List[Dict[str, Any]]:
+        """Registros com timestamp ISO e métricas de engajamento (views/likes/comments/shares), ordenados"""
+        def _build():
+            rows = []
+            for record in self.json_records:
+                if not any(field in record for field in ENGAGEMENT_FIELDS):
+                    continue
+                try:
+                    timestamp = datetime.fromisoformat(record.get("timestamp"))
+                except (TypeError, ValueError):
+                    continue
+                row = {"timestamp": timestamp}
+                row.update({field: record.get(field, 0) or 0 for field in ENGAGEMENT_FIELDS})
+                rows.append(row)
+            rows.sort(key=lambda row: row["timestamp"])
+            return rows
+
+        return self._memoize('engagement_rows', _build)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'session_id': self.session_id,
+            'texts': len(self.texts),
+            'json_documents': len(self.json_documents),
+            'images': len(self.image_paths),
+            'memoized_views': len(self._views)
+        }
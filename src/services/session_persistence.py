@@ -14,9 +14,13 @@ from typing import Dict, List, Any, Optional
 import logging
 import time
 from pathlib import Path # Import Path for backup functionality
+from services.service_registry import service_registry
+from services.session_catalog import session_catalog
 
 logger = logging.getLogger(__name__)
 
+CATALOG_KIND = 'sessions'
+
 class SessionPersistenceManager:
     """Gerenciador de persistência de sessões - APENAS LOCAL"""
 
@@ -77,11 +81,43 @@ class SessionPersistenceManager:
         try:
             with open(session_file, 'w', encoding='utf-8') as f:
                 json.dump(session_data, f, ensure_ascii=False, indent=2, default=str)
-            return True
         except Exception as e:
             logger.error(f"❌ Erro ao salvar sessão {session_id}: {e}")
             return False
 
+        session_catalog.upsert(
+            CATALOG_KIND, session_id,
+            self._catalog_summary(session_id, session_data),
+            os.path.getsize(session_file)
+        )
+        return True
+
+    @staticmethod
+    def _catalog_summary(session_id: str, session_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Campos da sessão usados na listagem (sem os dados pesados das etapas)"""
+        summary = {key: value for key, value in session_data.items() if not key.endswith('_data')}
+        summary['session_id'] = session_id
+        return summary
+
+    def rebuild_catalog(self) -> int:
+        """Reconstrói o catálogo de sessões a partir dos arquivos em disco"""
+        entries = []
+        for filename in os.listdir(self.sessions_dir):
+            if not filename.endswith('.json'):
+                continue
+            session_id = filename[:-5]
+            session_data = self._load_session_data(session_id)
+            if session_data:
+                entries.append((
+                    session_id,
+                    self._catalog_summary(session_id, session_data),
+                    os.path.getsize(self._get_session_file_path(session_id)),
+                    None
+                ))
+            else:
+                logger.warning(f"⚠️ Falha ao carregar sessão: {session_id}")
+        return session_catalog.rebuild(CATALOG_KIND, self.sessions_dir, entries)
+
     def save_session(self, session_id: str, name: str, query: str, segmento: str, 
                     openrouter_model: str = None) -> Dict[str, Any]:
         """Salva uma nova sessão em arquivo local"""
@@ -262,51 +298,64 @@ class SessionPersistenceManager:
             logger.error(f"❌ Erro ao atualizar progresso: {e}")
             return {'success': False, 'error': str(e)}
 
-    def get_sessions(self, status: str = None) -> List[Dict[str, Any]]:
-        """Lista sessões salvas localmente"""
-        try:
-            sessions = []
-
-            logger.info(f"🔍 DEBUG get_sessions: sessions_dir = {self.sessions_dir}")
-            logger.info(f"🔍 DEBUG get_sessions: dir exists = {os.path.exists(self.sessions_dir)}")
-
-            if not os.path.exists(self.sessions_dir):
-                logger.warning(f"⚠️ Diretório de sessões não existe: {self.sessions_dir}")
-                return sessions
-
-            files = os.listdir(self.sessions_dir)
-            logger.info(f"🔍 DEBUG get_sessions: files found = {files}")
-
-            for filename in files:
-                if filename.endswith('.json'):
-                    session_id = filename[:-5]  # Remove .json
-                    logger.info(f"🔍 DEBUG get_sessions: loading session {session_id}")
-                    session_data = self._load_session_data(session_id)
-
-                    if session_data:
-                        logger.info(f"🔍 DEBUG get_sessions: session data loaded = {session_data.get('name')}")
-                        # Filtra por status se especificado
-                        if status and session_data.get('status') != status:
-                            logger.info(f"🔍 DEBUG get_sessions: session filtered by status {status}")
-                            continue
+    def query_sessions(self, status: str = None, segmento: str = None, search: str = None,
+                       limit: int = None, offset: int = 0) -> Dict[str, Any]:
+        """
+        Lista sessões pelo catálogo indexado, mais recentes primeiro.
 
-                        # Garante que session_id está presente nos dados
-                        session_data['session_id'] = session_id
-                        sessions.append(session_data)
-                    else:
-                        logger.warning(f"⚠️ Falha ao carregar sessão: {session_id}")
-
-            # Ordena por data de atualização (mais recente primeiro)
-            sessions.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
-
-            logger.info(f"📋 {len(sessions)} sessões encontradas localmente")
-            return sessions
+        Returns:
+            {'sessions': resumos da página, 'total': total que atende aos filtros}
+        """
+        sessions = None
+        if session_catalog.enabled:
+            try:
+                if not session_catalog.is_current(CATALOG_KIND, self.sessions_dir):
+                    self.rebuild_catalog()
+                sessions, total = session_catalog.query(
+                    CATALOG_KIND, status=status, segmento=segmento, search=search,
+                    limit=limit, offset=offset
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Catálogo indisponível, varrendo diretório de sessões: {e}")
+
+        if sessions is None:
+            sessions, total = self._scan_sessions(status, segmento, search, limit, offset)
+
+        logger.info(f"📋 {len(sessions)} de {total} sessões listadas")
+        return {'sessions': sessions, 'total': total}
+
+    def get_sessions(self, status: str = None, segmento: str = None, search: str = None,
+                     limit: int = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """Lista sessões salvas localmente"""
+        return self.query_sessions(status, segmento, search, limit, offset)['sessions']
+
+    def _scan_sessions(self, status: str = None, segmento: str = None, search: str = None,
+                       limit: int = None, offset: int = 0) -> tuple:
+        """Listagem lendo cada arquivo (catálogo desativado ou indisponível)"""
+        sessions = []
+        if not os.path.exists(self.sessions_dir):
+            logger.warning(f"⚠️ Diretório de sessões não existe: {self.sessions_dir}")
+            return sessions, 0
+
+        needle = (search or '').lower()
+        for filename in os.listdir(self.sessions_dir):
+            if not filename.endswith('.json'):
+                continue
+            session_id = filename[:-5]
+            session_data = self._load_session_data(session_id)
+            if not session_data:
+                continue
+            if status and session_data.get('status') != status:
+                continue
+            if segmento and session_data.get('segmento') != segmento:
+                continue
+            if needle and needle not in f"{session_data.get('name') or ''} {session_data.get('segmento') or ''}".lower():
+                continue
+            sessions.append(self._catalog_summary(session_id, session_data))
 
-        except Exception as e:
-            logger.error(f"❌ Erro ao listar sessões: {e}")
-            import traceback
-            logger.error(f"❌ Traceback: {traceback.format_exc()}")
-            return []
+        sessions.sort(key=lambda x: x.get('updated_at') or '', reverse=True)
+        page = sessions[offset:offset + limit] if limit is not None else sessions[offset:]
+        return page, len(sessions)
 
     def delete_session(self, session_id: str) -> Dict[str, Any]:
         """Remove uma sessão"""
@@ -320,6 +369,7 @@ class SessionPersistenceManager:
                 }
 
             os.remove(session_file)
+            session_catalog.remove(CATALOG_KIND, session_id)
             logger.info(f"🗑️ Sessão removida: {session_id}")
 
             return {
@@ -359,4 +409,4 @@ class SessionPersistenceManager:
             return {'success': False, 'error': str(e)}
 
 # Instância global
-session_persistence = SessionPersistenceManager()
\ No newline at end of file
+session_persistence = service_registry.register('session_persistence', SessionPersistenceManager)
\ No newline at end of file
@@ -13,6 +13,7 @@ import asyncio
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from urllib.parse import quote_plus
+from services.service_registry import service_registry
 
 # Import do instaloader para extração real do Instagram
 try:
@@ -691,7 +692,7 @@ class SocialMediaExtractor:
         }
 
 # Instância global
-social_media_extractor = SocialMediaExtractor()
+social_media_extractor = service_registry.register('social_media_extractor', SocialMediaExtractor)
 
 # Função para compatibilidade
 def get_social_media_extractor():
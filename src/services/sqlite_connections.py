@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - SQLite Connections
+Conexões SQLite por thread compartilhadas pelos caches e stores persistentes
+"""
+
+import os
+import atexit
+import sqlite3
+import logging
+import threading
+import weakref
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Todos os bancos abertos no processo, fechados no encerramento
+_open_databases: "weakref.WeakSet[SQLiteConnections]" = weakref.WeakSet()
+
+
+class SQLiteConnections:
+    """
+    Uma conexão por thread para um arquivo SQLite.
+
+    A conexão da thread é aberta e configurada (synchronous=NORMAL) no
+    primeiro uso e reaproveitada depois; journal_mode=WAL é persistente no
+    arquivo e por isso é aplicado uma única vez por processo. Conexões de
+    threads que já terminaram são fechadas quando outra thread abre a sua,
+    e close() (chamado também no atexit) fecha todas. Um processo filho
+    (fork) não reaproveita as conexões herdadas do pai.
+    """
+
+    def __init__(self, db_path: Union[str, Path], timeout: float = 10, isolation_level: Optional[str] = ''):
+        self.db_path = str(db_path)
+        self.timeout = timeout
+        self.isolation_level = isolation_level
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._generation = 0
+        self._pid = os.getpid()
+        self._wal_enabled = False
+        _open_databases.add(self)
+
+    def connection(self) -> sqlite3.Connection:
+        """Conexão da thread atual"""
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.generation == self._generation:
+            return conn
+
+        # check_same_thread=False só para permitir o close() no encerramento;
+        # cada conexão continua sendo usada apenas pela sua thread
+        conn = sqlite3.connect(
+            self.db_path, timeout=self.timeout, isolation_level=self.isolation_level, check_same_thread=False
+        )
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        current = threading.current_thread()
+        with self._lock:
+            if not self._wal_enabled:
+                conn.execute("PRAGMA journal_mode=WAL")
+                self._wal_enabled = True
+            self._close_dead_threads_locked()
+            self._connections[current.ident] = (current, conn)
+            self._local.generation = self._generation
+
+        self._local.conn = conn
+        return conn
+
+    def _reset_after_fork(self):
+        # As conexões herdadas pertencem ao pai: são descartadas sem close()
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._generation += 1
+        self._pid = os.getpid()
+
+    def _close_dead_threads_locked(self):
+        for ident, (thread, conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                del self._connections[ident]
+                self._close_quietly(conn)
+
+    def close(self):
+        """Fecha as conexões de todas as threads (as próximas chamadas reabrem)"""
+        with self._lock:
+            connections = [conn for _, conn in self._connections.values()]
+            self._connections.clear()
+            self._generation += 1
+        for conn in connections:
+            self._close_quietly(conn)
+
+    def _close_quietly(self, conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except Exception as e:
+            logger.debug(f"Erro ao fechar conexão SQLite de {self.db_path}: {e}")
+
+
+def close_all():
+    """Fecha as conexões de todos os bancos do processo (hook de encerramento)"""
+    for database in list(_open_databases):
+        database.close()
+
+
+atexit.register(close_all)
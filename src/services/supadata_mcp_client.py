@@ -11,6 +11,7 @@ import httpx
 import asyncio
 from typing import Dict, Any, Optional, List
 from datetime import datetime
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -293,4 +294,4 @@ class SupadataClient:
         return bool(self.mcp_url)
 
 # Instância global
-supadata_client = SupadataClient()
+supadata_client = service_registry.register('supadata_client', SupadataClient)
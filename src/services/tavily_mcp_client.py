@@ -12,6 +12,7 @@ import json
 import httpx
 from typing import Dict, List, Any, Optional
 from datetime import datetime
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -291,4 +292,4 @@ class TavilyMCPClient:
         return self.api_key is not None
 
 # Instância global
-tavily_mcp_client = TavilyMCPClient()
+tavily_mcp_client = service_registry.register('tavily_mcp_client', TavilyMCPClient)
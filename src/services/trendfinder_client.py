@@ -11,6 +11,7 @@ import httpx
 import asyncio
 from typing import Dict, Any, Optional
 from datetime import datetime
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -231,4 +232,4 @@ class TrendFinderClient:
         return bool(self.mcp_url) and self._check_connectivity()
 
 # Instância global
-trendfinder_client = TrendFinderClient()
\ No newline at end of file
+trendfinder_client = service_registry.register('trendfinder_client', TrendFinderClient)
\ No newline at end of file
@@ -12,6 +12,7 @@ import requests
 import json
 from urllib.parse import parse_qs, urlparse, unquote
 from typing import Optional
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -192,7 +193,7 @@ class URLResolver:
             return url
 
 # Instância global
-url_resolver = URLResolver()
+url_resolver = service_registry.register('url_resolver', URLResolver)
 
 # Função de conveniência
 def resolve_url(url: str) -> str:
@@ -27,6 +27,7 @@ except ImportError:
 # Requests for fallback
 import requests
 from urllib.parse import urlparse
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -1073,4 +1074,4 @@ class ViralContentAnalyzer:
             return "❌ Erro ao gerar resumo da análise"
 
 # Instância global
-viral_content_analyzer = ViralContentAnalyzer()
\ No newline at end of file
+viral_content_analyzer = service_registry.register('viral_content_analyzer', ViralContentAnalyzer)
\ No newline at end of file
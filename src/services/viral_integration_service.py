@@ -46,6 +46,9 @@ except ImportError:
     logger = logging.getLogger(__name__)
     logger.warning("aiohttp/aiofiles não encontrados. Usando requests síncrono como fallback.")
 
+from services.http_client_registry import http_client_registry
+from services.browser_pool import browser_pool
+
 # BeautifulSoup para parsing HTML
 try:
     from bs4 import BeautifulSoup
@@ -61,6 +64,7 @@ load_dotenv()
 
 # Configuração de logging aprimorada
 import os
+from services.service_registry import service_registry
 log_dir = os.path.dirname(os.path.abspath(__file__))
 log_file = os.path.join(log_dir, 'viral_integration.log')
 
@@ -652,7 +656,7 @@ class ViralImageFinder:
                 try:
                     if HAS_ASYNC_DEPS:
                         timeout = aiohttp.ClientTimeout(total=15)  # Reduzir timeout
-                        async with aiohttp.ClientSession(timeout=timeout) as session:
+                        async with http_client_registry.session('serper', timeout=timeout) as session:
                             async with session.post(url, headers=headers, json=payload) as response:
                                 if response.status == 200:
                                     data = await response.json()
@@ -900,7 +904,7 @@ class ViralImageFinder:
         try:
             if HAS_ASYNC_DEPS:
                 timeout = aiohttp.ClientTimeout(total=self.config['timeout'])
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_client_registry.session('google', timeout=timeout) as session:
                     async with session.get(url, params=params) as response:
                         response.raise_for_status()
                         data = await response.json()
@@ -959,7 +963,7 @@ class ViralImageFinder:
                         
                         if HAS_ASYNC_DEPS:
                             timeout = aiohttp.ClientTimeout(total=30)
-                            async with aiohttp.ClientSession(timeout=timeout) as session:
+                            async with http_client_registry.session('youtube', timeout=timeout) as session:
                                 async with session.post(url, json=payload, headers=headers) as response:
                                     if response.status == 200:
                                         data = await response.json()
@@ -1071,7 +1075,7 @@ class ViralImageFinder:
                         
                         if HAS_ASYNC_DEPS:
                             timeout = aiohttp.ClientTimeout(total=30)
-                            async with aiohttp.ClientSession(timeout=timeout) as session:
+                            async with http_client_registry.session('serper', timeout=timeout) as session:
                                 async with session.post(url, json=payload, headers=headers) as response:
                                     if response.status == 200:
                                         data = await response.json()
@@ -1157,7 +1161,7 @@ class ViralImageFinder:
                         
                         if HAS_ASYNC_DEPS:
                             timeout = aiohttp.ClientTimeout(total=30)
-                            async with aiohttp.ClientSession(timeout=timeout) as session:
+                            async with http_client_registry.session('serper', timeout=timeout) as session:
                                 async with session.post(url, json=payload, headers=headers) as response:
                                     if response.status == 200:
                                         data = await response.json()
@@ -1231,7 +1235,7 @@ class ViralImageFinder:
             
             if HAS_ASYNC_DEPS:
                 timeout = aiohttp.ClientTimeout(total=30)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_client_registry.session('web', timeout=timeout) as session:
                     async with session.post(api_url, json=payload) as response:
                         if response.status == 200:
                             data = await response.json()
@@ -1297,7 +1301,7 @@ class ViralImageFinder:
                 
                 if HAS_ASYNC_DEPS:
                     timeout = aiohttp.ClientTimeout(total=30)
-                    async with aiohttp.ClientSession(timeout=timeout) as session:
+                    async with http_client_registry.session('web', timeout=timeout) as session:
                         async with session.get(embed_url) as response:
                             if response.status == 200:
                                 html_content = await response.text()
@@ -1343,7 +1347,7 @@ class ViralImageFinder:
                 try:
                     if HAS_ASYNC_DEPS:
                         timeout = aiohttp.ClientTimeout(total=30)
-                        async with aiohttp.ClientSession(timeout=timeout) as session:
+                        async with http_client_registry.session('web', timeout=timeout) as session:
                             async with session.get(url) as response:
                                 if response.status == 200:
                                     data = await response.json()
@@ -1448,7 +1452,7 @@ class ViralImageFinder:
             
             if HAS_ASYNC_DEPS:
                 timeout = aiohttp.ClientTimeout(total=30)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_client_registry.session('web', timeout=timeout) as session:
                     async with session.get(embed_url) as response:
                         if response.status == 200:
                             html_content = await response.text()
@@ -1492,7 +1496,7 @@ class ViralImageFinder:
                 headers = {
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
                 }
-                async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
+                async with http_client_registry.session('web', timeout=timeout, headers=headers) as session:
                     async with session.get(post_url) as response:
                         if response.status == 200:
                             html_content = await response.text()
@@ -1611,7 +1615,7 @@ class ViralImageFinder:
                 
                 if HAS_ASYNC_DEPS:
                     timeout = aiohttp.ClientTimeout(total=15)
-                    async with aiohttp.ClientSession(timeout=timeout) as session:
+                    async with http_client_registry.session('serper', timeout=timeout) as session:
                         async with session.post(serper_url, json=payload, headers=headers) as response:
                             if response.status == 200:
                                 data = await response.json()
@@ -1710,7 +1714,7 @@ class ViralImageFinder:
             
             if HAS_ASYNC_DEPS:
                 timeout = aiohttp.ClientTimeout(total=10)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_client_registry.session('web', timeout=timeout) as session:
                     async with session.get(post_url, headers=headers) as response:
                         if response.status == 200:
                             html = await response.text()
@@ -1801,7 +1805,7 @@ class ViralImageFinder:
             embed_url = f"https://api.instagram.com/oembed/?url=https://www.instagram.com/p/{shortcode}/"
             if HAS_ASYNC_DEPS:
                 timeout = aiohttp.ClientTimeout(total=15)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_client_registry.session('web', timeout=timeout) as session:
                     async with session.get(embed_url) as response:
                         if response.status == 200:
                             data = await response.json()
@@ -1844,7 +1848,7 @@ class ViralImageFinder:
             }
             if HAS_ASYNC_DEPS:
                 timeout = aiohttp.ClientTimeout(total=20)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_client_registry.session('web', timeout=timeout) as session:
                     async with session.get(post_url, headers=headers) as response:
                         if response.status == 200:
                             content = await response.text()
@@ -2426,14 +2430,9 @@ class ViralImageFinder:
                 ssl_context = ssl.create_default_context()
                 ssl_context.check_hostname = False
                 ssl_context.verify_mode = ssl.CERT_NONE
-                connector = aiohttp.TCPConnector(ssl=ssl_context)
                 timeout = aiohttp.ClientTimeout(total=self.config['timeout'])
-                async with aiohttp.ClientSession(
-                    connector=connector,
-                    timeout=timeout,
-                    headers=headers
-                ) as session:
-                    async with session.get(image_url) as response:
+                async with http_client_registry.session('web', timeout=timeout, headers=headers) as session:
+                    async with session.get(image_url, ssl=ssl_context) as response:
                         response.raise_for_status()
                         content_type = response.headers.get('content-type', '').lower()
                         # Limpar charset com aspas duplas do content-type
@@ -2603,7 +2602,7 @@ class ViralImageFinder:
                 
                 try:
                     if HAS_ASYNC_DEPS:
-                        async with aiohttp.ClientSession() as session:
+                        async with http_client_registry.session('serper') as session:
                             headers = {
                                 'X-API-KEY': serper_key,
                                 'Content-Type': 'application/json'
@@ -2669,7 +2668,7 @@ class ViralImageFinder:
         """
         try:
             if HAS_ASYNC_DEPS:
-                async with aiohttp.ClientSession() as session:
+                async with http_client_registry.session('web') as session:
                     headers = {
                         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
                         'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
@@ -2710,39 +2709,25 @@ class ViralImageFinder:
             logger.error("❌ Playwright não disponível para fallback")
             return None
         
+        async def _capture(page):
+            await page.goto(post_url, wait_until='domcontentloaded', timeout=15000)
+            await asyncio.sleep(2)
+
+            # Captura simples da página
+            await page.screenshot(path=screenshot_path, full_page=False)
+
         try:
-            from playwright.async_api import async_playwright
-            
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context(
-                    viewport={'width': 1920, 'height': 1080},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                )
-                page = await context.new_page()
-                
-                try:
-                    await page.goto(post_url, wait_until='domcontentloaded', timeout=15000)
-                    await asyncio.sleep(2)
-                    
-                    # Captura simples da página
-                    await page.screenshot(path=screenshot_path, full_page=False)
-                    
-                    await browser.close()
-                    
-                    # Verificar se screenshot foi criado
-                    if os.path.exists(screenshot_path) and os.path.getsize(screenshot_path) > 5000:
-                        logger.info(f"✅ Screenshot fallback salvo: {screenshot_path}")
-                        return screenshot_path
-                    
-                except Exception as e:
-                    logger.error(f"❌ Erro no fallback: {e}")
-                    await browser.close()
-            
+            await browser_pool.run(post_url, _capture)
+
+            # Verificar se screenshot foi criado
+            if os.path.exists(screenshot_path) and os.path.getsize(screenshot_path) > 5000:
+                logger.info(f"✅ Screenshot fallback salvo: {screenshot_path}")
+                return screenshot_path
+
             return None
-            
+
         except Exception as e:
-            logger.error(f"❌ Erro crítico no fallback: {e}")
+            logger.error(f"❌ Erro no fallback: {e}")
             return None
 
     async def take_screenshot(self, post_url: str, platform: str) -> Optional[str]:
@@ -2992,7 +2977,7 @@ class ViralImageFinder:
             # Estratégia de emergência: usar requests + PIL para capturar favicon ou imagem padrão
             try:
                 if HAS_ASYNC_DEPS:
-                    async with aiohttp.ClientSession() as session:
+                    async with http_client_registry.session('web') as session:
                         async with session.get(post_url, timeout=10) as response:
                             if response.status == 200:
                                 # Criar uma imagem placeholder com informações da URL
@@ -3196,7 +3181,7 @@ class ViralImageFinder:
         
         try:
             if HAS_ASYNC_DEPS:
-                async with aiohttp.ClientSession() as session:
+                async with http_client_registry.session('jina') as session:
                     headers = {
                         'Authorization': f'Bearer {jina_key}',
                         'Content-Type': 'application/json'
@@ -3245,7 +3230,7 @@ class ViralImageFinder:
         
         try:
             if HAS_ASYNC_DEPS:
-                async with aiohttp.ClientSession() as session:
+                async with http_client_registry.session('exa') as session:
                     headers = {
                         'x-api-key': exa_key,
                         'Content-Type': 'application/json'
@@ -3297,7 +3282,7 @@ class ViralImageFinder:
         
         try:
             if HAS_ASYNC_DEPS:
-                async with aiohttp.ClientSession() as session:
+                async with http_client_registry.session('firecrawl') as session:
                     headers = {
                         'Authorization': f'Bearer {firecrawl_key}',
                         'Content-Type': 'application/json'
@@ -3351,7 +3336,7 @@ class ViralImageFinder:
         return results
 
 # Instância global otimizada
-viral_integration_service = ViralImageFinder()
+viral_integration_service = service_registry.register('viral_integration_service', ViralImageFinder)
 viral_image_finder = viral_integration_service  # Alias para compatibilidade
 
 # Funções wrapper para compatibilidade
@@ -3376,13 +3361,13 @@ def find_viral_images_sync(query: str) -> Tuple[List[ViralImage], str]:
                         viral_integration_service.find_viral_images(query)
                     )
                 finally:
-                    new_loop.close()
+                    http_client_registry.close_event_loop(new_loop)
             with concurrent.futures.ThreadPoolExecutor() as executor:
                 future = executor.submit(run_async_in_thread)
                 return future.result(timeout=300)  # 5 minutos timeout
         except RuntimeError:
             # Não há loop ativo, criar um novo
-            return asyncio.run(viral_integration_service.find_viral_images(query))
+            return http_client_registry.run(viral_integration_service.find_viral_images(query))
     except Exception as e:
         logger.error(f"❌ ERRO CRÍTICO na busca viral: {e}")
         # Retornar resultado vazio mas válido
@@ -14,6 +14,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from services.openrouter_hierarchy_manager import openrouter_manager
 from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -490,4 +491,4 @@ CRÍTICO: Seja brutalmente honesto. Vá fundo na psique. Não tenha medo de choc
         }
 
 # Instância global
-visceral_leads_engineer = VisceralLeadsEngineer()
\ No newline at end of file
+visceral_leads_engineer = service_registry.register('visceral_leads_engineer', VisceralLeadsEngineer)
\ No newline at end of file
@@ -12,6 +12,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from services.ai_manager import ai_manager
 from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -481,4 +482,4 @@ O objetivo é criar um dossiê tão preciso que permita "ler a mente" dos leads.
         }
 
 # Instância global
-visceral_master = VisceralMasterAgent()
\ No newline at end of file
+visceral_master = service_registry.register('visceral_master', VisceralMasterAgent)
\ No newline at end of file
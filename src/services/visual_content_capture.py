@@ -3,7 +3,7 @@
 # -*- coding: utf-8 -*-
 """
 ARQV30 Enhanced v3.0 - Visual Content Capture
-Captura de screenshots e conteúdo visual usando Selenium
+Captura de screenshots e conteúdo visual usando Playwright (browser_pool) ou Selenium
 """
 
 import os
@@ -23,9 +23,85 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
+from services.service_registry import service_registry
+from services.browser_pool import browser_pool
 
 logger = logging.getLogger(__name__)
 
+# Palavras-chave que indicam páginas de login/bloqueio
+LOGIN_TITLE_KEYWORDS = [
+    'login', 'sign in', 'log in', 'entrar', 'acesso', 'authentication',
+    'blocked', 'bloqueado', 'access denied', 'acesso negado',
+    'captcha', 'robot', 'verification', 'verificação',
+    'forbidden', 'proibido', '403', '401', 'unauthorized',
+    'please sign in', 'faça login', 'entre na sua conta'
+]
+
+LOGIN_URL_KEYWORDS = [
+    '/login', '/signin', '/auth', '/accounts/login',
+    '/user/login', '/entrar', '/acesso'
+]
+
+# Campos de login típicos
+LOGIN_ELEMENT_SELECTORS = [
+    'input[type="password"]',
+    'input[name*="password"]',
+    'input[name*="login"]',
+    'input[name*="email"]',
+    'input[name*="username"]',
+    'button[type="submit"]',
+    '.login-form',
+    '.signin-form',
+    '#login',
+    '#signin'
+]
+
+LOGIN_TEXT_KEYWORDS = [
+    'please sign in', 'faça login', 'entre na sua conta',
+    'access denied', 'acesso negado', 'login required',
+    'you need to sign in', 'você precisa fazer login'
+]
+
+GOOGLEBOT_USER_AGENT = "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"
+
+# Coleta, em uma única chamada, o que a detecção de login precisa da página
+_PAGE_INFO_SCRIPT = """(selectors) => ({
+    loginElements: selectors.reduce((total, selector) => {
+        try { return total + document.querySelectorAll(selector).length; } catch (e) { return total; }
+    }, 0),
+    bodyText: document.body ? document.body.innerText.slice(0, 20000) : '',
+    description: (document.querySelector('meta[name="description"]') || {}).content || ''
+})"""
+
+
+def _looks_like_login_page(title: str, url: str, login_element_count: int, body_text: str) -> bool:
+    """Aplica as heurísticas de login/bloqueio ao título, URL, campos e texto da página"""
+    page_title = title.lower()
+    for keyword in LOGIN_TITLE_KEYWORDS:
+        if keyword in page_title:
+            logger.info(f"🚫 Palavra-chave de login detectada no título: '{keyword}'")
+            return True
+
+    current_url = url.lower()
+    for keyword in LOGIN_URL_KEYWORDS:
+        if keyword in current_url:
+            logger.info(f"🚫 Palavra-chave de login detectada na URL: '{keyword}'")
+            return True
+
+    # Se encontrar muitos elementos de login, provavelmente é uma página de login
+    if login_element_count >= 2:
+        logger.info(f"🚫 {login_element_count} elementos de login detectados na página")
+        return True
+
+    text = body_text.lower()
+    for keyword in LOGIN_TEXT_KEYWORDS:
+        if keyword in text:
+            logger.info(f"🚫 Texto de login detectado: '{keyword}'")
+            return True
+
+    return False
+
+
 class VisualContentCapture:
     """Capturador de conteúdo visual usando Selenium"""
 
@@ -470,10 +546,122 @@ class VisualContentCapture:
                 'timestamp': datetime.now().isoformat()
             }
 
+    async def _pool_screenshot(self, url: str, screenshot_path: Path, user_agent: str = None) -> Dict[str, Any]:
+        """
+        Abre url em um contexto do browser_pool e salva o screenshot se a
+        página não for de login/bloqueio.
+        """
+        async def _capture(page):
+            if user_agent:
+                await page.set_extra_http_headers({'User-Agent': user_agent})
+            await page.goto(url, wait_until='domcontentloaded', timeout=self.page_load_timeout * 1000)
+            try:
+                await page.wait_for_load_state('load', timeout=self.wait_timeout * 1000)
+            except Exception:
+                logger.warning(f"⚠️ Timeout aguardando carregamento de {url}")
+
+            info = await page.evaluate(_PAGE_INFO_SCRIPT, LOGIN_ELEMENT_SELECTORS)
+            title = await page.title()
+            blocked = _looks_like_login_page(title or "", page.url or "", info['loginElements'], info['bodyText'])
+            if not blocked:
+                await page.screenshot(path=str(screenshot_path))
+            return {
+                'blocked': blocked,
+                'title': title or "Sem título",
+                'final_url': page.url,
+                'description': info['description']
+            }
+
+        return await browser_pool.run(url, _capture)
+
+    async def _capture_with_pool(self, url: str, filename: str, session_dir: Path) -> Dict[str, Any]:
+        """Mesma sequência de _take_screenshot, usando o browser_pool em vez do Selenium"""
+
+        # PRIORIDADE 1: Google Images (requests síncrono, fora do event loop)
+        google_image_result = await asyncio.to_thread(self._try_google_images_extraction, url, filename, session_dir)
+        if google_image_result and google_image_result.get('success'):
+            logger.info(f"✅ SUCESSO VIA GOOGLE IMAGES: {url}")
+            return google_image_result
+
+        # PRIORIDADE 2: Screenshot via pool de navegadores
+        try:
+            logger.info(f"📸 Capturando screenshot: {url}")
+            screenshot_path = session_dir / f"{filename}.png"
+            page_info = await self._pool_screenshot(url, screenshot_path)
+
+            if page_info['blocked']:
+                logger.warning(f"🚫 PÁGINA DE LOGIN/BLOQUEIO DETECTADA: {url}")
+
+                # Estratégia 1: Google Images com domínio específico
+                from urllib.parse import urlparse
+                domain_query = f"site:{urlparse(url).netloc} screenshot content"
+                google_result = await asyncio.to_thread(
+                    self._try_google_images_with_query, domain_query, filename, session_dir
+                )
+                if google_result and google_result.get('success'):
+                    return google_result
+
+                # Estratégia 2: User-Agent alternativo
+                alt_path = session_dir / f"{filename}_alt.png"
+                try:
+                    alt_info = await self._pool_screenshot(url, alt_path, user_agent=GOOGLEBOT_USER_AGENT)
+                    if not alt_info['blocked'] and alt_path.exists() and alt_path.stat().st_size > 0:
+                        logger.info("✅ User-Agent alternativo funcionou!")
+                        return {
+                            'success': True,
+                            'url': url,
+                            'title': alt_info['title'],
+                            'description': "Capturado com User-Agent alternativo",
+                            'filename': alt_path.name,
+                            'filepath': str(alt_path),
+                            'filesize': alt_path.stat().st_size,
+                            'method': 'alternative_user_agent',
+                            'timestamp': datetime.now().isoformat()
+                        }
+                except Exception as e:
+                    logger.warning(f"⚠️ Erro na estratégia alternativa 2: {e}")
+
+                return {
+                    'success': False,
+                    'error': 'login_page_detected',
+                    'url': url,
+                    'message': 'Página de login ou bloqueio detectada - screenshot não capturado',
+                    'timestamp': datetime.now().isoformat()
+                }
+
+            if screenshot_path.exists() and screenshot_path.stat().st_size > 0:
+                logger.info(f"✅ Screenshot salvo: {screenshot_path}")
+                return {
+                    'success': True,
+                    'url': url,
+                    'final_url': page_info['final_url'],
+                    'title': page_info['title'],
+                    'description': page_info['description'],
+                    'filename': f"{filename}.png",
+                    'filepath': str(screenshot_path),
+                    'filesize': screenshot_path.stat().st_size,
+                    'timestamp': datetime.now().isoformat()
+                }
+            raise Exception("Screenshot não foi criado ou está vazio")
+
+        except Exception as e:
+            error_msg = f"Erro ao capturar screenshot de {url}: {e}"
+            logger.error(f"❌ {error_msg}")
+            return {
+                'success': False,
+                'url': url,
+                'error': error_msg,
+                'timestamp': datetime.now().isoformat()
+            }
+
     async def capture_screenshots(self, urls: List[str], session_id: str) -> Dict[str, Any]:
         """
         Captura screenshots de uma lista de URLs
-        
+
+        Com Playwright disponível, as URLs são capturadas em paralelo pelo
+        browser_pool (que limita contextos e espaça acessos ao mesmo domínio);
+        sem ele, usa um driver Selenium capturando em sequência.
+
         Args:
             urls: Lista de URLs para capturar
             session_id: ID da sessão para organização
@@ -491,45 +679,56 @@ class VisualContentCapture:
             'start_time': datetime.now().isoformat(),
             'session_directory': None
         }
+
+        def _record(result: Dict[str, Any]):
+            if result['success']:
+                capture_results['successful_captures'] += 1
+                capture_results['screenshots'].append(result)
+            else:
+                capture_results['failed_captures'] += 1
+                capture_results['errors'].append(result['error'])
+
+        # Gera nome do arquivo pela posição original da URL
+        targets = []
+        for i, url in enumerate(urls, 1):
+            if not url or not url.startswith(('http://', 'https://')):
+                logger.warning(f"⚠️ URL inválida ignorada: {url}")
+                capture_results['failed_captures'] += 1
+                capture_results['errors'].append(f"URL inválida: {url}")
+                continue
+            targets.append((url, f"screenshot_{i:03d}"))
         
         try:
             # Cria diretório da sessão
             session_dir = self._create_session_directory(session_id)
             capture_results['session_directory'] = str(session_dir)
-            
-            # Configura o driver
-            self.driver = self._setup_driver()
-            
-            # Processa cada URL
-            for i, url in enumerate(urls, 1):
-                if not url or not url.startswith(('http://', 'https://')):
-                    logger.warning(f"⚠️ URL inválida ignorada: {url}")
-                    capture_results['failed_captures'] += 1
-                    capture_results['errors'].append(f"URL inválida: {url}")
-                    continue
-                
-                try:
-                    # Gera nome do arquivo
-                    filename = f"screenshot_{i:03d}"
-                    
-                    # Captura o screenshot
-                    result = self._take_screenshot(url, filename, session_dir)
-                    
-                    if result['success']:
-                        capture_results['successful_captures'] += 1
-                        capture_results['screenshots'].append(result)
-                    else:
+
+            if await browser_pool.ensure_ready():
+                results = await asyncio.gather(
+                    *(self._capture_with_pool(url, filename, session_dir) for url, filename in targets),
+                    return_exceptions=True
+                )
+                for (url, _), result in zip(targets, results):
+                    if isinstance(result, Exception):
+                        result = {'success': False, 'error': f"Erro processando URL {url}: {result}"}
+                        logger.error(f"❌ {result['error']}")
+                    _record(result)
+            else:
+                # Configura o driver
+                self.driver = self._setup_driver()
+
+                for url, filename in targets:
+                    try:
+                        _record(self._take_screenshot(url, filename, session_dir))
+
+                        # Pequena pausa entre capturas para não sobrecarregar
+                        await asyncio.sleep(1)
+
+                    except Exception as e:
+                        error_msg = f"Erro processando URL {url}: {e}"
+                        logger.error(f"❌ {error_msg}")
                         capture_results['failed_captures'] += 1
-                        capture_results['errors'].append(result['error'])
-                    
-                    # Pequena pausa entre capturas para não sobrecarregar
-                    await asyncio.sleep(1)
-                    
-                except Exception as e:
-                    error_msg = f"Erro processando URL {url}: {e}"
-                    logger.error(f"❌ {error_msg}")
-                    capture_results['failed_captures'] += 1
-                    capture_results['errors'].append(error_msg)
+                        capture_results['errors'].append(error_msg)
             
             # Finaliza a captura
             capture_results['end_time'] = datetime.now().isoformat()
@@ -634,88 +833,22 @@ class VisualContentCapture:
     def _is_login_or_blocked_page(self) -> bool:
         """Detecta se a página atual é uma página de login ou bloqueio"""
         try:
-            # Verifica o título da página
-            page_title = self.driver.title.lower() if self.driver.title else ""
-            
-            # Palavras-chave que indicam páginas de login/bloqueio
-            login_keywords = [
-                'login', 'sign in', 'log in', 'entrar', 'acesso', 'authentication',
-                'blocked', 'bloqueado', 'access denied', 'acesso negado',
-                'captcha', 'robot', 'verification', 'verificação',
-                'forbidden', 'proibido', '403', '401', 'unauthorized',
-                'please sign in', 'faça login', 'entre na sua conta'
-            ]
-            
-            # Verifica título
-            for keyword in login_keywords:
-                if keyword in page_title:
-                    logger.info(f"🚫 Palavra-chave de login detectada no título: '{keyword}'")
-                    return True
-            
-            # Verifica URL atual
-            current_url = self.driver.current_url.lower()
-            url_login_keywords = [
-                '/login', '/signin', '/auth', '/accounts/login',
-                '/user/login', '/entrar', '/acesso'
-            ]
-            
-            for keyword in url_login_keywords:
-                if keyword in current_url:
-                    logger.info(f"🚫 Palavra-chave de login detectada na URL: '{keyword}'")
-                    return True
-            
-            # Verifica elementos na página
-            try:
-                # Procura por campos de login típicos
-                login_elements = [
-                    'input[type="password"]',
-                    'input[name*="password"]',
-                    'input[name*="login"]',
-                    'input[name*="email"]',
-                    'input[name*="username"]',
-                    'button[type="submit"]',
-                    '.login-form',
-                    '.signin-form',
-                    '#login',
-                    '#signin'
-                ]
-                
-                login_element_count = 0
-                for selector in login_elements:
-                    try:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        if elements:
-                            login_element_count += len(elements)
-                    except:
-                        continue
-                
-                # Se encontrar muitos elementos de login, provavelmente é uma página de login
-                if login_element_count >= 2:
-                    logger.info(f"🚫 {login_element_count} elementos de login detectados na página")
-                    return True
-                
-                # Verifica texto específico na página
+            login_element_count = 0
+            for selector in LOGIN_ELEMENT_SELECTORS:
                 try:
-                    body_text = self.driver.find_element(By.TAG_NAME, "body").text.lower()
-                    login_text_keywords = [
-                        'please sign in', 'faça login', 'entre na sua conta',
-                        'access denied', 'acesso negado', 'login required',
-                        'you need to sign in', 'você precisa fazer login'
-                    ]
-                    
-                    for keyword in login_text_keywords:
-                        if keyword in body_text:
-                            logger.info(f"🚫 Texto de login detectado: '{keyword}'")
-                            return True
-                            
+                    login_element_count += len(self.driver.find_elements(By.CSS_SELECTOR, selector))
                 except:
-                    pass
-                    
-            except Exception as e:
-                logger.warning(f"⚠️ Erro ao verificar elementos de login: {e}")
-            
-            return False
-            
+                    continue
+
+            try:
+                body_text = self.driver.find_element(By.TAG_NAME, "body").text
+            except:
+                body_text = ""
+
+            return _looks_like_login_page(
+                self.driver.title or "", self.driver.current_url or "", login_element_count, body_text
+            )
+
         except Exception as e:
             logger.error(f"❌ Erro na detecção de página de login: {e}")
             return False
@@ -751,7 +884,7 @@ class VisualContentCapture:
             
             # Tenta com User-Agent de bot/crawler
             self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-                "userAgent": "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"
+                "userAgent": GOOGLEBOT_USER_AGENT
             })
             
             # Tenta acessar novamente
@@ -845,4 +978,4 @@ class VisualContentCapture:
             return {'success': False, 'error': str(e)}
 
 # Instância global
-visual_content_capture = VisualContentCapture()
+visual_content_capture = service_registry.register('visual_content_capture', VisualContentCapture)
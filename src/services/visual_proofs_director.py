@@ -12,6 +12,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from services.ai_manager import ai_manager
 from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -658,4 +659,4 @@ Seja CRIATIVO, OUSADO e MEMORÁVEL. Esta PROVI deve ser tão impactante que se t
 
 
 # Instância global
-visual_proofs_director = VisualProofsDirector()
\ No newline at end of file
+visual_proofs_director = service_registry.register('visual_proofs_director', VisualProofsDirector)
\ No newline at end of file
@@ -13,6 +13,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from services.ai_manager import ai_manager
 from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.service_registry import service_registry
 
 logger = logging.getLogger(__name__)
 
@@ -230,4 +231,4 @@ RETORNE JSON:
         }
 
 # Instância global
-visual_proofs_generator = VisualProofsGenerator()
+visual_proofs_generator = service_registry.register('visual_proofs_generator', VisualProofsGenerator)
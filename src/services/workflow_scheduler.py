@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - Workflow Scheduler
+Fila de jobs do workflow com pool limitado de workers, prioridade e limite por tenant
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import logging
+import threading
+import itertools
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from services.http_client_registry import http_client_registry
+
+logger = logging.getLogger(__name__)
+
+# Prioridade padrão (menor = mais urgente)
+DEFAULT_PRIORITY = 5
+
+
+class WorkflowQueueFullError(Exception):
+    """Fila de workflows cheia (controle de admissão)"""
+    pass
+
+
+@dataclass
+class WorkflowJob:
+    """Job de workflow enfileirado"""
+    job_id: str
+    session_id: str
+    kind: str
+    tenant: str
+    priority: int
+    coro_factory: Callable[[], Awaitable[Any]]
+    on_cancel: Optional[Callable[[], None]] = None
+    state: str = 'queued'
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    worker: Optional[str] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    task: Any = None
+    loop: Any = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            'job_id': self.job_id,
+            'session_id': self.session_id,
+            'kind': self.kind,
+            'tenant': self.tenant,
+            'priority': self.priority,
+            'state': self.state,
+            'worker': self.worker,
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'wait_seconds': round((self.started_at or now) - self.submitted_at, 2),
+            'run_seconds': round((self.finished_at or now) - self.started_at, 2) if self.started_at else None
+        }
+
+
+class WorkflowScheduler:
+    """
+    Executa os jobs do workflow em um pool fixo de workers.
+
+    Cada worker é uma thread com um event loop de vida longa, então a sessão
+    HTTP pooled do http_client_registry e os semáforos por provedor são
+    reaproveitados entre jobs em vez de recriados a cada asyncio.run().
+    A fila é ordenada por (prioridade, ordem de chegada); um job só é
+    despachado se o tenant estiver abaixo de WORKFLOW_TENANT_MAX_CONCURRENT,
+    caso contrário o próximo elegível passa à frente sem perder a posição.
+    Acima de WORKFLOW_MAX_QUEUED jobs pendentes, submit() recusa novos jobs.
+    """
+
+    def __init__(self):
+        self.max_workers = max(1, int(os.getenv('WORKFLOW_MAX_WORKERS', '4')))
+        self.tenant_max_concurrent = max(1, int(os.getenv('WORKFLOW_TENANT_MAX_CONCURRENT', '2')))
+        self.max_queued = int(os.getenv('WORKFLOW_MAX_QUEUED', '100'))
+        self.job_retention = int(os.getenv('WORKFLOW_JOB_RETENTION', '3600'))
+
+        self._condition = threading.Condition()
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._jobs: Dict[str, WorkflowJob] = {}
+        self._session_jobs: Dict[str, str] = {}
+        self._running_by_tenant: Dict[str, int] = {}
+        self._workers: List[threading.Thread] = []
+        self._stopping = False
+
+        self.stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0
+        }
+
+    # Submissão e consulta
+
+    def submit(
+        self,
+        session_id: str,
+        kind: str,
+        coro_factory: Callable[[], Awaitable[Any]],
+        tenant: str = 'default',
+        priority: int = DEFAULT_PRIORITY,
+        on_cancel: Optional[Callable[[], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Enfileira um job.
+
+        Args:
+            session_id: Sessão do workflow
+            kind: Tipo do job (step1, step2, step3, full_workflow...)
+            coro_factory: Função sem argumentos que cria a corrotina do job
+            tenant: Dono do job, para o limite de concorrência por tenant
+            priority: Menor valor = despachado antes
+            on_cancel: Chamado (na thread do worker ou da requisição) se o job for cancelado
+
+        Raises:
+            WorkflowQueueFullError: se a fila já tiver WORKFLOW_MAX_QUEUED jobs pendentes
+        """
+        job = WorkflowJob(
+            job_id=f"{kind}_{session_id}_{next(self._sequence)}",
+            session_id=session_id,
+            kind=kind,
+            tenant=tenant or 'default',
+            priority=int(priority),
+            coro_factory=coro_factory,
+            on_cancel=on_cancel
+        )
+
+        with self._condition:
+            if len(self._queue) >= self.max_queued:
+                self.stats['rejected'] += 1
+                raise WorkflowQueueFullError(
+                    f"Fila de workflows cheia ({len(self._queue)} jobs aguardando)"
+                )
+
+            self._purge_finished_locked()
+            self._jobs[job.job_id] = job
+            self._session_jobs[session_id] = job.job_id
+            heapq.heappush(self._queue, (job.priority, next(self._sequence), job))
+            self.stats['submitted'] += 1
+            self._ensure_workers_locked()
+            self._condition.notify_all()
+            position = self._queue_position_locked(job)
+
+        logger.info(f"📥 Job {job.kind} enfileirado - Sessão: {session_id} (tenant {job.tenant}, posição {position})")
+        return {**job.to_dict(), 'queue_position': position}
+
+    def get_job_status(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Estado do job mais recente da sessão, com posição na fila se aguardando"""
+        with self._condition:
+            job = self._jobs.get(self._session_jobs.get(session_id, ''))
+            if job is None:
+                return None
+            status = job.to_dict()
+            status['queue_position'] = self._queue_position_locked(job) if job.state == 'queued' else None
+            return status
+
+    def cancel(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancela o job mais recente da sessão.
+
+        Jobs na fila são removidos; jobs em execução recebem cancel() na
+        task do event loop do worker.
+        """
+        with self._condition:
+            job = self._jobs.get(self._session_jobs.get(session_id, ''))
+            if job is None or job.state not in ('queued', 'running'):
+                return job.to_dict() if job else None
+
+            job.cancel_requested = True
+            if job.state == 'queued':
+                self._queue = [entry for entry in self._queue if entry[2] is not job]
+                heapq.heapify(self._queue)
+                self._finish_locked(job, 'cancelled')
+                run_on_cancel = True
+            else:
+                if job.loop is not None and job.task is not None:
+                    job.loop.call_soon_threadsafe(job.task.cancel)
+                run_on_cancel = False
+            status = job.to_dict()
+
+        if run_on_cancel:
+            self._run_on_cancel(job)
+        logger.info(f"🛑 Cancelamento solicitado - Sessão: {session_id} ({status['state']})")
+        return status
+
+    def _queue_position_locked(self, job: WorkflowJob) -> Optional[int]:
+        """Posição (1 = próximo) na ordem de despacho da fila"""
+        for position, entry in enumerate(sorted(self._queue, key=lambda entry: entry[:2]), start=1):
+            if entry[2] is job:
+                return position
+        return None
+
+    def _purge_finished_locked(self):
+        """Descarta registros de jobs finalizados há mais de WORKFLOW_JOB_RETENTION"""
+        limit = time.time() - self.job_retention
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at and job.finished_at < limit:
+                del self._jobs[job_id]
+                if self._session_jobs.get(job.session_id) == job_id:
+                    del self._session_jobs[job.session_id]
+
+    # Workers
+
+    def _ensure_workers_locked(self):
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+        while len(self._workers) < self.max_workers and not self._stopping:
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"workflow-worker-{len(self._workers) + 1}",
+                daemon=True
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_job_locked(self) -> Optional[WorkflowJob]:
+        """Primeiro job, em ordem de prioridade/chegada, cujo tenant tem vaga"""
+        for entry in sorted(self._queue, key=lambda entry: entry[:2]):
+            job = entry[2]
+            if self._running_by_tenant.get(job.tenant, 0) < self.tenant_max_concurrent:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                return job
+        return None
+
+    def _worker_loop(self):
+        name = threading.current_thread().name
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        logger.info(f"👷 {name} iniciado")
+
+        try:
+            while True:
+                with self._condition:
+                    job = self._next_job_locked()
+                    while job is None and not self._stopping:
+                        self._condition.wait()
+                        job = self._next_job_locked()
+                    if job is None:
+                        break
+
+                    job.state = 'running'
+                    job.started_at = time.time()
+                    job.worker = name
+                    job.loop = loop
+                    self._running_by_tenant[job.tenant] = self._running_by_tenant.get(job.tenant, 0) + 1
+
+                logger.info(f"▶️ {name} executando {job.kind} - Sessão: {job.session_id}")
+                state, error = self._run_job(loop, job)
+
+                with self._condition:
+                    self._running_by_tenant[job.tenant] -= 1
+                    if not self._running_by_tenant[job.tenant]:
+                        del self._running_by_tenant[job.tenant]
+                    job.error = error
+                    self._finish_locked(job, state)
+                    # Uma vaga do tenant foi liberada
+                    self._condition.notify_all()
+
+                if state == 'cancelled':
+                    self._run_on_cancel(job)
+                logger.info(f"⏹️ {name} finalizou {job.kind} ({state}) - Sessão: {job.session_id}")
+        finally:
+            try:
+                loop.run_until_complete(http_client_registry.close_loop())
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao fechar pool HTTP do {name}: {e}")
+            loop.close()
+            logger.info(f"👷 {name} encerrado")
+
+    def _run_job(self, loop: asyncio.AbstractEventLoop, job: WorkflowJob) -> tuple:
+        """Executa o job no loop do worker e devolve (estado final, erro)"""
+        try:
+            job.task = loop.create_task(job.coro_factory())
+            if job.cancel_requested:
+                job.task.cancel()
+            loop.run_until_complete(job.task)
+            return 'completed', None
+        except asyncio.CancelledError:
+            return 'cancelled', None
+        except Exception as e:
+            logger.error(f"❌ Job {job.kind} falhou - Sessão: {job.session_id}: {e}")
+            return 'failed', str(e)
+        finally:
+            job.task = None
+            job.coro_factory = None
+
+    def _finish_locked(self, job: WorkflowJob, state: str):
+        job.state = state
+        job.finished_at = time.time()
+        job.loop = None
+        self.stats[state] += 1
+
+    def _run_on_cancel(self, job: WorkflowJob):
+        if job.on_cancel:
+            try:
+                job.on_cancel()
+            except Exception as e:
+                logger.warning(f"⚠️ Erro no callback de cancelamento ({job.session_id}): {e}")
+
+    def shutdown(self, timeout: float = 5.0):
+        """Para os workers ociosos e fecha seus pools HTTP (hook de encerramento)"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            workers = list(self._workers)
+        for worker in workers:
+            worker.join(timeout)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Ocupação do pool, fila e contadores"""
+        with self._condition:
+            queued = [entry[2].to_dict() for entry in sorted(self._queue, key=lambda entry: entry[:2])]
+            running = [job.to_dict() for job in self._jobs.values() if job.state == 'running']
+            return {
+                'max_workers': self.max_workers,
+                'workers_alive': sum(1 for worker in self._workers if worker.is_alive()),
+                'tenant_max_concurrent': self.tenant_max_concurrent,
+                'max_queued': self.max_queued,
+                'running_by_tenant': dict(self._running_by_tenant),
+                'queued': queued,
+                'running': running,
+                **self.stats
+            }
+
+
+# Instância global
+workflow_scheduler = WorkflowScheduler()
@@ -117,6 +117,7 @@ class ModernAnalysisSystem {
     constructor() {
         this.currentSessionId = null;
         this.progressInterval = null;
+        this.progressSource = null;
         this.sessions = new Map();
         this.isPaused = false;
         this.notifications = [];
@@ -734,29 +735,37 @@ class ModernAnalysisSystem {
     startProgressMonitoring() {
         if (!this.currentSessionId) return;
 
+        this.stopProgressMonitoring();
+
+        if (!window.EventSource) {
+            this.startProgressPolling();
+            return;
+        }
+
+        // Stream SSE; o navegador reconecta sozinho e o servidor reenvia o que foi perdido
+        const source = new EventSource(`/api/progress/stream/${this.currentSessionId}`);
+        const onEvent = (event) => this.handleProgressStatus(JSON.parse(event.data));
+        source.addEventListener('progress', onEvent);
+        source.addEventListener('snapshot', onEvent);
+        source.addEventListener('complete', onEvent);
+        source.onerror = () => {
+            // CLOSED: stream indisponível (404, proxy sem SSE...); volta para o polling
+            if (source.readyState === EventSource.CLOSED && this.progressSource === source) {
+                this.progressSource = null;
+                this.startProgressPolling();
+            }
+        };
+        this.progressSource = source;
+    }
+
+    startProgressPolling() {
         this.progressInterval = setInterval(async () => {
             try {
                 const response = await fetch(`/api/progress/${this.currentSessionId}`);
                 const data = await response.json();
 
                 if (data.success) {
-                    this.updateProgress(
-                        data.percentage,
-                        data.current_step,
-                        data.total_steps,
-                        data.estimated_time
-                    );
-
-                    if (data.completed) {
-                        this.stopProgressMonitoring();
-                        this.showNotification('Análise concluída com sucesso!', 'success');
-                        this.showProgress(false);
-                        this.updateSessionControls('completed');
-                        localStorage.removeItem('currentSessionId');
-
-                        // Recarrega sessões
-                        await this.loadSavedSessions();
-                    }
+                    await this.handleProgressStatus(data.progress);
                 } else if (data.error) {
                     this.stopProgressMonitoring();
                     this.showNotification(`Erro: ${data.error}`, 'error');
@@ -769,7 +778,33 @@ class ModernAnalysisSystem {
         }, 3000); // Verifica a cada 3 segundos
     }
 
+    async handleProgressStatus(status) {
+        if (!status) return;
+
+        this.updateProgress(
+            status.percentage,
+            status.current_message,
+            status.total_steps,
+            status.estimated_remaining ? `${Math.round(status.estimated_remaining)}s` : ''
+        );
+
+        if (status.is_complete) {
+            this.stopProgressMonitoring();
+            this.showNotification('Análise concluída com sucesso!', 'success');
+            this.showProgress(false);
+            this.updateSessionControls('completed');
+            localStorage.removeItem('currentSessionId');
+
+            // Recarrega sessões
+            await this.loadSavedSessions();
+        }
+    }
+
     stopProgressMonitoring() {
+        if (this.progressSource) {
+            this.progressSource.close();
+            this.progressSource = null;
+        }
         if (this.progressInterval) {
             clearInterval(this.progressInterval);
             this.progressInterval = null;
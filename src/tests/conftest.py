@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""Configuração comum dos testes: importa os módulos de src/ e isola os caches em disco"""
+
+import os
+import sys
+import tempfile
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+# Os caches são singletons criados no import; apontam para um diretório temporário
+_cache_dir = tempfile.mkdtemp(prefix='arqv30-tests-')
+os.environ.setdefault('CONTENT_CACHE_PATH', os.path.join(_cache_dir, 'content.db'))
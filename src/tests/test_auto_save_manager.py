@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""Testes da escrita diferida (write-behind) do AutoSaveManager"""
+
+import os
+import threading
+
+import pytest
+
+import services.auto_save_manager as auto_save_module
+from services.auto_save_manager import AutoSaveManager, EscritorDiferido, EscritasPendentesError
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """AutoSaveManager isolado: diretórios em tmp_path e escritor próprio"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('AUTO_SAVE_WRITE_BEHIND', 'true')
+    instancia = AutoSaveManager()
+    instancia.escritor = EscritorDiferido(max_pendentes=50, tamanho_lote=4)
+    # Sem serviço preditivo nos testes
+    monkeypatch.setattr(instancia, '_trigger_predictive_analysis', lambda *args: None)
+    return instancia
+
+
+def _bloquear_escritor(escritor, session_id):
+    """Ocupa a thread escritora até o evento devolvido ser liberado"""
+    liberar = threading.Event()
+    iniciou = threading.Event()
+
+    def tarefa():
+        iniciou.set()
+        liberar.wait(5)
+
+    assert escritor.enfileirar(session_id, tarefa)
+    assert iniciou.wait(5)
+    return liberar
+
+
+def test_flush_apos_enfileirar_grava_todos_os_arquivos(manager):
+    liberar = _bloquear_escritor(manager.escritor, 'sessao-1')
+
+    caminhos = [
+        manager.salvar_etapa('etapa', {'indice': i}, categoria='workflow', session_id='sessao-1')
+        for i in range(10)
+    ]
+
+    # Nada chega ao disco enquanto a thread escritora está ocupada
+    assert manager.flush('sessao-1', timeout=0.05) is False
+    assert not any(os.path.exists(caminho) for caminho in caminhos)
+
+    liberar.set()
+    assert manager.flush('sessao-1', timeout=5) is True
+
+    # Sem coalescência: cada caminho devolvido foi gravado
+    assert len(set(caminhos)) == len(caminhos)
+    assert all(os.path.exists(caminho) for caminho in caminhos)
+    assert manager.escritor.get_metrics()['profundidade_fila'] == 0
+
+
+def test_flush_de_uma_sessao_nao_espera_outras(manager):
+    liberar = _bloquear_escritor(manager.escritor, 'outra-sessao')
+    try:
+        assert manager.flush('sessao-livre', timeout=0.05) is True
+        assert manager.flush(None, timeout=0.05) is False
+    finally:
+        liberar.set()
+
+
+def test_listar_etapas_falha_com_escritas_pendentes(manager, monkeypatch):
+    monkeypatch.setattr(auto_save_module, 'AUTO_SAVE_FLUSH_TIMEOUT', 0.05)
+    liberar = _bloquear_escritor(manager.escritor, 'sessao-2')
+    try:
+        manager.salvar_etapa('etapa', {'a': 1}, categoria='workflow', session_id='sessao-2')
+        with pytest.raises(EscritasPendentesError):
+            manager.garantir_gravacao('sessao-2', tentativas=2, timeout=0.05)
+        with pytest.raises(EscritasPendentesError):
+            manager.listar_etapas_salvas('sessao-2')
+    finally:
+        liberar.set()
+
+    monkeypatch.setattr(auto_save_module, 'AUTO_SAVE_FLUSH_TIMEOUT', 5)
+    etapas = manager.listar_etapas_salvas('sessao-2')
+    assert 'etapa' in etapas
+    assert os.path.exists(etapas['etapa'])
+
+
+def test_analise_preditiva_roda_fora_da_thread_escritora(manager, monkeypatch):
+    chamada = threading.Event()
+    threads = []
+
+    def registrar(*args):
+        threads.append(threading.current_thread().name)
+        chamada.set()
+
+    monkeypatch.setattr(manager, '_trigger_predictive_analysis', registrar)
+    manager.salvar_etapa('etapa', {'a': 1}, categoria='workflow', session_id='sessao-3')
+
+    assert manager.flush('sessao-3', timeout=5)
+    assert chamada.wait(5)
+    assert threads and threads[0].startswith('auto-save-predictive')
+
+
+def _trecho(url, indice):
+    return {'url': url, 'titulo': f'Título {indice}', 'conteudo': f'Conteúdo {indice} ' * 5}
+
+
+def _trechos_via_indice(manager, session_id):
+    total = manager.contar_trechos_consolidados(session_id)
+    return [manager.ler_trecho_consolidado(session_id, posicao) for posicao in range(total)]
+
+
+def test_indice_bate_com_log_apos_compactacao(manager):
+    urls = ['https://a.com', 'https://b.com', 'https://a.com', 'https://c.com', 'https://b.com', 'https://a.com']
+    for indice, url in enumerate(urls):
+        manager._adicionar_ao_arquivo_consolidado('sessao-c', _trecho(url, indice))
+
+    resultado = manager.compactar_consolidado('sessao-c')
+
+    assert resultado['success']
+    assert resultado['total_trechos'] == 3
+    assert resultado['duplicados_removidos'] == 3
+    assert resultado['urls_duplicadas'] == {'https://a.com': 2, 'https://b.com': 1}
+
+    via_log = list(manager.iterar_consolidado('sessao-c'))
+    assert [t['url'] for t in via_log] == ['https://a.com', 'https://b.com', 'https://c.com']
+    assert _trechos_via_indice(manager, 'sessao-c') == via_log
+
+    # Novos trechos continuam endereçáveis pelo índice após a compactação
+    manager._adicionar_ao_arquivo_consolidado('sessao-c', _trecho('https://d.com', 9))
+    assert _trechos_via_indice(manager, 'sessao-c') == list(manager.iterar_consolidado('sessao-c'))
+
+
+def test_indice_reconstruido_apos_queda_entre_os_replaces(manager):
+    for indice, url in enumerate(['https://a.com', 'https://a.com', 'https://b.com']):
+        manager._adicionar_ao_arquivo_consolidado('sessao-q', _trecho(url, indice))
+
+    dir_path = os.path.join(manager.base_dir, 'pesquisa_web', 'sessao-q')
+    indice_path = os.path.join(dir_path, manager.CONSOLIDADO_INDICE)
+    with open(indice_path, 'rb') as f:
+        indice_antigo = f.read()
+
+    assert manager.compactar_consolidado('sessao-q')['success']
+
+    # Simula a queda: log novo já no lugar, índice ainda o antigo
+    with open(indice_path, 'wb') as f:
+        f.write(indice_antigo)
+
+    assert manager.contar_trechos_consolidados('sessao-q') == 2
+    assert _trechos_via_indice(manager, 'sessao-q') == list(manager.iterar_consolidado('sessao-q'))
+
+
+def test_linha_incompleta_no_fim_do_log_e_descartada(manager):
+    for indice, url in enumerate(['https://a.com', 'https://b.com']):
+        manager._adicionar_ao_arquivo_consolidado('sessao-t', _trecho(url, indice))
+
+    log_path = os.path.join(manager.base_dir, 'pesquisa_web', 'sessao-t', manager.CONSOLIDADO_LOG)
+    with open(log_path, 'ab') as f:
+        f.write(b'{"url": "https://trunc')
+
+    manager._adicionar_ao_arquivo_consolidado('sessao-t', _trecho('https://c.com', 2))
+
+    trechos = _trechos_via_indice(manager, 'sessao-t')
+    assert [t['url'] for t in trechos] == ['https://a.com', 'https://b.com', 'https://c.com']
+    assert trechos == list(manager.iterar_consolidado('sessao-t'))
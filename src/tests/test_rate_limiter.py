@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Testes do balde de tokens com ajuste adaptativo (AIMD) do rate limiter"""
+
+import pytest
+
+import services.rate_limiter as rate_limiter_module
+from services.rate_limiter import KeyLimiter, TokenBucket, MIN_RATE_FACTOR
+
+
+class _Relogio:
+    """Relógio manual: o teste avança `now`"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return _Relogio()
+
+
+def test_balde_recarrega_ate_a_capacidade(clock):
+    bucket = TokenBucket(10, 2.0, clock)
+    for _ in range(10):
+        bucket.consume(1)
+    assert not bucket.has(1)
+    assert bucket.time_until(1) == pytest.approx(0.5)
+
+    clock.now = 2.0
+    assert bucket.available() == pytest.approx(4.0)
+
+    clock.now = 100.0
+    assert bucket.available() == pytest.approx(10.0)
+
+
+def test_429_reduz_taxa_pela_metade_e_bloqueia(clock):
+    limiter = KeyLimiter('key_1', rpm=60, clock=clock)
+
+    limiter.block_for(10)
+
+    assert limiter.rate_factor == pytest.approx(0.5)
+    assert limiter.rpm_bucket.capacity == pytest.approx(30)
+    assert limiter.rpm_bucket.refill_per_second == pytest.approx(0.5)
+    # Bloqueada pelo Retry-After mesmo que o balde recarregue antes
+    clock.now = 9.9
+    assert not limiter.try_acquire()
+    assert limiter.retry_in() == pytest.approx(0.1)
+
+    # Saldo zerado no 429, recarregado à taxa reduzida
+    clock.now = 10.0
+    assert limiter.rpm_bucket.available() == pytest.approx(5.0)
+    assert limiter.try_acquire()
+
+
+def test_429_repetidos_param_na_taxa_minima(clock):
+    limiter = KeyLimiter('key_1', rpm=60, tpm=6000, clock=clock)
+
+    for _ in range(10):
+        limiter.block_for(1)
+
+    assert limiter.rate_factor == pytest.approx(MIN_RATE_FACTOR)
+    assert limiter.rpm_bucket.capacity == pytest.approx(60 * MIN_RATE_FACTOR)
+    assert limiter.tpm_bucket.capacity == pytest.approx(6000 * MIN_RATE_FACTOR)
+
+
+def test_sucessos_recuperam_taxa_aditivamente_ate_a_configurada(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter_module, 'RATE_INCREASE_STEP', 0.1)
+    limiter = KeyLimiter('key_1', rpm=60, clock=clock)
+    limiter.block_for(0)
+    assert limiter.rate_factor == pytest.approx(0.5)
+
+    fatores = []
+    for _ in range(7):
+        clock.now += 10
+        assert limiter.try_acquire()
+        fatores.append(limiter.rate_factor)
+
+    assert fatores[:5] == pytest.approx([0.6, 0.7, 0.8, 0.9, 1.0])
+    # Não passa do configurado
+    assert fatores[5:] == pytest.approx([1.0, 1.0])
+    assert limiter.rpm_bucket.capacity == pytest.approx(60)
+    assert limiter.rpm_bucket.refill_per_second == pytest.approx(1.0)
+
+
+def test_requisicao_recusada_nao_recupera_taxa(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter_module, 'RATE_INCREASE_STEP', 0.1)
+    limiter = KeyLimiter('key_1', rpm=60, clock=clock)
+    limiter.block_for(5)
+
+    assert not limiter.try_acquire()
+    assert limiter.rate_factor == pytest.approx(0.5)
+    assert limiter.get_stats()['throttled'] == 1
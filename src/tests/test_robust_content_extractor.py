@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Testes do RobustContentExtractor contra um servidor aiohttp local"""
+
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web
+
+from services.robust_content_extractor import RobustContentExtractor
+from services.content_cache import content_cache
+
+PARAGRAPH = '<p>' + 'Conteúdo de teste com texto suficiente para a extração. ' * 20 + '</p>\n'
+LARGE_PAGE = (
+    '<html><head><title>Página grande</title></head><body><article>'
+    + PARAGRAPH * 700
+    + '<p>FIM-DO-DOCUMENTO</p></article></body></html>'
+).encode('utf-8')
+SHORT_PAGE = (
+    '<html><head><title>Curta</title><meta name="description" content="Resumo da página"></head>'
+    '<body><p>Oi</p></body></html>'
+).encode('utf-8')
+
+
+async def _serve(handler_map):
+    """Sobe um servidor local e devolve (runner, base_url)"""
+    app = web.Application()
+    for path, body in handler_map.items():
+        async def handler(request, body=body):
+            response = web.StreamResponse(headers={'Content-Type': 'text/html; charset=utf-8'})
+            await response.prepare(request)
+            # Envia em pedaços para o corpo nunca estar inteiro no buffer do cliente
+            for i in range(0, len(body), 16 * 1024):
+                await response.write(body[i:i + 16 * 1024])
+                await asyncio.sleep(0)
+            await response.write_eof()
+            return response
+        app.router.add_get(path, handler)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f'http://127.0.0.1:{port}'
+
+
+@pytest.fixture(autouse=True)
+def _clean_cache():
+    content_cache.clear()
+    yield
+    content_cache.clear()
+
+
+def test_async_fetch_reads_body_larger_than_buffer():
+    assert len(LARGE_PAGE) > 64 * 1024
+
+    async def scenario():
+        runner, base_url = await _serve({'/large': LARGE_PAGE})
+        try:
+            extractor = RobustContentExtractor()
+            return await extractor.extract_content_async(f'{base_url}/large')
+        finally:
+            await runner.cleanup()
+
+    content = asyncio.run(scenario())
+    assert content is not None
+    assert content.endswith('FIM-DO-DOCUMENTO')
+    assert len(content) > 64 * 1024
+
+
+def test_async_fetch_stops_at_max_html_bytes():
+    async def scenario():
+        runner, base_url = await _serve({'/large': LARGE_PAGE})
+        try:
+            extractor = RobustContentExtractor()
+            extractor.max_html_bytes = 200 * 1024
+            return await extractor.extract_content_async(f'{base_url}/large')
+        finally:
+            await runner.cleanup()
+
+    content = asyncio.run(scenario())
+    assert content is not None
+    assert 'FIM-DO-DOCUMENTO' not in content
+    assert len(content) <= 200 * 1024
+
+
+def test_extract_metadata_of_short_page():
+    async def scenario():
+        runner, base_url = await _serve({'/short': SHORT_PAGE})
+        try:
+            extractor = RobustContentExtractor()
+            url = f'{base_url}/short'
+            metadata = await asyncio.to_thread(extractor.extract_metadata, url)
+            return url, metadata
+        finally:
+            await runner.cleanup()
+
+    url, metadata = asyncio.run(scenario())
+    assert 'error' not in metadata
+    assert metadata['title'] == 'Curta'
+    assert metadata['description'] == 'Resumo da página'
+    assert not content_cache.is_failed(url)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Testes do WorkflowScheduler: limite por tenant e estado de jobs com falha"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.workflow_scheduler import WorkflowScheduler
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setenv('WORKFLOW_MAX_WORKERS', '3')
+    monkeypatch.setenv('WORKFLOW_TENANT_MAX_CONCURRENT', '1')
+    instancia = WorkflowScheduler()
+    yield instancia
+    instancia.shutdown()
+
+
+def _aguardar(condicao, timeout=5.0):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if condicao():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _job_bloqueado(liberar: threading.Event):
+    async def job():
+        await asyncio.to_thread(liberar.wait, 5)
+    return job
+
+
+def test_limite_de_concorrencia_por_tenant(scheduler):
+    liberar = threading.Event()
+    try:
+        scheduler.submit('a1', 'step1', _job_bloqueado(liberar), tenant='tenant-a')
+        scheduler.submit('a2', 'step1', _job_bloqueado(liberar), tenant='tenant-a')
+        scheduler.submit('b1', 'step1', _job_bloqueado(liberar), tenant='tenant-b')
+
+        assert _aguardar(lambda: scheduler.get_job_status('b1')['state'] == 'running')
+        assert scheduler.get_job_status('a1')['state'] == 'running'
+        # Há worker livre, mas o tenant-a já está no limite
+        assert scheduler.get_job_status('a2')['state'] == 'queued'
+    finally:
+        liberar.set()
+
+    assert _aguardar(lambda: scheduler.get_job_status('a2')['state'] == 'completed')
+    assert scheduler.get_status()['completed'] == 3
+
+
+def test_job_com_excecao_fica_failed(scheduler):
+    async def job_com_erro():
+        raise RuntimeError('Falha ao carregar serviços necessários')
+
+    scheduler.submit('s1', 'step1', job_com_erro, tenant='tenant-a')
+
+    assert _aguardar(lambda: scheduler.get_job_status('s1')['state'] == 'failed')
+    status = scheduler.get_job_status('s1')
+    assert status['error'] == 'Falha ao carregar serviços necessários'
+    assert scheduler.get_status()['failed'] == 1
+
+    # A vaga do tenant é liberada após a falha
+    async def job_ok():
+        return None
+
+    scheduler.submit('s2', 'step1', job_ok, tenant='tenant-a')
+    assert _aguardar(lambda: scheduler.get_job_status('s2')['state'] == 'completed')
+
+
+def test_tenant_e_prioridade_definidos_pelo_servidor():
+    flask = pytest.importorskip('flask')
+    enhanced_workflow = pytest.importorskip('routes.enhanced_workflow')
+
+    app = flask.Flask(__name__)
+    with app.test_request_context(
+        '/api/workflow/step1/start',
+        method='POST',
+        json={'tenant_id': 'outro-tenant', 'priority': 0},
+        headers={'X-Tenant-ID': 'outro-tenant'},
+        environ_base={'REMOTE_ADDR': '10.0.0.7'}
+    ):
+        opcoes = enhanced_workflow._job_options('step1')
+
+    assert opcoes == {'tenant': '10.0.0.7', 'priority': enhanced_workflow.DEFAULT_PRIORITY}
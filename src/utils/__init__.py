@@ -9,11 +9,21 @@ from .duplicate_remover import (
     remove_duplicates_from_results,
     get_duplicate_stats
 )
+from .json_serializer import (
+    to_serializable,
+    is_json_native,
+    dumps,
+    dump_to_file
+)
 
 __all__ = [
     'DuplicateRemover',
     'DuplicateStats', 
     'duplicate_remover',
     'remove_duplicates_from_results',
-    'get_duplicate_stats'
+    'get_duplicate_stats',
+    'to_serializable',
+    'is_json_native',
+    'dumps',
+    'dump_to_file'
 ]
\ No newline at end of file
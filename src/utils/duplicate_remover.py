@@ -3,16 +3,204 @@ Sistema de Remoção de Dados Duplicados
 Detecta e remove dados duplicados durante a coleta e processamento
 """
 
+import os
 import hashlib
 import re
-from typing import List, Dict, Any, Set, Tuple
+from typing import List, Dict, Any, Set, Tuple, Optional, Union
 from urllib.parse import urlparse, parse_qs
 import difflib
+import random
 from dataclasses import dataclass
+from functools import lru_cache
 import logging
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
 logger = logging.getLogger(__name__)
 
+# Limiar fixo para títulos (mais rígido que o de conteúdo)
+TITLE_SIMILARITY_THRESHOLD = 0.9
+
+DEDUP_STRATEGIES = ('sequence', 'minhash')
+
+# Calibração do 'minhash' contra o 'sequence' (conteúdos de 20 a 350 palavras
+# com 20% de quase-duplicatas: troca de 5% das palavras, corte de 15%,
+# prefixo/sufixo de portal, pontuação e caixa). Shingles de 4 caracteres;
+# pares (ratio do SequenceMatcher, Jaccard equivalente) medidos.
+MINHASH_SHINGLE_SIZE = 4
+MINHASH_THRESHOLD_CALIBRATION = ((0.85, 0.75), (0.95, 0.91))
+
+# Hashing universal para as permutações do MinHash: ((a * h + b) mod 2^64) mod p,
+# a mesma aritmética uint64 (com overflow) usada pelo numpy
+_MERSENNE_PRIME = (1 << 61) - 1
+_UINT64_MASK = (1 << 64) - 1
+_MAX_SHINGLE_HASH = (1 << 32) - 1
+
+
+@lru_cache(maxsize=8)
+def _minhash_permutations(num_perm: int, seed: int = 1) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """Coeficientes (a, b) das permutações"""
+    rng = random.Random(seed)
+    a = tuple(rng.randint(1, _MERSENNE_PRIME - 1) for _ in range(num_perm))
+    b = tuple(rng.randint(0, _MERSENNE_PRIME - 1) for _ in range(num_perm))
+    return a, b
+
+
+@lru_cache(maxsize=32)
+def _optimal_lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Escolhe (bandas, linhas) que minimizam falsos positivos abaixo do limiar
+    e falsos negativos acima dele (integração numérica da curva S do LSH).
+    """
+    def probability(s: float, bands: int, rows: int) -> float:
+        return 1 - (1 - s ** rows) ** bands
+
+    def integrate(f, a: float, b: float, steps: int = 100) -> float:
+        step = (b - a) / steps
+        return sum(f(a + (i + 0.5) * step) for i in range(steps)) * step
+
+    best, best_error = (1, num_perm), float('inf')
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        if rows < 1:
+            break
+        false_positive = integrate(lambda s: probability(s, bands, rows), 0.0, threshold)
+        false_negative = integrate(lambda s: 1 - probability(s, bands, rows), threshold, 1.0)
+        error = 0.5 * false_positive + 0.5 * false_negative
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+def minhash_threshold(sequence_threshold: float) -> float:
+    """
+    Limiar de Jaccard equivalente a um limiar do SequenceMatcher
+    (interpolação linear entre os pontos calibrados)
+    """
+    (s0, j0), (s1, j1) = MINHASH_THRESHOLD_CALIBRATION
+    if not s0 <= sequence_threshold <= s1:
+        logger.warning(f"Limiar {sequence_threshold} fora da faixa calibrada do MinHash ({s0}-{s1}); valor extrapolado")
+    jaccard = j0 + (sequence_threshold - s0) * (j1 - j0) / (s1 - s0)
+    return min(0.99, max(0.05, jaccard))
+
+
+class MinHashLSHIndex:
+    """
+    Índice de quase-duplicatas com MinHash + LSH por bandas.
+
+    A similaridade é o Jaccard estimado entre os conjuntos de shingles do
+    texto normalizado (n-gramas de caracteres por padrão, ou de palavras
+    com shingle_unit='word'). O LSH só compara o novo texto com os
+    candidatos que colidem em alguma banda, então inserir e consultar N
+    textos custa ~O(N) em vez de O(N²). Usa numpy quando disponível para
+    calcular as assinaturas.
+
+    Implementa append() e len() para ser usado no lugar das listas de
+    conteúdos já vistos em DuplicateRemover.
+    """
+
+    def __init__(self, threshold: float, num_perm: int = 128, shingle_size: int = MINHASH_SHINGLE_SIZE, shingle_unit: str = 'char'):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.shingle_unit = shingle_unit
+        self.bands, self.rows = _optimal_lsh_params(threshold, num_perm)
+        self._perm_a, self._perm_b = _minhash_permutations(num_perm)
+        if HAS_NUMPY:
+            self._np_a = np.array(self._perm_a, dtype=np.uint64)
+            self._np_b = np.array(self._perm_b, dtype=np.uint64)
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: List[Tuple[int, ...]] = []
+        self._keys: List[Any] = []
+        # query() seguido de add() do mesmo texto reaproveita a assinatura
+        self._last_signature: Tuple[Optional[str], Optional[Tuple[int, ...]]] = (None, None)
+
+    def _shingles(self, text: str) -> Set[str]:
+        normalized = re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', ' ', text.lower())).strip()
+        if not normalized:
+            return set()
+        units = normalized.split(' ') if self.shingle_unit == 'word' else normalized
+        k = self.shingle_size
+        if len(units) <= k:
+            return {' '.join(units) if self.shingle_unit == 'word' else units}
+        if self.shingle_unit == 'word':
+            return {' '.join(units[i:i + k]) for i in range(len(units) - k + 1)}
+        return {units[i:i + k] for i in range(len(units) - k + 1)}
+
+    def _signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        last_text, last_signature = self._last_signature
+        if text is last_text:
+            return last_signature
+        signature = self._compute_signature(text)
+        self._last_signature = (text, signature)
+        return signature
+
+    def _compute_signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        shingles = self._shingles(text)
+        if not shingles:
+            return None
+
+        hashes = [hash(shingle) & _MAX_SHINGLE_HASH for shingle in shingles]
+        if HAS_NUMPY:
+            values = np.array(hashes, dtype=np.uint64)
+            with np.errstate(over='ignore'):
+                permuted = (np.outer(values, self._np_a) + self._np_b) % np.uint64(_MERSENNE_PRIME)
+            return tuple(permuted.min(axis=0).tolist())
+
+        return tuple(
+            min(((a * h + b) & _UINT64_MASK) % _MERSENNE_PRIME for h in hashes)
+            for a, b in zip(self._perm_a, self._perm_b)
+        )
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        rows = self.rows
+        for band in range(self.bands):
+            yield band, signature[band * rows:(band + 1) * rows]
+
+    def _similarity(self, a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+        return sum(1 for x, y in zip(a, b) if x == y) / self.num_perm
+
+    def query(self, text: str) -> List[Any]:
+        """Chaves dos textos indexados com Jaccard estimado >= threshold"""
+        signature = self._signature(text)
+        if signature is None:
+            return []
+
+        candidates = set()
+        for band, band_key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(band_key, ()))
+
+        return [
+            self._keys[i] for i in sorted(candidates)
+            if self._similarity(signature, self._signatures[i]) >= self.threshold
+        ]
+
+    def contains_similar(self, text: str) -> bool:
+        """Verifica se algum texto indexado é quase-duplicata de text"""
+        return bool(self.query(text))
+
+    def add(self, text: str, key: Any = None):
+        """Indexa texto (key padrão: posição de inserção)"""
+        signature = self._signature(text)
+        if signature is None:
+            return
+        position = len(self._signatures)
+        self._signatures.append(signature)
+        self._keys.append(position if key is None else key)
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(position)
+
+    def append(self, text: str):
+        self.add(text)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+
 @dataclass
 class DuplicateStats:
     """Estatísticas de remoção de duplicatas"""
@@ -22,10 +210,30 @@ class DuplicateStats:
     similarity_threshold: float = 0.85
 
 class DuplicateRemover:
-    """Sistema inteligente de remoção de duplicatas"""
+    """
+    Sistema inteligente de remoção de duplicatas
+
+    Estratégias de similaridade (DEDUP_STRATEGY):
+    - 'sequence' (padrão): difflib.SequenceMatcher contra todos os itens já vistos (quadrático)
+    - 'minhash' (opcional): MinHash + LSH para conteúdos, ~linear no número de itens
+
+    No 'minhash' os limiares do SequenceMatcher são convertidos para Jaccard
+    de shingles de caracteres por minhash_threshold(). Medido contra o
+    'sequence' (limiar 0.85, 500 resultados com 20% de quase-duplicatas):
+    mesma decisão em 99.0% dos itens com conteúdos de 20-45 palavras e em
+    99.6% com 60-120 palavras. As divergências são quase-duplicatas longas
+    que o autojunk do SequenceMatcher deixa passar e pares na borda do
+    limiar, portanto não é um substituto exato. Títulos são curtos e a
+    concordância do MinHash neles é baixa, então continuam no SequenceMatcher
+    nas duas estratégias.
+    """
     
-    def __init__(self, similarity_threshold: float = 0.85):
+    def __init__(self, similarity_threshold: float = 0.85, strategy: Optional[str] = None):
         self.similarity_threshold = similarity_threshold
+        self.strategy = (strategy or os.getenv('DEDUP_STRATEGY', 'sequence')).lower()
+        if self.strategy not in DEDUP_STRATEGIES:
+            logger.warning(f"Estratégia de deduplicação desconhecida '{self.strategy}', usando 'sequence'")
+            self.strategy = 'sequence'
         self.url_hashes: Set[str] = set()
         self.content_hashes: Set[str] = set()
         self.title_hashes: Set[str] = set()
@@ -94,6 +302,25 @@ class DuplicateRemover:
         
         # Usa SequenceMatcher para calcular similaridade
         return difflib.SequenceMatcher(None, norm1, norm2).ratio()
+
+    def similarity_at_least(self, text1: str, text2: str, threshold: float) -> bool:
+        """
+        Equivale a calculate_similarity(text1, text2) >= threshold, mas só
+        calcula o ratio() quando os limites superiores baratos do
+        SequenceMatcher (tamanhos e contagem de caracteres) alcançam o limiar
+        """
+        if not text1 or not text2:
+            return False
+
+        norm1 = re.sub(r'\s+', ' ', text1.lower().strip())
+        norm2 = re.sub(r'\s+', ' ', text2.lower().strip())
+
+        matcher = difflib.SequenceMatcher(None, norm1, norm2)
+        return (
+            matcher.real_quick_ratio() >= threshold and
+            matcher.quick_ratio() >= threshold and
+            matcher.ratio() >= threshold
+        )
     
     def is_duplicate_url(self, url: str) -> bool:
         """Verifica se URL é duplicata"""
@@ -106,8 +333,22 @@ class DuplicateRemover:
         self.url_hashes.add(url_hash)
         return False
     
-    def is_duplicate_content(self, content: str, existing_contents: List[str] = None) -> bool:
-        """Verifica se conteúdo é duplicata"""
+    def _new_seen(self, threshold: float) -> Union[List[str], MinHashLSHIndex]:
+        """Conteúdos já vistos conforme a estratégia (lista ou índice LSH)"""
+        if self.strategy == 'minhash':
+            return MinHashLSHIndex(minhash_threshold(threshold))
+        return []
+    
+    def _is_similar_to_any(self, text: str, existing: Union[List[str], MinHashLSHIndex], threshold: float) -> bool:
+        if isinstance(existing, MinHashLSHIndex):
+            return existing.contains_similar(text)
+        for item in existing:
+            if self.similarity_at_least(text, item, threshold):
+                return True
+        return False
+    
+    def is_duplicate_content(self, content: str, existing_contents: Union[List[str], MinHashLSHIndex] = None) -> bool:
+        """Verifica se conteúdo é duplicata (existing_contents: lista ou MinHashLSHIndex)"""
         content_hash = self.get_content_hash(content)
         
         if not content_hash:
@@ -118,17 +359,14 @@ class DuplicateRemover:
             return True
             
         # Verifica similaridade com conteúdos existentes
-        if existing_contents:
-            for existing in existing_contents:
-                similarity = self.calculate_similarity(content, existing)
-                if similarity >= self.similarity_threshold:
-                    return True
+        if existing_contents and self._is_similar_to_any(content, existing_contents, self.similarity_threshold):
+            return True
         
         self.content_hashes.add(content_hash)
         return False
     
-    def is_duplicate_title(self, title: str, existing_titles: List[str] = None) -> bool:
-        """Verifica se título é duplicata"""
+    def is_duplicate_title(self, title: str, existing_titles: Union[List[str], MinHashLSHIndex] = None) -> bool:
+        """Verifica se título é duplicata (existing_titles: lista ou MinHashLSHIndex)"""
         title_hash = self.get_title_hash(title)
         
         if not title_hash:
@@ -138,12 +376,9 @@ class DuplicateRemover:
         if title_hash in self.title_hashes:
             return True
             
-        # Verifica similaridade com títulos existentes
-        if existing_titles:
-            for existing in existing_titles:
-                similarity = self.calculate_similarity(title, existing)
-                if similarity >= 0.9:  # Threshold mais alto para títulos
-                    return True
+        # Verifica similaridade com títulos existentes (threshold mais alto para títulos)
+        if existing_titles and self._is_similar_to_any(title, existing_titles, TITLE_SIMILARITY_THRESHOLD):
+            return True
         
         self.title_hashes.add(title_hash)
         return False
@@ -156,7 +391,7 @@ class DuplicateRemover:
         unique_results = []
         seen_urls = set()
         seen_titles = []
-        seen_contents = []
+        seen_contents = self._new_seen(self.similarity_threshold)
         
         self.stats.total_items = len(results)
         
@@ -203,7 +438,7 @@ class DuplicateRemover:
             
         unique_articles = []
         seen_urls = set()
-        seen_contents = []
+        seen_contents = self._new_seen(self.similarity_threshold)
         
         self.stats.total_items = len(articles)
         
@@ -221,14 +456,7 @@ class DuplicateRemover:
             
             # Verifica duplicata por conteúdo
             if content and len(content) > 100:  # Só verifica conteúdos substanciais
-                is_duplicate = False
-                for existing_content in seen_contents:
-                    similarity = self.calculate_similarity(content, existing_content)
-                    if similarity >= self.similarity_threshold:
-                        is_duplicate = True
-                        break
-                
-                if is_duplicate:
+                if self._is_similar_to_any(content, seen_contents, self.similarity_threshold):
                     self.stats.duplicates_removed += 1
                     continue
                     
@@ -251,6 +479,15 @@ class DuplicateRemover:
         merged_items = []
         processed_indices = set()
         
+        # Com MinHash, só os candidatos do LSH são comparados
+        index = None
+        if self.strategy == 'minhash':
+            index = MinHashLSHIndex(minhash_threshold(merge_threshold))
+            for j, item in enumerate(items):
+                content = item.get('content', '') or item.get('text', '')
+                if content:
+                    index.add(content, key=j)
+        
         for i, item1 in enumerate(items):
             if i in processed_indices:
                 continue
@@ -261,15 +498,19 @@ class DuplicateRemover:
             
             content1 = item1.get('content', '') or item1.get('text', '')
             
-            for j, item2 in enumerate(items[i+1:], i+1):
-                if j in processed_indices:
-                    continue
+            if index is not None:
+                for j in (index.query(content1) if content1 else []):
+                    if j > i and j not in processed_indices:
+                        similar_items.append(items[j])
+                        similar_indices.add(j)
+            else:
+                for j, item2 in enumerate(items[i+1:], i+1):
+                    if j in processed_indices:
+                        continue
+                        
+                    content2 = item2.get('content', '') or item2.get('text', '')
                     
-                content2 = item2.get('content', '') or item2.get('text', '')
-                
-                if content1 and content2:
-                    similarity = self.calculate_similarity(content1, content2)
-                    if similarity >= merge_threshold:
+                    if content1 and content2 and self.similarity_at_least(content1, content2, merge_threshold):
                         similar_items.append(item2)
                         similar_indices.add(j)
             
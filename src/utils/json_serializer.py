@@ -0,0 +1,386 @@
+"""
+Serialização JSON rápida para payloads grandes de sessão
+
+Limpeza em passada única (pilha explícita, sem recursão) com detecção de
+referências circulares e despacho por tipo, e backend orjson opcional.
+
+Benchmark com um payload sintético de sessão:
+    python -m utils.json_serializer bench [MB]
+"""
+
+import sys
+import json
+import time
+import logging
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+logger = logging.getLogger(__name__)
+
+# Limites herdados do AutoSaveManager._clean_for_serialization
+MAX_DEPTH = 15
+MAX_SEQUENCE_ITEMS = 100
+MAX_SET_ITEMS = 50
+MAX_KEY_LENGTH = 100
+MAX_REPR_LENGTH = 500
+
+JSON_NATIVE_LEAVES = (str, int, float, bool, type(None))
+_NATIVE_LEAF_TYPES = frozenset(JSON_NATIVE_LEAVES)
+
+# Marcador de saída de um contêiner na pilha (libera o id do caminho atual)
+_EXIT = object()
+
+
+def _safe_key(key: Any, index: int, parent_id: int) -> str:
+    try:
+        if isinstance(key, (dict, list, set)):
+            return f"key_{hash(str(key))}"
+        return str(key)[:MAX_KEY_LENGTH]
+    except Exception:
+        return f"key_{parent_id}_{index}"
+
+
+def _string_repr(obj: Any) -> Any:
+    try:
+        return {"__string_repr__": str(obj)[:MAX_REPR_LENGTH], "__type__": type(obj).__name__}
+    except Exception:
+        return {"__unserializable__": type(obj).__name__}
+
+
+def _isoformat(obj: Any) -> Any:
+    try:
+        return obj.isoformat()
+    except Exception:
+        return str(obj)
+
+
+def _callable_repr(obj: Any) -> str:
+    return f"<function {getattr(obj, '__name__', 'unknown')}>"
+
+
+# Categorias de tipo, resolvidas uma vez por classe e guardadas em _DISPATCH
+_LEAF, _DICT, _SEQUENCE, _SET, _OBJECT = range(5)
+
+_DISPATCH: Dict[type, Any] = {
+    str: _LEAF, int: _LEAF, float: _LEAF, bool: _LEAF, type(None): _LEAF,
+    dict: _DICT, list: _SEQUENCE, tuple: _SEQUENCE, set: _SET, frozenset: _SET
+}
+
+
+def _resolve(obj: Any) -> Any:
+    """Categoria do tipo de obj (ou função de conversão de folha), na ordem do limpador original"""
+    cls = type(obj)
+    handler = _DISPATCH.get(cls)
+    if handler is not None:
+        return handler
+
+    if issubclass(cls, JSON_NATIVE_LEAVES):
+        handler = _LEAF
+    elif issubclass(cls, dict):
+        handler = _DICT
+    elif issubclass(cls, (list, tuple)):
+        handler = _SEQUENCE
+    elif issubclass(cls, (set, frozenset)):
+        handler = _SET
+    elif hasattr(obj, '__dict__'):
+        handler = _OBJECT
+    elif callable(obj):
+        handler = _callable_repr
+    elif hasattr(obj, 'isoformat'):
+        handler = _isoformat
+    else:
+        handler = _string_repr
+
+    # Objetos com __dict__ de instância são decididos por instância
+    if handler != _OBJECT:
+        _DISPATCH[cls] = handler
+    return handler
+
+
+def to_serializable(obj: Any, max_depth: Optional[int] = MAX_DEPTH,
+                    max_items: Optional[int] = MAX_SEQUENCE_ITEMS,
+                    max_set_items: Optional[int] = MAX_SET_ITEMS) -> Any:
+    """
+    Cópia de obj contendo apenas tipos JSON.
+
+    Mesmas regras do limpador recursivo do AutoSaveManager (chaves como
+    string, objetos pelo __dict__, datetimes em ISO, demais tipos como
+    repr, limites de profundidade/itens; None desativa cada limite), mas em
+    uma única passada: o caminho atual fica em um set mantido com
+    marcadores de saída na pilha, em vez de uma cópia do set para cada filho.
+    """
+    root = [None]
+    stack = [(obj, root, 0, 0)]
+    path = set()
+
+    while stack:
+        item = stack.pop()
+        value = item[0]
+        if value is _EXIT:
+            path.discard(item[1])
+            continue
+
+        _, target, slot, depth = item
+
+        if max_depth is not None and depth > max_depth:
+            target[slot] = {"__max_depth__": f"Depth limit reached at {depth}"}
+            continue
+
+        handler = _resolve(value)
+        if handler == _LEAF:
+            target[slot] = value
+            continue
+        if callable(handler):
+            target[slot] = handler(value)
+            continue
+
+        value_id = id(value)
+        if value_id in path:
+            target[slot] = {"__circular_ref__": f"{type(value).__name__}_{value_id}"}
+            continue
+        path.add(value_id)
+        stack.append((_EXIT, value_id))
+
+        try:
+            child_depth = depth + 1
+            # Folhas nativas são copiadas direto, sem passar pela pilha
+            leaves_inline = max_depth is None or child_depth <= max_depth
+            if handler == _DICT:
+                cleaned = {}
+                for index, (key, child) in enumerate(value.items()):
+                    if type(key) is str and len(key) <= MAX_KEY_LENGTH:
+                        safe_key = key
+                    else:
+                        safe_key = _safe_key(key, index, value_id)
+                    if leaves_inline and type(child) in _NATIVE_LEAF_TYPES:
+                        cleaned[safe_key] = child
+                    else:
+                        cleaned[safe_key] = None
+                        stack.append((child, cleaned, safe_key, child_depth))
+                target[slot] = cleaned
+            elif handler == _SEQUENCE or handler == _SET:
+                if handler == _SET:
+                    items = list(value)[:max_set_items]
+                else:
+                    items = value[:max_items] if max_items is not None else value
+                cleaned = list(items)
+                target[slot] = cleaned
+                for index, child in enumerate(items):
+                    if not (leaves_inline and type(child) in _NATIVE_LEAF_TYPES):
+                        stack.append((child, cleaned, index, child_depth))
+            else:
+                stack.append((value.__dict__, target, slot, child_depth))
+        except Exception as e:
+            target[slot] = {"__serialization_error__": str(e)[:100]}
+
+    return root[0]
+
+
+def is_json_native(obj: Any) -> bool:
+    """True se obj só contém dict/list/tuple com chaves string e folhas JSON, sem ciclos"""
+    stack = [obj]
+    path = set()
+    while stack:
+        value = stack.pop()
+        if value is _EXIT:
+            path.discard(stack.pop())
+            continue
+        cls = type(value)
+        if cls in JSON_NATIVE_LEAVES:
+            continue
+        if cls is dict:
+            if not all(type(key) is str for key in value):
+                return False
+            children = value.values()
+        elif cls is list or cls is tuple:
+            children = value
+        else:
+            return False
+        value_id = id(value)
+        if value_id in path:
+            return False
+        path.add(value_id)
+        stack.append(value_id)
+        stack.append(_EXIT)
+        stack.extend(children)
+    return True
+
+
+def _dumps_native(obj: Any, indent: Optional[int]) -> bytes:
+    if HAS_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    separators = None if indent else (',', ':')
+    return json.dumps(obj, ensure_ascii=False, indent=indent, separators=separators).encode('utf-8')
+
+
+def dumps(obj: Any, indent: Optional[int] = None) -> bytes:
+    """
+    JSON em UTF-8 (compacto por padrão).
+
+    Payloads já serializáveis são escritos direto (orjson se instalado);
+    só quando isso falha por tipo não suportado ou ciclo o objeto passa
+    por to_serializable, sem limites de profundidade ou de itens.
+    """
+    try:
+        return _dumps_native(obj, indent)
+    except (TypeError, ValueError, RecursionError):
+        pass
+
+    cleaned = to_serializable(obj, max_depth=None, max_items=None, max_set_items=None)
+    try:
+        return _dumps_native(cleaned, indent)
+    except (TypeError, ValueError):
+        # Ex.: inteiros acima de 64 bits no orjson
+        return json.dumps(cleaned, ensure_ascii=False, indent=indent, default=str).encode('utf-8')
+
+
+def dump_to_file(obj: Any, path: str, indent: Optional[int] = None) -> int:
+    """Serializa antes de abrir o arquivo (sem JSON parcial em caso de erro); retorna os bytes gravados"""
+    data = dumps(obj, indent)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+# Benchmark
+
+class _Artifact:
+    """Objeto de domínio sem serialização nativa, como os presentes nos resultados reais"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.source = f"https://example.com/artigo/{index}"
+        self.tags = {f"tag{index % 7}", f"tag{index % 11}"}
+
+
+def build_sample_payload(target_mb: float = 50.0) -> Dict[str, Any]:
+    """Payload no formato de massive_data/search_results com aproximadamente target_mb MB"""
+    from datetime import datetime
+
+    paragraph = ("Conteúdo extraído da página com análise de mercado, dores do avatar, "
+                 "objeções e provas sociais coletadas durante a pesquisa. ") * 8
+    approx_result_size = len(paragraph) + 400
+    total_results = int(target_mb * 1024 * 1024 / approx_result_size)
+
+    # Resultados agrupados por provedor e query, até 40 por query (abaixo do limite de itens)
+    providers = ['serper', 'exa', 'jina', 'firecrawl', 'google']
+    search_results = {provider: {} for provider in providers}
+    for index in range(total_results):
+        provider = providers[index % len(providers)]
+        query = f"query {index // (40 * len(providers))} sobre o nicho"
+        search_results[provider].setdefault(query, []).append({
+            'url': f"https://site{index % 500}.com.br/post/{index}",
+            'title': f"Resultado {index} sobre o nicho",
+            'snippet': paragraph[:160],
+            'content': paragraph,
+            'score': (index % 100) / 100,
+            'metadata': {'position': index, 'lang': 'pt-BR', 'keywords': ['mercado', 'avatar', 'dor']}
+        })
+
+    payload = {
+        'session_id': 'session_bench',
+        'massive_data': {
+            'search_results': search_results,
+            'statistics': {'total_results': total_results, 'providers': providers},
+            'extracted_content': [{'url': f"https://example.com/{i}", 'text': paragraph} for i in range(200)]
+        },
+        'collected_at': datetime.now().isoformat()
+    }
+    return payload
+
+
+def _add_unserializable(payload: Dict[str, Any]) -> Dict[str, Any]:
+    from datetime import datetime
+
+    enriched = dict(payload)
+    enriched['artifacts'] = [_Artifact(i) for i in range(50)]
+    enriched['finished_at'] = datetime.now()
+    enriched['self_ref'] = enriched
+    return enriched
+
+
+def _legacy_clean(obj, seen=None, depth=0):
+    """Cópia do limpador recursivo anterior (seen.copy() por filho), para comparação"""
+    if seen is None:
+        seen = set()
+    if depth > MAX_DEPTH:
+        return {"__max_depth__": f"Depth limit reached at {depth}"}
+    obj_id = id(obj)
+    if obj_id in seen:
+        return {"__circular_ref__": f"{type(obj).__name__}_{obj_id}"}
+    seen.add(obj_id)
+    try:
+        if obj is None or isinstance(obj, (bool, int, float, str)):
+            return obj
+        elif isinstance(obj, dict):
+            return {str(key)[:MAX_KEY_LENGTH]: _legacy_clean(value, seen.copy(), depth + 1) for key, value in obj.items()}
+        elif isinstance(obj, (list, tuple)):
+            return [_legacy_clean(item, seen.copy(), depth + 1) for item in obj[:MAX_SEQUENCE_ITEMS]]
+        elif isinstance(obj, set):
+            return [_legacy_clean(item, seen.copy(), depth + 1) for item in list(obj)[:MAX_SET_ITEMS]]
+        elif hasattr(obj, '__dict__'):
+            return _legacy_clean(obj.__dict__, seen.copy(), depth + 1)
+        elif callable(obj):
+            return _callable_repr(obj)
+        elif hasattr(obj, 'isoformat'):
+            return _isoformat(obj)
+        try:
+            json.dumps(obj)
+            return obj
+        except (TypeError, ValueError):
+            return _string_repr(obj)
+    finally:
+        seen.discard(obj_id)
+
+
+def _timed(label: str, func: Callable[[], Any], results: Dict[str, float]) -> Any:
+    start = time.perf_counter()
+    value = func()
+    results[label] = time.perf_counter() - start
+    return value
+
+
+def run_benchmark(target_mb: float = 50.0) -> Dict[str, float]:
+    """Compara o caminho anterior (check + limpeza recursiva + json indentado) com o atual"""
+    payload = build_sample_payload(target_mb)
+    dirty = _add_unserializable(payload)
+    results: Dict[str, float] = {}
+
+    legacy_json = _timed('anterior: json.dumps(indent=2) payload serializável',
+                         lambda: json.dumps(payload, ensure_ascii=False, indent=2), results)
+    _timed('atual: dumps() payload serializável', lambda: dumps(payload), results)
+
+    def _legacy_dirty():
+        try:
+            json.dumps(dirty)
+        except (TypeError, ValueError):
+            pass
+        return json.dumps(_legacy_clean(dirty), ensure_ascii=False, indent=2)
+
+    _timed('anterior: make_serializable + json indentado (com objetos/ciclo)', _legacy_dirty, results)
+    _timed('atual: dumps() (com objetos/ciclo)', lambda: dumps(dirty), results)
+    _timed('anterior: _clean_for_serialization', lambda: _legacy_clean(dirty), results)
+    _timed('atual: to_serializable', lambda: to_serializable(dirty), results)
+
+    results['tamanho indentado (MB)'] = len(legacy_json.encode('utf-8')) / 1024 / 1024
+    results['tamanho compacto (MB)'] = len(dumps(payload)) / 1024 / 1024
+    return results
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'bench':
+        print("Uso: python -m utils.json_serializer bench [MB]")
+        sys.exit(1)
+    size_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 50.0
+    print(f"Backend: {'orjson' if HAS_ORJSON else 'json (stdlib)'} - payload de ~{size_mb:.0f} MB")
+    for label, value in run_benchmark(size_mb).items():
+        unit = '' if 'MB' in label else 's'
+        print(f"{label:<70} {value:8.2f}{unit}")